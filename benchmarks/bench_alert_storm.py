@@ -0,0 +1,140 @@
+"""
+Volume de escrita em `alerts` durante uma tempestade de lubrication_failure: uma linha (com
+full_payload) por disparo, como antes, vs. AlertCoalescer (um incidente por dispositivo e tipo de
+alerta, atualizado a cada disparo).
+
+--devices bombas (ComprehensiveSensorSimulator, leitura a cada --sample-seconds, N1 da borda
+marcando os alertas) rodam --minutes minutos; entre o primeiro e o último terço a falha de
+lubrificação passa de 1% para --storm-rate das leituras, o que também degrada a saúde e deixa as
+bombas quentes até o fim. As mensagens passam por `process_messages` (N2 incluído, com um detector
+novo em cada modo) e por um BatchWriter gravando em tabelas temporárias que sombreiam as reais.
+
+Mede, em cada modo: linhas inseridas e atualizadas em `alerts`, bytes de JSONB gravados, tamanho
+final da tabela (com as versões mortas dos UPDATEs) e o tempo total dos flushes.
+
+Requer um TimescaleDB/PostgreSQL acessível pelas variáveis DB_* com o schema do projeto.
+
+Uso: python -m benchmarks.bench_alert_storm --devices 20 --minutes 90
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from cronos_ai.central_cloud.api.services import sqs_consumer_service as service
+from cronos_ai.central_cloud.data_pipeline.incidents import AlertCoalescer
+from cronos_ai.central_cloud.data_pipeline.ingestion import BatchWriter
+from cronos_ai.edge.rules import RuleEngine
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.shared.database import connect
+
+TABLES = ("sensor_data", "alerts", "rul_predictions", "sensor_summaries")
+
+def create_temp_tables(conn):
+    # Tabelas temporárias têm precedência no search_path, então o BatchWriter grava nelas sem alteração.
+    with conn.cursor() as cur:
+        for table in TABLES:
+            cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (LIKE public.{table} INCLUDING ALL);")
+        cur.execute(f"TRUNCATE {', '.join(TABLES)};")
+    conn.commit()
+
+def make_messages(devices, minutes, sample_seconds, storm_rate, seed):
+    """Lista de passos; cada passo tem uma mensagem (leitura no formato legado) por dispositivo."""
+    random.seed(seed)
+    np.random.seed(seed)
+    steps = int(minutes * 60 / sample_seconds)
+    storm = range(steps // 3, 2 * steps // 3)
+    rate = [0.01]
+    simulators = []
+    for d in range(devices):
+        simulator = ComprehensiveSensorSimulator(device_id=f"bench-storm-{d:03d}")
+        simulator._trigger_anomaly = lambda: "lubrication_failure" if random.random() < rate[0] else None
+        simulators.append((simulator, RuleEngine()))
+    start = datetime(2025, 8, 10, tzinfo=timezone.utc)
+    messages = []
+    for step in range(steps):
+        rate[0] = storm_rate if step in storm else 0.01
+        at = (start + timedelta(seconds=step * sample_seconds)).isoformat()
+        batch = []
+        for d, (simulator, engine) in enumerate(simulators):
+            reading = simulator.generate_data()
+            alerts = engine.evaluate([reading])[0]
+            if alerts:
+                reading["alerts"] = alerts
+            reading["time"] = at
+            batch.append({"MessageId": f"{step}-{d}", "ReceiptHandle": f"{step}-{d}", "Body": json.dumps(reading)})
+        messages.append(batch)
+    return messages
+
+def replay(conn, messages, coalescer):
+    create_temp_tables(conn)
+    service.anomaly_detector_n2 = service.AnomalyDetectorN2()
+    writer = BatchWriter(conn, max_rows=500, max_latency=3600, coalescer=coalescer)
+    flush_seconds = 0.0
+    for batch in messages:
+        service.process_messages(batch, writer)
+        if writer.should_flush():
+            start = time.perf_counter()
+            writer.flush()
+            flush_seconds += time.perf_counter() - start
+    start = time.perf_counter()
+    writer.flush()
+    flush_seconds += time.perf_counter() - start
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT count(*), COALESCE(sum(occurrences), 0), count(*) FILTER (WHERE closed_at IS NULL),
+                   COALESCE(sum(pg_column_size(full_payload)), 0) + COALESCE(sum(pg_column_size(close_payload)), 0),
+                   pg_total_relation_size('alerts')
+            FROM alerts;
+        """)
+        rows, firings, still_open, payload_bytes, table_bytes = cur.fetchone()
+    conn.commit()
+    result = {
+        "rows_inserted": rows,
+        "rows_updated": coalescer.stats["updated"] if coalescer else 0,
+        "payload_bytes": int(payload_bytes),
+        "table_bytes": int(table_bytes),
+        "flush_seconds": round(flush_seconds, 3),
+    }
+    if coalescer:
+        result.update({"firings_recorded": int(firings), "incidents_closed": coalescer.stats["closed"], "incidents_open": still_open})
+    return result
+
+def run(devices=20, minutes=90.0, sample_seconds=5.0, storm_rate=0.3, quiet_seconds=300.0, seed=7):
+    # O simulador anuncia cada anomalia no stdout; o JSON fica sozinho na saída.
+    with contextlib.redirect_stdout(sys.stderr):
+        messages = make_messages(devices, minutes, sample_seconds, storm_rate, seed)
+    conn = connect()
+    try:
+        legacy = replay(conn, messages, None)
+        coalesced = replay(conn, messages, AlertCoalescer(quiet_seconds))
+    finally:
+        conn.close()
+    readings = sum(len(batch) for batch in messages)
+    return {
+        "devices": devices, "readings": readings, "storm_rate": storm_rate, "quiet_seconds": quiet_seconds,
+        "firings": legacy["rows_inserted"],
+        "per_firing": legacy,
+        "coalesced": coalesced,
+        "reduction": {
+            "rows_inserted": round(legacy["rows_inserted"] / max(coalesced["rows_inserted"], 1), 1),
+            "rows_written": round(legacy["rows_inserted"] / max(coalesced["rows_inserted"] + coalesced["rows_updated"], 1), 1),
+            "payload_bytes": round(legacy["payload_bytes"] / max(coalesced["payload_bytes"], 1), 1),
+            "table_bytes": round(legacy["table_bytes"] / max(coalesced["table_bytes"], 1), 1),
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--minutes", type=float, default=90.0)
+    parser.add_argument("--sample-seconds", type=float, default=5.0)
+    parser.add_argument("--storm-rate", type=float, default=0.3, help="Fração das leituras com falha de lubrificação na tempestade.")
+    parser.add_argument("--quiet-seconds", type=float, default=300.0, help="ALERT_INCIDENT_QUIET_SECONDS do consumidor.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.devices, args.minutes, args.sample_seconds, args.storm_rate, args.quiet_seconds), indent=2))
@@ -0,0 +1,112 @@
+"""
+Benchmark da API de alertas: latência (p50/p99) de cada combinação de filtros, primeira página e
+uma página profunda via cursor, com e sem full_payload.
+
+Com --seed, insere antes --rows alertas sintéticos (gerados no próprio servidor com
+generate_series) distribuídos por --devices dispositivos ao longo de um ano, e cria os índices.
+
+Uso: python -m benchmarks.bench_alerts --rows 10000000 --seed
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from cronos_ai.central_cloud.api.services.alert_queries import create_alert_indexes, encode_cursor, plan_alerts_query
+from cronos_ai.shared.database import connect
+
+ALERT_TYPES = ("HighTemperatureN2", "HighVibrationAxialN2", "LowHealthFactorN2", "HighTemperature")
+STATUSES = ("pending", "confirmed_true", "confirmed_false")
+
+SCENARIOS = (
+    ("latest", {}),
+    ("device", {"device_id": "bench-alerts-0042"}),
+    ("status_pending", {"status": "pending"}),
+    ("status_false_last_hour", {"status": "confirmed_false", "window_hours": 1}),
+    ("type", {"alert_type": "LowHealthFactorN2"}),
+    ("device_type_last_week", {"device_id": "bench-alerts-0042", "alert_type": "HighTemperatureN2", "window_hours": 168}),
+)
+
+def seed(conn, rows, devices):
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO alerts (time, device_id, alert_type, alert_value, full_payload, status)
+            SELECT NOW() - (i * (INTERVAL '365 days' / %(rows)s)),
+                   'bench-alerts-' || lpad((i %% %(devices)s)::text, 4, '0'),
+                   (%(types)s::text[])[1 + (i %% 7) %% %(n_types)s],
+                   random() * 100,
+                   jsonb_build_object('device_id', 'bench-alerts-' || (i %% %(devices)s), 'temperature_c', random() * 100),
+                   (%(statuses)s::text[])[1 + (i %% 11) %% %(n_statuses)s]
+            FROM generate_series(1, %(rows)s) AS i;
+        """, {"rows": rows, "devices": devices, "types": list(ALERT_TYPES), "n_types": len(ALERT_TYPES),
+              "statuses": list(STATUSES), "n_statuses": len(STATUSES)})
+    conn.commit()
+    create_alert_indexes(conn)
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE alerts;")
+    conn.commit()
+
+def time_query(conn, sql, params, repeat):
+    samples = []
+    with conn.cursor() as cur:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+    conn.rollback()
+    samples.sort()
+    return {
+        "rows": len(rows),
+        "ms_p50": round(statistics.median(samples), 2),
+        "ms_p99": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+    }
+
+def deep_cursor(conn, filters, pages):
+    """Cursor da página `pages`, obtido percorrendo as páginas como um cliente faria."""
+    cursor = None
+    with conn.cursor() as cur:
+        for _ in range(pages):
+            sql, params = plan_alerts_query(**filters, cursor=cursor, limit=100)
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            if len(rows) < 100:
+                break
+            cursor = encode_cursor({"time": rows[-1][1], "id": rows[-1][0]})
+    conn.rollback()
+    return cursor
+
+def run(rows=10_000_000, devices=1000, do_seed=False, repeat=50, deep_pages=50):
+    conn = connect()
+    try:
+        if do_seed:
+            seed(conn, rows, devices)
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*), NOW() FROM alerts;")
+            total, now = cur.fetchone()
+        conn.rollback()
+        results = {"alerts": total}
+        for name, scenario in SCENARIOS:
+            filters = {k: v for k, v in scenario.items() if k != "window_hours"}
+            if "window_hours" in scenario:
+                filters["start_time"] = now - timedelta(hours=scenario["window_hours"])
+            cursor = deep_cursor(conn, filters, deep_pages)
+            results[name] = {
+                "first_page": time_query(conn, *plan_alerts_query(**filters, limit=100), repeat),
+                "first_page_with_payload": time_query(conn, *plan_alerts_query(**filters, limit=100, include_payload=True), repeat),
+                f"page_{deep_pages}": time_query(conn, *plan_alerts_query(**filters, cursor=cursor, limit=100), repeat) if cursor else None,
+            }
+    finally:
+        conn.close()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--deep-pages", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.devices, args.seed, args.repeat, args.deep_pages), indent=2))
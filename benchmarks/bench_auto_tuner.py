@@ -0,0 +1,111 @@
+"""
+Duração de um ciclo do auto-tuner com --devices dispositivos recebendo feedback.
+
+Grava em tabelas temporárias da conexão (alerts, device_configs e auto_tuner_state, com os
+índices das reais) --false-positives falsos positivos por dispositivo, espalhados pelos canais
+do N2, e mede:
+- cycle: o ciclo incremental (`tune_once`: uma instrução para todos os dispositivos + NOTIFY);
+- idle_cycle: um ciclo logo depois, sem feedback novo (custo de rodar com cadência curta);
+- legacy: o laço antigo (SELECT + UPSERT por dispositivo) em --legacy-sample dispositivos,
+  extrapolado para --devices.
+
+O NOTIFY vai para um canal de benchmark, então nenhum detector em execução é afetado.
+
+Uso: python -m benchmarks.bench_auto_tuner --devices 100000 --false-positives 5
+"""
+import argparse
+import json
+import time
+
+from psycopg2.extras import RealDictCursor
+
+from cronos_ai.central_cloud.api.services import auto_tuner
+from cronos_ai.shared.database import connect
+
+BENCH_CHANNEL = "cronos_bench_configs"
+
+def create_temp_tables(conn):
+    with conn.cursor() as cur:
+        for table in ("alerts", "device_configs", "auto_tuner_state"):
+            cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (LIKE public.{table} INCLUDING ALL);")
+        cur.execute("TRUNCATE alerts, device_configs, auto_tuner_state;")
+    conn.commit()
+
+def seed(conn, devices, false_positives):
+    types, _ = auto_tuner.channel_map()
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO device_configs (device_id, temp_std_dev_multiplier)
+            SELECT 'bench-tuner-' || lpad(d::text, 6, '0'), 3.0 FROM generate_series(0, %(devices)s - 1) AS d;
+        """, {"devices": devices})
+        cur.execute("""
+            INSERT INTO alerts (time, device_id, alert_type, alert_value, status, feedback_at)
+            SELECT NOW() - INTERVAL '1 hour', 'bench-tuner-' || lpad(d::text, 6, '0'),
+                   (%(types)s::text[])[1 + (d + k) %% %(n_types)s], random() * 100,
+                   'confirmed_false', NOW() - INTERVAL '1 minute'
+            FROM generate_series(0, %(devices)s - 1) AS d, generate_series(1, %(fps)s) AS k;
+        """, {"devices": devices, "fps": false_positives, "types": types, "n_types": len(types)})
+        cur.execute("ANALYZE alerts; ANALYZE device_configs;")
+    conn.commit()
+
+def legacy_cycle(conn, sample):
+    """O ciclo antigo: GROUP BY da última hora e SELECT + UPSERT por dispositivo (limitado a `sample`)."""
+    start = time.perf_counter()
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT device_id, COUNT(*) as false_positives FROM alerts
+            WHERE status = 'confirmed_false' AND time > NOW() - INTERVAL '2 hours'
+            GROUP BY device_id HAVING COUNT(*) >= 1 LIMIT %s;
+        """, (sample,))
+        devices = cur.fetchall()
+        for device in devices:
+            cur.execute("SELECT temp_std_dev_multiplier FROM device_configs WHERE device_id = %s;", (device['device_id'],))
+            current = (cur.fetchone() or {}).get('temp_std_dev_multiplier', 3.0)
+            cur.execute(
+                "INSERT INTO device_configs (device_id, temp_std_dev_multiplier) VALUES (%s, %s) ON CONFLICT (device_id) DO UPDATE SET temp_std_dev_multiplier = EXCLUDED.temp_std_dev_multiplier, last_updated = NOW();",
+                (device['device_id'], current * 1.1))
+    conn.rollback()
+    return time.perf_counter() - start, len(devices)
+
+def run(devices=100_000, false_positives=5, legacy_sample=5000):
+    conn = connect()
+    try:
+        create_temp_tables(conn)
+        start = time.perf_counter()
+        seed(conn, devices, false_positives)
+        seed_seconds = time.perf_counter() - start
+
+        auto_tuner.AUTO_TUNER_SETTLE_SECONDS = 0
+        pending = auto_tuner.pending_feedback(conn)
+        start = time.perf_counter()
+        rows = auto_tuner.tune_once(conn, bus=None, channel=BENCH_CHANNEL)
+        cycle_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        idle_rows = auto_tuner.tune_once(conn, bus=None, channel=BENCH_CHANNEL)
+        idle_seconds = time.perf_counter() - start
+
+        legacy_seconds, legacy_devices = legacy_cycle(conn, legacy_sample)
+        legacy_estimate = legacy_seconds / max(legacy_devices, 1) * devices
+        return {
+            "devices": devices,
+            "false_positives": pending,
+            "seed_seconds": round(seed_seconds, 2),
+            "cycle": {"seconds": round(cycle_seconds, 3), "devices_tuned": len(rows)},
+            "idle_cycle": {"seconds": round(idle_seconds, 4), "devices_tuned": len(idle_rows)},
+            "legacy": {
+                "sample_devices": legacy_devices,
+                "sample_seconds": round(legacy_seconds, 3),
+                "estimated_seconds": round(legacy_estimate, 1),
+            },
+            "speedup_vs_legacy": round(legacy_estimate / cycle_seconds, 1) if cycle_seconds else None,
+        }
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=100_000)
+    parser.add_argument("--false-positives", type=int, default=5, help="Falsos positivos por dispositivo.")
+    parser.add_argument("--legacy-sample", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.devices, args.false_positives, args.legacy_sample), indent=2))
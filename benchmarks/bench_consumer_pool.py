@@ -0,0 +1,64 @@
+"""
+Benchmark de escalabilidade do ConsumerEngine: mensagens/s drenadas de um SQS em memória
+com 1, 2, 4 e 8 workers em modo processo.
+
+Cada worker grava em tabelas temporárias da própria sessão no TimescaleDB/PostgreSQL
+apontado pelas variáveis DB_*, então os dados reais não são alterados.
+
+Uso: python -m benchmarks.bench_consumer_pool --messages 20000 --devices 500 --workers 1 2 4 8
+"""
+import argparse
+import json
+import time
+
+import psycopg2
+
+from benchmarks.bench_ingestion import create_temp_tables
+from benchmarks.local_stack import InMemorySQS
+from cronos_ai.shared.database import DB_HOST, DB_NAME, DB_USER, DB_PASS
+from cronos_ai.central_cloud.data_pipeline.consumer import ConsumerEngine
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+
+def connect_with_temp_tables():
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+    create_temp_tables(conn)
+    return conn
+
+def fill_queue(sqs, messages, devices):
+    simulators = [ComprehensiveSensorSimulator(device_id=f"bench-{i:04d}") for i in range(devices)]
+    for i in range(messages):
+        sqs.send_message("memory://bench", json.dumps(simulators[i % devices].generate_data()))
+
+def run_once(messages, devices, workers, pollers, mode):
+    sqs = InMemorySQS()
+    fill_queue(sqs, messages, devices)
+    engine = ConsumerEngine(sqs, "memory://bench", pollers=pollers, workers=workers, mode=mode,
+                            connect=connect_with_temp_tables, max_latency=0.5)
+    start = time.perf_counter()
+    engine.start()
+    while sqs.deleted < messages:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    engine.stop()
+    return messages / elapsed
+
+def run(messages=20000, devices=500, workers=(1, 2, 4, 8), pollers=4, mode="process"):
+    results = {n: round(run_once(messages, devices, n, pollers, mode), 1) for n in workers}
+    baseline = results[workers[0]]
+    return {
+        "messages": messages,
+        "devices": devices,
+        "mode": mode,
+        "messages_per_sec": results,
+        "scaling_efficiency": {n: round(rate / (baseline * n / workers[0]), 2) for n, rate in results.items()},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--pollers", type=int, default=4)
+    parser.add_argument("--mode", choices=("thread", "process"), default="process")
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.devices, tuple(args.workers), args.pollers, args.mode), indent=2))
@@ -0,0 +1,126 @@
+"""
+Redução do uplink com o estágio de features da borda: bytes, mensagens SQS e linhas gravadas na
+nuvem por dispositivo-hora enviando toda leitura bruta (comportamento anterior) vs. SignalReducer
+(resumos por bloco + leituras brutas só em alertas e mudanças além da zona morta).
+
+Cada dispositivo é um ComprehensiveSensorSimulator (com as anomalias súbitas dele) amostrado a cada
+--sample-seconds, com o detector N1 da borda marcando os alertas, por --hours horas simuladas; o
+uplink usa os mesmos parâmetros de lote do edge_device_main, com o relógio simulado. As linhas na
+nuvem são as leituras (sensor_data) e os resumos (sensor_summaries) que o consumidor decodifica das
+mensagens. Também confere que toda leitura com alerta chega à nuvem e mede o custo do estágio por leitura.
+
+Na borda o estágio é opcional (EDGE_FEATURES=1); o modo "raw" é o padrão do edge_device_main.
+
+Uso: python -m benchmarks.bench_edge_reduction --devices 5 --hours 24
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from benchmarks.local_stack import InMemorySQS
+from cronos_ai.edge.features import SignalReducer
+from cronos_ai.edge.rules import RuleEngine
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.edge.uplink import Uplink
+from cronos_ai.shared.uplink_codec import decode_message
+
+def make_readings(device_id, n, sample_seconds):
+    simulator = ComprehensiveSensorSimulator(device_id=device_id)
+    engine = RuleEngine()
+    start = datetime(2025, 8, 10, tzinfo=timezone.utc)
+    readings = []
+    for i in range(n):
+        reading = simulator.generate_data()
+        alerts = engine.evaluate([reading])[0]
+        if alerts:
+            reading["alerts"] = alerts
+        reading["time"] = start + timedelta(seconds=i * sample_seconds)
+        readings.append(reading)
+    return readings
+
+def send(readings, device_id, sample_seconds, max_latency, reducer=None):
+    """Passa as leituras pelo uplink (e pelo reducer, se houver); devolve estatísticas e o que a nuvem recebe."""
+    sqs = InMemorySQS()
+    clock = [0.0]
+    uplink = Uplink(sqs, "memory://q", device_id, max_latency=max_latency, clock=lambda: clock[0])
+    elapsed = 0.0
+    for i, reading in enumerate(readings):
+        clock[0] = i * sample_seconds
+        if reducer is None:
+            uplink.add(reading)
+        else:
+            start = time.perf_counter()
+            raw, summary = reducer.add(reading)
+            elapsed += time.perf_counter() - start
+            for r in raw:
+                uplink.add(r)
+            if summary:
+                uplink.add_summary(summary)
+        uplink.flush_if_due()
+    if reducer is not None:
+        summary = reducer.flush()
+        if summary:
+            uplink.add_summary(summary)
+    uplink.flush()
+    rows = summaries = alerts = 0
+    for message in sqs.receive_message("memory://q", MaxNumberOfMessages=10 ** 9)["Messages"]:
+        decoded, block_summaries = decode_message(message["Body"])
+        rows += len(decoded)
+        summaries += len(block_summaries)
+        alerts += sum(1 for r in decoded if r.get("alerts"))
+    return uplink.stats, rows, summaries, alerts, elapsed
+
+def run(devices=5, hours=24.0, sample_seconds=5.0, max_latency=5.0, seed=11):
+    random.seed(seed)
+    np.random.seed(seed)
+    n = int(hours * 3600 / sample_seconds)
+    device_hours = devices * hours
+    totals = {mode: {"bytes": 0, "messages": 0, "requests": 0, "raw_rows": 0, "summary_rows": 0, "alert_readings": 0}
+              for mode in ("raw", "features")}
+    generated_alerts = 0
+    stage_seconds = 0.0
+    for d in range(devices):
+        device_id = f"bench-reduction-{d:03d}"
+        readings = make_readings(device_id, n, sample_seconds)
+        generated_alerts += sum(1 for r in readings if r.get("alerts"))
+        for mode in totals:
+            reducer = SignalReducer() if mode == "features" else None
+            stats, rows, summaries, alerts, elapsed = send(readings, device_id, sample_seconds, max_latency, reducer)
+            stage_seconds += elapsed
+            for key in ("bytes", "messages", "requests"):
+                totals[mode][key] += stats[key]
+            totals[mode]["raw_rows"] += rows
+            totals[mode]["summary_rows"] += summaries
+            totals[mode]["alert_readings"] += alerts
+
+    results = {"devices": devices, "hours": hours, "sample_seconds": sample_seconds, "readings_per_device_hour": round(n / hours),
+               "alert_readings_generated": generated_alerts}
+    for mode, total in totals.items():
+        results[mode] = {
+            "uplink_bytes_per_device_hour": round(total["bytes"] / device_hours),
+            "messages_per_device_hour": round(total["messages"] / device_hours, 1),
+            "cloud_rows_per_device_hour": round((total["raw_rows"] + total["summary_rows"]) / device_hours, 1),
+            "raw_rows_per_device_hour": round(total["raw_rows"] / device_hours, 1),
+            "summary_rows_per_device_hour": round(total["summary_rows"] / device_hours, 1),
+            "alert_readings_delivered": total["alert_readings"],
+        }
+    results["reduction"] = {
+        "uplink_bytes": round(results["raw"]["uplink_bytes_per_device_hour"] / results["features"]["uplink_bytes_per_device_hour"], 1),
+        "messages": round(results["raw"]["messages_per_device_hour"] / results["features"]["messages_per_device_hour"], 1),
+        "cloud_rows": round(results["raw"]["cloud_rows_per_device_hour"] / results["features"]["cloud_rows_per_device_hour"], 1),
+    }
+    results["stage_us_per_reading"] = round(stage_seconds / (n * devices) * 1e6, 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=5)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--sample-seconds", type=float, default=5.0)
+    parser.add_argument("--max-latency", type=float, default=5.0, help="UPLINK_MAX_LATENCY do edge_device_main.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.devices, args.hours, args.sample_seconds, args.max_latency), indent=2))
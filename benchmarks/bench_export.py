@@ -0,0 +1,94 @@
+"""
+Benchmark da exportação em streaming: vazão (linhas/s, MB/s) e memória de pico por formato.
+
+A memória é medida pelo pico de RSS do processo (ru_maxrss) antes e depois de consumir todo o
+gerador, então um crescimento proporcional ao número de linhas indica materialização indevida.
+
+Com --seed, insere antes --rows leituras sintéticas (1 por segundo) para --device em blocos via
+COPY; sem ele, usa os dados já existentes no banco apontado por DB_*.
+
+Uso: python -m benchmarks.bench_export --device bench-export-01 --rows 10000000 --seed
+"""
+import argparse
+import io
+import json
+import resource
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from cronos_ai.central_cloud.api.services.export_service import EXPORT_FORMATS, make_encoder, stream_sensor_data
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+from cronos_ai.shared.database import connect
+
+SEED_BLOCK = 200_000
+
+def seed(conn, device_id, rows):
+    rng = np.random.default_rng(0)
+    start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=rows)
+    for offset in range(0, rows, SEED_BLOCK):
+        n = min(SEED_BLOCK, rows - offset)
+        values = rng.normal(50, 5, size=(n, len(SENSOR_CHANNELS)))
+        buf = io.StringIO()
+        for i, row in enumerate(values):
+            t = start + timedelta(seconds=offset + i)
+            buf.write(f"{t.isoformat()},{device_id}," + ",".join(f"{v:.3f}" if c != "rpm" else str(int(v)) for c, v in zip(SENSOR_CHANNELS, row)) + "\n")
+        buf.seek(0)
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY sensor_data (time, device_id, {', '.join(SENSOR_CHANNELS)}) FROM STDIN WITH (FORMAT csv);", buf)
+        conn.commit()
+
+def _max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def export(device_id, fmt, chunk_rows):
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    total_bytes = 0
+    chunks = 0
+    for chunk in stream_sensor_data(device_id, fmt=fmt, chunk_rows=chunk_rows):
+        total_bytes += len(chunk)
+        chunks += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 2),
+        "chunks": chunks,
+        "megabytes": round(total_bytes / 1e6, 1),
+        "megabytes_per_second": round(total_bytes / 1e6 / elapsed, 1),
+        "max_rss_mb_before": round(rss_before, 1),
+        "max_rss_mb_after": round(_max_rss_mb(), 1),
+    }
+
+def run(device_id, rows=10_000_000, do_seed=False, formats=tuple(EXPORT_FORMATS), chunk_rows=5000):
+    conn = connect()
+    try:
+        if do_seed:
+            seed(conn, device_id, rows)
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM sensor_data WHERE device_id = %s;", (device_id,))
+            total_rows = cur.fetchone()[0]
+        conn.rollback()
+    finally:
+        conn.close()
+    results = {"device_id": device_id, "rows": total_rows, "chunk_rows": chunk_rows}
+    for fmt in formats:
+        try:
+            make_encoder(fmt)
+        except ValueError as e:
+            results[fmt] = {"skipped": str(e)}
+            continue
+        result = export(device_id, fmt, chunk_rows)
+        result["rows_per_second"] = round(total_rows / result["seconds"]) if result["seconds"] else None
+        results[fmt] = result
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device", default="bench-export-01")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=list(EXPORT_FORMATS))
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.device, args.rows, args.seed, tuple(args.formats), args.chunk_rows), indent=2))
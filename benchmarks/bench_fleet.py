@@ -0,0 +1,149 @@
+"""
+Visão geral da frota: GET /api/v1/sensordata/fleet servido do LastValueCache vs. as consultas
+que respondem a mesma pergunta no banco.
+
+- memory: --devices bombas (FleetSimulator) no cache, como o consumidor embutido deixa; mede a
+  latência da rota inteira (roteamento e serialização JSON), chamada pela interface ASGI sem
+  rede, sem alterações entre as requisições e com um flush de 500 leituras antes de cada uma
+  (só essas bombas são codificadas de novo), e o custo de `update` por flush no consumidor.
+- database (com --db): --readings-per-device leituras por bomba em tabelas temporárias que
+  sombreiam sensor_data e alerts; mede a carga do cache depois de um restart (uma consulta
+  DISTINCT ON), o "latest" por dispositivo com uma consulta por bomba (como era preciso antes) e
+  a consulta da rota /latest (10 linhas quaisquer da tabela).
+
+Uso: python -m benchmarks.bench_fleet --devices 10000 --db
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI
+
+from benchmarks.bench_serialization import _call
+from benchmarks.report import latency_summary
+from cronos_ai.central_cloud.api.endpoints import sensor_data
+from cronos_ai.central_cloud.api.services.fleet_cache import LastValueCache, fetch_fleet, fleet_cache
+from cronos_ai.central_cloud.data_pipeline.ingestion import SENSOR_COLUMNS
+from cronos_ai.edge.simulators import FleetSimulator
+from cronos_ai.shared.database import connect
+
+FLEET_PATH = "/api/v1/sensordata/fleet"
+
+def make_rows(devices, readings_per_device, seed=5):
+    """Leituras em tuplas na ordem de SENSOR_COLUMNS, uma rodada da frota por minuto."""
+    simulator = FleetSimulator(n_devices=devices, device_prefix="bench-fleet", seed=seed)
+    start = datetime.now(timezone.utc) - timedelta(minutes=readings_per_device)
+    rows = []
+    for step in range(readings_per_device):
+        at = start + timedelta(minutes=step)
+        rows.extend((at,) + tuple(r[c] for c in SENSOR_COLUMNS[1:]) for r in simulator.records(simulator.step()))
+    return rows
+
+def bench_memory(devices, requests):
+    rows = make_rows(devices, 3)
+    latest = rows[devices:2 * devices]
+    open_alerts = {row[1]: i % 3 for i, row in enumerate(latest)}
+
+    # Custo do consumidor: um update por flush de 500 leituras.
+    cache = LastValueCache()
+    start = time.process_time()
+    for i in range(0, len(rows), 500):
+        cache.update(rows[i:i + 500], {row[1]: 0 for row in rows[i:i + 500]})
+    update_us = (time.process_time() - start) / (len(rows) / 500) * 1e6
+
+    fleet_cache.update(latest, open_alerts)
+    fleet_cache.load([])
+    app = FastAPI()
+    app.include_router(sensor_data.router, prefix="/api/v1/sensordata")
+    loop = asyncio.new_event_loop()
+    try:
+        body = loop.run_until_complete(_call(app, FLEET_PATH))
+        assert len(json.loads(body)) == devices
+        samples, after_flush = [], []
+        newer = rows[2 * devices:]
+        for i in range(requests):
+            start = time.perf_counter()
+            loop.run_until_complete(_call(app, FLEET_PATH))
+            samples.append((time.perf_counter() - start) * 1e3)
+            flush = newer[(i * 500) % devices:][:500]
+            fleet_cache.update(flush, {row[1]: 1 for row in flush})
+            start = time.perf_counter()
+            loop.run_until_complete(_call(app, FLEET_PATH))
+            after_flush.append((time.perf_counter() - start) * 1e3)
+    finally:
+        loop.close()
+    return {"devices": devices, "response_bytes": len(body), "update_us_per_flush": round(update_us, 1),
+            "fleet": latency_summary(samples), "fleet_after_flush": latency_summary(after_flush)}
+
+def _timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return result, latency_summary(samples)
+
+def bench_database(devices, readings_per_device, repeat):
+    conn = connect(retries=1)
+    if conn is None:
+        raise RuntimeError("Banco indisponível nas variáveis DB_*.")
+    try:
+        with conn.cursor() as cur:
+            # Tabelas temporárias têm precedência no search_path sobre as reais.
+            for table in ("sensor_data", "alerts"):
+                cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (LIKE public.{table} INCLUDING ALL);")
+            cur.execute("TRUNCATE sensor_data, alerts;")
+            buf = io.StringIO()
+            csv.writer(buf).writerows(make_rows(devices, readings_per_device))
+            buf.seek(0)
+            cur.copy_expert(f"COPY sensor_data ({', '.join(SENSOR_COLUMNS)}) FROM STDIN WITH (FORMAT csv);", buf)
+            cur.execute("CREATE INDEX IF NOT EXISTS bench_fleet_device_time_idx ON sensor_data (device_id, time DESC);")
+            cur.execute("ANALYZE sensor_data;")
+            cur.execute("SELECT DISTINCT device_id FROM sensor_data;")
+            device_ids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+        def per_device():
+            with conn.cursor() as cur:
+                for device_id in device_ids:
+                    cur.execute("SELECT * FROM sensor_data WHERE device_id = %s ORDER BY time DESC LIMIT 1;", (device_id,))
+                    cur.fetchone()
+
+        def latest_route():
+            with conn.cursor() as cur:
+                cur.execute("SELECT * FROM sensor_data ORDER BY time DESC LIMIT 10;")
+                return cur.fetchall()
+
+        rows, distinct_on = _timed(lambda: fetch_fleet(conn), repeat)
+        assert len(rows) == devices
+        _, one_query_per_device = _timed(per_device, max(1, repeat // 5))
+        _, latest = _timed(latest_route, repeat)
+        conn.rollback()
+    finally:
+        conn.close()
+    return {
+        "devices": devices, "rows": devices * readings_per_device,
+        "restart_load_distinct_on": distinct_on,
+        "one_query_per_device": one_query_per_device,
+        "latest_route_query": latest,
+    }
+
+def run(devices=10000, requests=50, db=False, readings_per_device=30, repeat=10):
+    results = {"memory": bench_memory(devices, requests)}
+    if db:
+        results["database"] = bench_database(devices, readings_per_device, repeat)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--db", action="store_true", help="Mede também a carga do banco e as consultas equivalentes (variáveis DB_*).")
+    parser.add_argument("--readings-per-device", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.devices, args.requests, args.db, args.readings_per_device, args.repeat), indent=2))
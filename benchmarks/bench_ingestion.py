@@ -0,0 +1,86 @@
+"""
+Benchmark de ingestão: INSERT por linha (caminho antigo do consumidor) vs. BatchWriter (COPY em lote).
+
+Requer um TimescaleDB/PostgreSQL acessível pelas variáveis DB_*. As tabelas usadas são
+temporárias e sombreiam `sensor_data`/`alerts` apenas nesta sessão, sem tocar nos dados reais.
+
+Uso: python -m benchmarks.bench_ingestion --rows 20000 --batch 500
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import psycopg2
+
+from cronos_ai.shared.database import DB_HOST, DB_NAME, DB_USER, DB_PASS
+from cronos_ai.central_cloud.data_pipeline.ingestion import BatchWriter
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.shared.data_models import SensorData
+
+ROW_INSERT_SQL = (
+    "INSERT INTO sensor_data (time, device_id, health_factor, rpm, temperature_c, pressure_in_bar, pressure_out_bar, "
+    "vibration_axial_mms, vibration_radial_mms, current_a, acoustic_db, humidity_percent) "
+    "VALUES (NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);"
+)
+
+def create_temp_tables(conn):
+    # Tabelas temporárias têm precedência no search_path, então o BatchWriter grava nelas sem alteração.
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS sensor_data (LIKE public.sensor_data INCLUDING DEFAULTS);")
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS alerts (LIKE public.alerts INCLUDING DEFAULTS);")
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS rul_predictions (LIKE public.rul_predictions INCLUDING DEFAULTS);")
+        cur.execute("TRUNCATE sensor_data, alerts, rul_predictions;")
+    conn.commit()
+
+def generate_readings(n, devices=50):
+    simulators = [ComprehensiveSensorSimulator(device_id=f"bench-{i:03d}") for i in range(devices)]
+    return [SensorData(**simulators[i % devices].generate_data()) for i in range(n)]
+
+def bench_row_inserts(conn, readings, messages_per_receive=10):
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for i, sd in enumerate(readings, 1):
+            cur.execute(ROW_INSERT_SQL, (
+                sd.device_id, sd.health_factor, sd.rpm, sd.temperature_c, sd.pressure_in_bar, sd.pressure_out_bar,
+                sd.vibration_axial_mms, sd.vibration_radial_mms, sd.current_a, sd.acoustic_db, sd.humidity_percent,
+            ))
+            if i % messages_per_receive == 0:
+                conn.commit()
+    conn.commit()
+    return time.perf_counter() - start
+
+def bench_batch_writer(conn, readings, batch_size):
+    writer = BatchWriter(conn, max_rows=batch_size, max_latency=3600)
+    start = time.perf_counter()
+    for sd in readings:
+        writer.add(sd, datetime.now(timezone.utc))
+        if writer.should_flush():
+            writer.flush()
+    writer.flush()
+    return time.perf_counter() - start
+
+def run(rows=20000, batch=500):
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+    try:
+        create_temp_tables(conn)
+        readings = generate_readings(rows)
+        row_seconds = bench_row_inserts(conn, readings)
+        create_temp_tables(conn)
+        batch_seconds = bench_batch_writer(conn, readings, batch)
+    finally:
+        conn.close()
+    return {
+        "rows": rows,
+        "batch_size": batch,
+        "row_insert_rows_per_sec": round(rows / row_seconds, 1),
+        "batch_copy_rows_per_sec": round(rows / batch_seconds, 1),
+        "speedup": round(row_seconds / batch_seconds, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.batch), indent=2))
@@ -0,0 +1,103 @@
+"""
+Custo do LCM na borda: tempo por leitura de `LocalModelManager.evaluate` (janela + features +
+modelo + regras) e só da inferência do modelo, e a memória de cada artefato, com pesos float32 e
+int8; depois, o laço de leituras rodando enquanto outra thread troca de versão sem parar, para
+medir o tempo de uma troca e confirmar que nenhuma leitura falha durante as trocas.
+
+O modelo é o de RUL treinado com o simulador (carga reduzida) e as leituras vêm do FleetSimulator,
+tratadas como a série de um dispositivo.
+
+Uso: python -m benchmarks.bench_lcm --readings 50000
+"""
+import argparse
+import contextlib
+import json
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from cronos_ai.central_cloud.ml_engine.rul_inference import train_from_simulator
+from cronos_ai.edge.simulators import FleetSimulator
+from cronos_ai.lcm.local_model_manager import LocalModelManager, export_rul_model, publish
+
+def make_readings(n):
+    simulator = FleetSimulator(n_devices=n, device_prefix="bench-lcm", seed=5)
+    return simulator.records(simulator.step())
+
+def _evaluate_all(manager, readings):
+    latencies = np.empty(len(readings))
+    errors = 0
+    for i, reading in enumerate(readings):
+        start = time.perf_counter()
+        try:
+            manager.evaluate(reading)
+        except Exception:
+            errors += 1
+        latencies[i] = time.perf_counter() - start
+    return latencies, errors
+
+def _summary(latencies):
+    return {"p50_us": round(float(np.percentile(latencies, 50)) * 1e6, 1),
+            "p99_us": round(float(np.percentile(latencies, 99)) * 1e6, 1),
+            "readings_per_second": round(len(latencies) / latencies.sum())}
+
+def run(readings=50000):
+    model = train_from_simulator(devices=500, steps=150)
+    data = make_readings(readings)
+    results = {"readings": readings, "features": len(model.feature_names)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, quantize in (("float32", False), ("int8", True)):
+            model_dir = f"{tmp}/{label}"
+            export_rul_model(model, model_dir, quantize=quantize)
+            manager = LocalModelManager(model_dir)
+            manager.refresh()
+            latencies, _ = _evaluate_all(manager, data)
+            report = manager.report()
+            results[label] = {
+                "evaluate": _summary(latencies),
+                "model_p50_us": report["p50_us"], "model_p99_us": report["p99_us"],
+                "artifact_bytes": report["artifact_bytes"], "weights_bytes": report["weights_bytes"],
+            }
+
+        # Duas versões publicadas alternadamente enquanto o laço principal avalia leituras.
+        model_dir = f"{tmp}/swap"
+        versions = []
+        for i, quantize in enumerate((False, True)):
+            model.version = f"bench-v{i}"
+            export_rul_model(model, model_dir, quantize=quantize)
+            versions.append(model.version)
+        manager = LocalModelManager(model_dir)
+        manager.refresh()
+        stop, swap_seconds = threading.Event(), []
+
+        def swapper():
+            while not stop.is_set():
+                publish(model_dir, versions[len(swap_seconds) % 2])
+                start = time.perf_counter()
+                manager.refresh()
+                swap_seconds.append(time.perf_counter() - start)
+                time.sleep(0.001)
+
+        thread = threading.Thread(target=swapper, daemon=True)
+        thread.start()
+        latencies, errors = _evaluate_all(manager, data)
+        stop.set()
+        thread.join()
+        results["hot_swap"] = {
+            "swaps": len(swap_seconds), "errors": errors, "evaluate": _summary(latencies),
+            "swap_p50_ms": round(float(np.percentile(swap_seconds, 50)) * 1e3, 3),
+            "swap_p99_ms": round(float(np.percentile(swap_seconds, 99)) * 1e3, 3),
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=50000)
+    args = parser.parse_args()
+    # As trocas de versão são registradas pelo LCM; o JSON fica sozinho no stdout.
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args.readings)
+    print(json.dumps(results, indent=2))
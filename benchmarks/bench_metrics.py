@@ -0,0 +1,83 @@
+"""
+Custo da instrumentação Prometheus no hot path do consumidor: tempo de um `metrics.stage()` e de
+um incremento de contador isolados, e o tempo de `process_messages` por lote de mensagens em
+lote (v1), para mostrar a fração do lote gasta com métricas (sem banco: o writer é um stub em memória).
+
+Uso: python -m benchmarks.bench_metrics --batches 2000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from cronos_ai.central_cloud.api.services import sqs_consumer_service
+from cronos_ai.edge.simulators import FleetSimulator
+from cronos_ai.shared import metrics
+from cronos_ai.shared.uplink_codec import encode_readings
+
+# Cada lote do consumidor usa 4 estágios e 5 incrementos de contador em process_messages.
+STAGES_PER_BATCH = 4
+INCREMENTS_PER_BATCH = 5
+
+class NullWriter:
+    def add(self, sd, received_at, alerts=()):
+        pass
+
+    def add_predictions(self, predicted_at, predictions, model_version):
+        pass
+
+    def track_message(self, message):
+        pass
+
+    def dead_letter(self, message, reason):
+        pass
+
+def _per_call_us(function, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        function()
+    return (time.perf_counter() - start) / n * 1e6
+
+def _empty_stage():
+    with metrics.stage("decode"):
+        pass
+
+def make_messages(devices=10, steps=10):
+    """Uma mensagem v1 por dispositivo com `steps` leituras cada, como o SQSSink do gerador de carga."""
+    simulator = FleetSimulator(devices, device_prefix="bench-metrics", seed=0)
+    start = datetime.now(timezone.utc)
+    per_device = {}
+    for i in range(steps):
+        for record in simulator.records(simulator.step()):
+            record["time"] = start + timedelta(seconds=i)
+            per_device.setdefault(record["device_id"], []).append(record)
+    messages = []
+    for device_id, readings in per_device.items():
+        for body in encode_readings(device_id, readings):
+            messages.append({"MessageId": device_id, "ReceiptHandle": device_id, "Body": body})
+    return messages
+
+def run(batches=2000, calls=200000):
+    stage_us = _per_call_us(_empty_stage, calls)
+    inc_us = _per_call_us(metrics.CONSUMER_READINGS.inc, calls)
+    messages = make_messages()
+    writer = NullWriter()
+    start = time.perf_counter()
+    for _ in range(batches):
+        sqs_consumer_service.process_messages(messages, writer)
+    batch_us = (time.perf_counter() - start) / batches * 1e6
+    overhead_us = STAGES_PER_BATCH * stage_us + INCREMENTS_PER_BATCH * inc_us
+    return {
+        "stage_us_per_call": round(stage_us, 3),
+        "counter_inc_us_per_call": round(inc_us, 3),
+        "messages_per_batch": len(messages),
+        "process_messages_us_per_batch": round(batch_us, 1),
+        "metrics_us_per_batch": round(overhead_us, 2),
+        "metrics_fraction_of_batch": round(overhead_us / batch_us, 4),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.batches), indent=2))
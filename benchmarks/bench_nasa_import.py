@@ -0,0 +1,183 @@
+"""
+Tempo e pico de memória do importador do C-MAPSS (scripts/import_nasa_data.py) vs. o importador
+antigo (ZIP interno lido inteiro em memória, pandas + execute_values, só train_FD001, DROP TABLE).
+
+Gera um ZIP aninhado sintético com o mesmo layout e formato do dataset da NASA (FD001–FD004,
+train/test/RUL, mesmo número de unidades; --scale multiplica as unidades) e roda cada importador
+em um subprocesso, medindo a duração e o pico de RSS (os.wait4, inclui os processos de trabalho).
+O Linux mantém no subprocesso o pico de RSS do processo que o criou, então o ZIP também é gerado
+em um subprocesso e este processo não importa o NumPy: o piso das medições é o RSS dele (~20 MB).
+As tabelas ficam em um schema de benchmark (search_path via PGOPTIONS), então os dados reais não
+são alterados.
+
+Execuções:
+- legacy: o importador antigo (train_FD001);
+- streaming_fd001_train: o novo, só train_FD001 e 1 worker (comparação direta com o antigo);
+- streaming_all: o novo com os 12 arquivos e --workers processos;
+- rerun: o novo de novo sobre os mesmos dados (todos os arquivos pulados pelo log).
+
+Uso: python -m benchmarks.bench_nasa_import --scale 1 --workers 4
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import psycopg2
+
+from cronos_ai.shared.database import DB_HOST, DB_NAME, DB_USER, DB_PASS
+
+BENCH_SCHEMA = "cronos_bench_nasa"
+IMPORTER = os.path.join(os.path.dirname(__file__), "..", "scripts", "import_nasa_data.py")
+INNER_ZIP_PATH = "6. Turbofan Engine Degradation Simulation Data Set/CMAPSSData.zip"
+# Unidades de treino e de teste de cada subset no dataset original.
+SUBSET_UNITS = {"FD001": (100, 100), "FD002": (260, 259), "FD003": (100, 100), "FD004": (249, 248)}
+# Formato das colunas nos arquivos originais (unidade, ciclo, 3 ajustes, 21 sensores).
+CMAPSS_FORMAT = ["%d", "%d", "%.4f", "%.4f", "%.1f"] + ["%.2f"] * 21
+
+def cmapss_file(rng, units, test):
+    """Conteúdo de um train_/test_FDxxx.txt: ciclos 1..N de cada unidade, N entre 128 e 362 (truncado no teste)."""
+    import numpy as np
+    blocks = []
+    for unit in range(1, units + 1):
+        length = int(rng.integers(128, 363))
+        if test:
+            length = int(rng.integers(31, length))
+        block = np.empty((length, 26))
+        block[:, 0] = unit
+        block[:, 1] = np.arange(1, length + 1)
+        block[:, 2:5] = rng.normal([0.0, 0.0, 100.0], [0.002, 0.0003, 0.0], (length, 3))
+        block[:, 5:] = rng.normal(500.0, 50.0, (length, 21))
+        blocks.append(block)
+    out = io.BytesIO()
+    # Os arquivos originais terminam cada linha com dois espaços.
+    np.savetxt(out, np.vstack(blocks), fmt=CMAPSS_FORMAT, delimiter=" ", newline="  \n")
+    return out.getvalue()
+
+def build_dataset(path, scale=1, seed=7):
+    """Grava em `path` um ZIP externo com o CMAPSSData.zip dentro; devolve as linhas por arquivo."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    inner, rows = io.BytesIO(), {}
+    with zipfile.ZipFile(inner, "w", zipfile.ZIP_DEFLATED) as z:
+        for subset, (train_units, test_units) in SUBSET_UNITS.items():
+            for split, units in (("train", train_units), ("test", test_units)):
+                data = cmapss_file(rng, units * scale, split == "test")
+                z.writestr(f"{split}_{subset}.txt", data)
+                rows[f"{split}_{subset}.txt"] = data.count(b"\n")
+            z.writestr(f"RUL_{subset}.txt", "".join(f"{r}\n" for r in rng.integers(7, 146, test_units * scale)))
+            rows[f"RUL_{subset}.txt"] = test_units * scale
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(INNER_ZIP_PATH, inner.getvalue())
+    return rows
+
+def legacy_import(zip_path):
+    """O importador antigo, como estava em scripts/import_nasa_data.py (executado no subprocesso)."""
+    import pandas as pd
+    from psycopg2.extras import execute_values
+
+    with zipfile.ZipFile(zip_path, "r") as outer_z:
+        inner_zip_bytes = outer_z.read(INNER_ZIP_PATH)
+        with zipfile.ZipFile(io.BytesIO(inner_zip_bytes), "r") as inner_z:
+            name = next(n for n in inner_z.namelist() if n.endswith("train_FD001.txt"))
+            with inner_z.open(name) as f:
+                df = pd.read_csv(f, sep=" ", header=None)
+    df.drop(columns=[26, 27], inplace=True)
+    df.columns = ["unit_nr", "cycle", "setting1", "setting2", "setting3"] + [f"sensor{i}" for i in range(1, 22)]
+    max_cycles = df.groupby("unit_nr")["cycle"].max().reset_index()
+    max_cycles.columns = ["unit_nr", "max_cycle"]
+    df = pd.merge(df, max_cycles, on="unit_nr")
+    df["RUL"] = df["max_cycle"] - df["cycle"]
+    df.drop(columns=["max_cycle"], inplace=True)
+
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS nasa_turbofan_data;")
+        column_definitions = ", ".join([f"{col} REAL" for col in df.columns if col != "unit_nr"])
+        cur.execute(f"CREATE TABLE nasa_turbofan_data (time TIMESTAMPTZ DEFAULT NOW(), unit_nr INTEGER, {column_definitions});")
+        execute_values(cur, f"INSERT INTO nasa_turbofan_data ({','.join(df.columns)}) VALUES %s",
+                       list(df.itertuples(index=False, name=None)))
+    conn.commit()
+    conn.close()
+
+def reset_schema():
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE; CREATE SCHEMA {BENCH_SCHEMA};")
+    conn.commit()
+    conn.close()
+
+def count_rows(tables):
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+    try:
+        with conn.cursor() as cur:
+            counts = {}
+            for table in tables:
+                cur.execute(f"SELECT count(*) FROM {BENCH_SCHEMA}.{table};")
+                counts[table] = cur.fetchone()[0]
+            return counts
+    finally:
+        conn.close()
+
+def measure(command):
+    """Roda `command` em um subprocesso; devolve duração, pico de RSS (MB) e a última linha da saída."""
+    env = {**os.environ, "DB_HOST": DB_HOST, "DB_NAME": DB_NAME, "DB_USER": DB_USER, "DB_PASS": DB_PASS,
+           "PGOPTIONS": f"-c search_path={BENCH_SCHEMA}"}
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=output, stderr=subprocess.STDOUT, env=env)
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        output.seek(0)
+        lines = output.read().decode(errors="replace").strip().splitlines()
+    if process.returncode:
+        raise RuntimeError(f"{' '.join(command)} saiu com código {process.returncode}: {lines[-5:]}")
+    # ru_maxrss do wait4 é o maior entre o processo e seus filhos já encerrados (KB no Linux).
+    return {"seconds": round(seconds, 2), "peak_rss_mb": round(usage.ru_maxrss / 1024, 1), "output": lines[-1] if lines else ""}
+
+def run(scale=1, workers=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_path = os.path.join(tmp, "cmapss.zip")
+        rows = json.loads(subprocess.run([sys.executable, "-m", "benchmarks.bench_nasa_import", "--build", zip_path,
+                                          "--scale", str(scale)], check=True, capture_output=True).stdout)
+        importer = [sys.executable, IMPORTER, "--zip", zip_path]
+        results = {"scale": scale, "workers": workers, "zip_mb": round(os.path.getsize(zip_path) / 2**20, 1),
+                   "rows": sum(rows.values())}
+
+        reset_schema()
+        results["legacy"] = measure([sys.executable, "-m", "benchmarks.bench_nasa_import", "--legacy", zip_path])
+        results["legacy"]["rows"] = count_rows(["nasa_turbofan_data"])["nasa_turbofan_data"]
+
+        reset_schema()
+        results["streaming_fd001_train"] = measure(importer + ["--subsets", "FD001", "--splits", "train", "--workers", "1"])
+        results["streaming_fd001_train"]["rows"] = count_rows(["nasa_turbofan_data"])["nasa_turbofan_data"]
+
+        reset_schema()
+        results["streaming_all"] = measure(importer + ["--workers", str(workers)])
+        results["streaming_all"]["rows"] = sum(count_rows(["nasa_turbofan_data", "nasa_turbofan_test", "nasa_turbofan_rul"]).values())
+        results["rerun"] = measure(importer + ["--workers", str(workers)])
+        results["rerun"]["rows"] = sum(count_rows(["nasa_turbofan_data", "nasa_turbofan_test", "nasa_turbofan_rul"]).values())
+        reset_schema()
+    for key in ("legacy", "streaming_fd001_train", "streaming_all", "rerun"):
+        results[key]["rows_per_second"] = round(results[key]["rows"] / results[key]["seconds"]) if results[key]["seconds"] else None
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Multiplica o número de unidades de cada subset.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--legacy", metavar="ZIP", help=argparse.SUPPRESS)
+    parser.add_argument("--build", metavar="ZIP", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.legacy:
+        legacy_import(args.legacy)
+    elif args.build:
+        print(json.dumps(build_dataset(args.build, args.scale)))
+    else:
+        print(json.dumps(run(args.scale, args.workers), indent=2))
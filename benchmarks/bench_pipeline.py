@@ -0,0 +1,144 @@
+"""
+Benchmark ponta a ponta do caminho SQS → consumidor → TimescaleDB, com o SQS em memória.
+
+- ingest: o gerador de carga (FleetSimulator) publica leituras a taxas controladas enquanto o
+  ConsumerEngine consome; mede a vazão sustentada (leituras gravadas e apagadas da fila por
+  segundo) e quanto tempo o backlog leva para zerar depois que a carga para.
+- alert_latency: sob carga de fundo, injeta leituras-sonda com alerta N1 e mede o tempo entre o
+  envio à fila e o commit da linha em `alerts` (observado pelo callback `on_alerts` do writer).
+
+As gravações vão para tabelas temporárias de cada conexão (ver bench_ingestion), então os
+dados reais não são alterados.
+
+Uso: python -m benchmarks.bench_pipeline --rates 1000 5000 20000 --duration 20 --workers 4
+"""
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.bench_consumer_pool import connect_with_temp_tables
+from benchmarks.local_stack import InMemorySQS
+from benchmarks.report import latency_summary
+from cronos_ai.central_cloud.data_pipeline.consumer import ConsumerEngine
+from cronos_ai.edge import load_generator
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator, FleetSimulator
+
+QUEUE_URL = "memory://bench-pipeline"
+PROBE_ALERT = "BenchProbe"
+
+class CountingSQS(InMemorySQS):
+    """InMemorySQS que também conta leituras (não só mensagens) apagadas depois do commit."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._readings = {}
+        self.readings_deleted = 0
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        response = super().send_message(QueueUrl, MessageBody, **kwargs)
+        self._readings[response['MessageId']] = json.loads(MessageBody).get("n", 1)
+        return response
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        with self._cond:
+            for entry in Entries:
+                pending = self._in_flight.get(entry['ReceiptHandle'])
+                if pending is not None:
+                    self.readings_deleted += self._readings.pop(pending[1]['MessageId'], 1)
+        return super().delete_message_batch(QueueUrl, Entries)
+
+def _engine(sqs, workers, mode, max_latency, on_alerts=None):
+    return ConsumerEngine(sqs, QUEUE_URL, pollers=max(2, workers // 2), workers=workers, mode=mode,
+                          connect=connect_with_temp_tables, max_latency=max_latency, on_alerts=on_alerts)
+
+def _produce(sqs, devices, rate, duration, steps_per_message, seed=0):
+    sink = load_generator.SQSSink(sqs, QUEUE_URL, steps_per_message=steps_per_message)
+    return load_generator.run(FleetSimulator(devices, device_prefix="bench-pipe", seed=seed), sink, rate, duration=duration)
+
+def ingest_at_rate(rate, duration, devices, workers, mode, max_latency, steps_per_message, drain_timeout=120):
+    sqs = CountingSQS()
+    engine = _engine(sqs, workers, mode, max_latency)
+    engine.start()
+    try:
+        start = time.perf_counter()
+        produced = _produce(sqs, devices, rate, duration, steps_per_message)
+        produced_at = time.perf_counter()
+        ingested_during_load = sqs.readings_deleted
+        while sqs.readings_deleted < produced["readings"] and time.perf_counter() - produced_at < drain_timeout:
+            time.sleep(0.05)
+        drained_at = time.perf_counter()
+    finally:
+        engine.stop()
+    return {
+        "offered_readings_per_second": produced["readings_per_second"],
+        "ingested_readings_per_second": round(ingested_during_load / (produced_at - start), 1),
+        "overall_readings_per_second": round(sqs.readings_deleted / (drained_at - start), 1),
+        "backlog_at_end_of_load": produced["readings"] - ingested_during_load,
+        "drain_seconds": round(drained_at - produced_at, 2),
+        "complete": sqs.readings_deleted >= produced["readings"],
+    }
+
+def alert_latency(probes, interval, background_rate, devices, workers, max_latency, steps_per_message):
+    """Latência envio → commit em `alerts` das leituras-sonda, com carga de fundo rodando."""
+    sqs = CountingSQS()
+    sent_at = {}
+    latencies = []
+    done = threading.Event()
+
+    def on_alerts(alerts):
+        now = time.perf_counter()
+        for alert in alerts:
+            if alert["alert_type"] == PROBE_ALERT and alert["device_id"] in sent_at:
+                latencies.append((now - sent_at.pop(alert["device_id"])) * 1000)
+        if len(latencies) >= probes:
+            done.set()
+
+    engine = _engine(sqs, workers, "thread", max_latency, on_alerts=on_alerts)
+    engine.start()
+    duration = probes * interval + max_latency + 5
+    background = threading.Thread(target=_produce, args=(sqs, devices, background_rate, duration, steps_per_message), daemon=True)
+    background.start()
+    try:
+        simulator = ComprehensiveSensorSimulator()
+        for k in range(probes):
+            reading = simulator.generate_data()
+            reading["device_id"] = f"bench-probe-{k:05d}"
+            reading["alerts"] = [{"type": PROBE_ALERT, "value": float(k)}]
+            sent_at[reading["device_id"]] = time.perf_counter()
+            sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=json.dumps(reading))
+            time.sleep(interval)
+        done.wait(max_latency * 4 + 30)
+    finally:
+        background.join()
+        engine.stop()
+    summary = latency_summary(latencies)
+    summary.update(lost=len(sent_at), background_readings_per_second=background_rate, batch_max_latency=max_latency)
+    return summary
+
+def run(rates=(1000, 5000, 20000), duration=20, devices=1000, workers=4, mode="process", max_latency=0.5,
+        steps_per_message=10, probes=100, probe_interval=0.1):
+    return {
+        "devices": devices,
+        "workers": workers,
+        "mode": mode,
+        "ingest": {
+            str(rate): ingest_at_rate(rate, duration, devices, workers, mode, max_latency, steps_per_message)
+            for rate in rates
+        },
+        "alert_latency": alert_latency(probes, probe_interval, rates[0], devices, workers, max_latency, steps_per_message),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=int, nargs="+", default=[1000, 5000, 20000], help="Leituras por segundo oferecidas.")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=("thread", "process"), default="process")
+    parser.add_argument("--max-latency", type=float, default=0.5, help="CONSUMER_BATCH_MAX_LATENCY do writer.")
+    parser.add_argument("--steps-per-message", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(tuple(args.rates), args.duration, args.devices, args.workers, args.mode,
+                         args.max_latency, args.steps_per_message, args.probes), indent=2))
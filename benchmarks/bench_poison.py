@@ -0,0 +1,199 @@
+"""
+Vazão do consumidor com mensagens envenenadas: uma fila em memória com --messages mensagens no
+formato em lote (--steps-per-message leituras cada) é consumida pelo ConsumerEngine, uma vez
+limpa e outra com --poison-rate das mensagens malformadas, divididas em três tipos:
+
+- json: corpo truncado (falha na decodificação);
+- schema: leitura com campo inválido (falha na validação);
+- db: leitura com um valor pequeno demais para REAL (1e-50), que passa pela validação mas é
+  rejeitado pelo PostgreSQL no COPY (underflow).
+
+As duas primeiras vão para dead_letters na primeira entrega; a última derruba o flush do lote,
+que é refeito mensagem a mensagem com SAVEPOINT, e volta para a fila até CONSUMER_MAX_RECEIVES
+entregas. Com --no-isolation mede também o comportamento anterior: o lote inteiro com a mensagem
+rejeitada volta para a fila a cada tentativa.
+
+Mede o tempo até todas as leituras válidas serem gravadas e apagadas da fila (leituras/s) e até
+as malformadas saírem da fila, na mais rápida de --repeat rodadas alternadas de cada cenário; as
+gravações vão para tabelas temporárias de cada conexão.
+
+Uso: python -m benchmarks.bench_poison --messages 2000 --poison-rate 0.01 --no-isolation
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+
+from benchmarks.local_stack import InMemorySQS
+from cronos_ai.central_cloud.data_pipeline import ingestion
+from cronos_ai.central_cloud.data_pipeline.consumer import ConsumerEngine
+from cronos_ai.edge.simulators import FleetSimulator
+from cronos_ai.shared import metrics
+from cronos_ai.shared.database import DB_HOST, DB_NAME, DB_PASS, DB_USER
+from cronos_ai.shared.uplink_codec import encode_readings
+
+QUEUE_URL = "memory://bench-poison"
+TABLES = ("sensor_data", "alerts", "rul_predictions", "sensor_summaries", "dead_letters")
+POISON_KINDS = ("json", "schema", "db")
+
+def connect_with_temp_tables():
+    # Tabelas temporárias têm precedência no search_path, então o BatchWriter grava nelas sem alteração.
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+    with conn.cursor() as cur:
+        for table in TABLES:
+            cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (LIKE public.{table} INCLUDING DEFAULTS);")
+    conn.commit()
+    return conn
+
+class TrackingSQS(InMemorySQS):
+    """InMemorySQS que conta as entregas e as leituras válidas e mensagens malformadas apagadas da fila."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.readings = {}
+        self.poison = set()
+        self.deliveries = 0
+        self.readings_deleted = 0
+        self.poison_deleted = 0
+
+    def receive_message(self, QueueUrl, **kwargs):
+        response = super().receive_message(QueueUrl, **kwargs)
+        with self._cond:
+            self.deliveries += len(response.get('Messages', ()))
+        return response
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        with self._cond:
+            for entry in Entries:
+                pending = self._in_flight.get(entry['ReceiptHandle'])
+                if pending is not None:
+                    message_id = pending[1]['MessageId']
+                    if message_id in self.poison:
+                        self.poison_deleted += 1
+                    else:
+                        self.readings_deleted += self.readings.get(message_id, 0)
+        return super().delete_message_batch(QueueUrl, Entries)
+
+def make_bodies(messages, steps_per_message, devices, seed=0):
+    """Corpos v1 de `messages` mensagens, uma por dispositivo a cada `steps_per_message` rodadas da frota."""
+    simulator = FleetSimulator(devices, device_prefix="bench-poison", seed=seed)
+    start = datetime.now(timezone.utc)
+    bodies = []
+    step = 0
+    while len(bodies) < messages:
+        per_device = {}
+        for _ in range(steps_per_message):
+            for record in simulator.records(simulator.step()):
+                record["time"] = start + timedelta(seconds=step)
+                per_device.setdefault(record["device_id"], []).append(record)
+            step += 1
+        for device_id, readings in per_device.items():
+            bodies.append((device_id, readings))
+    return bodies[:messages]
+
+def poison_body(kind, device_id, readings):
+    if kind == "json":
+        return encode_readings(device_id, readings)[0][:40]
+    if kind == "schema":
+        return json.dumps({**{k: v for k, v in readings[0].items() if k != "time"}, "rpm": "rápido"})
+    readings = [dict(reading) for reading in readings]
+    readings[-1]["vibration_axial_mms"] = 1e-50
+    return encode_readings(device_id, readings)[0]
+
+def fill(sqs, bodies, poison_rate):
+    every = int(round(1 / poison_rate)) if poison_rate else 0
+    readings = 0
+    for i, (device_id, device_readings) in enumerate(bodies):
+        if every and i % every == every - 1:
+            body = poison_body(POISON_KINDS[(i // every) % len(POISON_KINDS)], device_id, device_readings)
+            sqs.poison.add(sqs.send_message(QUEUE_URL, body)['MessageId'])
+            continue
+        for body in encode_readings(device_id, device_readings):
+            sqs.readings[sqs.send_message(QUEUE_URL, body)['MessageId']] = len(device_readings)
+            readings += len(device_readings)
+    return readings
+
+def _dead_lettered():
+    for family in metrics.CONSUMER_MESSAGES.collect():
+        for sample in family.samples:
+            if sample.name.endswith("_total") and sample.labels.get("result") == "dead_lettered":
+                return sample.value
+    return 0.0
+
+def consume(bodies, poison_rate, workers, max_latency, visibility_timeout, timeout, isolation=True):
+    sqs = TrackingSQS(visibility_timeout=visibility_timeout)
+    readings = fill(sqs, bodies, poison_rate)
+    dead_before = _dead_lettered()
+    content_errors = ingestion.CONTENT_ERRORS
+    if not isolation:
+        # Sem erros "de conteúdo", o flush não isola: o lote inteiro volta para a fila.
+        ingestion.CONTENT_ERRORS = ()
+    engine = ConsumerEngine(sqs, QUEUE_URL, pollers=2, workers=workers, mode="thread",
+                            connect=connect_with_temp_tables, max_latency=max_latency)
+    try:
+        start = time.perf_counter()
+        engine.start()
+        valid_done = None
+        while time.perf_counter() - start < timeout:
+            if valid_done is None and sqs.readings_deleted >= readings:
+                valid_done = time.perf_counter() - start
+            if valid_done is not None and sqs.poison_deleted >= len(sqs.poison):
+                break
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.stop()
+        ingestion.CONTENT_ERRORS = content_errors
+    return {
+        "poison_messages": len(sqs.poison),
+        "readings": readings,
+        "readings_ingested": sqs.readings_deleted,
+        # Acima das mensagens enviadas: reentregas (malformadas e, se o lote demorar mais que a visibilidade, válidas).
+        "deliveries": sqs.deliveries,
+        "valid_seconds": None if valid_done is None else round(valid_done, 2),
+        "readings_per_second": round(sqs.readings_deleted / (valid_done or elapsed), 1),
+        "poison_cleared": sqs.poison_deleted,
+        "all_cleared_seconds": round(elapsed, 2) if sqs.poison_deleted >= len(sqs.poison) else None,
+        "dead_lettered": int(_dead_lettered() - dead_before),
+    }
+
+def _fastest(results):
+    return min(results, key=lambda r: float("inf") if r["valid_seconds"] is None else r["valid_seconds"])
+
+def run(messages=2000, steps_per_message=10, devices=200, poison_rate=0.01, workers=2, max_latency=0.5,
+        visibility_timeout=10.0, timeout=90.0, repeat=3, no_isolation=False):
+    bodies = make_bodies(messages, steps_per_message, devices)
+    clean, poisoned = [], []
+    # Rodadas alternadas (limpa, envenenada...); fica a mais rápida de cada uma.
+    for _ in range(repeat):
+        clean.append(consume(bodies, 0.0, workers, max_latency, visibility_timeout, timeout))
+        poisoned.append(consume(bodies, poison_rate, workers, max_latency, visibility_timeout, timeout))
+    clean, poisoned = _fastest(clean), _fastest(poisoned)
+    result = {
+        "messages": messages, "poison_rate": poison_rate, "max_receives": ingestion.CONSUMER_MAX_RECEIVES,
+        "clean": clean, "poisoned": poisoned,
+        "throughput_ratio": round(poisoned["readings_per_second"] / clean["readings_per_second"], 3),
+    }
+    if no_isolation:
+        result["poisoned_without_isolation"] = consume(bodies, poison_rate, workers, max_latency, visibility_timeout,
+                                                       timeout, isolation=False)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--steps-per-message", type=int, default=10)
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--poison-rate", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-latency", type=float, default=0.5, help="CONSUMER_BATCH_MAX_LATENCY do writer.")
+    parser.add_argument("--visibility-timeout", type=float, default=10.0,
+                        help="Segundos até uma mensagem não apagada voltar à fila; abaixo do tempo para drenar a fila, as válidas também são reentregues.")
+    parser.add_argument("--timeout", type=float, default=90.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-isolation", action="store_true", help="Mede também o flush sem gravação isolada por mensagem.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.steps_per_message, args.devices, args.poison_rate, args.workers,
+                         args.max_latency, args.visibility_timeout, args.timeout, args.repeat, args.no_isolation), indent=2))
@@ -0,0 +1,139 @@
+"""
+Latência p50/p99 de todas as rotas /api/v1, com a API servida por uvicorn neste processo e
+chamadas HTTP reais (requests) contra o TimescaleDB apontado pelas variáveis DB_*.
+
+Com --seed, grava antes um dia de leituras (1 por minuto) e um alerta para --device, para que
+as rotas por dispositivo tenham dados; sem ele, usa o que já existe no banco.
+A API sobe com CONSUMER_MODE=external, então nenhum consumidor roda durante a medição.
+Rotas /api/v1 sem cenário definido em `scenarios` aparecem em "uncovered" no resultado.
+
+Uso: python -m benchmarks.bench_routes --device bench-routes-01 --seed --requests 200
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from benchmarks.report import latency_summary
+
+def seed(device_id, minutes=24 * 60):
+    from cronos_ai.central_cloud.data_pipeline.ingestion import BatchWriter
+    from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+    from cronos_ai.shared.data_models import SensorData
+    from cronos_ai.shared.database import connect
+
+    conn = connect()
+    try:
+        simulator = ComprehensiveSensorSimulator(device_id=device_id)
+        writer = BatchWriter(conn, max_rows=5000, max_latency=3600)
+        start = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+        for i in range(minutes):
+            sd = SensorData(**simulator.generate_data(), time=start + timedelta(minutes=i))
+            alerts = [("BenchRouteProbe", sd.temperature_c, {"device_id": device_id})] if i == minutes - 1 else ()
+            writer.add(sd, sd.time, alerts)
+            if writer.should_flush():
+                writer.flush()
+        writer.flush()
+    finally:
+        conn.close()
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_api():
+    """Sobe a API em uma thread e devolve (servidor, URL base)."""
+    os.environ.setdefault("CONSUMER_MODE", "external")
+    import uvicorn
+    from cronos_ai.central_cloud.api.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+def scenarios(base, device_id):
+    """(rota, método, url, kwargs do requests) para cada rota /api/v1 medida."""
+    now = datetime.now(timezone.utc)
+    day_ago = (now - timedelta(days=1)).isoformat()
+    response = requests.get(f"{base}/api/v1/alerts/", params={"device_id": device_id, "limit": 1, "include_payload": False})
+    alerts = response.json() if response.ok else []
+    alert_id = alerts[0]["id"] if alerts else 0
+    return [
+        ("/api/v1/sensordata/latest", "GET", f"{base}/api/v1/sensordata/latest", {}),
+        ("/api/v1/sensordata/fleet", "GET", f"{base}/api/v1/sensordata/fleet", {}),
+        ("/api/v1/sensordata/{device_id}", "GET", f"{base}/api/v1/sensordata/{device_id}", {"params": {"limit": 1000}}),
+        ("/api/v1/sensordata/{device_id}/summary", "GET", f"{base}/api/v1/sensordata/{device_id}/summary",
+         {"params": {"interval": "1 hour", "start_time": day_ago}}),
+        ("/api/v1/sensordata/{device_id}/export", "GET", f"{base}/api/v1/sensordata/{device_id}/export",
+         {"params": {"format": "ndjson", "start_time": (now - timedelta(hours=1)).isoformat()}}),
+        ("/api/v1/alerts/", "GET", f"{base}/api/v1/alerts/", {"params": {"include_payload": False}}),
+        ("/api/v1/alerts/?device_id", "GET", f"{base}/api/v1/alerts/", {"params": {"device_id": device_id}}),
+        ("/api/v1/alerts/stream", "STREAM", f"{base}/api/v1/alerts/stream", {}),
+        ("/api/v1/alerts/{alert_id}/feedback", "POST", f"{base}/api/v1/alerts/{alert_id}/feedback",
+         {"json": {"status": "pending"}}),
+        ("/api/v1/configurations/{device_id}", "GET", f"{base}/api/v1/configurations/{device_id}", {}),
+        ("/api/v1/configurations/{device_id}#POST", "POST", f"{base}/api/v1/configurations/{device_id}",
+         {"json": {"device_id": device_id, "temp_std_dev_multiplier": 3.0}}),
+    ]
+
+def time_request(session, method, url, kwargs):
+    start = time.perf_counter()
+    if method == "STREAM":
+        # Para o SSE mede o tempo até o primeiro bloco (conexão aberta e inscrita no broker).
+        with session.get(url, stream=True, timeout=10) as response:
+            next(response.iter_content(chunk_size=None))
+    else:
+        response = session.request(method, url, timeout=60, **kwargs)
+        response.content
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, response.status_code
+
+def uncovered_routes(measured):
+    """Rotas /api/v1 do schema OpenAPI da aplicação que não têm cenário de medição."""
+    from cronos_ai.central_cloud.api.main import app
+    names = {name.split("?")[0].split("#")[0] for name in measured}
+    return sorted(path for path in app.openapi()["paths"] if path.startswith("/api/v1") and path not in names)
+
+def run(device_id="bench-routes-01", do_seed=False, n_requests=200, warmup=5):
+    if do_seed:
+        seed(device_id)
+    server, base = start_api()
+    results = {}
+    try:
+        with requests.Session() as session:
+            plan = scenarios(base, device_id)
+            for name, method, url, kwargs in plan:
+                samples, statuses = [], {}
+                for i in range(warmup + n_requests):
+                    try:
+                        elapsed, status = time_request(session, method, url, kwargs)
+                    except requests.RequestException as e:
+                        elapsed, status = None, type(e).__name__
+                    if i < warmup:
+                        continue
+                    if elapsed is not None:
+                        samples.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+                results[name] = latency_summary(samples)
+                results[name]["status_codes"] = {str(k): v for k, v in statuses.items()}
+        results["uncovered"] = uncovered_routes([name for name, *_ in plan])
+    finally:
+        server.should_exit = True
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device", default="bench-routes-01")
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.device, args.seed, args.requests), indent=2))
@@ -0,0 +1,67 @@
+"""
+Latência e vazão da inferência de RUL no caminho do consumidor: `RulScorer.score` sobre lotes de
+--batch-sizes dispositivos (features das janelas do AnomalyDetectorN2 + uma multiplicação de
+matrizes), vs. pontuar os mesmos dispositivos um a um (uma chamada por dispositivo).
+
+As janelas de --devices bombas são aquecidas com o FleetSimulator e o modelo é treinado com o
+próprio simulador (train_from_simulator, carga reduzida). O intervalo entre previsões é zerado
+para que todo lote seja pontuado por completo (sem banco).
+
+Uso: python -m benchmarks.bench_rul --devices 10000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import N2_FIELDS, AnomalyDetectorN2
+from cronos_ai.central_cloud.ml_engine.rul_inference import RulScorer, train_from_simulator
+from cronos_ai.edge.simulators import FleetSimulator
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+def warm_detector(devices, window_size=100):
+    detector = AnomalyDetectorN2(window_size=window_size)
+    simulator = FleetSimulator(n_devices=devices, device_prefix="bench-rul", seed=3)
+    rows = detector.stats.rows_for(simulator.device_ids)
+    for _ in range(window_size):
+        columns = simulator.step()
+        detector.stats.push(rows, np.column_stack([columns[field] for field in N2_FIELDS]))
+    return detector, list(simulator.device_ids)
+
+def _latencies(function, batches):
+    latencies = []
+    for batch in batches:
+        start = time.perf_counter()
+        function(batch)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+def run(devices=10000, batch_sizes=BATCH_SIZES, rounds=20):
+    start = time.perf_counter()
+    model = train_from_simulator(devices=500, steps=150)
+    results = {"devices": devices, "features": len(model.feature_names),
+               "train_seconds": round(time.perf_counter() - start, 2)}
+    detector, device_ids = warm_detector(devices)
+    scorer = RulScorer(model, detector.window_features, N2_FIELDS, interval=0)
+    for size in batch_sizes:
+        size = min(size, devices)
+        batches = [device_ids[(i * size) % devices:][:size] for i in range(max(rounds, 1000 // size))]
+        batched = _latencies(scorer.score, batches)
+        one_by_one = _latencies(lambda batch: [scorer.score([d]) for d in batch], batches[:rounds])
+        results[f"batch_{size}"] = {
+            "p50_ms": round(float(np.percentile(batched, 50)) * 1e3, 3),
+            "p99_ms": round(float(np.percentile(batched, 99)) * 1e3, 3),
+            "devices_per_second": round(size * len(batched) / batched.sum()),
+            "one_by_one_devices_per_second": round(size * len(one_by_one) / one_by_one.sum()),
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.devices, tuple(args.batch_sizes), args.rounds), indent=2))
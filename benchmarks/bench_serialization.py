@@ -0,0 +1,236 @@
+"""
+Perfil de CPU da serialização no consumidor e na API, antes e depois da camada
+`cronos_ai/shared/serialization.py`.
+
+- consumer: CPU por mensagem do estágio de decodificação e validação de `process_messages`, em
+  lotes de 10 mensagens (um receive do SQS), com mensagens no formato legado (uma leitura) e no
+  formato em lote v1 (--readings-per-message leituras). Antes: a decodificação anterior do codec
+  (json da biblioteca padrão, dict montado canal a canal) e um `SensorData(**d)` por leitura;
+  depois: `decode_message` (orjson) e `validate_batch` no lote inteiro.
+- api: CPU por resposta de --rows linhas de sensor_data, chamando uma app FastAPI direto pela
+  interface ASGI (sem rede). Antes: lista de dicts (como o RealDictCursor entrega) validada e
+  serializada pelo `response_model=List[Dict[str, Any]]`; depois: as tuplas do cursor em
+  `rows_response`.
+- fetch (com --db): CPU para buscar as mesmas --rows linhas com RealDictCursor (antes) e com o
+  cursor comum de tuplas (depois), de uma tabela temporária no banco das variáveis DB_*.
+
+Com --profile, imprime no stderr as funções que mais consomem CPU em cada caminho (cProfile).
+
+Uso: python -m benchmarks.bench_serialization --rows 1000 --db --profile
+"""
+import argparse
+import asyncio
+import base64
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from fastapi import FastAPI
+from psycopg2.extras import RealDictCursor, execute_values
+
+from cronos_ai.edge.simulators import FleetSimulator
+from cronos_ai.shared.data_models import SENSOR_CHANNELS, SensorData
+from cronos_ai.shared.database import connect
+from cronos_ai.shared.serialization import orjson, rows_response, validate_batch
+from cronos_ai.shared.uplink_codec import decode_message, encode_readings
+
+RECEIVE_BATCH = 10
+SENSOR_COLUMNS = ("time", "device_id") + SENSOR_CHANNELS
+
+def make_readings(n, seed=3):
+    simulator = FleetSimulator(n_devices=n, device_prefix="bench-serial", seed=seed)
+    readings = simulator.records(simulator.step())
+    start = datetime(2025, 8, 10, tzinfo=timezone.utc)
+    for i, reading in enumerate(readings):
+        reading["time"] = start + timedelta(seconds=i)
+    return readings
+
+def make_batches(messages, readings_per_message):
+    """Lotes de RECEIVE_BATCH mensagens SQS; 1 leitura por mensagem = formato legado."""
+    readings = make_readings(messages * readings_per_message)
+    bodies = []
+    for m in range(messages):
+        chunk = readings[m * readings_per_message:(m + 1) * readings_per_message]
+        if readings_per_message == 1:
+            bodies.append(json.dumps({k: v for k, v in chunk[0].items() if k != "time"}))
+        else:
+            bodies.extend(encode_readings(chunk[0]["device_id"], chunk))
+    messages = [{"MessageId": str(i), "Body": body} for i, body in enumerate(bodies)]
+    return [messages[i:i + RECEIVE_BATCH] for i in range(0, len(messages), RECEIVE_BATCH)]
+
+def legacy_decode(body):
+    """Leituras de um corpo de mensagem como o codec decodificava antes desta camada."""
+    message = json.loads(body)
+    if "v" not in message:
+        return [message]
+    columnar = json.loads(zlib.decompress(base64.b64decode(message["data"])))
+    times = [columnar["t0"]]
+    for delta in columnar["dt"]:
+        times.append(times[-1] + delta)
+    readings = []
+    for i in range(message["n"]):
+        reading = {"device_id": message["device_id"]}
+        reading["time"] = datetime.fromtimestamp(times[i] / 1000, tz=timezone.utc).isoformat()
+        for channel in SENSOR_CHANNELS:
+            reading[channel] = columnar["c"][channel][i]
+        alerts = columnar["a"].get(str(i))
+        if alerts:
+            reading["alerts"] = alerts
+        readings.append(reading)
+    return readings
+
+def decode_before(batch):
+    accepted = []
+    for message in batch:
+        accepted.extend((d, SensorData(**d)) for d in legacy_decode(message["Body"]))
+    return accepted
+
+def decode_after(batch):
+    decoded = [decode_message(message["Body"])[0] for message in batch]
+    models, _ = validate_batch(decoded)
+    return [pair for group, group_models in zip(decoded, models) for pair in zip(group, group_models)]
+
+def cpu_per_call(function, calls):
+    start = time.process_time()
+    for args in calls:
+        function(*args)
+    return (time.process_time() - start) / len(calls)
+
+def compare(before, after, calls, repeat, profile=None):
+    """Menor CPU por chamada de cada caminho em `repeat` rodadas alternadas (antes, depois, antes...)."""
+    best = {before: float("inf"), after: float("inf")}
+    for _ in range(repeat):
+        for function in best:
+            best[function] = min(best[function], cpu_per_call(function, calls))
+    if profile:
+        for label, function in (("antes", before), ("depois", after)):
+            profiler = cProfile.Profile()
+            profiler.runcall(cpu_per_call, function, calls)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("tottime").print_stats(12)
+            print(f"BENCH: Perfil {profile} {label}\n{out.getvalue()}", file=sys.stderr)
+    return best[before], best[after]
+
+def bench_consumer(messages, readings_per_message, repeat, profile):
+    batches = make_batches(messages, readings_per_message)
+    n_messages = sum(len(batch) for batch in batches)
+    assert [sd for _, sd in decode_before(batches[0])] == [sd for _, sd in decode_after(batches[0])]
+    before, after = compare(decode_before, decode_after, [(b,) for b in batches], repeat,
+                            profile and f"consumer ({readings_per_message}/msg)")
+    per_batch = len(batches) / n_messages
+    return {
+        "readings_per_message": readings_per_message,
+        "before_us_per_message": round(before * per_batch * 1e6, 1),
+        "after_us_per_message": round(after * per_batch * 1e6, 1),
+        "speedup": round(before / after, 2),
+    }
+
+def build_app(rows):
+    app = FastAPI()
+    dict_rows = [dict(zip(SENSOR_COLUMNS, row)) for row in rows]
+
+    @app.get("/before", response_model=List[Dict[str, Any]])
+    async def before():
+        return [dict(row) for row in dict_rows]
+
+    @app.get("/after", response_model=List[Dict[str, Any]])
+    async def after():
+        return rows_response(SENSOR_COLUMNS, rows)
+
+    return app
+
+async def _call(app, path):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+             "server": ("bench", 80), "client": ("bench", 1)}
+    body = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Depois do corpo da requisição, só um disconnect; o StreamingResponse fica esperando por ele.
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+def bench_api(n_rows, repeat, profile):
+    rows = [tuple(r[c] for c in SENSOR_COLUMNS) for r in make_readings(n_rows, seed=4)]
+    app = build_app(rows)
+    loop = asyncio.new_event_loop()
+    try:
+        before = lambda: loop.run_until_complete(_call(app, "/before"))
+        after = lambda: loop.run_until_complete(_call(app, "/after"))
+        assert json.loads(before()) == json.loads(after())
+        size = len(after())
+        before, after = compare(before, after, [()] * 10, repeat, profile and "api")
+    finally:
+        loop.close()
+    return {
+        "rows": n_rows, "response_bytes": size,
+        "before_ms_per_response": round(before * 1e3, 2),
+        "after_ms_per_response": round(after * 1e3, 2),
+        "speedup": round(before / after, 2),
+    }
+
+def bench_fetch(n_rows, repeat):
+    rows = [tuple(r[c] for c in SENSOR_COLUMNS) for r in make_readings(n_rows, seed=4)]
+    conn = connect(retries=1)
+    if conn is None:
+        raise RuntimeError("Banco indisponível nas variáveis DB_*.")
+    try:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS bench_serialization (LIKE public.sensor_data);")
+            cur.execute("TRUNCATE bench_serialization;")
+            execute_values(cur, f"INSERT INTO bench_serialization ({', '.join(SENSOR_COLUMNS)}) VALUES %s;", rows)
+        conn.commit()
+
+        def fetch(cursor_factory):
+            with conn.cursor(cursor_factory=cursor_factory) as cur:
+                cur.execute("SELECT * FROM bench_serialization ORDER BY time DESC;")
+                return cur.fetchall()
+
+        before, after = compare(lambda: fetch(RealDictCursor), lambda: fetch(None), [()] * 10, repeat)
+    finally:
+        conn.close()
+    return {
+        "rows": n_rows,
+        "before_ms_per_fetch": round(before * 1e3, 2),
+        "after_ms_per_fetch": round(after * 1e3, 2),
+        "speedup": round(before / after, 2),
+    }
+
+def run(messages=2000, readings_per_message=20, rows=1000, repeat=5, profile=False, db=False):
+    results = {
+        "json_backend": "orjson" if orjson is not None else "json",
+        "consumer": [bench_consumer(messages, 1, repeat, profile),
+                     bench_consumer(messages // 10, readings_per_message, repeat, profile)],
+        "api": bench_api(rows, repeat, profile),
+    }
+    if db:
+        results["fetch"] = bench_fetch(rows, repeat)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000, help="Mensagens no formato legado (1/10 disso no formato em lote).")
+    parser.add_argument("--readings-per-message", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--db", action="store_true", help="Mede também a busca das linhas no banco (variáveis DB_*).")
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.readings_per_message, args.rows, args.repeat, args.profile, args.db), indent=2))
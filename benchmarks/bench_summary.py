@@ -0,0 +1,80 @@
+"""
+Benchmark do /summary: latência da consulta sobre os dados brutos vs. sobre o rollup escolhido
+pelo planejador, para períodos de 1 dia, 30 dias e 1 ano.
+
+Com --seed, insere antes um ano de leituras sintéticas (1 por minuto) para --device e
+materializa os rollups; sem ele, usa os dados já existentes no banco apontado por DB_*.
+
+Uso: python -m benchmarks.bench_summary --device bench-summary-01 --seed
+"""
+import argparse
+import io
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from cronos_ai.central_cloud.data_pipeline.rollups import ROLLUPS, plan_summary_query
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+from cronos_ai.shared.database import connect
+
+RANGES = (("1d", timedelta(days=1), "1 hour"), ("30d", timedelta(days=30), "1 day"), ("1y", timedelta(days=365), "1 week"))
+
+def seed(conn, device_id, days=365):
+    end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    minutes = days * 24 * 60
+    times = [end - timedelta(minutes=m) for m in range(minutes)]
+    values = np.random.default_rng(0).normal(50, 5, size=(minutes, len(SENSOR_CHANNELS)))
+    buf = io.StringIO()
+    for t, row in zip(times, values):
+        buf.write(f"{t.isoformat()},{device_id}," + ",".join(f"{v:.3f}" if c != "rpm" else str(int(v)) for c, v in zip(SENSOR_CHANNELS, row)) + "\n")
+    buf.seek(0)
+    with conn.cursor() as cur:
+        cur.copy_expert(f"COPY sensor_data (time, device_id, {', '.join(SENSOR_CHANNELS)}) FROM STDIN WITH (FORMAT csv);", buf)
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for view, *_ in ROLLUPS:
+            cur.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL);")
+    conn.autocommit = False
+
+def time_query(conn, sql, params, repeat):
+    samples = []
+    with conn.cursor() as cur:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+    conn.rollback()
+    return round(statistics.median(samples), 2)
+
+def run(device_id, do_seed=False, repeat=5):
+    conn = connect()
+    try:
+        if do_seed:
+            seed(conn, device_id)
+        end = datetime.now(timezone.utc)
+        results = {}
+        for label, span, interval in RANGES:
+            raw_sql, raw_params, _ = plan_summary_query(device_id, interval, end - span, end, use_rollups=False)
+            sql, params, source = plan_summary_query(device_id, interval, end - span, end)
+            results[label] = {
+                "interval": interval,
+                "source": source,
+                "raw_ms_p50": time_query(conn, raw_sql, raw_params, repeat),
+                "rollup_ms_p50": time_query(conn, sql, params, repeat),
+            }
+    finally:
+        conn.close()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device", default="bench-summary-01")
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.device, args.seed, args.repeat), indent=2))
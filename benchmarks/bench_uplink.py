@@ -0,0 +1,80 @@
+"""
+Benchmark do uplink da borda: mensagens SQS, chamadas à API e bytes por leitura no formato
+legado (um JSON por leitura, um send_message por leitura) vs. o formato em lote v1 com
+send_message_batch, para vários tamanhos de lote. Também mede o custo de decodificação no consumidor.
+
+Uso: python -m benchmarks.bench_uplink --readings 20000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.local_stack import InMemorySQS
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.edge.uplink import Uplink
+from cronos_ai.shared.uplink_codec import decode_body
+
+BATCH_SIZES = (1, 10, 100, 500, 2000)
+
+def make_readings(n, sample_seconds=1.0):
+    simulator = ComprehensiveSensorSimulator(device_id="bench-uplink-01")
+    start = datetime.now(timezone.utc)
+    readings = []
+    for i in range(n):
+        reading = simulator.generate_data()
+        reading["time"] = start + timedelta(seconds=i * sample_seconds)
+        readings.append(reading)
+    return readings
+
+def legacy(readings):
+    sqs = InMemorySQS()
+    total_bytes = 0
+    start = time.perf_counter()
+    for reading in readings:
+        body = json.dumps({k: v for k, v in reading.items() if k != "time"})
+        sqs.send_message(QueueUrl="memory://q", MessageBody=body)
+        total_bytes += len(body)
+    elapsed = time.perf_counter() - start
+    return {
+        "messages_per_reading": 1.0,
+        "requests_per_reading": 1.0,
+        "bytes_per_reading": round(total_bytes / len(readings), 1),
+        "encode_us_per_reading": round(elapsed / len(readings) * 1e6, 2),
+    }
+
+def batched(readings, batch_size):
+    sqs = InMemorySQS()
+    uplink = Uplink(sqs, "memory://q", "bench-uplink-01", max_latency=float("inf"), max_readings=batch_size)
+    start = time.perf_counter()
+    for reading in readings:
+        uplink.add(reading)
+        uplink.flush_if_due()
+    uplink.flush()
+    encode_elapsed = time.perf_counter() - start
+    bodies = [message["Body"] for message in sqs.receive_message("memory://q", MaxNumberOfMessages=10 ** 9)["Messages"]]
+    start = time.perf_counter()
+    decoded = sum(len(decode_body(body)) for body in bodies)
+    decode_elapsed = time.perf_counter() - start
+    assert decoded == len(readings)
+    n = len(readings)
+    return {
+        "messages_per_reading": round(uplink.stats["messages"] / n, 5),
+        "requests_per_reading": round(uplink.stats["requests"] / n, 5),
+        "bytes_per_reading": round(uplink.stats["bytes"] / n, 1),
+        "encode_us_per_reading": round(encode_elapsed / n * 1e6, 2),
+        "decode_us_per_reading": round(decode_elapsed / n * 1e6, 2),
+    }
+
+def run(readings=20000):
+    data = make_readings(readings)
+    results = {"readings": readings, "legacy": legacy(data)}
+    for batch_size in BATCH_SIZES:
+        results[f"batch_{batch_size}"] = batched(data, batch_size)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.readings), indent=2))
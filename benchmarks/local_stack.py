@@ -0,0 +1,72 @@
+"""
+Peças locais para rodar os benchmarks sem LocalStack: um SQS em memória, thread-safe,
+com a mesma interface usada pelo consumidor e pela borda (subconjunto do cliente boto3).
+"""
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+
+class InMemorySQS:
+    """Fila SQS em memória com visibilidade temporária e contagem de recebimentos."""
+
+    def __init__(self, visibility_timeout=30.0):
+        self.visibility_timeout = visibility_timeout
+        self._ready = deque()
+        self._in_flight = {}
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self.deleted = 0
+
+    def get_queue_url(self, QueueName):
+        return {'QueueUrl': f"memory://{QueueName}"}
+
+    def _requeue_expired(self):
+        now = time.monotonic()
+        expired = [h for h, (deadline, _) in self._in_flight.items() if deadline <= now]
+        for handle in expired:
+            _, message = self._in_flight.pop(handle)
+            self._ready.append(message)
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        with self._cond:
+            message = {'MessageId': str(next(self._ids)), 'Body': MessageBody, 'ReceiveCount': 0}
+            self._ready.append(message)
+            self._cond.notify()
+        return {'MessageId': message['MessageId']}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        for entry in Entries:
+            self.send_message(QueueUrl, entry['MessageBody'])
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, WaitTimeSeconds=0, **kwargs):
+        deadline = time.monotonic() + WaitTimeSeconds
+        with self._cond:
+            self._requeue_expired()
+            while not self._ready and time.monotonic() < deadline:
+                self._cond.wait(min(0.05, max(deadline - time.monotonic(), 0)))
+                self._requeue_expired()
+            batch = []
+            while self._ready and len(batch) < MaxNumberOfMessages:
+                message = self._ready.popleft()
+                message['ReceiveCount'] += 1
+                handle = uuid.uuid4().hex
+                self._in_flight[handle] = (time.monotonic() + self.visibility_timeout, message)
+                batch.append({
+                    'MessageId': message['MessageId'], 'ReceiptHandle': handle, 'Body': message['Body'],
+                    'Attributes': {'ApproximateReceiveCount': str(message['ReceiveCount'])},
+                })
+        return {'Messages': batch} if batch else {}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        with self._cond:
+            for entry in Entries:
+                if self._in_flight.pop(entry['ReceiptHandle'], None) is not None:
+                    self.deleted += 1
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+    def pending(self):
+        with self._cond:
+            return len(self._ready) + len(self._in_flight)
@@ -0,0 +1,71 @@
+"""
+Utilitários dos relatórios de benchmark: percentis de latência, metadados do ambiente e
+comparação de um resultado com uma execução de referência para apontar regressões.
+"""
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Trechos do nome da métrica que indicam a direção boa: vazão (maior é melhor) ou tempo/tamanho (menor é melhor).
+HIGHER_IS_BETTER = ("per_second", "per_sec", "throughput")
+LOWER_IS_BETTER = ("ms_p50", "ms_p99", "ms_max", "_us_", "seconds", "bytes_per_reading", "rss_mb")
+
+def latency_summary(samples_ms):
+    """p50/p99/máximo (ms) de uma lista de amostras."""
+    if not samples_ms:
+        return {"count": 0}
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(samples.size),
+        "ms_p50": round(float(np.percentile(samples, 50)), 2),
+        "ms_p99": round(float(np.percentile(samples, 99)), 2),
+        "ms_max": round(float(samples.max()), 2),
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def _direction(key):
+    if any(token in key for token in HIGHER_IS_BETTER):
+        return 1
+    if any(token in key for token in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+def _flatten(result, prefix=""):
+    for key, value in result.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, str(key), value
+
+def compare(current, baseline, tolerance=0.15):
+    """
+    Métricas que pioraram mais que `tolerance` (fração) em relação à referência.
+    Só entram métricas com direção conhecida (vazão, latência, tempo, bytes).
+    """
+    previous = {path: value for path, _, value in _flatten(baseline)}
+    regressions = []
+    for path, key, value in _flatten(current):
+        direction = _direction(key)
+        old = previous.get(path)
+        if not direction or not old:
+            continue
+        change = (value - old) / abs(old)
+        if change * direction < -tolerance:
+            regressions.append({"metric": path, "baseline": old, "current": value, "change": round(change, 3)})
+    return regressions
@@ -0,0 +1,90 @@
+"""
+Executa a suíte de benchmarks e grava um único JSON com os resultados e o ambiente.
+
+Suítes:
+- uplink: bytes e mensagens por leitura da borda (offline, sem banco);
+- metrics: custo da instrumentação Prometheus por lote do consumidor (offline, sem banco);
+- edge_rules: leituras/s do detector N1 da borda em um núcleo (offline, sem banco);
+- edge_reduction: bytes, mensagens e linhas na nuvem por dispositivo-hora com o estágio de features da borda (offline, sem banco);
+- lcm: tempo por leitura e memória dos modelos locais da borda, e trocas de versão a quente (offline, sem banco);
+- serialization: CPU por mensagem na decodificação/validação do consumidor e por resposta de 1000 linhas da API, antes e depois da camada de serialização (offline, sem banco);
+- fleet: latência da visão da frota (/api/v1/sensordata/fleet) com 10 mil bombas no cache em memória (offline, sem banco);
+- rul: latência e vazão da inferência de RUL por lote de dispositivos (offline, sem banco);
+- alert_storm: linhas e bytes gravados em `alerts` numa tempestade de falhas de lubrificação, por disparo vs. incidentes (bench_alert_storm);
+- pipeline: vazão de ingestão e latência de alerta SQS → consumidor → TimescaleDB (bench_pipeline);
+- poison: vazão do consumidor com 1% de mensagens malformadas vs. a fila limpa (bench_poison);
+- routes: p50/p99 de todas as rotas /api/v1 (bench_routes).
+
+As suítes que usam banco precisam de um TimescaleDB acessível pelas variáveis DB_*; se uma
+suíte falhar, o erro fica registrado no JSON e as demais continuam.
+
+Com --baseline, compara com um JSON anterior e sai com código 1 se alguma métrica de vazão ou
+latência piorar além de --tolerance:
+
+    python -m benchmarks.run_all --output bench_results.json
+    python -m benchmarks.run_all --quick --baseline bench_results.json --tolerance 0.2
+"""
+import argparse
+import json
+import sys
+import traceback
+
+from benchmarks import (bench_alert_storm, bench_edge_reduction, bench_edge_rules, bench_fleet, bench_lcm, bench_metrics,
+                        bench_pipeline, bench_poison, bench_routes, bench_rul, bench_serialization, bench_uplink)
+from benchmarks.report import compare, environment
+
+SUITES = {
+    "uplink": lambda quick: bench_uplink.run(readings=5000 if quick else 20000),
+    "metrics": lambda quick: bench_metrics.run(batches=200 if quick else 2000),
+    "edge_rules": lambda quick: bench_edge_rules.run(readings=20_000 if quick else 100_000),
+    "edge_reduction": lambda quick: bench_edge_reduction.run(devices=2 if quick else 5, hours=6 if quick else 24),
+    "lcm": lambda quick: bench_lcm.run(readings=10_000 if quick else 50_000),
+    "serialization": lambda quick: bench_serialization.run(messages=500 if quick else 2000, repeat=2 if quick else 5),
+    "fleet": lambda quick: bench_fleet.run(devices=2000 if quick else 10000, requests=20 if quick else 50),
+    "rul": lambda quick: bench_rul.run(devices=2000 if quick else 10000, rounds=5 if quick else 20),
+    "alert_storm": lambda quick: bench_alert_storm.run(devices=5 if quick else 20, minutes=30 if quick else 90),
+    "pipeline": lambda quick: bench_pipeline.run(
+        rates=(1000, 5000) if quick else (1000, 5000, 20000),
+        duration=5 if quick else 20,
+        devices=200 if quick else 1000,
+        probes=20 if quick else 100,
+    ),
+    "poison": lambda quick: bench_poison.run(messages=1000 if quick else 5000, repeat=2 if quick else 3),
+    "routes": lambda quick: bench_routes.run(do_seed=True, n_requests=30 if quick else 200),
+}
+
+def run(suites=tuple(SUITES), quick=False):
+    results = {"environment": environment(), "quick": quick}
+    for name in suites:
+        print(f"BENCH: Rodando suíte '{name}'...", file=sys.stderr)
+        try:
+            results[name] = SUITES[name](quick)
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="Cargas menores, para rodar em CI.")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para detectar regressões.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Piora relativa tolerada (0.15 = 15%%).")
+    args = parser.parse_args()
+
+    results = run(tuple(args.suites), args.quick)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"BENCH: Resultados gravados em {args.output}", file=sys.stderr)
+    if results.get("regressions"):
+        for regression in results["regressions"]:
+            print(f"BENCH: Regressão em {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"({regression['change']:+.1%})", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,83 @@
-from fastapi import APIRouter, HTTPException
-import os
-import psycopg2
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from psycopg2.extras import RealDictCursor
-from typing import List, Dict, Any
-from cronos_ai.shared.data_models import AlertFeedback
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from cronos_ai.shared.database import get_connection
+from cronos_ai.shared.serialization import cursor_columns, rows_response
+from cronos_ai.shared.data_models import AlertFeedback, AlertStatus
+from cronos_ai.central_cloud.api.services.alert_queries import encode_cursor, plan_alerts_query
+from cronos_ai.central_cloud.api.services.alert_stream import alert_broker, event_stream
 
 router = APIRouter()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "cronos_db")
-DB_USER = os.getenv("DB_USER", "cronos_user")
-DB_PASS = os.getenv("DB_PASS", "cronos_password")
-
 @router.get("/", response_model=List[Dict[str, Any]])
-def get_all_alerts():
+def get_all_alerts(
+    device_id: Optional[str] = Query(None, description="Filtra pelo dispositivo"),
+    alert_type: Optional[str] = Query(None, description="Filtra pelo tipo de alerta (ex: HighTemperatureN2)"),
+    status: Optional[AlertStatus] = Query(None, description="Filtra pelo status do feedback"),
+    start_time: Optional[datetime] = Query(None, description="Data de início no formato ISO (ex: 2025-08-10T10:00:00)"),
+    end_time: Optional[datetime] = Query(None, description="Data de fim no formato ISO (ex: 2025-08-10T11:00:00)"),
+    cursor: Optional[str] = Query(None, description="Cursor de paginação: valor do cabeçalho X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de alertas por página"),
+    include_payload: bool = Query(True, description="Inclui o full_payload (JSONB) de cada alerta")
+):
+    """Alertas do mais recente para o mais antigo; X-Next-Cursor vem preenchido quando há mais páginas."""
     try:
-        with psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM alerts ORDER BY time DESC LIMIT 100;")
-                results = cur.fetchall()
-                return results
+        query, params = plan_alerts_query(
+            device_id=device_id, alert_type=alert_type, status=status.value if status else None,
+            start_time=start_time, end_time=end_time, cursor=cursor, limit=limit, include_payload=include_payload,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido.")
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                columns, results = cursor_columns(cur), cur.fetchall()
+                headers = None
+                if len(results) == limit:
+                    headers = {"X-Next-Cursor": encode_cursor(dict(zip(columns, results[-1])))}
+                return rows_response(columns, results, headers)
     except Exception as e:
         print(f"API_ENDPOINT: Erro ao consultar alertas: {e}")
         raise HTTPException(status_code=500, detail="Erro ao buscar alertas no banco de dados.")
 
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    last_event_id: Optional[int] = Query(None, description="Retoma o stream a partir deste id de alerta"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Alertas novos em tempo real (Server-Sent Events). O navegador reenvia Last-Event-ID ao
+    reconectar, e o stream reenvia tudo o que foi gravado depois desse id; sem id, ou com uma
+    lacuna maior que o replay, envia um evento `reset` para o cliente recarregar a lista.
+    """
+    last_id = last_event_id_header if last_event_id_header is not None else last_event_id
+    return StreamingResponse(
+        event_stream(request, last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/{alert_id}/feedback", response_model=Dict[str, Any])
 def provide_alert_feedback(alert_id: int, feedback: AlertFeedback):
     try:
-        with psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS) as conn:
+        with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("UPDATE alerts SET status = %s WHERE id = %s RETURNING *;", (feedback.status.value, alert_id))
+                # feedback_at só muda quando o status muda: repetir o mesmo feedback não o entrega de novo ao auto-tuner.
+                cur.execute("""
+                    UPDATE alerts
+                    SET feedback_at = CASE WHEN status IS DISTINCT FROM %(status)s THEN NOW() ELSE feedback_at END,
+                        status = %(status)s
+                    WHERE id = %(id)s RETURNING *;
+                """, {"status": feedback.status.value, "id": alert_id})
                 updated_alert = cur.fetchone()
                 conn.commit()
                 if not updated_alert:
                     raise HTTPException(status_code=404, detail=f"Alerta com id {alert_id} não encontrado.")
+                alert_broker.publish_status(updated_alert)
                 return updated_alert
     except Exception as e:
         print(f"API_ENDPOINT: Erro ao registrar feedback: {e}")
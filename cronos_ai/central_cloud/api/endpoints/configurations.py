@@ -1,52 +1,40 @@
 from fastapi import APIRouter, HTTPException
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from typing import Dict, Any
+from cronos_ai.shared.database import get_connection
 from cronos_ai.shared.data_models import DeviceConfig
+from cronos_ai.central_cloud.api.services.config_service import config_cache, fetch_configs, save_configs
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import N2_FIELDS
 
 router = APIRouter()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "cronos_db")
-DB_USER = os.getenv("DB_USER", "cronos_user")
-DB_PASS = os.getenv("DB_PASS", "cronos_password")
+def _load_config(device_id: str):
+    with get_connection() as conn:
+        rows = fetch_configs(conn, device_id)
+    return rows[0] if rows else None
 
 @router.get("/{device_id}", response_model=DeviceConfig)
 def get_device_config(device_id: str):
+    # Leitura pelo cache; ele é atualizado a cada alteração publicada (POST, auto-tuner, NOTIFY).
     try:
-        with psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM device_configs WHERE device_id = %s;", (device_id,))
-                config = cur.fetchone()
-                if not config:
-                    return DeviceConfig(device_id=device_id)
-                return config
+        config = config_cache.get(device_id, _load_config)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not config:
+        return DeviceConfig(device_id=device_id)
+    return config
 
 @router.post("/{device_id}", response_model=DeviceConfig)
 def set_device_config(device_id: str, config: DeviceConfig):
     if device_id != config.device_id:
         raise HTTPException(status_code=400, detail="O device_id na URL não corresponde ao do corpo da requisição.")
-    
+    unknown = sorted(set(config.channel_multipliers) - set(N2_FIELDS).difference({"temperature_c"}))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Canais inválidos em channel_multipliers: {', '.join(unknown)} (a temperatura usa temp_std_dev_multiplier).")
+
     try:
-        with psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(
-                    """
-                    INSERT INTO device_configs (device_id, temp_std_dev_multiplier)
-                    VALUES (%s, %s)
-                    ON CONFLICT (device_id) DO UPDATE SET
-                        temp_std_dev_multiplier = EXCLUDED.temp_std_dev_multiplier,
-                        last_updated = NOW();
-                    """,
-                    (config.device_id, config.temp_std_dev_multiplier)
-                )
-                conn.commit()
-                
-                cur.execute("SELECT * FROM device_configs WHERE device_id = %s;", (device_id,))
-                updated_config = cur.fetchone()
-                return updated_config
+        with get_connection() as conn:
+            # Grava, notifica os outros processos e aplica no detector e no cache deste processo.
+            (updated_config,) = save_configs(conn, [config.model_dump()])
+            return updated_config
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
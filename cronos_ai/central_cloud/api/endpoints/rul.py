@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from cronos_ai.shared.database import get_connection
+from cronos_ai.shared.serialization import cursor_columns, rows_response
+
+router = APIRouter()
+
+@router.get("/", response_model=List[Dict[str, Any]])
+def get_latest_predictions(
+    max_rul_hours: Optional[float] = Query(None, ge=0, description="Só dispositivos com RUL prevista até este valor"),
+    limit: int = Query(100, ge=1, le=10000, description="Número máximo de dispositivos")
+):
+    """Previsão de RUL mais recente de cada dispositivo, das menores (mais perto do fim de vida) para as maiores."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT * FROM (
+                        SELECT DISTINCT ON (device_id) time, device_id, rul_hours, model_version
+                        FROM rul_predictions
+                        WHERE time > NOW() - INTERVAL '1 day'
+                        ORDER BY device_id, time DESC
+                    ) latest
+                    WHERE %(max_rul)s::real IS NULL OR rul_hours <= %(max_rul)s::real
+                    ORDER BY rul_hours, device_id
+                    LIMIT %(limit)s;
+                """, {"max_rul": max_rul_hours, "limit": limit})
+                return rows_response(cursor_columns(cur), cur.fetchall())
+    except Exception as e:
+        print(f"API_ENDPOINT: Erro ao consultar previsões de RUL: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao buscar previsões de RUL.")
+
+@router.get("/{device_id}", response_model=List[Dict[str, Any]])
+def get_device_predictions(
+    device_id: str,
+    start_time: Optional[datetime] = Query(None, description="Data de início no formato ISO (ex: 2025-08-10T10:00:00)"),
+    end_time: Optional[datetime] = Query(None, description="Data de fim no formato ISO (ex: 2025-08-10T11:00:00)"),
+    limit: int = Query(100, ge=1, le=10000, description="Número máximo de previsões")
+):
+    """Histórico de previsões de RUL do dispositivo, da mais recente para a mais antiga."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                query = "SELECT time, device_id, rul_hours, model_version FROM rul_predictions WHERE device_id = %s"
+                params = [device_id]
+                if start_time:
+                    query += " AND time >= %s"
+                    params.append(start_time)
+                if end_time:
+                    query += " AND time <= %s"
+                    params.append(end_time)
+                cur.execute(query + " ORDER BY time DESC LIMIT %s;", (*params, limit))
+                columns, results = cursor_columns(cur), cur.fetchall()
+    except Exception as e:
+        print(f"API_ENDPOINT: Erro ao consultar previsões de RUL: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao buscar previsões de RUL.")
+    if not results:
+        raise HTTPException(status_code=404, detail="Nenhuma previsão de RUL encontrada para os critérios fornecidos.")
+    return rows_response(columns, results)
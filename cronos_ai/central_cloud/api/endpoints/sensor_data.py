@@ -1,63 +1,112 @@
 import boto3
 from fastapi import APIRouter, HTTPException, Query
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from cronos_ai.shared.database import get_connection
+from cronos_ai.shared.serialization import JSON_MEDIA_TYPE, cursor_columns, rows_response
+from cronos_ai.central_cloud.data_pipeline.rollups import plan_summary_query
+from cronos_ai.central_cloud.api.services.export_service import EXPORT_FORMATS, export_slots, stream_sensor_data
+from cronos_ai.central_cloud.api.services.fleet_cache import fetch_fleet, fleet_cache
+from cronos_ai.central_cloud.api.services.sensor_queries import next_sensor_cursor, plan_sensor_page_query
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "cronos_db")
-DB_USER = os.getenv("DB_USER", "cronos_user")
-DB_PASS = os.getenv("DB_PASS", "cronos_password")
-
-def get_db_connection():
-    return psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
-
 @router.get("/latest", response_model=List[Dict[str, Any]])
 def get_latest_sensor_data():
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
                 cur.execute("SELECT * FROM sensor_data ORDER BY time DESC LIMIT 10;")
-                results = cur.fetchall()
-                return results
+                return rows_response(cursor_columns(cur), cur.fetchall())
     except Exception as e:
         print(f"API_ENDPOINT: Erro ao consultar o TimescaleDB: {e}")
         raise HTTPException(status_code=500, detail="Erro ao buscar dados no banco de dados.")
 
+def _load_fleet():
+    with get_connection() as conn:
+        return fetch_fleet(conn)
+
+# Declarada antes de /{device_id} para "fleet" não ser lido como um device_id.
+@router.get("/fleet", response_model=List[Dict[str, Any]])
+def get_fleet_overview():
+    """
+    Estado atual de cada bomba: a leitura mais recente (com o health_factor) e os incidentes de
+    alerta abertos, servidos do cache em memória. O cabeçalho X-Fleet-Source indica se a resposta
+    saiu da memória ou precisou de carga do banco.
+    """
+    try:
+        source, body = fleet_cache.body(_load_fleet)
+    except Exception as e:
+        print(f"API_ENDPOINT: Erro ao carregar a visão da frota: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao buscar dados no banco de dados.")
+    return Response(body, media_type=JSON_MEDIA_TYPE, headers={"X-Fleet-Source": source})
+
 @router.get("/{device_id}", response_model=List[Dict[str, Any]])
 def get_sensor_data_by_device(
     device_id: str,
     start_time: Optional[datetime] = Query(None, description="Data de início no formato ISO (ex: 2025-08-10T10:00:00)"),
-    end_time: Optional[datetime] = Query(None, description="Data de fim no formato ISO (ex: 2025-08-10T11:00:00)")
+    end_time: Optional[datetime] = Query(None, description="Data de fim no formato ISO (ex: 2025-08-10T11:00:00)"),
+    before: Optional[str] = Query(None, description="Cursor de paginação: valor do cabeçalho X-Next-Cursor da página anterior"),
+    limit: int = Query(1000, ge=1, le=10000, description="Número máximo de leituras por página")
 ):
+    """
+    Leituras do dispositivo da mais recente para a mais antiga, paginadas por cursor de tempo.
+    Quando a página vem cheia, o cabeçalho X-Next-Cursor traz o `before` da próxima página.
+    """
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                query_params = [device_id]
-                query = "SELECT * FROM sensor_data WHERE device_id = %s"
-                if start_time:
-                    query += " AND time >= %s"
-                    query_params.append(start_time)
-                if end_time:
-                    query += " AND time <= %s"
-                    query_params.append(end_time)
-                query += " ORDER BY time DESC LIMIT 1000;"
-                
+        query, query_params = plan_sensor_page_query(device_id, start_time, end_time, before, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido.")
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
                 cur.execute(query, tuple(query_params))
                 results = cur.fetchall()
                 if not results:
                     raise HTTPException(status_code=404, detail=f"Nenhum dado encontrado para os critérios fornecidos.")
-                return results
+                columns = cursor_columns(cur)
+                headers = None
+                if len(results) == limit:
+                    time_index = columns.index("time")
+                    headers = {"X-Next-Cursor": next_sensor_cursor([row[time_index] for row in results], before)}
+                return rows_response(columns, results, headers)
     except HTTPException as e:
         raise e
     except Exception as e:
         print(f"API_ENDPOINT: Erro ao consultar o TimescaleDB por device_id: {e}")
         raise HTTPException(status_code=500, detail="Erro ao buscar dados no banco de dados.")
 
+@router.get("/{device_id}/export")
+def export_sensor_data(
+    device_id: str,
+    format: str = Query("ndjson", description=f"Formato da exportação: {', '.join(EXPORT_FORMATS)}"),
+    start_time: Optional[datetime] = Query(None, description="Data de início no formato ISO (ex: 2025-08-10T10:00:00)"),
+    end_time: Optional[datetime] = Query(None, description="Data de fim no formato ISO (ex: 2025-08-10T11:00:00)")
+):
+    """Exporta todo o histórico do período em ordem cronológica, em streaming e com memória constante."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Use um de: {', '.join(EXPORT_FORMATS)}.")
+    if not export_slots.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail="Muitas exportações em andamento. Tente novamente em instantes.")
+    try:
+        body = stream_sensor_data(device_id, start_time, end_time, fmt=format)
+    except ValueError as e:
+        export_slots.release()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        export_slots.release()
+        print(f"API_ENDPOINT: Erro ao iniciar exportação: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao exportar dados do banco de dados.")
+    filename = f"{device_id}.{'arrows' if format == 'arrow' else format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        background=BackgroundTask(export_slots.release),
+    )
+
 @router.get("/{device_id}/summary", response_model=List[Dict[str, Any]])
 def get_device_summary(
     device_id: str,
@@ -65,27 +114,46 @@ def get_device_summary(
     start_time: datetime = Query(default_factory=lambda: datetime.now() - timedelta(days=1)),
     end_time: datetime = Query(default_factory=datetime.now)
 ):
+    """Sumário por bucket de todos os canais, servido pelo rollup mais grosso que responde ao intervalo."""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                query = """
-                    SELECT
-                        time_bucket(%s, time) AS bucket,
-                        AVG(temperature_c) AS avg_temperature,
-                        MAX(vibration_radial_mms) AS max_vibration,
-                        MIN(pressure_in_bar) AS min_pressure_in,
-                        MAX(pressure_out_bar) AS max_pressure_out,
-                        AVG(current_a) AS avg_current
-                    FROM sensor_data
-                    WHERE device_id = %s AND time BETWEEN %s AND %s
-                    GROUP BY bucket
-                    ORDER BY bucket DESC;
-                """
-                cur.execute(query, (interval, device_id, start_time, end_time))
+        query, params, source = plan_summary_query(device_id, interval, start_time, end_time)
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
                 results = cur.fetchall()
                 if not results:
                      raise HTTPException(status_code=404, detail=f"Nenhum dado de sumário encontrado para os critérios fornecidos.")
-                return results
+                return rows_response(cursor_columns(cur), results, {"X-Summary-Source": source})
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"API_ENDPOINT: Erro ao gerar sumário: {e}")
-        raise HTTPException(status_code=500, detail="Erro ao gerar sumário dos dados.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erro ao gerar sumário dos dados.")
+
+@router.get("/{device_id}/features", response_model=List[Dict[str, Any]])
+def get_device_features(
+    device_id: str,
+    start_time: Optional[datetime] = Query(None, description="Data de início no formato ISO (ex: 2025-08-10T10:00:00)"),
+    end_time: Optional[datetime] = Query(None, description="Data de fim no formato ISO (ex: 2025-08-10T11:00:00)"),
+    limit: int = Query(288, ge=1, le=10000, description="Número máximo de resumos (288 = 1 dia de blocos de 5 minutos)")
+):
+    """Resumos por bloco calculados na borda (features de cada canal), do mais recente para o mais antigo."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                query = "SELECT time, window_start, device_id, readings, features FROM sensor_summaries WHERE device_id = %s"
+                params = [device_id]
+                if start_time:
+                    query += " AND time >= %s"
+                    params.append(start_time)
+                if end_time:
+                    query += " AND time <= %s"
+                    params.append(end_time)
+                cur.execute(query + " ORDER BY time DESC LIMIT %s;", (*params, limit))
+                columns, results = cursor_columns(cur), cur.fetchall()
+    except Exception as e:
+        print(f"API_ENDPOINT: Erro ao consultar resumos da borda: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao buscar resumos no banco de dados.")
+    if not results:
+        raise HTTPException(status_code=404, detail="Nenhum resumo encontrado para os critérios fornecidos.")
+    return rows_response(columns, results)
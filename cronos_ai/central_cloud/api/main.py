@@ -1,7 +1,45 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .endpoints import sensor_data, alerts, configurations
-from .services.sqs_consumer_service import start_consumer_thread
+from .endpoints import sensor_data, alerts, configurations, rul
+from .services.sqs_consumer_service import CONSUMER_MODE, start_consumer_thread, anomaly_detector_n2
+from .services.alert_stream import alert_broker, start_alert_listener
+from .services.config_service import config_cache, start_config_listener
+from .services.fleet_cache import fleet_cache
+from cronos_ai.shared import metrics
+from cronos_ai.shared.database import db_pool
+
+# endpoint -> template completo da rota (prefixo do router incluído + caminho), preenchido abaixo.
+ROUTE_TEMPLATES = {}
+
+class RequestMetricsMiddleware:
+    """
+    Latência por rota até o início da resposta (status + headers), como middleware ASGI puro:
+    não envolve o corpo, então o stream SSE e o export não ficam presos nele. A rota é o
+    template (`/api/v1/sensordata/{device_id}`), para a cardinalidade não crescer por dispositivo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        observed = False
+
+        async def send_wrapper(message):
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                metrics.HTTP_REQUEST_SECONDS.labels(
+                    method=scope["method"], route=ROUTE_TEMPLATES.get(scope.get("endpoint"), "unmatched"),
+                    status=message["status"],
+                ).observe(time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
 app = FastAPI(title="Cronos AI API")
 
@@ -10,15 +48,66 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+
+metrics.gauge_from("cronos_db_pool_in_use", "Conexões do pool da API em uso.", lambda: db_pool.stats()["in_use"])
+metrics.gauge_from("cronos_alert_stream_subscribers", "Clientes conectados ao stream de alertas.",
+                   lambda: alert_broker.stats()["subscribers"])
+metrics.gauge_from("cronos_detector_devices", "Dispositivos com configuração carregada no detector N2 da API.",
+                   lambda: len(anomaly_detector_n2.configs))
 
 @app.on_event("startup")
 def on_startup():
     start_consumer_thread()
+    # Com o consumidor fora da API, os alertas novos chegam ao stream e as alterações de
+    # configuração ao cache via LISTEN/NOTIFY (no modo embutido o motor de consumo já escuta).
+    if CONSUMER_MODE != "embedded":
+        start_alert_listener()
+        start_config_listener()
 
-app.include_router(sensor_data.router, prefix="/api/v1/sensordata", tags=["Sensor Data"])
-app.include_router(alerts.router, prefix="/api/v1/alerts", tags=["Alerts"])
-app.include_router(configurations.router, prefix="/api/v1/configurations", tags=["Configurations"])
+ROUTERS = (
+    (sensor_data.router, "/api/v1/sensordata", "Sensor Data"),
+    (alerts.router, "/api/v1/alerts", "Alerts"),
+    (configurations.router, "/api/v1/configurations", "Configurations"),
+    (rul.router, "/api/v1/rul", "RUL"),
+)
+for router, prefix, tag in ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
+    ROUTE_TEMPLATES.update({route.endpoint: prefix + route.path for route in router.routes})
 
 @app.get("/")
 def read_root():
-    return {"message": "Bem-vindo à API do Cronos AI!"}
\ No newline at end of file
+    return {"message": "Bem-vindo à API do Cronos AI!"}
+
+@app.get("/health/db")
+def read_db_pool_stats():
+    """Uso do pool de conexões compartilhado e tempo de espera por conexão."""
+    return db_pool.stats()
+
+@app.get("/health/detector")
+def read_detector_memory():
+    """Memória ocupada pelas janelas do detector N2 embutido na API."""
+    return anomaly_detector_n2.stats.memory_report()
+
+@app.get("/health/config-cache")
+def read_config_cache_stats():
+    """Entradas, acertos e faltas do cache de configurações por dispositivo."""
+    return config_cache.stats()
+
+@app.get("/health/fleet-cache")
+def read_fleet_cache_stats():
+    """Dispositivos no cache da visão da frota, atualizações do consumidor e cargas do banco."""
+    return fleet_cache.stats()
+
+@app.get("/health/alert-stream")
+def read_alert_stream_stats():
+    """Clientes conectados ao stream de alertas, eventos publicados e descartados por backpressure."""
+    return alert_broker.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Exposição Prometheus (consumidor embutido, auto-tuner e latência das rotas)."""
+    body, content_type = metrics.exposition()
+    return Response(content=body, media_type=content_type)
+
+ROUTE_TEMPLATES.update({route.endpoint: route.path for route in app.router.routes if hasattr(route, "endpoint")})
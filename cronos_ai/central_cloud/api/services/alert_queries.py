@@ -0,0 +1,67 @@
+"""
+Consulta da API de alertas: filtros, paginação por cursor (time, id) e os índices que a sustentam.
+
+A ordenação é sempre `time DESC, id DESC`; o cursor da próxima página é o par (time, id) da última
+linha, codificado como texto opaco e devolvido no cabeçalho X-Next-Cursor.
+"""
+from cronos_ai.shared.serialization import decode_page_cursor, encode_page_cursor
+
+ALERT_LIST_COLUMNS = ("id", "time", "device_id", "alert_type", "alert_value", "status",
+                      "last_time", "occurrences", "peak_value", "closed_at")
+
+# Criados por setup_database. O índice parcial de pendentes atende à fila de trabalho do dashboard,
+# o de falsos positivos por feedback_at atende ao auto-tuner incremental (feedback depois da marca d'água)
+# e o de incidentes abertos atende à recuperação do AlertCoalescer na inicialização dos workers.
+ALERT_INDEXES = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_time_id_idx ON alerts (time DESC, id DESC);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_device_time_idx ON alerts (device_id, time DESC, id DESC);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_status_time_idx ON alerts (status, time DESC, id DESC) INCLUDE (device_id);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_type_time_idx ON alerts (alert_type, time DESC, id DESC);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_pending_time_idx ON alerts (time DESC, id DESC) WHERE status = 'pending';",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_false_feedback_idx ON alerts (feedback_at) INCLUDE (device_id, alert_type) WHERE status = 'confirmed_false';",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_open_incidents_idx ON alerts (last_time) INCLUDE (device_id, alert_type) WHERE closed_at IS NULL AND last_time IS NOT NULL;",
+)
+
+def create_alert_indexes(conn):
+    """Cria os índices de `alerts` sem bloquear a ingestão (CONCURRENTLY exige autocommit)."""
+    previous = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for ddl in ALERT_INDEXES:
+                cur.execute(ddl)
+    finally:
+        conn.autocommit = previous
+
+def encode_cursor(row):
+    return encode_page_cursor(row['time'], row['id'])
+
+def decode_cursor(cursor):
+    """Converte o X-Next-Cursor de volta em (time, id); levanta ValueError se estiver malformado."""
+    return decode_page_cursor(cursor)
+
+def plan_alerts_query(device_id=None, alert_type=None, status=None, start_time=None, end_time=None,
+                      cursor=None, limit=100, include_payload=False):
+    """Monta (sql, params) da listagem de alertas com os filtros informados."""
+    columns = ALERT_LIST_COLUMNS + (("full_payload", "close_payload") if include_payload else ())
+    conditions = []
+    params = []
+    for clause, value in (
+        ("device_id = %s", device_id),
+        ("alert_type = %s", alert_type),
+        ("status = %s", status),
+        ("time >= %s", start_time),
+        ("time <= %s", end_time),
+    ):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    if cursor is not None:
+        conditions.append("(time, id) < (%s, %s)")
+        params.extend(decode_cursor(cursor))
+    query = f"SELECT {', '.join(columns)} FROM alerts"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY time DESC, id DESC LIMIT %s;"
+    params.append(limit)
+    return query, params
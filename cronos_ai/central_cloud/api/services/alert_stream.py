@@ -0,0 +1,247 @@
+"""
+Canal de alertas em tempo real para o dashboard (Server-Sent Events em /api/v1/alerts/stream).
+
+O `AlertBroker` recebe os alertas logo depois do commit e os distribui para todos os clientes
+conectados sem tocar no banco. Duas fontes alimentam o broker:
+
+- consumidor embutido (CONSUMER_MODE=embedded): o BatchWriter chama `alert_broker.publish`
+  com as linhas devolvidas pelo INSERT ... RETURNING;
+- consumidor externo: cada lote gravado emite NOTIFY no canal ALERT_CHANNEL com a faixa de ids
+  inserida, e a thread de `listen_for_alerts` busca essas linhas uma única vez para todos os clientes.
+
+Cada cliente tem uma fila própria e limitada; um cliente lento perde os eventos mais antigos da
+fila, e o gerador do stream recupera a lacuna pelo buffer de replay (ou pelo banco) antes de seguir.
+O mesmo buffer atende a reconexão com Last-Event-ID. Quando a lacuna não tem como ser
+completada (conexão sem Last-Event-ID ou mais de ALERT_STREAM_REPLAY alertas perdidos), o stream
+envia um evento `reset` e o dashboard recarrega a lista.
+"""
+import asyncio
+import json
+import os
+import select
+import threading
+from collections import deque
+
+from psycopg2.extras import RealDictCursor
+from starlette.concurrency import run_in_threadpool
+
+from cronos_ai.central_cloud.data_pipeline.ingestion import ALERT_CHANNEL, ALERT_RETURNING as ALERT_EVENT_COLUMNS
+from cronos_ai.shared import database
+
+ALERT_STREAM_CLIENT_BUFFER = int(os.getenv("ALERT_STREAM_CLIENT_BUFFER", "256"))
+ALERT_STREAM_REPLAY = int(os.getenv("ALERT_STREAM_REPLAY", "1000"))
+ALERT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("ALERT_STREAM_HEARTBEAT_SECONDS", "15"))
+
+def _event_data(alert):
+    alert = dict(alert)
+    if hasattr(alert.get("time"), "isoformat"):
+        alert["time"] = alert["time"].isoformat()
+    return json.dumps(alert, separators=(",", ":"))
+
+def format_event(event, alert):
+    """Serializa um alerta no formato SSE; só eventos 'alert' levam id (usado na retomada)."""
+    lines = [f"event: {event}"]
+    if event == "alert":
+        lines.append(f"id: {alert['id']}")
+    lines.append(f"data: {_event_data(alert)}")
+    return "\n".join(lines) + "\n\n"
+
+def fetch_alerts(conn, after_id=None, ids=None, limit=ALERT_STREAM_REPLAY):
+    """Alertas com id > after_id, ou com id entre (primeiro, último) de `ids`, em ordem de id."""
+    query = f"SELECT {', '.join(ALERT_EVENT_COLUMNS)} FROM alerts WHERE "
+    if ids is not None:
+        query += "id BETWEEN %s AND %s ORDER BY id;"
+        params = list(ids)
+    else:
+        query += "id > %s ORDER BY id LIMIT %s;"
+        params = [after_id, limit]
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+class Subscriber:
+    """Fila de um cliente SSE, preenchida por qualquer thread e lida pelo event loop da requisição."""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = deque(maxlen=maxsize)
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, item):
+        # Chamado com o lock do broker; deque(maxlen) descarta o mais antigo quando cheia.
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(item)
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            pass  # event loop já encerrado; o cliente será removido pelo próprio gerador.
+
+class AlertBroker:
+    """Distribuição de alertas para os clientes do stream, com buffer de replay para retomada."""
+
+    def __init__(self, client_buffer=ALERT_STREAM_CLIENT_BUFFER, replay_size=ALERT_STREAM_REPLAY):
+        self.client_buffer = client_buffer
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._replay = deque(maxlen=replay_size)
+        self._replay_ids = set()
+        self.published = 0
+
+    def subscribe(self, loop):
+        subscriber = Subscriber(loop, self.client_buffer)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, alerts):
+        """Publica alertas recém-gravados; ids já publicados são ignorados (NOTIFY e RETURNING podem se sobrepor)."""
+        with self._lock:
+            for alert in alerts:
+                alert = {column: alert[column] for column in ALERT_EVENT_COLUMNS}
+                if alert["id"] in self._replay_ids:
+                    continue
+                if len(self._replay) == self._replay.maxlen:
+                    self._replay_ids.discard(self._replay[0]["id"])
+                self._replay.append(alert)
+                self._replay_ids.add(alert["id"])
+                self.published += 1
+                for subscriber in self._subscribers:
+                    subscriber.offer(("alert", alert))
+
+    def publish_status(self, alert):
+        """Avisa os clientes de uma mudança de status (feedback dado em outra aba)."""
+        update = {"id": alert["id"], "status": alert["status"]}
+        with self._lock:
+            for alert_in_replay in self._replay:
+                if alert_in_replay["id"] == update["id"]:
+                    alert_in_replay["status"] = update["status"]
+            for subscriber in self._subscribers:
+                subscriber.offer(("status", update))
+
+    def replay_after(self, last_id):
+        """
+        Alertas publicados depois de `last_id`, na ordem de publicação, ou None se `last_id`
+        já saiu do buffer (nesse caso o chamador busca no banco).
+        """
+        with self._lock:
+            if last_id not in self._replay_ids:
+                return None
+            events = list(self._replay)
+        for position, alert in enumerate(events):
+            if alert["id"] == last_id:
+                return events[position + 1:]
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "replay_buffered": len(self._replay),
+                "dropped": sum(s.dropped for s in self._subscribers),
+            }
+
+alert_broker = AlertBroker()
+
+def _backlog(last_id):
+    """
+    Alertas perdidos desde `last_id`, do buffer de replay quando possível, senão do banco, ou
+    None se forem mais que ALERT_STREAM_REPLAY (a busca no banco cortaria o resto).
+    """
+    events = alert_broker.replay_after(last_id)
+    if events is not None:
+        return events
+    with database.get_connection() as conn:
+        events = fetch_alerts(conn, after_id=last_id)
+    return events if len(events) < ALERT_STREAM_REPLAY else None
+
+RESET_EVENT = format_event("reset", {})
+
+async def event_stream(request, last_id=None):
+    """Gerador SSE de uma conexão: envia o backlog desde `last_id`, depois os alertas novos."""
+    # Inscreve antes de ler o backlog para não perder o que chegar no meio; repetidos são pulados.
+    subscriber = alert_broker.subscribe(asyncio.get_running_loop())
+    sent_in_backlog = set()
+    try:
+        yield "retry: 3000\n\n"
+        backlog = None if last_id is None else await run_in_threadpool(_backlog, last_id)
+        if backlog is None:
+            # Sem ponto de retomada (ou lacuna grande demais): o cliente recarrega a lista.
+            last_id = None
+            yield RESET_EVENT
+        for alert in backlog or ():
+            last_id = alert["id"]
+            sent_in_backlog.add(last_id)
+            yield format_event("alert", alert)
+        while not await request.is_disconnected():
+            try:
+                await asyncio.wait_for(subscriber.wakeup.wait(), ALERT_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            subscriber.wakeup.clear()
+            if subscriber.dropped:
+                # A fila deste cliente transbordou: descarta o que sobrou e retoma do último id entregue.
+                subscriber.queue.clear()
+                subscriber.dropped = 0
+                backlog = None if last_id is None else await run_in_threadpool(_backlog, last_id)
+                if backlog is None:
+                    last_id = None
+                    yield RESET_EVENT
+                for alert in backlog or ():
+                    last_id = alert["id"]
+                    yield format_event("alert", alert)
+                continue
+            while subscriber.queue:
+                event, alert = subscriber.queue.popleft()
+                if event == "alert":
+                    if alert["id"] in sent_in_backlog:
+                        continue
+                    last_id = alert["id"]
+                yield format_event(event, alert)
+    finally:
+        alert_broker.unsubscribe(subscriber)
+
+def listen_for_alerts(broker=alert_broker, connect=database.connect, stop=None):
+    """
+    Alimenta o broker a partir do NOTIFY emitido pelo consumidor externo. Usa uma conexão
+    dedicada em autocommit; cada notificação traz 'primeiro_id,último_id' do lote gravado.
+    """
+    conn = connect()
+    if not conn:
+        print("ALERT_STREAM: Sem conexão com o banco; stream alimentado apenas em processo.")
+        return
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {ALERT_CHANNEL};")
+    print(f"ALERT_STREAM: Escutando o canal {ALERT_CHANNEL}.")
+    try:
+        while stop is None or not stop.is_set():
+            if select.select([conn], [], [], 5.0) == ([], [], []):
+                continue
+            conn.poll()
+            ranges = []
+            while conn.notifies:
+                payload = conn.notifies.pop(0).payload
+                try:
+                    first_id, last_id = (int(part) for part in payload.split(","))
+                    ranges.append((first_id, last_id))
+                except ValueError:
+                    print(f"ALERT_STREAM: Notificação inválida ignorada: {payload!r}")
+            for id_range in ranges:
+                broker.publish(fetch_alerts(conn, ids=id_range))
+    except Exception as e:
+        print(f"ALERT_STREAM: Listener encerrado por erro: {e}")
+    finally:
+        conn.close()
+
+def start_alert_listener():
+    thread = threading.Thread(target=listen_for_alerts, daemon=True)
+    thread.start()
+    return thread
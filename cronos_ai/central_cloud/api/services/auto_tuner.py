@@ -0,0 +1,156 @@
+"""
+Auto-tuner incremental do detector N2.
+
+Cada ciclo processa só o feedback `confirmed_false` registrado depois da marca d'água
+(`auto_tuner_state.watermark`, comparada com `alerts.feedback_at`) e calcula os novos
+multiplicadores de todos os dispositivos afetados em uma única instrução SQL. Cada alerta N2
+é atribuído ao canal que o gerou (HighTemperatureN2 -> temperature_c). Os primeiros
+AUTO_TUNER_MIN_FALSE_POSITIVES falsos positivos de um canal em um dispositivo não mudam nada;
+a partir daí, cada AUTO_TUNER_FALSE_POSITIVES_PER_STEP falsos positivos multiplicam o
+multiplicador desse canal por AUTO_TUNER_STEP (proporcionalmente para contagens parciais), até
+AUTO_TUNER_MAX_MULTIPLIER. A temperatura continua em `temp_std_dev_multiplier`; os demais
+canais ficam em `channel_multipliers` (JSONB).
+
+O serviço verifica a cada AUTO_TUNER_POLL_SECONDS quanto feedback novo existe e roda um ciclo
+quando passa de AUTO_TUNER_FEEDBACK_TRIGGER ou quando AUTO_TUNER_INTERVAL_SECONDS se passaram
+desde o último. A marca d'água é lida com FOR UPDATE, então réplicas concorrentes não aplicam
+o mesmo feedback duas vezes.
+"""
+import os
+import time
+
+from psycopg2.extras import RealDictCursor
+
+from cronos_ai.shared import database, metrics
+from cronos_ai.central_cloud.api.services.config_service import CONFIG_CHANNEL, CONFIG_COLUMNS, config_bus, notify_configs
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import N2_CHANNELS
+
+AUTO_TUNER_INTERVAL_SECONDS = float(os.getenv("AUTO_TUNER_INTERVAL_SECONDS", "3600"))
+AUTO_TUNER_POLL_SECONDS = float(os.getenv("AUTO_TUNER_POLL_SECONDS", "60"))
+AUTO_TUNER_FEEDBACK_TRIGGER = int(os.getenv("AUTO_TUNER_FEEDBACK_TRIGGER", "50"))
+AUTO_TUNER_FALSE_POSITIVES_PER_STEP = float(os.getenv("AUTO_TUNER_FALSE_POSITIVES_PER_STEP", "5"))
+# Falsos positivos acumulados de um canal (no dispositivo) antes que ele comece a ser ajustado.
+AUTO_TUNER_MIN_FALSE_POSITIVES = int(os.getenv("AUTO_TUNER_MIN_FALSE_POSITIVES", "3"))
+AUTO_TUNER_STEP = float(os.getenv("AUTO_TUNER_STEP", "1.1"))
+AUTO_TUNER_MAX_MULTIPLIER = float(os.getenv("AUTO_TUNER_MAX_MULTIPLIER", "10.0"))
+# Feedback gravado há menos que isso fica para o próximo ciclo (transações ainda não confirmadas).
+AUTO_TUNER_SETTLE_SECONDS = float(os.getenv("AUTO_TUNER_SETTLE_SECONDS", "10"))
+# Memória das agregações do ciclo; com o padrão do Postgres (4MB) elas vão para disco a partir de ~50k dispositivos.
+AUTO_TUNER_WORK_MEM = os.getenv("AUTO_TUNER_WORK_MEM", "64MB")
+DEFAULT_STD_DEV_MULTIPLIER = 3.0
+TUNER_NAME = "n2"
+
+def channel_map():
+    """(tipos de alerta, canais) paralelos: High<Rótulo>N2 e Low<Rótulo>N2 de cada canal do N2."""
+    types, channels = [], []
+    for field, label, _ in N2_CHANNELS:
+        for prefix in ("High", "Low"):
+            types.append(f"{prefix}{label}N2")
+            channels.append(field)
+    return types, channels
+
+TUNE_SQL = f"""
+    WITH new_feedback AS (
+        SELECT a.device_id, m.channel, count(*) AS n
+        FROM alerts a
+        JOIN unnest(%(types)s::text[], %(channels)s::text[]) AS m(alert_type, channel) USING (alert_type)
+        WHERE a.status = 'confirmed_false' AND a.feedback_at > %(since)s AND a.feedback_at <= %(until)s
+        GROUP BY a.device_id, m.channel
+    ), totals AS (
+        SELECT a.device_id, m.channel, count(*) AS total
+        FROM alerts a
+        JOIN unnest(%(types)s::text[], %(channels)s::text[]) AS m(alert_type, channel) USING (alert_type)
+        WHERE a.status = 'confirmed_false' AND a.feedback_at <= %(until)s
+          AND a.device_id IN (SELECT device_id FROM new_feedback)
+        GROUP BY a.device_id, m.channel
+    ), false_positives AS (
+        -- Só a parte do feedback novo que passa do mínimo acumulado conta para o ajuste.
+        SELECT nf.device_id, nf.channel,
+               GREATEST(t.total - %(min)s, 0) - GREATEST(t.total - nf.n - %(min)s, 0) AS n
+        FROM new_feedback nf
+        JOIN totals t USING (device_id, channel)
+    ), tuned AS (
+        SELECT fp.device_id, fp.channel, d.temp_std_dev_multiplier AS base_temperature, d.channel_multipliers AS base_channels,
+               LEAST(%(max)s::float8, COALESCE(
+                   CASE WHEN fp.channel = 'temperature_c' THEN d.temp_std_dev_multiplier::float8
+                        ELSE (d.channel_multipliers ->> fp.channel)::float8 END,
+                   %(default)s::float8) * power(%(step)s::float8, fp.n / %(per_step)s::float8)) AS multiplier
+        FROM false_positives fp
+        LEFT JOIN device_configs d USING (device_id)
+        WHERE fp.n > 0
+    )
+    INSERT INTO device_configs AS c (device_id, temp_std_dev_multiplier, channel_multipliers)
+    SELECT device_id,
+           COALESCE(max(multiplier) FILTER (WHERE channel = 'temperature_c'), base_temperature, %(default)s::float8),
+           COALESCE(base_channels, '{{}}'::jsonb)
+               || COALESCE(jsonb_object_agg(channel, multiplier) FILTER (WHERE channel <> 'temperature_c'), '{{}}'::jsonb)
+    FROM tuned
+    GROUP BY device_id, base_temperature, base_channels
+    ON CONFLICT (device_id) DO UPDATE SET
+        temp_std_dev_multiplier = EXCLUDED.temp_std_dev_multiplier,
+        channel_multipliers = EXCLUDED.channel_multipliers,
+        last_updated = NOW()
+    RETURNING {', '.join(f'c.{column}' for column in CONFIG_COLUMNS)};
+"""
+
+def _lock_watermark(cur, name):
+    cur.execute("INSERT INTO auto_tuner_state (name, watermark) VALUES (%s, '-infinity') ON CONFLICT (name) DO NOTHING;", (name,))
+    cur.execute("SELECT watermark, clock_timestamp() - make_interval(secs => %s) AS until FROM auto_tuner_state WHERE name = %s FOR UPDATE;",
+                (AUTO_TUNER_SETTLE_SECONDS, name))
+    return cur.fetchone()
+
+def pending_feedback(conn, name=TUNER_NAME):
+    """Falsos positivos registrados depois da marca d'água (índice parcial alerts_false_feedback_idx)."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT count(*) FROM alerts
+            WHERE status = 'confirmed_false'
+              AND feedback_at > COALESCE((SELECT watermark FROM auto_tuner_state WHERE name = %s), '-infinity');
+        """, (name,))
+        count = cur.fetchone()[0]
+    conn.rollback()
+    return count
+
+def tune_once(conn, name=TUNER_NAME, bus=config_bus, channel=CONFIG_CHANNEL):
+    """
+    Um ciclo: aplica o feedback novo em uma transação (multiplicadores, NOTIFY e marca d'água)
+    e publica as configurações alteradas no bus local. Devolve as linhas alteradas.
+    """
+    types, channels = channel_map()
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        state = _lock_watermark(cur, name)
+        cur.execute("SELECT set_config('work_mem', %s, true);", (AUTO_TUNER_WORK_MEM,))
+        cur.execute(TUNE_SQL, {
+            "types": types, "channels": channels, "since": state["watermark"], "until": state["until"],
+            "step": AUTO_TUNER_STEP, "per_step": AUTO_TUNER_FALSE_POSITIVES_PER_STEP, "min": AUTO_TUNER_MIN_FALSE_POSITIVES,
+            "max": AUTO_TUNER_MAX_MULTIPLIER, "default": DEFAULT_STD_DEV_MULTIPLIER,
+        })
+        rows = [dict(row) for row in cur.fetchall()]
+        notify_configs(cur, rows, channel)
+        cur.execute("UPDATE auto_tuner_state SET watermark = %s, last_run = NOW(), devices_tuned = %s WHERE name = %s;",
+                    (state["until"], len(rows), name))
+    conn.commit()
+    if bus is not None:
+        bus.publish(rows)
+    return rows
+
+def auto_tuner_service(stop=None):
+    """Serviço que roda em background para ajustar a sensibilidade dos alertas."""
+    print("AUTO_TUNER: Serviço de autoajuste iniciado.")
+    last_cycle = time.monotonic()
+    while stop is None or not stop.is_set():
+        time.sleep(AUTO_TUNER_POLL_SECONDS)
+        try:
+            with database.get_connection() as db_conn:
+                pending = pending_feedback(db_conn)
+                due = time.monotonic() - last_cycle >= AUTO_TUNER_INTERVAL_SECONDS
+                if not pending or (pending < AUTO_TUNER_FEEDBACK_TRIGGER and not due):
+                    continue
+                print(f"AUTO_TUNER: {pending} falso(s) positivo(s) novo(s); ajustando sensibilidade...")
+                with metrics.AUTO_TUNER_CYCLE_SECONDS.time():
+                    rows = tune_once(db_conn)
+                last_cycle = time.monotonic()
+                metrics.AUTO_TUNER_DEVICES_TUNED.inc(len(rows))
+                print(f"AUTO_TUNER: {len(rows)} dispositivo(s) ajustado(s).")
+        except Exception as e:
+            print(f"AUTO_TUNER: Erro durante o ciclo de ajuste: {e}")
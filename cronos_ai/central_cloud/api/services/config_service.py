@@ -0,0 +1,251 @@
+"""
+Propagação incremental das configurações de dispositivo (device_configs).
+
+Toda alteração passa por `save_configs`: grava a(s) linha(s), emite um NOTIFY no canal
+CONFIG_CHANNEL na mesma transação e, depois do commit, publica as linhas no `config_bus`
+deste processo. Os assinantes do bus (detector N2, cache do GET /configurations) aplicam só
+as linhas alteradas, em vez de recarregar a tabela inteira.
+
+Outros processos (workers do consumidor externo, outras réplicas da API) recebem as mesmas
+linhas pelo NOTIFY através de `ConfigListener`, que as republica no bus local. Ao (re)conectar,
+o listener devolve a tabela inteira uma vez, para cobrir o que mudou enquanto estava fora.
+"""
+import json
+import select
+import threading
+import time
+from datetime import datetime
+
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+from cronos_ai.shared import database
+
+CONFIG_CHANNEL = "cronos_device_configs"
+# Limite do payload do NOTIFY é 8000 bytes; as linhas são agrupadas abaixo disso.
+NOTIFY_MAX_BYTES = 7500
+CONFIG_CACHE_MAX_ENTRIES = 10000
+CONFIG_LISTENER_RETRY_SECONDS = 30
+CONFIG_COLUMNS = ("device_id", "temp_std_dev_multiplier", "channel_multipliers", "last_updated")
+
+_JSON = json.JSONEncoder(separators=(",", ":"))
+
+def _encode(row):
+    return {**row, "last_updated": row["last_updated"].isoformat() if row.get("last_updated") else None}
+
+def _decode(row):
+    if row.get("last_updated"):
+        row["last_updated"] = datetime.fromisoformat(row["last_updated"])
+    return row
+
+def notify_payloads(rows, max_bytes=NOTIFY_MAX_BYTES):
+    """Divide as linhas em payloads JSON (listas) que cabem no NOTIFY."""
+    payloads, chunk, size = [], [], 2
+    for row in rows:
+        encoded = _JSON.encode(_encode(row))
+        if chunk and size + len(encoded) + 1 > max_bytes:
+            payloads.append("[" + ",".join(chunk) + "]")
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        payloads.append("[" + ",".join(chunk) + "]")
+    return payloads
+
+class ConfigBus:
+    """
+    Distribui linhas de device_configs alteradas para os assinantes do processo. Descarta
+    linhas mais antigas que a última já vista do mesmo dispositivo (um NOTIFY atrasado não
+    desfaz uma alteração local mais nova).
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler):
+        """`handler(rows)` é chamado com a lista de linhas novas de cada publicação."""
+        self._handlers.append(handler)
+
+    def publish(self, rows):
+        with self._lock:
+            fresh = []
+            for row in rows:
+                seen = self._versions.get(row["device_id"])
+                if seen is not None and row.get("last_updated") is not None and row["last_updated"] < seen:
+                    continue
+                self._versions[row["device_id"]] = row.get("last_updated")
+                fresh.append(row)
+        for handler in self._handlers:
+            try:
+                handler(fresh)
+            except Exception as e:
+                print(f"CONFIG: Falha ao aplicar {len(fresh)} configuração(ões): {e}")
+        return len(fresh)
+
+config_bus = ConfigBus()
+
+def notify_configs(cur, rows, channel=CONFIG_CHANNEL):
+    """NOTIFY das linhas gravadas (um round trip para todos os payloads); entregue só no commit da transação de `cur`."""
+    payloads = notify_payloads(rows)
+    if payloads:
+        cur.execute("SELECT count(pg_notify(%s, payload)) FROM unnest(%s::text[]) AS payload;", (channel, payloads))
+
+def save_configs(conn, configs, bus=config_bus):
+    """
+    UPSERT das configurações (dicts com device_id, temp_std_dev_multiplier e channel_multipliers)
+    em uma transação, com NOTIFY das linhas gravadas; publica no bus local depois do commit.
+    """
+    values = [(c["device_id"], c["temp_std_dev_multiplier"], Json(c.get("channel_multipliers") or {})) for c in configs]
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        rows = execute_values(
+            cur,
+            f"""
+            INSERT INTO device_configs (device_id, temp_std_dev_multiplier, channel_multipliers) VALUES %s
+            ON CONFLICT (device_id) DO UPDATE SET
+                temp_std_dev_multiplier = EXCLUDED.temp_std_dev_multiplier,
+                channel_multipliers = EXCLUDED.channel_multipliers,
+                last_updated = NOW()
+            RETURNING {', '.join(CONFIG_COLUMNS)};
+            """,
+            values,
+            page_size=max(len(values), 1),
+            fetch=True,
+        )
+        rows = [dict(row) for row in rows]
+        notify_configs(cur, rows)
+    conn.commit()
+    bus.publish(rows)
+    return rows
+
+def fetch_configs(conn, device_id=None):
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        if device_id is None:
+            cur.execute(f"SELECT {', '.join(CONFIG_COLUMNS)} FROM device_configs;")
+        else:
+            cur.execute(f"SELECT {', '.join(CONFIG_COLUMNS)} FROM device_configs WHERE device_id = %s;", (device_id,))
+        return [dict(row) for row in cur.fetchall()]
+
+class ConfigCache:
+    """
+    Cache read-through do GET /configurations: uma consulta por dispositivo na primeira leitura
+    (inclusive "sem configuração", guardado como None) e atualizado pelo bus a cada alteração.
+    """
+
+    def __init__(self, max_entries=CONFIG_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._loading = set()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, device_id, load):
+        """Configuração do dispositivo (ou None); `load(device_id)` só é chamado em um miss."""
+        with self._lock:
+            if device_id in self._entries:
+                self.hits += 1
+                return self._entries[device_id]
+            self.misses += 1
+            self._loading.add(device_id)
+        try:
+            row = load(device_id)
+        finally:
+            with self._lock:
+                self._loading.discard(device_id)
+        with self._lock:
+            # Uma alteração publicada durante a consulta prevalece sobre o resultado dela.
+            self._entries.setdefault(device_id, row)
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            return self._entries[device_id]
+
+    def apply(self, rows):
+        with self._lock:
+            for row in rows:
+                if row["device_id"] in self._entries or row["device_id"] in self._loading:
+                    self._entries[row["device_id"]] = row
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+config_cache = ConfigCache()
+config_bus.subscribe(config_cache.apply)
+
+class ConfigListener:
+    """
+    LISTEN no canal de configurações com uma conexão dedicada em autocommit. `poll(timeout)`
+    devolve as linhas alteradas desde a chamada anterior; na primeira chamada (e depois de uma
+    reconexão) devolve a tabela inteira, lida depois do LISTEN para não perder alterações.
+    Sem banco, tenta de novo a cada `retry_seconds` sem bloquear quem chama.
+    """
+
+    def __init__(self, connect=None, retry_seconds=CONFIG_LISTENER_RETRY_SECONDS):
+        self.connect = connect or (lambda: database.connect(retries=1, delay=0))
+        self.retry_seconds = retry_seconds
+        self.conn = None
+        self._next_attempt = 0.0
+
+    def _subscribe(self):
+        if time.monotonic() < self._next_attempt:
+            return None
+        self._next_attempt = time.monotonic() + self.retry_seconds
+        self.conn = self.connect()
+        if not self.conn:
+            return None
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            cur.execute(f"LISTEN {CONFIG_CHANNEL};")
+        return fetch_configs(self.conn)
+
+    def poll(self, timeout=0.0):
+        try:
+            if self.conn is None or self.conn.closed:
+                return self._subscribe() or []
+            if timeout and select.select([self.conn], [], [], timeout) == ([], [], []):
+                return []
+            self.conn.poll()
+            rows = []
+            while self.conn.notifies:
+                payload = self.conn.notifies.pop(0).payload
+                try:
+                    rows.extend(_decode(row) for row in json.loads(payload))
+                except (ValueError, TypeError, KeyError):
+                    print(f"CONFIG: Notificação inválida ignorada: {payload[:80]!r}")
+            return rows
+        except Exception as e:
+            print(f"CONFIG: Listener perdeu a conexão, reconectando na próxima chamada: {e}")
+            self.close()
+            return []
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+def listen_for_configs(bus=config_bus, connect=None, stop=None, timeout=5.0):
+    """Republica no bus local as alterações feitas por outros processos (loop bloqueante)."""
+    listener = ConfigListener(connect)
+    print(f"CONFIG: Escutando o canal {CONFIG_CHANNEL}.")
+    try:
+        while stop is None or not stop.is_set():
+            rows = listener.poll(timeout)
+            if rows:
+                bus.publish(rows)
+            elif listener.conn is None:
+                # Sem conexão: espera antes de tentar de novo.
+                (stop or threading.Event()).wait(timeout)
+    finally:
+        listener.close()
+
+def start_config_listener():
+    thread = threading.Thread(target=listen_for_configs, daemon=True)
+    thread.start()
+    return thread
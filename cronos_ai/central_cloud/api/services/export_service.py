@@ -0,0 +1,153 @@
+"""
+Exportação em streaming do histórico bruto de um dispositivo.
+
+As linhas são lidas por um cursor nomeado (server-side) em blocos de `chunk_rows` e cada bloco é
+codificado e entregue antes do próximo ser buscado, então a memória fica constante qualquer que
+seja o tamanho do período exportado.
+"""
+import csv
+import io
+import json
+import threading
+from contextlib import ExitStack
+
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+from cronos_ai.shared.database import get_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele, só NDJSON e CSV ficam disponíveis.
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS = ("time", "device_id") + SENSOR_CHANNELS
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+# Cada exportação segura uma conexão do pool até o fim; o limite protege o restante da API.
+export_slots = threading.BoundedSemaphore(2)
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo somente-escrita que acumula bytes até serem drenados, preservando a posição lógica."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _ndjson_encoder():
+    def encode(rows):
+        return "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, (row[0].isoformat(),) + tuple(row[1:]))), separators=(",", ":")) + "\n"
+            for row in rows
+        ).encode("utf-8")
+    return encode, b"", lambda: b""
+
+def _csv_encoder():
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    header = buf.getvalue().encode("utf-8")
+
+    def encode(rows):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows((row[0].isoformat(),) + tuple(row[1:]) for row in rows)
+        return buf.getvalue().encode("utf-8")
+    return encode, header, lambda: b""
+
+def _arrow_schema():
+    fields = [pa.field("time", pa.timestamp("us", tz="UTC")), pa.field("device_id", pa.string())]
+    fields += [pa.field(c, pa.int32() if c == "rpm" else pa.float32()) for c in SENSOR_CHANNELS]
+    return pa.schema(fields)
+
+def _arrow_batch(schema, rows):
+    columns = list(zip(*rows))
+    return pa.record_batch([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema)
+
+def _arrow_encoder(parquet):
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+
+    def encode(rows):
+        writer.write_batch(_arrow_batch(schema, rows))
+        return sink.drain()
+
+    def finish():
+        writer.close()
+        return sink.drain()
+    return encode, sink.drain(), finish
+
+def make_encoder(fmt):
+    """Devolve (encode(rows) -> bytes, cabeçalho, finish() -> bytes) para o formato pedido."""
+    if fmt == "ndjson":
+        return _ndjson_encoder()
+    if fmt == "csv":
+        return _csv_encoder()
+    if fmt in ("arrow", "parquet"):
+        if pa is None:
+            raise ValueError(f"O formato '{fmt}' requer o pacote pyarrow.")
+        return _arrow_encoder(parquet=fmt == "parquet")
+    raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+def stream_sensor_data(device_id, start_time=None, end_time=None, fmt="ndjson", chunk_rows=5000):
+    """
+    Gerador de blocos de bytes com o histórico do dispositivo em ordem cronológica.
+    Formato, conexão e consulta são resolvidos aqui, antes do primeiro bloco, para que erros virem
+    uma resposta HTTP em vez de um stream truncado; a conexão é devolvida ao fim do gerador.
+    """
+    encoder = make_encoder(fmt)
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM sensor_data WHERE device_id = %s"
+    params = [device_id]
+    if start_time:
+        query += " AND time >= %s"
+        params.append(start_time)
+    if end_time:
+        query += " AND time <= %s"
+        params.append(end_time)
+    query += " ORDER BY time;"
+    resources = ExitStack()
+    try:
+        conn = resources.enter_context(get_connection())
+        cur = resources.enter_context(conn.cursor(name="sensor_data_export"))
+        cur.itersize = chunk_rows
+        cur.execute(query, params)
+    except Exception:
+        resources.close()
+        raise
+    return _generate(resources, cur, encoder, chunk_rows)
+
+def _generate(resources, cur, encoder, chunk_rows):
+    encode, header, finish = encoder
+    with resources:
+        if header:
+            yield header
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield encode(rows)
+    tail = finish()
+    if tail:
+        yield tail
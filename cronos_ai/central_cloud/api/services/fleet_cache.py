@@ -0,0 +1,147 @@
+"""
+Cache do último valor por dispositivo para a visão geral da frota (/api/v1/sensordata/fleet).
+
+O `LastValueCache` guarda, por device_id, a leitura mais recente (linha de sensor_data, com o
+health_factor) e o número de incidentes de alerta abertos, e responde a frota inteira da memória:
+
+- consumidor embutido (CONSUMER_MODE=embedded): o BatchWriter chama `fleet_cache.update` depois de
+  cada commit com a leitura mais nova de cada dispositivo do lote e os incidentes abertos no
+  AlertCoalescer do worker;
+- carga do banco: na primeira consulta depois de um restart (e, com o consumidor externo, quando a
+  carga anterior passa de FLEET_CACHE_REFRESH_SECONDS), uma única consulta DISTINCT ON (device_id)
+  sobre o índice (device_id, time DESC) traz a última leitura de cada dispositivo dos últimos
+  FLEET_CACHE_LOOKBACK, junto com a contagem de incidentes abertos. Com o consumidor embutido, o
+  que ele já entregou prevalece sobre a carga quando é mais novo.
+
+Cada dispositivo fica também serializado em JSON (`body`); só os alterados desde a resposta
+anterior são codificados de novo, e a resposta junta os bytes prontos.
+
+Incidentes abertos são os de `alerts` com closed_at nulo, como no AlertCoalescer (só existem com
+ALERT_COALESCE=1; sem ele a contagem fica em 0).
+"""
+import os
+import threading
+import time
+
+from cronos_ai.central_cloud.data_pipeline.incidents import ALERT_INCIDENT_LOOKBACK
+from cronos_ai.central_cloud.data_pipeline.ingestion import SENSOR_COLUMNS
+from cronos_ai.shared.serialization import dumps
+
+FLEET_CACHE_LOOKBACK = os.getenv("FLEET_CACHE_LOOKBACK", "7 days")
+FLEET_CACHE_REFRESH_SECONDS = float(os.getenv("FLEET_CACHE_REFRESH_SECONDS", "10"))
+FLEET_COLUMNS = SENSOR_COLUMNS + ("open_alerts",)
+
+FLEET_QUERY = f"""
+    SELECT {', '.join('r.' + column for column in SENSOR_COLUMNS)}, COALESCE(o.open_alerts, 0)
+    FROM (
+        SELECT DISTINCT ON (device_id) {', '.join(SENSOR_COLUMNS)}
+        FROM sensor_data
+        WHERE time > NOW() - %s::interval
+        ORDER BY device_id, time DESC
+    ) r
+    LEFT JOIN (
+        SELECT device_id, count(*) AS open_alerts
+        FROM alerts
+        WHERE closed_at IS NULL AND last_time IS NOT NULL AND last_time > NOW() - %s::interval
+        GROUP BY device_id
+    ) o ON o.device_id = r.device_id;
+"""
+
+def fetch_fleet(conn, lookback=FLEET_CACHE_LOOKBACK, incident_lookback=ALERT_INCIDENT_LOOKBACK):
+    """Última leitura e incidentes abertos de cada dispositivo, em tuplas na ordem de FLEET_COLUMNS."""
+    with conn.cursor() as cur:
+        cur.execute(FLEET_QUERY, (lookback, incident_lookback))
+        return cur.fetchall()
+
+class LastValueCache:
+    """Última leitura e incidentes abertos por dispositivo (ver o docstring do módulo)."""
+
+    def __init__(self, refresh_seconds=FLEET_CACHE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._readings = {}
+        self._open_alerts = {}
+        self._encoded = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        # Alimentado por um consumidor neste processo: a carga do banco só é necessária uma vez.
+        self.live = False
+        self.updates = self.loads = 0
+
+    def __len__(self):
+        return len(self._readings)
+
+    def update(self, readings, open_alerts=None):
+        """
+        Aplica as leituras de um lote gravado (tuplas na ordem de SENSOR_COLUMNS); uma leitura mais
+        antiga que a guardada é ignorada. `open_alerts` mapeia device_id para incidentes abertos.
+        """
+        with self._lock:
+            self.live = True
+            self.updates += 1
+            for row in readings:
+                current = self._readings.get(row[1])
+                if current is None or row[0] >= current[0]:
+                    self._readings[row[1]] = row
+                    self._encoded.pop(row[1], None)
+            if open_alerts:
+                for device_id, count in open_alerts.items():
+                    if self._open_alerts.get(device_id) != count:
+                        self._open_alerts[device_id] = count
+                        self._encoded.pop(device_id, None)
+
+    def load(self, rows):
+        """Carga do banco (tuplas na ordem de FLEET_COLUMNS)."""
+        with self._lock:
+            self.loads += 1
+            self._loaded_at = time.monotonic()
+            if not self.live:
+                self._readings = {row[1]: row[:-1] for row in rows}
+                self._open_alerts = {row[1]: row[-1] for row in rows}
+                self._encoded = {}
+                return
+            for row in rows:
+                current = self._readings.get(row[1])
+                if current is None or row[0] > current[0]:
+                    self._readings[row[1]] = row[:-1]
+                    self._encoded.pop(row[1], None)
+                self._open_alerts.setdefault(row[1], row[-1])
+
+    def _stale(self):
+        if self._loaded_at is None:
+            return True
+        return not self.live and time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def _ensure_loaded(self, fetch):
+        # `fetch()` devolve as linhas do banco; requisições simultâneas esperam a mesma carga.
+        if self._stale():
+            with self._load_lock:
+                if self._stale():
+                    self.load(fetch())
+                    return "database"
+        return "memory"
+
+    def rows(self, fetch):
+        """(origem, linhas da frota na ordem de FLEET_COLUMNS); `fetch` só é chamado se o cache precisar de carga."""
+        source = self._ensure_loaded(fetch)
+        with self._lock:
+            return source, [row + (self._open_alerts.get(device_id, 0),) for device_id, row in self._readings.items()]
+
+    def body(self, fetch):
+        """(origem, frota em JSON: lista de objetos com as colunas de FLEET_COLUMNS)."""
+        source = self._ensure_loaded(fetch)
+        with self._lock:
+            encoded = self._encoded
+            for device_id, row in self._readings.items():
+                if device_id not in encoded:
+                    encoded[device_id] = dumps(dict(zip(FLEET_COLUMNS, row + (self._open_alerts.get(device_id, 0),))))
+            return source, b"[" + b",".join(encoded.values()) + b"]"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "devices": len(self._readings), "live": self.live, "updates": self.updates, "loads": self.loads,
+                "loaded_seconds_ago": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1),
+            }
+
+fleet_cache = LastValueCache()
@@ -0,0 +1,40 @@
+"""
+Consulta paginada das leituras de um dispositivo (GET /sensor-data/{device_id}).
+
+O sensor_data não tem chave única, e várias leituras podem ter o mesmo `time`. O cursor é o par
+(time, n) da última leitura da página, em que `n` conta quantas leituras com esse mesmo `time` já
+foram entregues: a próxima página começa em `time <= cursor` e pula essas `n`. Dentro de um mesmo
+instante a ordem é fixada pelos canais, para que o salto caia sempre nas mesmas linhas.
+"""
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+from cronos_ai.shared.serialization import decode_page_cursor, encode_page_cursor
+
+def plan_sensor_page_query(device_id, start_time=None, end_time=None, before=None, limit=1000):
+    """Monta (sql, params) da página; `before` é o X-Next-Cursor da página anterior (ValueError se malformado)."""
+    conditions = ["device_id = %s"]
+    params = [device_id]
+    if start_time:
+        conditions.append("time >= %s")
+        params.append(start_time)
+    if end_time:
+        conditions.append("time <= %s")
+        params.append(end_time)
+    skip = 0
+    if before:
+        before_time, skip = decode_page_cursor(before)
+        conditions.append("time <= %s")
+        params.append(before_time)
+    query = (f"SELECT * FROM sensor_data WHERE {' AND '.join(conditions)}"
+             f" ORDER BY time DESC, {', '.join(SENSOR_CHANNELS)} OFFSET %s LIMIT %s;")
+    params.extend((skip, limit))
+    return query, params
+
+def next_sensor_cursor(times, before=None):
+    """X-Next-Cursor da página seguinte a partir dos `time` da página atual (já ordenados)."""
+    last = times[-1]
+    delivered = sum(1 for t in times if t == last)
+    if before:
+        before_time, skip = decode_page_cursor(before)
+        if before_time == last:
+            delivered += skip
+    return encode_page_cursor(last, delivered)
@@ -1,51 +1,275 @@
-import boto3
+import glob
 import json
 import threading
 import time
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import numpy as np
-from collections import deque
-from cronos_ai.shared.data_models import SensorData
+from datetime import datetime, timezone
+from cronos_ai.shared.data_models import SensorData, SensorSummary
+from cronos_ai.shared import database, metrics
+from cronos_ai.shared.config import get_section
+from cronos_ai.shared.serialization import validate_batch
+from cronos_ai.shared.uplink_codec import decode_message
+from cronos_ai.central_cloud.api.services.alert_queries import create_alert_indexes
+from cronos_ai.central_cloud.api.services.config_service import config_bus, fetch_configs, save_configs
+from cronos_ai.central_cloud.data_pipeline.rollups import create_rollups
+from cronos_ai.central_cloud.data_pipeline.storage import apply_storage_policies
+from cronos_ai.central_cloud.ml_engine.rolling_stats import RollingWindowStats, occurrence_rank
+from cronos_ai.central_cloud.ml_engine.rul_inference import RulScorer, load_model, window_features
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "cronos_db")
-DB_USER = os.getenv("DB_USER", "cronos_user")
-DB_PASS = os.getenv("DB_PASS", "cronos_password")
+BATCH_MAX_ROWS = int(os.getenv("CONSUMER_BATCH_MAX_ROWS", "500"))
+BATCH_MAX_LATENCY = float(os.getenv("CONSUMER_BATCH_MAX_LATENCY", "2.0"))
+# "embedded" roda o consumidor em threads dentro da API; "external" deixa o consumo para
+# o serviço separado (python -m cronos_ai.central_cloud.data_pipeline.consumer).
+CONSUMER_MODE = os.getenv("CONSUMER_MODE", "embedded")
+CONSUMER_POLLERS = int(os.getenv("CONSUMER_POLLERS", "1"))
+CONSUMER_WORKERS = int(os.getenv("CONSUMER_WORKERS", "1"))
+SQS_ENDPOINT_URL = os.getenv("SQS_ENDPOINT_URL", "http://host.docker.internal:4566")
+SQS_REGION = os.getenv("SQS_REGION", "us-east-1")
+SQS_QUEUE_NAME = os.getenv("SQS_QUEUE_NAME", "sensor_data_queue")
+# Estado das janelas do N2, salvo periodicamente para que um restart não deixe a frota sem detecção.
+N2_STATE_DIR = os.getenv("N2_STATE_DIR", "/var/lib/cronos/n2_state")
+N2_SNAPSHOT_SECONDS = float(os.getenv("N2_SNAPSHOT_SECONDS", "300"))
+N2_REBUILD_LOOKBACK = os.getenv("N2_REBUILD_LOOKBACK", "1 day")
+
+# Canais numéricos de SensorData monitorados pelo N2: (campo, rótulo do alerta, sentido do desvio).
+N2_CHANNELS = (
+    ("health_factor", "HealthFactor", "low"),
+    ("rpm", "Rpm", "both"),
+    ("temperature_c", "Temperature", "high"),
+    ("pressure_in_bar", "PressureIn", "both"),
+    ("pressure_out_bar", "PressureOut", "both"),
+    ("vibration_axial_mms", "VibrationAxial", "high"),
+    ("vibration_radial_mms", "VibrationRadial", "high"),
+    ("current_a", "Current", "high"),
+    ("acoustic_db", "AcousticNoise", "high"),
+    ("humidity_percent", "Humidity", "both"),
+)
+N2_FIELDS = tuple(field for field, _, _ in N2_CHANNELS)
+TEMPERATURE_INDEX = N2_FIELDS.index("temperature_c")
+# Seção `n2` do config.yaml: canais que alertam em todos os dispositivos e multiplicadores padrão por canal.
+DEFAULT_N2_SETTINGS = {
+    "alert_channels": ["temperature_c"],
+    "multipliers": {"acoustic_db": 6.0, "humidity_percent": 4.0, "pressure_out_bar": 4.0},
+}
+
+def load_n2_settings():
+    return get_section("n2", default=DEFAULT_N2_SETTINGS)
 
 class AnomalyDetectorN2:
-    def __init__(self, window_size=100, default_std_dev_multiplier=3.0):
-        self.window_size=window_size; self.default_std_dev_multiplier=default_std_dev_multiplier; self.history={}; self.configs={}
+    """
+    Detector estatístico da nuvem: alerta quando uma leitura sai de média ± multiplicador × desvio
+    da janela recente do próprio dispositivo.
+
+    Todos os canais de N2_CHANNELS têm janela (o RUL também as usa), mas só alertam os canais de
+    `alert_channels` (seção `n2` do config.yaml; por padrão só a temperatura) e, em cada
+    dispositivo, os que têm multiplicador próprio em `channel_multipliers`. As janelas ficam em
+    RollingWindowStats (ring buffers NumPy com atualização O(1)), e `check_many` avalia um lote
+    inteiro de leituras em chamadas vetorizadas.
+    """
+
+    def __init__(self, window_size=100, default_std_dev_multiplier=3.0, settings=None):
+        self.window_size = window_size
+        self.default_std_dev_multiplier = default_std_dev_multiplier
+        settings = load_n2_settings() if settings is None else settings
+        self.default_multipliers = np.full(len(N2_FIELDS), default_std_dev_multiplier)
+        for field, value in (settings.get("multipliers") or {}).items():
+            if field in N2_FIELDS:
+                self.default_multipliers[N2_FIELDS.index(field)] = value
+        self.default_alerting = np.array([field in (settings.get("alert_channels") or ()) for field in N2_FIELDS])
+        self.configs = {}
+        # Canais que alertam em cada dispositivo com configuração própria.
+        self.alerting = {}
+        self.stats = RollingWindowStats(N2_FIELDS, window_size=window_size)
+        # Workers em thread compartilham o detector; o lock protege o crescimento dos buffers.
+        self._lock = threading.Lock()
+        self._check_high = np.array([direction in ("high", "both") for _, _, direction in N2_CHANNELS])
+        self._check_low = np.array([direction in ("low", "both") for _, _, direction in N2_CHANNELS])
+
     def load_configs(self, db_conn):
-        print("DETECTOR_N2: Recarregando configurações..."); self.configs.clear()
+        """Carga completa, só na inicialização; depois disso as alterações chegam por `apply_configs`."""
+        print("DETECTOR_N2: Carregando configurações...")
         try:
-            with db_conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("SELECT * FROM device_configs;"); [self.configs.update({row['device_id']: row}) for row in cur.fetchall()]
+            rows = fetch_configs(db_conn)
+            self.configs, self.alerting = {}, {}
+            self.apply_configs(rows)
             print(f"DETECTOR_N2: {len(self.configs)} configuração(ões) carregada(s).")
         except Exception as e: print(f"DETECTOR_N2: Erro ao carregar configurações: {e}")
+
+    def apply_configs(self, rows):
+        """Aplica só as linhas alteradas de device_configs (assinante do config_bus)."""
+        for row in rows:
+            self.configs[row['device_id']], self.alerting[row['device_id']] = self._channel_multipliers(row)
+
+    def _channel_multipliers(self, row):
+        """
+        (multiplicadores, canais que alertam) na ordem de N2_CHANNELS: temperatura na coluna própria,
+        demais canais no JSONB; um canal com multiplicador no JSONB passa a alertar no dispositivo.
+        """
+        multipliers = self.default_multipliers.copy()
+        alerting = self.default_alerting.copy()
+        for field, value in (row.get('channel_multipliers') or {}).items():
+            if field in N2_FIELDS:
+                multipliers[N2_FIELDS.index(field)] = value
+                alerting[N2_FIELDS.index(field)] = True
+        if row.get('temp_std_dev_multiplier') is not None:
+            multipliers[TEMPERATURE_INDEX] = row['temp_std_dev_multiplier']
+        return multipliers, alerting
+
+    def snapshot(self, path):
+        """Salva as janelas atuais em `path` (.npz); a cópia é feita sob o lock e a gravação fora dele."""
+        with self._lock:
+            arrays = self.stats.export()
+        RollingWindowStats.write(path, arrays)
+        return len(arrays["device_ids"])
+
+    def restore(self, paths, keep=None):
+        """Restaura janelas de snapshots, do mais antigo para o mais novo. Devolve o total de dispositivos."""
+        restored = 0
+        with self._lock:
+            for path in sorted(paths, key=os.path.getmtime):
+                try:
+                    restored += self.stats.restore(path, keep)
+                except Exception as e:
+                    print(f"DETECTOR_N2: Snapshot {path} ignorado: {e}")
+        return restored
+
+    def rebuild_from_db(self, db_conn, keep=None, lookback=N2_REBUILD_LOOKBACK):
+        """Reconstrói todas as janelas com uma única consulta janelada sobre as leituras mais recentes."""
+        with db_conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT device_id, {', '.join(N2_FIELDS)}
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY device_id ORDER BY time DESC) AS rn
+                    FROM sensor_data
+                    WHERE time > NOW() - %s::interval
+                ) recent
+                WHERE rn <= %s
+                ORDER BY device_id, time;
+            """, (lookback, self.window_size))
+            rows = cur.fetchall()
+        return self.load_rows(rows, keep)
+
+    def load_rows(self, rows, keep=None):
+        """Carrega linhas (device_id, canais...) já ordenadas por dispositivo e tempo."""
+        restored = 0
+        with self._lock:
+            start = 0
+            for end in range(1, len(rows) + 1):
+                if end == len(rows) or rows[end][0] != rows[start][0]:
+                    device_id = rows[start][0]
+                    if keep is None or keep(device_id):
+                        values = np.array([row[1:] for row in rows[start:end]], dtype=np.float64)
+                        self.stats.load_window(device_id, np.nan_to_num(values))
+                        restored += 1
+                    start = end
+        return restored
+
+    def warm_start(self, db_conn, state_dir=N2_STATE_DIR, keep=None):
+        """Restaura do snapshot mais recente em disco; sem snapshot, reconstrói a partir do banco."""
+        paths = glob.glob(os.path.join(state_dir, "n2_state*.npz"))
+        start = time.perf_counter()
+        restored = self.restore(paths, keep) if paths else 0
+        source = "snapshot"
+        if not restored:
+            try:
+                restored = self.rebuild_from_db(db_conn, keep)
+                source = "banco de dados"
+            except Exception as e:
+                print(f"DETECTOR_N2: Falha ao reconstruir estado a partir do banco: {e}")
+        print(f"DETECTOR_N2: {restored} janela(s) restaurada(s) via {source} em {time.perf_counter() - start:.2f}s.")
+        return restored
+
+    def _multipliers(self, readings):
+        multipliers = np.tile(self.default_multipliers, (len(readings), 1))
+        alerting = np.tile(self.default_alerting, (len(readings), 1))
+        for i, data in enumerate(readings):
+            config = self.configs.get(data.device_id)
+            if config is not None:
+                multipliers[i] = config
+                alerting[i] = self.alerting[data.device_id]
+        return multipliers, alerting
+
+    def window_features(self, device_ids, min_count):
+        """(dispositivos com pelo menos `min_count` leituras na janela, features de RUL das janelas deles)."""
+        with self._lock:
+            index, counts = self.stats.index, self.stats.counts
+            warm = [d for d in device_ids if d in index and counts[index[d]] >= min_count]
+            rows = np.fromiter((index[d] for d in warm), dtype=np.intp, count=len(warm))
+            return warm, window_features(self.stats, rows)
+
     def check(self, data: SensorData):
-        device_id=data.device_id; alerts=[]; config=self.configs.get(device_id); std_dev_multiplier=config['temp_std_dev_multiplier'] if config else self.default_std_dev_multiplier
-        if device_id not in self.history: self.history[device_id]={'temperature_c':deque(maxlen=self.window_size)}
-        hist=self.history[device_id]
-        if len(hist['temperature_c']) > self.window_size/2:
-            mean=np.mean(hist['temperature_c']); std_dev=np.std(hist['temperature_c']); upper_bound=mean+std_dev_multiplier*std_dev
-            if data.temperature_c > upper_bound: alerts.append({"type":"HighTemperatureN2", "value":data.temperature_c, "details":f"Valor {data.temperature_c:.2f} excedeu o limite dinâmico de {upper_bound:.2f} (multiplicador={std_dev_multiplier})"})
-        hist['temperature_c'].append(data.temperature_c)
-        return alerts
+        return self.check_many([data])[0]
+
+    def check_many(self, readings, saved=None):
+        """
+        Avalia um lote de leituras e devolve, para cada uma, a lista de alertas N2. Com `saved`
+        (dict), guarda nele o estado anterior das janelas alteradas, para `rollback`.
+        """
+        results = [[] for _ in readings]
+        if not readings:
+            return results
+        values = np.array([[getattr(data, field) for field in N2_FIELDS] for data in readings], dtype=np.float64)
+        multipliers, alerting = self._multipliers(readings)
+        with self._lock:
+            return self._check_rows(readings, values, multipliers, alerting, results, saved)
+
+    def rollback(self, saved):
+        """Desfaz as leituras empurradas desde que `saved` foi esvaziado (lote que não foi gravado)."""
+        with self._lock:
+            self.stats.restore_rows(saved)
+        saved.clear()
+
+    def _check_rows(self, readings, values, multipliers, alerting, results, saved=None):
+        rows = self.stats.rows_for([data.device_id for data in readings])
+        if saved is not None:
+            self.stats.save_rows(np.unique(rows).tolist(), saved)
+        # Leituras repetidas do mesmo dispositivo no lote são avaliadas em rodadas, na ordem de chegada.
+        ranks = occurrence_rank(rows.tolist())
+        for rank in range(int(ranks.max()) + 1):
+            sel = np.flatnonzero(ranks == rank)
+            mean, std_dev, counts = self.stats.stats(rows[sel])
+            warm = (counts > self.window_size / 2)[:, None] & alerting[sel]
+            upper = mean + multipliers[sel] * std_dev
+            lower = mean - multipliers[sel] * std_dev
+            # Compara na mesma precisão em que a janela é guardada, para que um sinal constante
+            # não gere alerta só por arredondamento.
+            stored = values[sel].astype(self.stats.dtype)
+            high = warm & self._check_high & (stored > upper)
+            low = warm & self._check_low & (stored < lower)
+            for i, c in zip(*np.nonzero(high | low)):
+                idx = sel[i]
+                _, label, _ = N2_CHANNELS[c]
+                value = float(values[idx, c])
+                if high[i, c]:
+                    alert_type, limit, relation = f"High{label}N2", upper[i, c], "excedeu o"
+                else:
+                    alert_type, limit, relation = f"Low{label}N2", lower[i, c], "ficou abaixo do"
+                results[idx].append({
+                    "type": alert_type, "value": value,
+                    "details": f"Valor {value:.2f} {relation} limite dinâmico de {limit:.2f} (multiplicador={multipliers[idx, c]})",
+                })
+            self.stats.push(rows[sel], values[sel])
+        return results
 
 anomaly_detector_n2 = AnomalyDetectorN2()
+config_bus.subscribe(anomaly_detector_n2.apply_configs)
+# Previsões de RUL a partir das mesmas janelas do N2 (desativado se não houver modelo em RUL_MODEL_PATH).
+rul_scorer = RulScorer(load_model(), anomaly_detector_n2.window_features, N2_FIELDS)
+
+def n2_snapshot_path(shard=None):
+    """Arquivo de snapshot do detector; em modo processo cada worker salva o seu shard."""
+    name = "n2_state.npz" if shard is None else f"n2_state.shard{shard}.npz"
+    return os.path.join(N2_STATE_DIR, name)
 
 def get_db_connection():
-    retries=5; conn=None
-    while retries>0 and not conn:
-        try: conn=psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
-        except psycopg2.OperationalError: retries-=1; time.sleep(5)
+    """Conexão dedicada de longa duração para os workers de escrita (fora do pool compartilhado da API)."""
+    conn=database.connect()
     if conn: print("API_CONSUMER: Conexão com o TimescaleDB estabelecida!")
     return conn
 
 def setup_database(conn):
-    """Cria/Altera todas as tabelas, incluindo a coluna 'status' em 'alerts'."""
+    """Cria/Altera todas as tabelas, incluindo as colunas de feedback e os índices de 'alerts', as políticas de armazenamento e os rollups de sensor_data."""
     with conn.cursor() as cur:
         cur.execute("CREATE TABLE IF NOT EXISTS sensor_data (time TIMESTAMPTZ NOT NULL, device_id VARCHAR(50) NOT NULL, health_factor REAL, rpm INTEGER, temperature_c REAL, pressure_in_bar REAL, pressure_out_bar REAL, vibration_axial_mms REAL, vibration_radial_mms REAL, current_a REAL, acoustic_db REAL, humidity_percent REAL);")
         cur.execute("SELECT create_hypertable('sensor_data', 'time', if_not_exists => TRUE);")
@@ -60,91 +284,119 @@ def setup_database(conn):
             END $$;
         """)
         cur.execute("CREATE TABLE IF NOT EXISTS alerts (id SERIAL PRIMARY KEY, time TIMESTAMPTZ NOT NULL, device_id VARCHAR(50) NOT NULL, alert_type VARCHAR(100), alert_value REAL, full_payload JSONB, status VARCHAR(20) DEFAULT 'pending');")
+        # Auto-tuner incremental: instante do feedback, multiplicadores por canal e a marca d'água do que já foi processado.
+        cur.execute("ALTER TABLE alerts ADD COLUMN IF NOT EXISTS feedback_at TIMESTAMPTZ;")
+        # Incidentes do AlertCoalescer: abertura em time/full_payload, disparos seguintes e fechamento nestas colunas.
+        cur.execute("""
+            ALTER TABLE alerts
+                ADD COLUMN IF NOT EXISTS last_time TIMESTAMPTZ,
+                ADD COLUMN IF NOT EXISTS occurrences INTEGER DEFAULT 1,
+                ADD COLUMN IF NOT EXISTS peak_value REAL,
+                ADD COLUMN IF NOT EXISTS closed_at TIMESTAMPTZ,
+                ADD COLUMN IF NOT EXISTS close_payload JSONB;
+        """)
+        cur.execute("ALTER TABLE device_configs ADD COLUMN IF NOT EXISTS channel_multipliers JSONB NOT NULL DEFAULT '{}';")
+        cur.execute("CREATE TABLE IF NOT EXISTS auto_tuner_state (name VARCHAR(50) PRIMARY KEY, watermark TIMESTAMPTZ NOT NULL, last_run TIMESTAMPTZ, devices_tuned INTEGER);")
+        cur.execute("CREATE TABLE IF NOT EXISTS rul_predictions (time TIMESTAMPTZ NOT NULL, device_id VARCHAR(50) NOT NULL, rul_hours REAL, model_version VARCHAR(50));")
+        cur.execute("SELECT create_hypertable('rul_predictions', 'time', if_not_exists => TRUE);")
+        cur.execute("CREATE INDEX IF NOT EXISTS rul_predictions_device_time_idx ON rul_predictions (device_id, time DESC);")
+        cur.execute("CREATE TABLE IF NOT EXISTS sensor_summaries (time TIMESTAMPTZ NOT NULL, device_id VARCHAR(50) NOT NULL, window_start TIMESTAMPTZ NOT NULL, readings INTEGER, features JSONB NOT NULL);")
+        cur.execute("SELECT create_hypertable('sensor_summaries', 'time', if_not_exists => TRUE);")
+        cur.execute("CREATE INDEX IF NOT EXISTS sensor_summaries_device_time_idx ON sensor_summaries (device_id, time DESC);")
+        cur.execute("CREATE TABLE IF NOT EXISTS dead_letters (id SERIAL PRIMARY KEY, time TIMESTAMPTZ NOT NULL DEFAULT NOW(), message_id VARCHAR(100), receive_count INTEGER, reason TEXT, body TEXT);")
 
         conn.commit()
+    create_alert_indexes(conn)
+    apply_storage_policies(conn)
+    create_rollups(conn)
     print("API_CONSUMER: Todas as tabelas prontas e atualizadas.")
 
-def auto_tuner_service():
-    """Serviço que roda em background para ajustar a sensibilidade dos alertas."""
-    print("AUTO_TUNER: Serviço de autoajuste iniciado.")
-    while True:
-        time.sleep(3600) 
-        
-        print("AUTO_TUNER: Procurando por feedback para otimizar modelos...")
-        db_conn = get_db_connection()
-        if not db_conn: continue
+def process_messages(messages, writer):
+    """
+    Valida um lote de mensagens (uma leitura no formato legado ou várias no formato em lote, com
+    resumos de bloco da borda), roda o detector N2 sobre todas as leituras, pontua o RUL dos
+    dispositivos do lote e enfileira leituras, resumos, alertas e previsões no writer.
+    As leituras de todas as mensagens são validadas juntas (`validate_batch`), inclusive contra os
+    limites das colunas do banco; uma mensagem ilegível ou inválida não tem como melhorar numa
+    reentrega, então vai direto para `writer.dead_letter` (gravada em dead_letters e apagada da
+    fila no próximo flush) sem afetar as demais. O conteúdo de cada mensagem aceita é enfileirado
+    junto, seguido de `track_message`, para que o flush consiga isolar uma mensagem que o banco rejeite.
+    """
+    received_at = datetime.now(timezone.utc)
+    accepted = []
+    accepted_messages = []
+    with metrics.stage("decode"):
+        decoded = []
+        for message in messages:
+            try:
+                body_readings, body_summaries = decode_message(message['Body'])
+                block_summaries = [SensorSummary(**summary) for summary in body_summaries]
+            except Exception as e:
+                _reject(writer, message, e)
+                continue
+            decoded.append((message, body_readings, block_summaries))
+        models, errors = validate_batch([body_readings for _, body_readings, _ in decoded])
+        for i, ((message, body_readings, block_summaries), readings) in enumerate(zip(decoded, models)):
+            if readings is None:
+                _reject(writer, message, errors[i])
+                continue
+            accepted.extend(zip(body_readings, readings))
+            accepted_messages.append((message, len(readings), block_summaries))
+    with metrics.stage("n2_check"):
+        alerts_n2 = anomaly_detector_n2.check_many([sd for _, sd in accepted], getattr(writer, "detector_state", None))
+    with metrics.stage("rul_score"):
+        predictions = rul_scorer.score([sd.device_id for _, sd in accepted])
+    n1_count = n2_count = 0
+    with metrics.stage("enqueue"):
+        position = 0
+        for message, n_readings, block_summaries in accepted_messages:
+            for i in range(position, position + n_readings):
+                (data_dict, sd), device_alerts_n2 = accepted[i], alerts_n2[i]
+                alerts = [(alert.type, alert.value, data_dict) for alert in sd.alerts or ()]
+                n1_count += len(alerts)
+                n2_count += len(device_alerts_n2)
+                alerts += [(alert['type'], alert['value'], alert['details']) for alert in device_alerts_n2]
+                writer.add(sd, received_at, alerts)
+            position += n_readings
+            if block_summaries:
+                writer.add_summaries(block_summaries)
+            writer.track_message(message)
+        if predictions:
+            writer.add_predictions(received_at, predictions, rul_scorer.model.version)
+    metrics.MESSAGES_ACCEPTED.inc(len(accepted_messages))
+    metrics.CONSUMER_READINGS.inc(len(accepted))
+    metrics.ALERTS_N1.inc(n1_count)
+    metrics.ALERTS_N2.inc(n2_count)
+    metrics.RUL_PREDICTIONS.inc(len(predictions))
 
-        try:
-            with db_conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT device_id, COUNT(*) as false_positives
-                    FROM alerts
-                    WHERE status = 'confirmed_false' AND time > NOW() - INTERVAL '1 hour'
-                    GROUP BY device_id
-                    HAVING COUNT(*) >= 5;
-                """)
-                devices_to_tune = cur.fetchall()
-
-                for device in devices_to_tune:
-                    device_id = device['device_id']
-                    cur.execute("SELECT temp_std_dev_multiplier FROM device_configs WHERE device_id = %s;", (device_id,))
-                    current_multiplier = (cur.fetchone() or {}).get('temp_std_dev_multiplier', 3.0)
-                    
-                    new_multiplier = current_multiplier * 1.1
-                    
-                    print(f"AUTO_TUNER: Muitos falsos positivos para {device_id}. Ajustando sensibilidade de {current_multiplier:.2f} para {new_multiplier:.2f}.")
-                    
-                    cur.execute(
-                        "INSERT INTO device_configs (device_id, temp_std_dev_multiplier) VALUES (%s, %s) ON CONFLICT (device_id) DO UPDATE SET temp_std_dev_multiplier = EXCLUDED.temp_std_dev_multiplier, last_updated = NOW();",
-                        (device_id, new_multiplier)
-                    )
-                db_conn.commit()
-            
-            anomaly_detector_n2.load_configs(db_conn)
-
-        except Exception as e:
-            print(f"AUTO_TUNER: Erro durante o ciclo de ajuste: {e}")
-        finally:
-            if db_conn: db_conn.close()
+def _reject(writer, message, error):
+    metrics.MESSAGES_INVALID.inc()
+    print(f"API_CONSUMER: Mensagem {message.get('MessageId')} inválida, enviada para dead_letters: {error}")
+    writer.dead_letter(message, f"invalid: {error}")
 
 def consume_sqs_messages():
+    """
+    Sobe o motor de consumo embutido na API, com CONSUMER_POLLERS pollers e CONSUMER_WORKERS workers
+    em threads. Os alertas gravados vão direto para o stream de alertas da API e as últimas leituras
+    para o cache da visão da frota.
+    """
+    from cronos_ai.central_cloud.data_pipeline.consumer import build_engine
+    from cronos_ai.central_cloud.api.services.alert_stream import alert_broker
+    from cronos_ai.central_cloud.api.services.fleet_cache import fleet_cache
     print("API_CONSUMER: Iniciando consumidor SQS...")
-    db_conn = get_db_connection()
-    if not db_conn: return
-    setup_database(db_conn)
-    anomaly_detector_n2.load_configs(db_conn)
-    endpoint_url = 'http://host.docker.internal:4566'; queue_name = 'sensor_data_queue'
-    sqs_client = boto3.client('sqs', endpoint_url=endpoint_url, region_name='us-east-1')
-    try: queue_url = sqs_client.get_queue_url(QueueName=queue_name)['QueueUrl']
-    except Exception as e: print(f"API_CONSUMER: Falha ao obter URL da fila: {e}"); return
-    while True:
-        try:
-            response = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=10)
-            if 'Messages' in response:
-                with db_conn.cursor() as cur:
-                    for message in response['Messages']:
-                        data_dict = json.loads(message['Body'])
-                        sd = SensorData(**data_dict)
-                        cur.execute("INSERT INTO sensor_data (time, device_id, health_factor, rpm, temperature_c, pressure_in_bar, pressure_out_bar, vibration_axial_mms, vibration_radial_mms, current_a, acoustic_db, humidity_percent) VALUES (NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);", (sd.device_id, sd.health_factor, sd.rpm, sd.temperature_c, sd.pressure_in_bar, sd.pressure_out_bar, sd.vibration_axial_mms, sd.vibration_radial_mms, sd.current_a, sd.acoustic_db, sd.humidity_percent))
-                        if 'alerts' in data_dict and data_dict['alerts']:
-                            for alert in data_dict['alerts']:
-                                cur.execute("INSERT INTO alerts (time, device_id, alert_type, alert_value, full_payload) VALUES (NOW(), %s, %s, %s, %s);", (sd.device_id, alert['type'], alert['value'], json.dumps(data_dict)))
-                            print(f"API_CONSUMER: Alerta N1 de {sd.device_id} salvo.")
-                        alerts_n2 = anomaly_detector_n2.check(sd)
-                        if alerts_n2:
-                            for alert in alerts_n2:
-                                cur.execute("INSERT INTO alerts (time, device_id, alert_type, alert_value, full_payload) VALUES (NOW(), %s, %s, %s, %s);", (sd.device_id, alert['type'], alert['value'], json.dumps(alert['details'])))
-                            print(f"API_CONSUMER: Alerta N2 de {sd.device_id} detectado e salvo.")
-                db_conn.commit()
-                entries_to_delete = [{'Id': msg['MessageId'], 'ReceiptHandle': msg['ReceiptHandle']} for msg in response['Messages']]
-                sqs_client.delete_message_batch(QueueUrl=queue_url, Entries=entries_to_delete)
-        except Exception as e: print(f"API_CONSUMER: Erro no loop principal: {e}"); time.sleep(5)
+    engine = build_engine(pollers=CONSUMER_POLLERS, workers=CONSUMER_WORKERS, mode="thread", on_alerts=alert_broker.publish,
+                          on_readings=fleet_cache.update)
+    if engine: engine.start()
 
 
 def start_consumer_thread():
-    """Inicia a thread do consumidor SQS e a NOVA thread do auto-tuner."""
+    """Inicia o consumidor SQS embutido (se CONSUMER_MODE=embedded) e a thread do auto-tuner."""
+    if CONSUMER_MODE != "embedded":
+        print("API_CONSUMER: Consumo delegado ao serviço externo (CONSUMER_MODE=external).")
+        return
+    from cronos_ai.central_cloud.api.services.auto_tuner import auto_tuner_service
     consumer_thread = threading.Thread(target=consume_sqs_messages, daemon=True)
     tuner_thread = threading.Thread(target=auto_tuner_service, daemon=True)
     
     consumer_thread.start()
-    tuner_thread.start()
\ No newline at end of file
+    tuner_thread.start()
@@ -0,0 +1,294 @@
+"""
+Motor de consumo SQS com múltiplos pollers e workers de escrita.
+
+Os pollers fazem o long-polling e distribuem cada mensagem para o worker dono do
+`device_id` (sharding por CRC32), o que mantém o histórico do detector N2 de cada bomba em
+um único worker. A ordem por dispositivo só é preservada dentro de um poller: com
+`--pollers` > 1, duas mensagens do mesmo dispositivo recebidas por pollers diferentes podem
+chegar ao worker fora de ordem e bagunçar as janelas do N2 e a linha do tempo dos incidentes;
+por isso o docker-compose usa um único poller. Cada worker tem a própria conexão com o banco
+e o próprio BatchWriter; as mensagens gravadas voltam por uma fila de confirmação e são
+apagadas do SQS pelo processo principal.
+
+A fila de entrada de cada worker guarda no máximo `inbox_size` mensagens (por padrão
+`max_rows`, cerca de um lote): recebidas e ainda não gravadas, elas continuam contando o
+visibility timeout do SQS, e um acúmulo maior faria a fila reentregá-las enquanto ainda
+esperam, gravando-as duas vezes. Com a fila cheia, o poller espera antes do próximo receive.
+
+Pode rodar embutido na API (threads) ou como serviço separado:
+
+    python -m cronos_ai.central_cloud.data_pipeline.consumer --pollers 1 --workers 8 --mode process
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+
+import boto3
+
+from cronos_ai.central_cloud.api.services import sqs_consumer_service as service
+from cronos_ai.central_cloud.api.services.auto_tuner import auto_tuner_service
+from cronos_ai.central_cloud.api.services.config_service import ConfigListener, config_bus, listen_for_configs
+from cronos_ai.central_cloud.data_pipeline.incidents import ALERT_COALESCE, AlertCoalescer
+from cronos_ai.central_cloud.data_pipeline.ingestion import BatchWriter, delete_committed
+from cronos_ai.shared import metrics
+from cronos_ai.shared.serialization import loads
+
+STOP = "STOP"
+DRAIN_LIMIT = 100
+CONSUMER_METRICS_PORT = int(os.getenv("CONSUMER_METRICS_PORT", "9101"))
+
+def shard_for(device_id, workers):
+    """Shard estável entre processos (não depende do hash aleatorizado do Python)."""
+    return zlib.crc32(device_id.encode("utf-8")) % workers
+
+def _route_key(message):
+    try:
+        return loads(message['Body']).get('device_id') or ''
+    except (ValueError, AttributeError):
+        # Mensagens ilegíveis vão para qualquer worker, que as envia para dead_letters.
+        return ''
+
+def drain(inbox, first, limit=DRAIN_LIMIT):
+    """Junta à primeira mensagem o que já estiver esperando na fila do worker, para o N2 avaliar em lote."""
+    messages = [first]
+    while len(messages) < limit:
+        try:
+            message = inbox.get_nowait()
+        except queue.Empty:
+            break
+        if message == STOP:
+            # Devolve a sentinela para o loop principal tratar depois do lote.
+            inbox.put(STOP)
+            break
+        messages.append(message)
+    return messages
+
+def _snapshot(detector, path):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        detector.snapshot(path)
+    except Exception as e:
+        print(f"DETECTOR_N2: Falha ao salvar snapshot em {path}: {e}")
+
+def run_worker(shard, inbox, acks, connect, max_rows, max_latency, workers=1, isolated=False, on_alerts=None,
+               on_readings=None):
+    """
+    Loop de um worker de escrita: valida, roda o N2, grava em lote e confirma o que foi persistido.
+
+    Com `isolated` (modo processo) o worker tem o próprio detector: escuta as configurações,
+    restaura as janelas dos dispositivos do seu shard e salva o próprio snapshot. Em modo
+    thread o detector é compartilhado, restaurado em `build_engine` e salvo pelo worker 0.
+    `on_alerts` recebe os alertas gravados a cada flush (só em modo thread; processos usam o NOTIFY)
+    e `on_readings` as últimas leituras por dispositivo (só em modo thread; o cache da frota de
+    uma API sem consumidor embutido recarrega do banco).
+    Com ALERT_COALESCE, cada worker agrupa os alertas dos seus dispositivos em incidentes e
+    retoma os incidentes que ficaram abertos no banco.
+    """
+    db_conn = connect()
+    if not db_conn:
+        print(f"API_CONSUMER[{shard}]: Worker sem conexão com o banco; encerrando.")
+        return
+    detector = service.anomaly_detector_n2
+    configs = None
+    if isolated:
+        # Cada processo tem o próprio detector: a primeira leitura do listener traz a tabela
+        # inteira e as seguintes só as configurações alteradas (NOTIFY).
+        configs = ConfigListener()
+        initial = configs.poll()
+        if configs.conn is None:
+            detector.load_configs(db_conn)
+        else:
+            config_bus.publish(initial)
+        detector.warm_start(db_conn, keep=lambda device_id: shard_for(device_id, workers) == shard)
+    if isolated:
+        snapshot_path = service.n2_snapshot_path(shard)
+    elif shard == 0:
+        snapshot_path = service.n2_snapshot_path()
+    else:
+        snapshot_path = None
+    last_snapshot = time.monotonic()
+    coalescer = None
+    if ALERT_COALESCE:
+        coalescer = AlertCoalescer()
+        try:
+            restored = coalescer.load_open(db_conn, keep=lambda device_id: shard_for(device_id, workers) == shard)
+            print(f"API_CONSUMER[{shard}]: {restored} incidente(s) de alerta aberto(s) retomado(s).")
+        except Exception as e:
+            db_conn.rollback()
+            print(f"API_CONSUMER[{shard}]: Falha ao retomar incidentes abertos: {e}")
+    writer = BatchWriter(db_conn, max_rows=max_rows, max_latency=max_latency, on_alerts=on_alerts, coalescer=coalescer,
+                         on_readings=on_readings, detector=detector)
+    while True:
+        remaining = writer.seconds_until_due()
+        try:
+            message = inbox.get(timeout=1.0 if remaining is None else max(remaining, 0.01))
+        except queue.Empty:
+            message = None
+        try:
+            if message == STOP:
+                acks.put((time.time(), writer.flush()))
+                break
+            if message is not None:
+                service.process_messages(drain(inbox, message), writer)
+            if writer.should_flush():
+                acks.put((time.time(), writer.flush()))
+        except Exception as e:
+            metrics.CONSUMER_ERRORS.labels(stage="worker").inc()
+            print(f"API_CONSUMER[{shard}]: Erro ao processar mensagem: {e}")
+        if configs is not None:
+            changed = configs.poll()
+            if changed:
+                config_bus.publish(changed)
+        if snapshot_path and time.monotonic() - last_snapshot > service.N2_SNAPSHOT_SECONDS:
+            _snapshot(detector, snapshot_path)
+            last_snapshot = time.monotonic()
+    if snapshot_path:
+        _snapshot(detector, snapshot_path)
+    if configs is not None:
+        configs.close()
+    db_conn.close()
+
+class ConsumerEngine:
+    """Orquestra `pollers` threads de long-polling e `workers` writers (threads ou processos)."""
+
+    def __init__(self, sqs_client, queue_url, pollers=1, workers=1, mode="thread",
+                 connect=service.get_db_connection, max_rows=service.BATCH_MAX_ROWS,
+                 max_latency=service.BATCH_MAX_LATENCY, inbox_size=None, on_alerts=None, on_readings=None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Modo de execução inválido: {mode}")
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.pollers = pollers
+        self.workers = workers
+        self.mode = mode
+        self.connect = connect
+        self.max_rows = max_rows
+        self.max_latency = max_latency
+        self.on_alerts = on_alerts
+        self.on_readings = on_readings
+        self._stop = threading.Event()
+        if inbox_size is None:
+            inbox_size = max_rows
+        if mode == "process":
+            self._ctx = multiprocessing.get_context()
+            self.inboxes = [self._ctx.Queue(maxsize=inbox_size) for _ in range(workers)]
+            self.acks = self._ctx.Queue()
+        else:
+            self.inboxes = [queue.Queue(maxsize=inbox_size) for _ in range(workers)]
+            self.acks = queue.Queue()
+        self._poller_threads = []
+        self._worker_handles = []
+        self._acker_thread = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            try:
+                with metrics.stage("sqs_receive"):
+                    # ApproximateReceiveCount limita as reentregas de uma mensagem rejeitada pelo banco (BatchWriter).
+                    response = self.sqs_client.receive_message(
+                        QueueUrl=self.queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=10,
+                        AttributeNames=['ApproximateReceiveCount'],
+                    )
+                for message in response.get('Messages', []):
+                    self._dispatch(self.inboxes[shard_for(_route_key(message), self.workers)], message)
+            except Exception as e:
+                metrics.CONSUMER_ERRORS.labels(stage="sqs_receive").inc()
+                print(f"API_CONSUMER: Erro no poller: {e}"); time.sleep(5)
+
+    def _dispatch(self, inbox, message):
+        # Espera vaga no worker sem travar o `stop()`; a mensagem não entregue volta para a fila do SQS.
+        while not self._stop.is_set():
+            try:
+                inbox.put(message, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+    def _ack(self):
+        while True:
+            ack = self.acks.get()
+            if ack is None:
+                return
+            committed_at, entries = ack
+            if not entries:
+                continue
+            try:
+                with metrics.stage("sqs_delete"):
+                    delete_committed(self.sqs_client, self.queue_url, entries)
+                metrics.CONSUMER_DELETE_LAG_SECONDS.observe(max(0.0, time.time() - committed_at))
+            except Exception as e:
+                metrics.CONSUMER_ERRORS.labels(stage="sqs_delete").inc()
+                print(f"API_CONSUMER: Falha ao apagar mensagens confirmadas: {e}")
+
+    def start(self):
+        for shard, inbox in enumerate(self.inboxes):
+            args = (shard, inbox, self.acks, self.connect, self.max_rows, self.max_latency, self.workers)
+            if self.mode == "process":
+                handle = self._ctx.Process(target=run_worker, args=args + (True,), daemon=True)
+            else:
+                handle = threading.Thread(target=run_worker, args=args + (False, self.on_alerts, self.on_readings), daemon=True)
+            handle.start()
+            self._worker_handles.append(handle)
+        if self.mode == "thread":
+            # Alterações de configuração feitas em outros processos chegam ao detector compartilhado pelo NOTIFY.
+            threading.Thread(target=listen_for_configs, kwargs={"stop": self._stop}, daemon=True).start()
+        self._acker_thread = threading.Thread(target=self._ack, daemon=True)
+        self._acker_thread.start()
+        for _ in range(self.pollers):
+            poller = threading.Thread(target=self._poll, daemon=True)
+            poller.start()
+            self._poller_threads.append(poller)
+        print(f"API_CONSUMER: Motor iniciado com {self.pollers} poller(s) e {self.workers} worker(s) em modo {self.mode}.")
+
+    def stop(self, timeout=30):
+        """Para os pollers, descarrega os lotes pendentes dos workers e apaga o que foi gravado."""
+        self._stop.set()
+        for poller in self._poller_threads:
+            poller.join(timeout)
+        for inbox in self.inboxes:
+            inbox.put(STOP)
+        for handle in self._worker_handles:
+            handle.join(timeout)
+        self.acks.put(None)
+        self._acker_thread.join(timeout)
+
+def build_engine(pollers=1, workers=1, mode="thread", on_alerts=None, on_readings=None):
+    """Prepara banco, detector e fila e devolve um motor pronto para `start()` (ou None em caso de falha)."""
+    db_conn = service.get_db_connection()
+    if not db_conn: return None
+    service.setup_database(db_conn)
+    service.anomaly_detector_n2.load_configs(db_conn)
+    if mode == "thread":
+        service.anomaly_detector_n2.warm_start(db_conn)
+    db_conn.close()
+    sqs_client = boto3.client('sqs', endpoint_url=service.SQS_ENDPOINT_URL, region_name=service.SQS_REGION)
+    try: queue_url = sqs_client.get_queue_url(QueueName=service.SQS_QUEUE_NAME)['QueueUrl']
+    except Exception as e: print(f"API_CONSUMER: Falha ao obter URL da fila: {e}"); return None
+    return ConsumerEngine(sqs_client, queue_url, pollers=pollers, workers=workers, mode=mode, on_alerts=on_alerts,
+                          on_readings=on_readings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Consumidor SQS do Cronos AI desacoplado da API.")
+    parser.add_argument("--pollers", type=int, default=1, help="Threads de long-polling no SQS; com mais de uma, a ordem por dispositivo não é garantida.")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="Workers de escrita (shards por device_id).")
+    parser.add_argument("--mode", choices=("thread", "process"), default="process")
+    args = parser.parse_args()
+
+    engine = build_engine(args.pollers, args.workers, args.mode)
+    if not engine: return
+    metrics.serve(CONSUMER_METRICS_PORT)
+    engine.start()
+    threading.Thread(target=auto_tuner_service, daemon=True).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nAPI_CONSUMER: Encerrando e descarregando lotes pendentes...")
+        engine.stop()
+
+if __name__ == "__main__":
+    main()
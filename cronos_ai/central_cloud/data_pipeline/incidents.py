@@ -0,0 +1,184 @@
+"""
+Agrupamento de alertas em incidentes no consumidor.
+
+Um dispositivo degradado dispara o mesmo alerta (N1 ou N2) a cada poucas leituras; em vez de uma
+linha de `alerts` por disparo, o `AlertCoalescer` mantém um incidente aberto por
+(device_id, alert_type): a primeira ocorrência insere a linha (com o full_payload da leitura que
+abriu o incidente) e as seguintes só atualizam `occurrences`, `last_time` e `peak_value` (o valor
+mais extremo: o maior, ou o menor nos alertas Low*). O incidente fecha quando chega uma leitura (ou
+resumo de bloco) do dispositivo mais de ALERT_INCIDENT_QUIET_SECONDS depois do último disparo;
+`closed_at` recebe o instante dessa leitura e `close_payload` o payload do último disparo (só
+quando houve mais de um). Um disparo depois do silêncio abre um incidente novo.
+
+O estado fica em memória no worker dono do dispositivo (mesmo sharding do N2) e as alterações se
+acumulam até o flush do BatchWriter, que grava cada incidente uma única vez por lote: INSERT para
+os novos e um UPDATE ... FROM (VALUES ...) para os que já existiam. Se o flush falhar, o estado
+volta ao último commit, porque as mensagens serão reentregues. Na inicialização, `load_open`
+recupera os incidentes ainda abertos no banco.
+"""
+import json
+import os
+from datetime import timedelta
+
+ALERT_COALESCE = os.getenv("ALERT_COALESCE", "1") == "1"
+ALERT_INCIDENT_QUIET_SECONDS = float(os.getenv("ALERT_INCIDENT_QUIET_SECONDS", "300"))
+ALERT_INCIDENT_LOOKBACK = os.getenv("ALERT_INCIDENT_LOOKBACK", "1 day")
+
+INCIDENT_INSERT_COLUMNS = (
+    "time", "device_id", "alert_type", "alert_value", "full_payload",
+    "last_time", "occurrences", "peak_value", "closed_at", "close_payload",
+)
+INCIDENT_UPDATE_SQL = """
+    UPDATE alerts AS a SET last_time = v.last_time, occurrences = v.occurrences, peak_value = v.peak_value,
+                           closed_at = v.closed_at, close_payload = v.close_payload
+    FROM (VALUES %s) AS v(id, last_time, occurrences, peak_value, closed_at, close_payload)
+    WHERE a.id = v.id;
+"""
+# Os NULLs de um VALUES não têm tipo; os casts garantem a atribuição às colunas.
+INCIDENT_UPDATE_TEMPLATE = "(%s, %s::timestamptz, %s, %s::real, %s::timestamptz, %s::jsonb)"
+
+class Incident:
+    """Estado de um incidente; `id` é None até o primeiro commit."""
+
+    __slots__ = ("id", "device_id", "alert_type", "first", "value", "payload", "last", "occurrences",
+                 "peak", "last_payload", "closed_at", "_saved")
+
+    def __init__(self, device_id, alert_type, at, value, payload, incident_id=None, last=None, occurrences=1, peak=None):
+        self.id = incident_id
+        self.device_id = device_id
+        self.alert_type = alert_type
+        self.first = at
+        self.value = value
+        self.payload = payload
+        self.last = last or at
+        self.occurrences = occurrences
+        self.peak = value if peak is None else peak
+        self.last_payload = None
+        self.closed_at = None
+        self._saved = None
+
+    def fire(self, at, value, payload):
+        self.last = max(self.last, at)
+        self.occurrences += 1
+        if value is not None:
+            lower = self.alert_type.startswith("Low")
+            if self.peak is None or (value < self.peak if lower else value > self.peak):
+                self.peak = value
+        self.last_payload = payload
+
+    def close_payload(self):
+        return None if self.last_payload is None else json.dumps(self.last_payload)
+
+    def insert_row(self):
+        return (self.first, self.device_id, self.alert_type, self.value, json.dumps(self.payload),
+                self.last, self.occurrences, self.peak, self.closed_at, self.close_payload())
+
+    def update_row(self):
+        return (self.id, self.last, self.occurrences, self.peak, self.closed_at, self.close_payload())
+
+    def save(self):
+        self._saved = (self.last, self.occurrences, self.peak, self.last_payload, self.closed_at)
+
+    def restore(self):
+        self.last, self.occurrences, self.peak, self.last_payload, self.closed_at = self._saved
+
+class AlertCoalescer:
+    """Incidentes abertos por dispositivo e as alterações ainda não gravadas (ver o docstring do módulo)."""
+
+    def __init__(self, quiet_seconds=ALERT_INCIDENT_QUIET_SECONDS):
+        self.quiet = timedelta(seconds=quiet_seconds)
+        self.open = {}
+        self.opened = []
+        self.changed = {}
+        self.stats = {"firings": 0, "opened": 0, "updated": 0, "closed": 0}
+
+    def __len__(self):
+        return sum(len(incidents) for incidents in self.open.values())
+
+    def observe(self, device_id, at, alerts=()):
+        """
+        Registra uma leitura do dispositivo no instante `at` com os alertas dela, em
+        (alert_type, alert_value, full_payload). Devolve os incidentes abertos por esta leitura.
+        """
+        incidents = self.open.get(device_id)
+        if incidents:
+            self._close_quiet(incidents, at)
+        opened = []
+        for alert_type, alert_value, payload in alerts:
+            self.stats["firings"] += 1
+            incident = incidents.get(alert_type) if incidents else None
+            if incident is None:
+                incident = Incident(device_id, alert_type, at, alert_value, payload)
+                if incidents is None:
+                    incidents = self.open[device_id] = {}
+                incidents[alert_type] = incident
+                self.opened.append(incident)
+                opened.append(incident)
+                self.stats["opened"] += 1
+            else:
+                incident.fire(at, alert_value, payload)
+                self._touch(incident)
+        return opened
+
+    def _close_quiet(self, incidents, at):
+        for alert_type in [t for t, incident in incidents.items() if at - incident.last > self.quiet]:
+            incident = incidents.pop(alert_type)
+            incident.closed_at = at
+            self._touch(incident)
+            self.stats["closed"] += 1
+
+    def _touch(self, incident):
+        # Incidentes ainda não inseridos saem no INSERT do flush com o estado final do lote.
+        if incident.id is not None and incident.id not in self.changed:
+            self.changed[incident.id] = incident
+            self.stats["updated"] += 1
+
+    def open_count(self, device_id):
+        """Incidentes abertos do dispositivo."""
+        return len(self.open.get(device_id) or ())
+
+    def pending(self):
+        """(linhas para INSERT, linhas para UPDATE) das alterações desde o último commit."""
+        return [i.insert_row() for i in self.opened], [i.update_row() for i in self.changed.values()]
+
+    def committed(self, ids):
+        """Confirma o flush: `ids` são os ids devolvidos pelo INSERT, na ordem de `pending()`."""
+        for incident, incident_id in zip(self.opened, ids):
+            incident.id = incident_id
+        for incident in self.opened + list(self.changed.values()):
+            incident.save()
+        self.opened = []
+        self.changed = {}
+
+    def rollback(self):
+        """Descarta as alterações desde o último commit; as mensagens do lote serão reentregues."""
+        for incident in self.opened:
+            incidents = self.open.get(incident.device_id, {})
+            if incidents.get(incident.alert_type) is incident:
+                del incidents[incident.alert_type]
+        for incident in self.changed.values():
+            incident.restore()
+            if incident.closed_at is None:
+                self.open.setdefault(incident.device_id, {})[incident.alert_type] = incident
+        self.opened = []
+        self.changed = {}
+
+    def load_open(self, db_conn, keep=None, lookback=ALERT_INCIDENT_LOOKBACK):
+        """Recupera os incidentes abertos no banco (índice parcial alerts_open_incidents_idx)."""
+        with db_conn.cursor() as cur:
+            cur.execute("""
+                SELECT id, device_id, alert_type, time, alert_value, last_time, occurrences, peak_value
+                FROM alerts
+                WHERE closed_at IS NULL AND last_time IS NOT NULL AND last_time > NOW() - %s::interval;
+            """, (lookback,))
+            rows = cur.fetchall()
+        db_conn.rollback()
+        restored = 0
+        for incident_id, device_id, alert_type, first, value, last, occurrences, peak in rows:
+            if keep is not None and not keep(device_id):
+                continue
+            incident = Incident(device_id, alert_type, first, value, None, incident_id, last, occurrences, peak)
+            incident.save()
+            self.open.setdefault(device_id, {})[alert_type] = incident
+            restored += 1
+        return restored
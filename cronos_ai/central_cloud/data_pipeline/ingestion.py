@@ -0,0 +1,435 @@
+import bisect
+import csv
+import io
+import json
+import os
+import re
+import time
+import psycopg2
+from psycopg2.extras import execute_values
+
+from cronos_ai.central_cloud.data_pipeline.incidents import INCIDENT_INSERT_COLUMNS, INCIDENT_UPDATE_SQL, INCIDENT_UPDATE_TEMPLATE
+from cronos_ai.shared import metrics
+
+# Canal do NOTIFY emitido a cada lote com alertas (escutado pelo stream de alertas da API).
+ALERT_CHANNEL = "cronos_alerts"
+ALERT_RETURNING = ("id", "time", "device_id", "alert_type", "alert_value", "status")
+ALERT_INSERT_COLUMNS = ("time", "device_id", "alert_type", "alert_value", "full_payload")
+DEAD_LETTER_COLUMNS = ("message_id", "receive_count", "reason", "body")
+# Entregas de uma mensagem rejeitada pelo banco antes de ela ir para dead_letters.
+CONSUMER_MAX_RECEIVES = int(os.getenv("CONSUMER_MAX_RECEIVES", "3"))
+# Erros do banco causados pelo conteúdo (e não pela conexão): só eles levam à gravação isolada.
+CONTENT_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+# Linha do COPY rejeitada, no CONTEXT do erro do PostgreSQL.
+COPY_LINE = re.compile(r"COPY sensor_data, line (\d+)")
+# Na gravação isolada, confere no SAVEPOINT de cada mensagem os valores que os alertas dela levam para os
+# incidentes. É um VALUES solto: dentro de um SELECT, o planner descarta as colunas não usadas sem fazer os casts.
+INCIDENT_PROBE_SQL = "VALUES %s;"
+INCIDENT_PROBE_TEMPLATE = "(%s::real, %s::jsonb)"
+SUSPECTS_MAX = 1000
+
+SENSOR_COLUMNS = (
+    "time", "device_id", "health_factor", "rpm", "temperature_c", "pressure_in_bar", "pressure_out_bar",
+    "vibration_axial_mms", "vibration_radial_mms", "current_a", "acoustic_db", "humidity_percent",
+)
+
+class BatchWriter:
+    """
+    Estágio de escrita em lote do consumidor.
+
+    Acumula leituras validadas (e seus alertas) recebidas em várias chamadas a
+    `receive_message` e grava tudo de uma vez no TimescaleDB: as leituras via
+    `COPY ... FROM STDIN` e os alertas via INSERT multi-linha. O lote é descarregado
+    quando atinge `max_rows` leituras ou quando a leitura mais antiga do buffer
+    completa `max_latency` segundos.
+
+    Os identificadores das mensagens SQS ficam retidos junto com o lote e só são
+    devolvidos por `flush()` depois do commit, para que o chamador apague da fila
+    apenas o que já está persistido.
+
+    Previsões de RUL (`add_predictions`) vão para rul_predictions e resumos de bloco da borda
+    (`add_summaries`) para sensor_summaries, na mesma transação.
+
+    Com um `coalescer` (AlertCoalescer), disparos repetidos do mesmo alerta viram um incidente:
+    só a abertura insere linha em `alerts` e as ocorrências seguintes e o fechamento são gravados
+    como um UPDATE por incidente no flush. Sem ele, cada disparo é uma linha. As leituras e os
+    resumos só chegam ao coalescer no flush, e só os das mensagens gravadas.
+
+    Os alertas gravados são anunciados com NOTIFY no canal ALERT_CHANNEL (faixa de ids do lote)
+    e, se houver `on_alerts`, entregues a ele como dicts logo após o commit.
+
+    Isolamento de falhas: tudo o que é enfileirado antes de um `track_message` pertence àquela
+    mensagem. Se o banco rejeitar o conteúdo do lote (DataError/IntegrityError), o flush refaz a
+    transação sob SAVEPOINTs, separando a mensagem da linha rejeitada pelo COPY (ou dividindo ao
+    meio o trecho rejeitado) até isolar as mensagens culpadas: as aceitas são confirmadas e
+    apagadas da fila normalmente; as rejeitadas voltam para a fila até a entrega número
+    `max_receives` (ApproximateReceiveCount do SQS), quando vão para a tabela dead_letters e são
+    apagadas. Nas reentregas, elas já são gravadas à parte, sem derrubar o lote de novo.
+    Incidentes, previsões de RUL e dead letters são do lote, não de uma mensagem, e são gravados
+    depois das mensagens; com `coalescer`, o SAVEPOINT de cada mensagem também confere os valores
+    e payloads dos alertas dela, e os incidentes saem só das mensagens aceitas. `dead_letter`
+    descarta na hora uma mensagem que nunca seria gravada (corpo ilegível ou inválido).
+
+    Com `detector` (AnomalyDetectorN2), o estado anterior das janelas alteradas pelo lote fica em
+    `detector_state` até o flush; se o flush falhar, as janelas voltam a ele, porque as mensagens
+    serão reentregues e passariam de novo pelo detector.
+
+    Com `on_readings`, cada commit entrega `on_readings(leituras, incidentes_abertos)`: a leitura
+    mais nova de cada dispositivo do lote (tuplas na ordem de SENSOR_COLUMNS) e, com `coalescer`,
+    os incidentes abertos dos dispositivos do lote (cache da visão da frota na API).
+    """
+
+    def __init__(self, db_conn, max_rows=500, max_latency=2.0, on_alerts=None, coalescer=None, on_readings=None,
+                 max_receives=CONSUMER_MAX_RECEIVES, detector=None):
+        self.db_conn = db_conn
+        self.max_rows = max_rows
+        self.max_latency = max_latency
+        self.on_alerts = on_alerts
+        self.coalescer = coalescer
+        self.on_readings = on_readings
+        self.max_receives = max_receives
+        self.detector = detector
+        self.detector_state = None if detector is None else {}
+        self.rows = []
+        self.alerts = []
+        self.predictions = []
+        self.summaries = []
+        # Entradas do coalescer (device_id, instante, alertas), aplicadas no flush.
+        self.observations = []
+        self.pending_messages = []
+        self.messages = []
+        self.dead_letters = []
+        # MessageIds rejeitados pelo banco que ainda voltam para a fila (a reentrega cai no mesmo worker).
+        self.suspects = {}
+        self._oldest = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, sd, received_at, alerts=()):
+        """
+        Enfileira uma leitura; `alerts` é uma lista de (alert_type, alert_value, full_payload).
+        A leitura é gravada com o instante de coleta da borda quando ele vem na mensagem.
+        """
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if sd.time is not None:
+            received_at = sd.time
+        self.rows.append((
+            received_at, sd.device_id, sd.health_factor, sd.rpm, sd.temperature_c, sd.pressure_in_bar,
+            sd.pressure_out_bar, sd.vibration_axial_mms, sd.vibration_radial_mms, sd.current_a,
+            sd.acoustic_db, sd.humidity_percent,
+        ))
+        if self.coalescer is not None:
+            self.observations.append((sd.device_id, received_at, alerts))
+            return
+        for alert_type, alert_value, full_payload in alerts:
+            self.alerts.append((received_at, sd.device_id, alert_type, alert_value, json.dumps(full_payload)))
+
+    def add_predictions(self, predicted_at, predictions, model_version):
+        """Enfileira previsões de RUL: `predictions` é uma lista de (device_id, rul_horas)."""
+        self.predictions.extend((predicted_at, device_id, rul, model_version) for device_id, rul in predictions)
+
+    def add_summaries(self, summaries):
+        """Enfileira resumos de bloco (SensorSummary) enviados pela borda; eles também fecham incidentes silenciosos."""
+        self.summaries.extend((s.time, s.device_id, s.window_start, s.readings, json.dumps(s.features)) for s in summaries)
+        if self.coalescer is not None:
+            self.observations.extend((s.device_id, s.time, ()) for s in summaries)
+
+    def track_message(self, message):
+        """Registra uma mensagem SQS cujo conteúdo (tudo o que foi enfileirado desde a anterior) já está no lote."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        entry = {'Id': message['MessageId'], 'ReceiptHandle': message['ReceiptHandle']}
+        self.pending_messages.append(entry)
+        self.messages.append((entry, message, self._marks()))
+
+    def dead_letter(self, message, reason):
+        """Enfileira uma mensagem para dead_letters; ela é apagada da fila depois do commit do lote."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        entry = {'Id': message['MessageId'], 'ReceiptHandle': message['ReceiptHandle']}
+        self.dead_letters.append((entry, (
+            message['MessageId'], receive_count(message), _text(reason), _text(message.get('Body', '')),
+        )))
+
+    def _marks(self):
+        return len(self.rows), len(self.summaries), len(self.alerts), len(self.observations)
+
+    def seconds_until_due(self):
+        """Segundos restantes até o lote atual vencer por tempo (None se vazio)."""
+        if self._oldest is None:
+            return None
+        return max(0.0, self.max_latency - (time.monotonic() - self._oldest))
+
+    def should_flush(self):
+        if len(self.rows) >= self.max_rows:
+            return True
+        remaining = self.seconds_until_due()
+        return remaining is not None and remaining <= 0
+
+    def _copy_rows(self, cur, rows):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow(['' if v is None else v for v in row])
+        buf.seek(0)
+        cur.copy_expert(f"COPY sensor_data ({', '.join(SENSOR_COLUMNS)}) FROM STDIN WITH (FORMAT csv);", buf)
+
+    def _insert_alerts(self, cur, alerts, columns):
+        return execute_values(
+            cur,
+            f"INSERT INTO alerts ({', '.join(columns)}) VALUES %s RETURNING {', '.join(ALERT_RETURNING)};",
+            alerts,
+            page_size=len(alerts),
+            fetch=True,
+        )
+
+    def _write_owned(self, cur, start, end, probe=False):
+        """
+        Leituras, resumos e alertas (sem coalescer) entre duas marcas de `_marks`; devolve os alertas
+        inseridos. Com `probe`, confere também os alertas que vão para o coalescer.
+        """
+        if probe:
+            alerts = [(value, json.dumps(payload)) for _, _, alerts in self.observations[start[3]:end[3]]
+                      for _, value, payload in alerts]
+            if alerts:
+                execute_values(cur, INCIDENT_PROBE_SQL, alerts, template=INCIDENT_PROBE_TEMPLATE, page_size=len(alerts))
+        if end[0] > start[0]:
+            self._copy_rows(cur, self.rows[start[0]:end[0]])
+        if end[1] > start[1]:
+            summaries = self.summaries[start[1]:end[1]]
+            execute_values(
+                cur,
+                "INSERT INTO sensor_summaries (time, device_id, window_start, readings, features) VALUES %s;",
+                summaries,
+                page_size=len(summaries),
+            )
+        if end[2] > start[2]:
+            return self._insert_alerts(cur, self.alerts[start[2]:end[2]], ALERT_INSERT_COLUMNS)
+        return []
+
+    def _bounds(self):
+        return [(0, 0, 0, 0)] + [end for _, _, end in self.messages]
+
+    def _write_isolated(self, cur, ranges):
+        """
+        Grava cada trecho de mensagens [lo, hi) de `ranges` sob um SAVEPOINT (é uma pilha: o
+        último trecho vai primeiro); um trecho rejeitado é refeito em pedaços menores até chegar
+        às mensagens culpadas. Devolve (alertas inseridos, leituras gravadas, trechos [lo, hi) de
+        mensagens gravados, mensagens rejeitadas com o erro).
+        """
+        inserted, rows, written, rejected = [], [], [], []
+        bounds = self._bounds()
+        pending = list(ranges)
+        while pending:
+            lo, hi = pending.pop()
+            if lo >= hi:
+                continue
+            cur.execute("SAVEPOINT batch_message;")
+            try:
+                alerts = self._write_owned(cur, bounds[lo], bounds[hi], probe=self.coalescer is not None)
+            except CONTENT_ERRORS as e:
+                cur.execute("ROLLBACK TO SAVEPOINT batch_message;")
+                if hi - lo == 1:
+                    entry, message, _ = self.messages[lo]
+                    rejected.append((entry, message, e))
+                else:
+                    pending += self._subranges(e, bounds, lo, hi)
+                continue
+            cur.execute("RELEASE SAVEPOINT batch_message;")
+            inserted += alerts
+            rows += self.rows[bounds[lo][0]:bounds[hi][0]]
+            written.append((lo, hi))
+        # Conteúdo enfileirado sem mensagem (carga direta pelo BatchWriter) vai sem isolamento.
+        inserted += self._write_owned(cur, bounds[-1], self._marks())
+        rows += self.rows[bounds[-1][0]:]
+        return inserted, rows, written, rejected
+
+    def _quarantine(self):
+        """
+        Trechos que separam as mensagens do lote já rejeitadas pelo banco em uma entrega anterior
+        (`suspects`), para que elas não derrubem o COPY do lote de novo; vazio se não há nenhuma.
+        """
+        ranges, lo = [], 0
+        for i, (entry, _, _) in enumerate(self.messages):
+            if entry['Id'] in self.suspects:
+                ranges += [(lo, i), (i, i + 1)]
+                lo = i + 1
+        if not ranges:
+            return []
+        ranges.append((lo, len(self.messages)))
+        return ranges[::-1]
+
+    def _subranges(self, error, bounds, lo, hi):
+        """
+        Divide as mensagens [lo, hi) em volta da que tem a leitura apontada pelo erro do COPY
+        (linha no CONTEXT), para gravar as demais de uma vez; sem essa indicação (INSERT de
+        alertas ou resumos), divide ao meio.
+        """
+        match = COPY_LINE.search(getattr(error.diag, "context", None) or "")
+        if match is not None:
+            row = bounds[lo][0] + int(match.group(1)) - 1
+            failed = bisect.bisect_right([end[0] for end in bounds[lo + 1:hi + 1]], row) + lo
+            if failed < hi:
+                return [(failed + 1, hi), (failed, failed + 1), (lo, failed)]
+        middle = (lo + hi) // 2
+        return [(middle, hi), (lo, middle)]
+
+    def _observe(self, spans):
+        """Aplica ao coalescer as observações dos trechos [início, fim) de `observations`; devolve o pending() dele."""
+        if self.coalescer is None:
+            return [], []
+        for start, end in spans:
+            for device_id, at, alerts in self.observations[start:end]:
+                self.coalescer.observe(device_id, at, alerts)
+        return self.coalescer.pending()
+
+    def _write_shared(self, cur, incidents, incident_updates, inserted):
+        """Conteúdo do lote (incidentes, previsões e dead letters) e NOTIFY dos alertas; devolve os incidentes inseridos."""
+        incident_rows = self._insert_alerts(cur, incidents, INCIDENT_INSERT_COLUMNS) if incidents else []
+        ids = [row[0] for row in inserted + incident_rows]
+        if ids:
+            # O NOTIFY só é entregue no commit, junto com as linhas.
+            cur.execute("SELECT pg_notify(%s, %s);", (ALERT_CHANNEL, f"{min(ids)},{max(ids)}"))
+        if incident_updates:
+            execute_values(cur, INCIDENT_UPDATE_SQL, incident_updates,
+                           template=INCIDENT_UPDATE_TEMPLATE, page_size=len(incident_updates))
+        if self.predictions:
+            execute_values(
+                cur,
+                "INSERT INTO rul_predictions (time, device_id, rul_hours, model_version) VALUES %s;",
+                self.predictions,
+                page_size=len(self.predictions),
+            )
+        if self.dead_letters:
+            execute_values(
+                cur,
+                f"INSERT INTO dead_letters ({', '.join(DEAD_LETTER_COLUMNS)}) VALUES %s;",
+                [row for _, row in self.dead_letters],
+                page_size=len(self.dead_letters),
+            )
+        return incident_rows
+
+    def _reject(self, rejected):
+        """Mensagens rejeitadas pelo banco: dead_letters na última entrega permitida; antes disso, voltam para a fila."""
+        retried = 0
+        for entry, message, error in rejected:
+            count = receive_count(message)
+            print(f"API_CONSUMER: Mensagem {entry['Id']} rejeitada pelo banco (entrega {count}/{self.max_receives}): {error}")
+            if count >= self.max_receives:
+                self.suspects.pop(entry['Id'], None)
+                self.dead_letter(message, f"write: {error}")
+            else:
+                retried += 1
+                self.suspects[entry['Id']] = None
+                if len(self.suspects) > SUSPECTS_MAX:
+                    del self.suspects[next(iter(self.suspects))]
+        metrics.MESSAGES_REJECTED.inc(retried)
+
+    def flush(self):
+        """Grava o lote em uma única transação e devolve as entradas SQS prontas para exclusão."""
+        if not self.rows and not self.alerts and not self.pending_messages and not self.dead_letters:
+            return []
+        rows, committed = self.rows, self.pending_messages
+        try:
+            with metrics.stage("db_flush"):
+                ranges = self._quarantine()
+                if not ranges:
+                    incidents, incident_updates = self._observe([(0, len(self.observations))])
+                    try:
+                        with self.db_conn.cursor() as cur:
+                            inserted = self._write_owned(cur, (0, 0, 0, 0), self._marks())
+                            incident_rows = self._write_shared(cur, incidents, incident_updates, inserted)
+                        self.db_conn.commit()
+                    except CONTENT_ERRORS as e:
+                        self.db_conn.rollback()
+                        if self.coalescer is not None:
+                            self.coalescer.rollback()
+                        print(f"API_CONSUMER: Lote rejeitado pelo banco ({e}); isolando as mensagens.")
+                        ranges = self._subranges(e, self._bounds(), 0, len(self.messages))
+                if ranges:
+                    with metrics.stage("db_isolate"), self.db_conn.cursor() as cur:
+                        inserted, rows, written, rejected = self._write_isolated(cur, ranges)
+                        self._reject(rejected)
+                        # O coalescer só vê as mensagens aceitas (e o conteúdo sem mensagem, gravado por último).
+                        bounds = self._bounds()
+                        written.sort()
+                        incidents, incident_updates = self._observe(
+                            [(bounds[lo][3], bounds[hi][3]) for lo, hi in written] + [(bounds[-1][3], len(self.observations))]
+                        )
+                        committed = [entry for lo, hi in written for entry, _, _ in self.messages[lo:hi]]
+                        incident_rows = self._write_shared(cur, incidents, incident_updates, inserted)
+                    self.db_conn.commit()
+        except Exception:
+            # As mensagens não apagadas voltam a ficar visíveis na fila e serão reentregues,
+            # então o lote é descartado em vez de ser regravado no próximo flush.
+            self.db_conn.rollback()
+            if self.coalescer is not None:
+                self.coalescer.rollback()
+            if self.detector is not None:
+                self.detector.rollback(self.detector_state)
+            self._reset()
+            raise
+        if self.coalescer is not None:
+            self.coalescer.committed([row[0] for row in incident_rows])
+            metrics.INCIDENTS_OPENED.inc(len(incident_rows))
+            metrics.INCIDENTS_UPDATED.inc(len(incident_updates))
+        metrics.CONSUMER_BATCH_ROWS.observe(len(rows))
+        metrics.MESSAGES_DEAD_LETTERED.inc(len(self.dead_letters))
+        committed = committed + [entry for entry, _ in self.dead_letters]
+        if self.on_readings:
+            self._publish_readings(rows)
+        self._reset()
+        inserted += incident_rows
+        if inserted and self.on_alerts:
+            try:
+                self.on_alerts([dict(zip(ALERT_RETURNING, row)) for row in inserted])
+            except Exception as e:
+                print(f"API_CONSUMER: Falha ao publicar alertas gravados: {e}")
+        return committed
+
+    def _publish_readings(self, rows):
+        # Roda depois do commit: uma falha aqui não pode derrubar o flush de um lote já gravado.
+        try:
+            latest = {}
+            for row in rows:
+                current = latest.get(row[1])
+                if current is None or row[0] >= current[0]:
+                    latest[row[1]] = row
+            open_alerts = None
+            if self.coalescer is not None:
+                devices = set(latest).union(summary[1] for summary in self.summaries)
+                open_alerts = {device_id: self.coalescer.open_count(device_id) for device_id in devices}
+            self.on_readings(list(latest.values()), open_alerts)
+        except Exception as e:
+            print(f"API_CONSUMER: Falha ao publicar últimas leituras: {e}")
+
+    def _reset(self):
+        self.rows = []
+        self.alerts = []
+        self.predictions = []
+        self.summaries = []
+        self.observations = []
+        self.pending_messages = []
+        self.messages = []
+        self.dead_letters = []
+        if self.detector_state:
+            self.detector_state.clear()
+        self._oldest = None
+
+def receive_count(message):
+    """Entregas da mensagem até agora (ApproximateReceiveCount, pedido no receive_message); 1 se ausente."""
+    try:
+        return int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1))
+    except (TypeError, ValueError):
+        return 1
+
+def _text(value):
+    # TEXT do PostgreSQL não aceita NUL, que é justamente um dos conteúdos que levam uma mensagem para lá.
+    return str(value).replace("\x00", "\\u0000")
+
+def delete_committed(sqs_client, queue_url, entries):
+    """Apaga da fila as mensagens já persistidas, respeitando o limite de 10 por chamada."""
+    for i in range(0, len(entries), 10):
+        sqs_client.delete_message_batch(QueueUrl=queue_url, Entries=entries[i:i + 10])
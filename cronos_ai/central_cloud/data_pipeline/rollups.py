@@ -0,0 +1,147 @@
+"""
+Camada de rollups do sensor_data: continuous aggregates do TimescaleDB em 1 minuto, 1 hora e
+1 dia, com média, mínimo e máximo de todos os canais, e o planejador que escolhe o rollup mais
+grosso capaz de responder a um pedido de sumário.
+"""
+import re
+from datetime import timedelta
+
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+
+# (view, bucket, largura do bucket, start_offset, end_offset, schedule_interval) das políticas de refresh.
+ROLLUPS = (
+    ("sensor_data_1m", "1 minute", timedelta(minutes=1), "2 hours", "1 minute", "1 minute"),
+    ("sensor_data_1h", "1 hour", timedelta(hours=1), "3 days", "1 hour", "30 minutes"),
+    ("sensor_data_1d", "1 day", timedelta(days=1), "30 days", "1 day", "1 hour"),
+)
+
+# Colunas do formato antigo do /summary, mantidas para os clientes existentes.
+LEGACY_SUMMARY_COLUMNS = (
+    ("avg_temperature", "temperature_c_avg"),
+    ("max_vibration", "vibration_radial_mms_max"),
+    ("min_pressure_in", "pressure_in_bar_min"),
+    ("max_pressure_out", "pressure_out_bar_max"),
+    ("avg_current", "current_a_avg"),
+)
+
+_INTERVAL_UNITS = {
+    "second": timedelta(seconds=1), "minute": timedelta(minutes=1), "min": timedelta(minutes=1),
+    "hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1),
+}
+_INTERVAL_PART = re.compile(r"(\d+)\s*(second|minute|min|hour|day|week)s?", re.IGNORECASE)
+
+def parse_interval(text):
+    """Converte '15 minutes', '1 hour', '2 days 12 hours' etc. em timedelta (None se não reconhecer)."""
+    parts = _INTERVAL_PART.findall(text or "")
+    if not parts or _INTERVAL_PART.sub("", text).strip(" ,"):
+        return None
+    return sum((int(n) * _INTERVAL_UNITS[unit.lower()] for n, unit in parts), timedelta())
+
+def rollup_ddl(view, bucket, width, start_offset, end_offset, schedule):
+    """Comandos que criam um continuous aggregate e sua política de atualização (idempotentes)."""
+    aggregates = ",\n    ".join(
+        f"AVG({c}) AS {c}_avg, MIN({c}) AS {c}_min, MAX({c}) AS {c}_max" for c in SENSOR_CHANNELS
+    )
+    return [
+        f"""CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '{bucket}', time) AS bucket, device_id, COUNT(*) AS samples,
+    {aggregates}
+FROM sensor_data
+GROUP BY bucket, device_id
+WITH NO DATA;""",
+        f"""SELECT add_continuous_aggregate_policy('{view}',
+    start_offset => INTERVAL '{start_offset}', end_offset => INTERVAL '{end_offset}',
+    schedule_interval => INTERVAL '{schedule}', if_not_exists => TRUE);""",
+    ]
+
+def create_rollups(conn):
+    """Cria os rollups. Continuous aggregates não podem ser criados dentro de transação, então usa autocommit."""
+    conn.commit()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for rollup in ROLLUPS:
+                for statement in rollup_ddl(*rollup):
+                    cur.execute(statement)
+    finally:
+        conn.autocommit = False
+
+def choose_rollup(interval):
+    """
+    Rollup mais grosso cujo bucket divide exatamente o intervalo pedido; None quando só os
+    dados brutos respondem (intervalo menor que 1 minuto, não múltiplo ou não reconhecido).
+    """
+    width = parse_interval(interval)
+    if not width:
+        return None
+    for view, _, rollup_width, *_ in reversed(ROLLUPS):
+        if width >= rollup_width and width % rollup_width == timedelta(0):
+            return view
+    return None
+
+def _full_buckets(column, bucket):
+    # Buckets inteiros do rollup dentro do período: do primeiro que começa em start_time até o que contém end_time (exclusive).
+    return (f"{column} >= time_bucket(INTERVAL '{bucket}', period.start_time - INTERVAL '1 microsecond') + INTERVAL '{bucket}'"
+            f" AND {column} < time_bucket(INTERVAL '{bucket}', period.end_time)")
+
+def plan_summary_query(device_id, interval, start_time, end_time, use_rollups=True):
+    """
+    Monta (sql, params, fonte) do sumário. Sobre um rollup, as médias são reponderadas pelo
+    número de amostras de cada bucket. O rollup escolhido só responde pelos buckets inteiros do
+    período; as bordas vêm dos rollups mais finos e, abaixo de 1 minuto, do sensor_data, para
+    que o resultado seja o mesmo da consulta sobre os dados brutos.
+    """
+    view = choose_rollup(interval) if use_rollups else None
+    legacy = ", ".join(f"{source} AS {alias}" for alias, source in LEGACY_SUMMARY_COLUMNS)
+    raw_columns = ",\n            ".join(
+        f"AVG({c}) AS {c}_avg, MIN({c}) AS {c}_min, MAX({c}) AS {c}_max" for c in SENSOR_CHANNELS
+    )
+    if view is None:
+        sql = f"""
+            SELECT summary.*, {legacy} FROM (
+                SELECT time_bucket(%s::interval, time) AS bucket, COUNT(*) AS samples,
+                    {raw_columns}
+                FROM sensor_data
+                WHERE device_id = %s AND time BETWEEN %s AND %s
+                GROUP BY 1
+            ) summary
+            ORDER BY bucket DESC;
+        """
+        return sql, (interval, device_id, start_time, end_time), "sensor_data"
+    # Do rollup escolhido até o de 1 minuto; cada camada cobre só o que a anterior não cobriu.
+    layers = ROLLUPS[[rollup[0] for rollup in ROLLUPS].index(view)::-1]
+    rollup_columns = ", ".join(f"{c}_avg, {c}_min, {c}_max" for c in SENSOR_CHANNELS)
+    parts = []
+    for i, (layer, bucket, *_) in enumerate(layers):
+        where = _full_buckets("bucket", bucket)
+        if i:
+            where += f" AND NOT ({_full_buckets('bucket', layers[i - 1][1])})"
+        parts.append(f"SELECT bucket, samples, {rollup_columns} FROM {layer}, period WHERE device_id = %s AND {where}")
+    parts.append(
+        f"""SELECT time_bucket(INTERVAL '{layers[-1][1]}', time) AS bucket, COUNT(*) AS samples,
+            {raw_columns}
+            FROM sensor_data, period
+            WHERE device_id = %s AND time BETWEEN period.start_time AND period.end_time
+                AND NOT ({_full_buckets('time', layers[-1][1])})
+            GROUP BY 1"""
+    )
+    union = "\n            UNION ALL\n            ".join(parts)
+    columns = ",\n            ".join(
+        f"SUM({c}_avg * samples) / NULLIF(SUM(samples), 0) AS {c}_avg, MIN({c}_min) AS {c}_min, MAX({c}_max) AS {c}_max"
+        for c in SENSOR_CHANNELS
+    )
+    sql = f"""
+        WITH period AS (SELECT %s::timestamptz AS start_time, %s::timestamptz AS end_time),
+        parts AS (
+            {union}
+        )
+        SELECT summary.*, {legacy} FROM (
+            SELECT time_bucket(%s::interval, bucket) AS bucket, SUM(samples) AS samples,
+                {columns}
+            FROM parts
+            GROUP BY 1
+        ) summary
+        ORDER BY bucket DESC;
+    """
+    return sql, (start_time, end_time, *[device_id] * len(parts), interval), view
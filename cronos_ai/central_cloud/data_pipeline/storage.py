@@ -0,0 +1,139 @@
+"""
+Políticas de armazenamento da hypertable sensor_data: intervalo de chunk, compressão nativa
+segmentada por device_id, retenção e índices, todos configurados na seção `storage` do config.yaml.
+
+Também funciona como ferramenta de migração para instalações existentes, mostrando o tamanho
+da tabela antes e depois:
+
+    python -m cronos_ai.central_cloud.data_pipeline.storage [--compress-now] [--dry-run]
+"""
+import argparse
+import json
+
+from psycopg2.extras import RealDictCursor
+
+from cronos_ai.shared.config import get_section
+from cronos_ai.shared.database import connect
+
+DEFAULT_SENSOR_DATA_POLICY = {
+    "chunk_time_interval": "6 hours",
+    "compress_after": "7 days",
+    "retention": "365 days",
+}
+
+def load_storage_policy():
+    return get_section("storage", "sensor_data", default=DEFAULT_SENSOR_DATA_POLICY)
+
+def storage_statements(policy):
+    """Lista de (sql, params) que aplica a política; cada comando é idempotente."""
+    statements = [
+        ("SELECT set_chunk_time_interval('sensor_data', %s::interval);", (policy["chunk_time_interval"],)),
+        # Consultas por dispositivo em um período (get_sensor_data_by_device) usam este índice.
+        ("CREATE INDEX IF NOT EXISTS sensor_data_device_time_idx ON sensor_data (device_id, time DESC);", None),
+        ("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM timescaledb_information.hypertables
+                               WHERE hypertable_name = 'sensor_data' AND compression_enabled) THEN
+                    ALTER TABLE sensor_data SET (
+                        timescaledb.compress,
+                        timescaledb.compress_segmentby = 'device_id',
+                        timescaledb.compress_orderby = 'time DESC'
+                    );
+                END IF;
+            END $$;
+        """, None),
+        # Remover e recriar as políticas faz uma mudança no config.yaml valer para instalações existentes.
+        ("SELECT remove_compression_policy('sensor_data', if_exists => TRUE);", None),
+        ("SELECT remove_retention_policy('sensor_data', if_exists => TRUE);", None),
+    ]
+    if policy.get("compress_after"):
+        statements.append(("SELECT add_compression_policy('sensor_data', %s::interval);", (policy["compress_after"],)))
+    if policy.get("retention"):
+        statements.append(("SELECT add_retention_policy('sensor_data', %s::interval);", (policy["retention"],)))
+    return statements
+
+def apply_storage_policies(conn, policy=None):
+    """Aplica a política de armazenamento em uma transação."""
+    policy = policy or load_storage_policy()
+    with conn.cursor() as cur:
+        for sql, params in storage_statements(policy):
+            cur.execute(sql, params)
+    conn.commit()
+    return policy
+
+def storage_report(conn):
+    """Tamanho da hypertable (tabela, índices, total), número de chunks e efeito da compressão."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT table_bytes, index_bytes, toast_bytes, total_bytes
+            FROM hypertable_detailed_size('sensor_data');
+        """)
+        report = dict(cur.fetchone() or {})
+        cur.execute("SELECT COUNT(*) AS chunks FROM show_chunks('sensor_data');")
+        report.update(cur.fetchone())
+        cur.execute("""
+            SELECT number_compressed_chunks, before_compression_total_bytes, after_compression_total_bytes
+            FROM hypertable_compression_stats('sensor_data');
+        """)
+        report.update(cur.fetchone() or {})
+        cur.execute("""
+            SELECT COUNT(*) / 3600.0 AS rows_per_second_last_hour
+            FROM sensor_data WHERE time > NOW() - INTERVAL '1 hour';
+        """)
+        report.update(cur.fetchone())
+    conn.rollback()
+    return {key: float(value) if value is not None and not isinstance(value, int) else value for key, value in report.items()}
+
+def recommend_chunk_interval(rows_per_second, bytes_per_row=120, memory_budget_bytes=1 << 30):
+    """Intervalo de chunk (em horas) que mantém um chunk, com índices, dentro do orçamento de memória."""
+    if not rows_per_second:
+        return None
+    hours = memory_budget_bytes / (rows_per_second * bytes_per_row * 3600)
+    for candidate in (168, 24, 12, 6, 3, 1):
+        if hours >= candidate:
+            return f"{candidate} hours"
+    return "1 hour"
+
+def compress_eligible_chunks(conn, compress_after):
+    """Comprime agora os chunks que a política só comprimiria no próximo job agendado."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(compress_chunk(chunk, if_not_compressed => TRUE))
+            FROM show_chunks('sensor_data', older_than => %s::interval) AS chunk;
+        """, (compress_after,))
+        compressed = cur.fetchone()[0]
+    conn.commit()
+    return compressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as políticas de armazenamento do sensor_data a uma instalação existente.")
+    parser.add_argument("--compress-now", action="store_true", help="Comprime imediatamente os chunks já elegíveis.")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas mostra o relatório e a política que seria aplicada.")
+    args = parser.parse_args()
+
+    conn = connect()
+    if not conn:
+        print("STORAGE: Não foi possível conectar ao banco."); return
+    try:
+        policy = load_storage_policy()
+        before = storage_report(conn)
+        print(f"STORAGE: Antes: {json.dumps(before, indent=2)}")
+        print(f"STORAGE: Política: {json.dumps(policy, indent=2)}")
+        recommended = recommend_chunk_interval(before.get("rows_per_second_last_hour"))
+        if recommended:
+            print(f"STORAGE: Intervalo de chunk recomendado para a ingestão atual: {recommended}")
+        if args.dry_run:
+            return
+        apply_storage_policies(conn, policy)
+        if args.compress_now and policy.get("compress_after"):
+            print(f"STORAGE: {compress_eligible_chunks(conn, policy['compress_after'])} chunk(s) comprimido(s).")
+        after = storage_report(conn)
+        print(f"STORAGE: Depois: {json.dumps(after, indent=2)}")
+        if before.get("total_bytes") and after.get("total_bytes"):
+            print(f"STORAGE: Variação de tamanho: {before['total_bytes'] - after['total_bytes']:+,.0f} bytes liberados.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import os
+
+import numpy as np
+
+class RollingWindowStats:
+    """
+    Estatísticas de janela deslizante (média e desvio padrão) por dispositivo e por canal.
+
+    Cada dispositivo ocupa uma linha de um ring buffer NumPy pré-alocado com forma
+    (capacidade, window_size, canais). Somas e somas dos quadrados são mantidas em float64
+    e atualizadas em O(1) a cada leitura (entra o valor novo, sai o mais antigo da janela).
+    Quando o ponteiro da janela dá a volta, as somas daquele dispositivo são recalculadas
+    a partir do buffer, o que elimina o erro de arredondamento acumulado com custo amortizado O(1).
+
+    A capacidade dobra quando um dispositivo novo não cabe, então a memória por dispositivo
+    é fixa e dada por `bytes_per_device`.
+    """
+
+    def __init__(self, channels, window_size=100, initial_capacity=256, dtype=np.float32):
+        self.channels = tuple(channels)
+        self.window_size = window_size
+        self.dtype = np.dtype(dtype)
+        self.index = {}
+        self._alloc(initial_capacity)
+
+    def _alloc(self, capacity):
+        n_channels = len(self.channels)
+        self.buffer = np.zeros((capacity, self.window_size, n_channels), dtype=self.dtype)
+        self.sums = np.zeros((capacity, n_channels), dtype=np.float64)
+        self.sumsq = np.zeros((capacity, n_channels), dtype=np.float64)
+        self.counts = np.zeros(capacity, dtype=np.int32)
+        self.heads = np.zeros(capacity, dtype=np.int32)
+
+    def _grow(self):
+        old = (self.buffer, self.sums, self.sumsq, self.counts, self.heads)
+        used = len(self.index)
+        self._alloc(max(1, self.buffer.shape[0]) * 2)
+        for new_arr, old_arr in zip((self.buffer, self.sums, self.sumsq, self.counts, self.heads), old):
+            new_arr[:used] = old_arr[:used]
+
+    @property
+    def capacity(self):
+        return self.buffer.shape[0]
+
+    def row_for(self, device_id):
+        """Linha do dispositivo no buffer, alocando uma nova se for a primeira leitura dele."""
+        row = self.index.get(device_id)
+        if row is None:
+            row = len(self.index)
+            if row >= self.capacity:
+                self._grow()
+            self.index[device_id] = row
+        return row
+
+    def rows_for(self, device_ids):
+        return np.fromiter((self.row_for(d) for d in device_ids), dtype=np.intp, count=len(device_ids))
+
+    def stats(self, rows):
+        """Devolve (média, desvio padrão populacional, contagem) das janelas das linhas pedidas."""
+        counts = self.counts[rows]
+        n = np.maximum(counts, 1)[:, None]
+        mean = self.sums[rows] / n
+        var = np.maximum(self.sumsq[rows] / n - mean * mean, 0.0)
+        return mean, np.sqrt(var), counts
+
+    def push(self, rows, values):
+        """Insere uma leitura por linha; `rows` não pode ter repetições (use rodadas para isso)."""
+        values = np.asarray(values, dtype=self.dtype)
+        heads = self.heads[rows]
+        full = self.counts[rows] == self.window_size
+        evicted = self.buffer[rows, heads].astype(np.float64)
+        evicted[~full] = 0.0
+        incoming = values.astype(np.float64)
+        self.sums[rows] += incoming - evicted
+        self.sumsq[rows] += incoming * incoming - evicted * evicted
+        self.buffer[rows, heads] = values
+        heads = (heads + 1) % self.window_size
+        self.heads[rows] = heads
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.window_size)
+        wrapped = rows[heads == 0]
+        if wrapped.size:
+            window = self.buffer[wrapped].astype(np.float64)
+            self.sums[wrapped] = window.sum(axis=1)
+            self.sumsq[wrapped] = (window * window).sum(axis=1)
+
+    def save_rows(self, rows, saved):
+        """
+        Guarda em `saved` (dict vazio no início do lote) o estado das linhas que ainda não estão
+        nele, para `restore_rows`.
+        """
+        seen = saved.setdefault("rows", set())
+        new = [row for row in rows if row not in seen]
+        if new:
+            seen.update(new)
+            # Indexação por lista já copia: uma cópia por array para todas as linhas novas.
+            saved.setdefault("chunks", []).append(
+                (new, [arr[new] for arr in (self.buffer, self.sums, self.sumsq, self.counts, self.heads)]))
+
+    def restore_rows(self, saved):
+        """Volta as linhas ao estado guardado por `save_rows`."""
+        for rows, state in saved.get("chunks", ()):
+            for arr, part in zip((self.buffer, self.sums, self.sumsq, self.counts, self.heads), state):
+                arr[rows] = part
+
+    def load_window(self, device_id, values):
+        """Substitui a janela do dispositivo pelas leituras dadas, da mais antiga para a mais recente."""
+        values = np.asarray(values, dtype=self.dtype)[-self.window_size:]
+        row = self.row_for(device_id)
+        n = len(values)
+        self.buffer[row, :n] = values
+        self.buffer[row, n:] = 0
+        self.counts[row] = n
+        self.heads[row] = n % self.window_size
+        window = values.astype(np.float64)
+        self.sums[row] = window.sum(axis=0)
+        self.sumsq[row] = (window * window).sum(axis=0)
+
+    def window_of(self, device_id):
+        """Leituras atuais da janela do dispositivo, da mais antiga para a mais recente."""
+        row = self.index[device_id]
+        count = self.counts[row]
+        if count < self.window_size:
+            return self.buffer[row, :count].copy()
+        return np.roll(self.buffer[row], -self.heads[row], axis=0)
+
+    def export(self):
+        """Cópia das janelas em uso, pronta para `write` (permite gravar fora de um lock)."""
+        used = len(self.index)
+        return {
+            "device_ids": np.array(sorted(self.index, key=self.index.get), dtype=str),
+            "channels": np.array(self.channels, dtype=str),
+            "buffer": self.buffer[:used].copy(),
+            "counts": self.counts[:used].copy(),
+            "heads": self.heads[:used].copy(),
+        }
+
+    @staticmethod
+    def write(path, arrays):
+        """Grava o resultado de `export` em um .npz compactado (escrita atômica via arquivo temporário)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def save(self, path):
+        self.write(path, self.export())
+
+    def restore(self, path, keep=None):
+        """
+        Carrega janelas salvas por `save`. `keep(device_id)` filtra os dispositivos a restaurar.
+        Snapshots de outra configuração (canais ou tamanho de janela diferentes) são ignorados.
+        Devolve o número de dispositivos restaurados.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(data["channels"].tolist()) != self.channels or data["buffer"].shape[1] != self.window_size:
+                return 0
+            buffer, counts, heads = data["buffer"], data["counts"], data["heads"]
+            restored = 0
+            for i, device_id in enumerate(data["device_ids"].tolist()):
+                if keep is not None and not keep(device_id):
+                    continue
+                if counts[i] < self.window_size:
+                    self.load_window(device_id, buffer[i, :counts[i]])
+                else:
+                    self.load_window(device_id, np.roll(buffer[i], -heads[i], axis=0))
+                restored += 1
+        return restored
+
+    @property
+    def bytes_per_device(self):
+        n_channels = len(self.channels)
+        return self.window_size * n_channels * self.dtype.itemsize + 2 * n_channels * 8 + 2 * 4
+
+    def memory_report(self):
+        """Uso de memória do motor: total alocado e custo fixo por dispositivo."""
+        return {
+            "devices": len(self.index),
+            "capacity": self.capacity,
+            "bytes_per_device": self.bytes_per_device,
+            "bytes_allocated": self.bytes_per_device * self.capacity,
+        }
+
+def occurrence_rank(keys):
+    """Para cada posição, quantas vezes a mesma chave já apareceu antes dela no lote."""
+    seen = {}
+    ranks = np.empty(len(keys), dtype=np.intp)
+    for i, key in enumerate(keys):
+        ranks[i] = seen.get(key, 0)
+        seen[key] = ranks[i] + 1
+    return ranks
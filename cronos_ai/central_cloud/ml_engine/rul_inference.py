@@ -0,0 +1,184 @@
+"""
+Inferência online de RUL (vida útil remanescente, em horas) das bombas.
+
+O modelo é um regressor linear serializado em .npz, sem pickle: nomes das features, média e
+escala de padronização, coeficientes, intercepto e versão. É carregado uma vez (RUL_MODEL_PATH)
+e aplicado a um micro-lote de dispositivos com uma única multiplicação de matrizes.
+
+As features saem das janelas deslizantes que o detector N2 já mantém (RollingWindowStats): média
+e desvio de cada canal, atualizados em O(1) a cada leitura, e a leitura mais recente. Pontuar não
+consulta o banco nem percorre as janelas.
+
+O consumidor chama `RulScorer.score` com os dispositivos de cada lote; cada dispositivo é pontuado
+no máximo a cada RUL_SCORE_INTERVAL_SECONDS e só com a janela aquecida. As previsões vão para a
+tabela rul_predictions junto com as leituras do lote.
+
+Treino de um modelo a partir do simulador (o Dockerfile gera o modelo padrão assim):
+
+    python -m cronos_ai.central_cloud.ml_engine.rul_inference train --output /var/lib/cronos/models/rul_model.npz
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+RUL_MODEL_PATH = os.getenv("RUL_MODEL_PATH", "/var/lib/cronos/models/rul_model.npz")
+RUL_SCORE_INTERVAL_SECONDS = float(os.getenv("RUL_SCORE_INTERVAL_SECONDS", "60"))
+RUL_MIN_WINDOW = int(os.getenv("RUL_MIN_WINDOW", "50"))
+# Fim de vida no simulador: health_factor para de cair em 0.1.
+FAILURE_HEALTH = 0.1
+FEATURE_KINDS = ("mean", "std", "last")
+
+def feature_names(channels):
+    return [f"{channel}_{kind}" for kind in FEATURE_KINDS for channel in channels]
+
+def window_features(stats, rows):
+    """Matriz (len(rows), 3 × canais): média, desvio e última leitura de cada canal, na ordem de `feature_names`."""
+    mean, std_dev, _ = stats.stats(rows)
+    last = stats.buffer[rows, (stats.heads[rows] - 1) % stats.window_size].astype(np.float64)
+    return np.hstack((mean, std_dev, last))
+
+class RulModel:
+    """Regressão linear sobre features padronizadas; previsões limitadas a [0, max_rul]."""
+
+    def __init__(self, feature_names, coef, intercept, feature_mean=None, feature_scale=None, version="dev", max_rul=np.inf):
+        self.feature_names = [str(name) for name in feature_names]
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        n = len(self.feature_names)
+        self.feature_mean = np.zeros(n) if feature_mean is None else np.asarray(feature_mean, dtype=np.float64)
+        self.feature_scale = np.ones(n) if feature_scale is None else np.asarray(feature_scale, dtype=np.float64)
+        self.version = str(version)
+        self.max_rul = float(max_rul)
+        if not (self.coef.shape == self.feature_mean.shape == self.feature_scale.shape == (n,)):
+            raise ValueError("Modelo de RUL inválido: coeficientes e features com tamanhos diferentes.")
+        # Padronização e coeficientes fundidos: uma multiplicação por previsão.
+        self._weights = self.coef / self.feature_scale
+        self._bias = self.intercept - float(self.feature_mean @ self._weights)
+
+    def predict(self, features):
+        return np.clip(np.asarray(features, dtype=np.float64) @ self._weights + self._bias, 0.0, self.max_rul)
+
+    def fused(self):
+        """(pesos, viés) com a padronização aplicada: previsão = features @ pesos + viés, antes do limite."""
+        return self._weights, self._bias
+
+    @classmethod
+    def fit(cls, features, target, names, version=None, ridge=1e-3):
+        """Regressão ridge em forma fechada sobre as features padronizadas."""
+        features, target = np.asarray(features, dtype=np.float64), np.asarray(target, dtype=np.float64)
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        z = (features - mean) / scale
+        coef = np.linalg.solve(z.T @ z + ridge * len(z) * np.eye(z.shape[1]), z.T @ (target - target.mean()))
+        return cls(names, coef, target.mean(), mean, scale,
+                   version or time.strftime("rul-%Y%m%d%H%M%S"), max_rul=float(target.max()))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["feature_names"].tolist(), data["coef"], data["intercept"], data["feature_mean"],
+                       data["feature_scale"], data["version"].item(), data["max_rul"].item())
+
+    def save(self, path):
+        """Grava o modelo (escrita atômica via arquivo temporário)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, feature_names=np.array(self.feature_names, dtype=str), coef=self.coef,
+                     intercept=np.array(self.intercept), feature_mean=self.feature_mean,
+                     feature_scale=self.feature_scale, version=np.array(self.version), max_rul=np.array(self.max_rul))
+        os.replace(tmp_path, path)
+
+def load_model(path=RUL_MODEL_PATH):
+    """Modelo em `path`, ou None (inferência desativada) se não existir ou não puder ser lido."""
+    if not os.path.exists(path):
+        print(f"RUL: Modelo não encontrado em {path}; inferência de RUL desativada.")
+        return None
+    try:
+        model = RulModel.load(path)
+    except Exception as e:
+        print(f"RUL: Falha ao carregar o modelo {path}: {e}; inferência de RUL desativada.")
+        return None
+    print(f"RUL: Modelo {model.version} carregado ({len(model.feature_names)} features).")
+    return model
+
+class RulScorer:
+    """
+    Pontua micro-lotes de dispositivos. `features(device_ids, min_count)` devolve
+    (dispositivos com janela aquecida, matriz de features na ordem de `channels`), como
+    AnomalyDetectorN2.window_features; as colunas usadas pelo modelo são escolhidas uma vez aqui.
+    """
+
+    def __init__(self, model, features, channels, interval=RUL_SCORE_INTERVAL_SECONDS, min_window=RUL_MIN_WINDOW):
+        self.model = model
+        self.features = features
+        self.interval = interval
+        self.min_window = min_window
+        self._last_scored = {}
+        self._columns = None
+        if model is not None:
+            available = {name: i for i, name in enumerate(feature_names(channels))}
+            missing = [name for name in model.feature_names if name not in available]
+            if missing:
+                raise ValueError(f"Modelo de RUL usa features indisponíveis: {', '.join(missing)}")
+            self._columns = np.array([available[name] for name in model.feature_names], dtype=np.intp)
+
+    def score(self, device_ids, now=None):
+        """[(device_id, rul_horas)] dos dispositivos do lote que estão aquecidos e vencidos para nova previsão."""
+        if self.model is None:
+            return []
+        now = time.monotonic() if now is None else now
+        due = [d for d in dict.fromkeys(device_ids) if now - self._last_scored.get(d, -np.inf) >= self.interval]
+        if not due:
+            return []
+        scored, features = self.features(due, self.min_window)
+        if not scored:
+            return []
+        predictions = self.model.predict(features[:, self._columns])
+        for device_id in scored:
+            self._last_scored[device_id] = now
+        return list(zip(scored, predictions.tolist()))
+
+def rul_hours(health, degradation_rate, sample_seconds):
+    """RUL real no simulador: leituras até health_factor chegar a FAILURE_HEALTH, em horas."""
+    return np.maximum(health - FAILURE_HEALTH, 0.0) / degradation_rate * sample_seconds / 3600
+
+def train_from_simulator(devices=2000, steps=400, window_size=100, sample_seconds=5.0, seed=7):
+    """
+    Treina um modelo com o FleetSimulator: bombas com desgaste inicial sorteado, janelas iguais às
+    do N2 e, como alvo, o tempo até o fim de vida. Amostra as features a cada 10 leituras
+    depois que as janelas enchem.
+    """
+    from cronos_ai.central_cloud.ml_engine.rolling_stats import RollingWindowStats
+    from cronos_ai.edge.simulators import FleetSimulator
+    from cronos_ai.shared.data_models import SENSOR_CHANNELS
+
+    simulator = FleetSimulator(n_devices=devices, seed=seed)
+    simulator.health_factor = simulator.rng.uniform(FAILURE_HEALTH, 1.0, devices)
+    stats = RollingWindowStats(SENSOR_CHANNELS, window_size=window_size, initial_capacity=devices)
+    rows = stats.rows_for(simulator.device_ids)
+    samples, targets = [], []
+    for step in range(steps):
+        columns = simulator.step()
+        stats.push(rows, np.column_stack([columns[channel] for channel in SENSOR_CHANNELS]))
+        if step >= window_size and step % 10 == 0:
+            samples.append(window_features(stats, rows))
+            targets.append(rul_hours(simulator.health_factor, simulator.degradation_rate, sample_seconds))
+    return RulModel.fit(np.vstack(samples), np.concatenate(targets), feature_names(SENSOR_CHANNELS))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train = subparsers.add_parser("train", help="Treina um modelo com o simulador e o grava em --output.")
+    train.add_argument("--output", default=RUL_MODEL_PATH)
+    train.add_argument("--devices", type=int, default=2000)
+    train.add_argument("--steps", type=int, default=400)
+    train.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    model = train_from_simulator(args.devices, args.steps, seed=args.seed)
+    model.save(args.output)
+    print(f"RUL: Modelo {model.version} treinado em {time.perf_counter() - start:.1f}s e gravado em {args.output}.")
@@ -2,8 +2,14 @@ import boto3
 import time
 import json
 import os
+from datetime import datetime, timezone
 
+from cronos_ai.edge.features import SignalReducer
+from cronos_ai.edge.rules import RuleEngine
 from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.edge.uplink import SpillQueue, Uplink
+from cronos_ai.lcm.lcm_service import LCM_MODEL_DIR, LcmService
+from cronos_ai.lcm.local_model_manager import LocalModelManager
 
 DEVICE_ID = "bomba-01-edge"
 QUEUE_NAME = 'sensor_data_queue'
@@ -11,28 +17,26 @@ QUEUE_NAME = 'sensor_data_queue'
 endpoint_url = 'http://host.docker.internal:4566'
 region_name = 'us-east-1'
 
+# Amostragem e uplink: as leituras são acumuladas e enviadas em lote a cada UPLINK_MAX_LATENCY segundos
+# (ou ao completar UPLINK_MAX_READINGS); leituras com alerta N1 são enviadas na hora.
+SAMPLE_SECONDS = float(os.getenv("EDGE_SAMPLE_SECONDS", "5"))
+UPLINK_MAX_LATENCY = float(os.getenv("UPLINK_MAX_LATENCY", "5"))
+UPLINK_MAX_READINGS = int(os.getenv("UPLINK_MAX_READINGS", "500"))
+UPLINK_SPILL_DIR = os.getenv("UPLINK_SPILL_DIR", "/var/lib/cronos/uplink_spill")
+UPLINK_SPILL_MAX_BYTES = int(os.getenv("UPLINK_SPILL_MAX_BYTES", str(512 * 1024 * 1024)))
+# Estágio de features (edge.features no config.yaml): resumos por bloco e leituras brutas só em
+# alertas e mudanças além da zona morta. Desligado por padrão (toda leitura bruta é enviada): o N2,
+# o RUL, os rollups e a visão da frota ainda são calculados só sobre o sensor_data.
+EDGE_FEATURES = os.getenv("EDGE_FEATURES", "0") != "0"
+
 class AnomalyDetectorN1:
-    def __init__(self):
-        self.thresholds = {
-            "temperature_c_upper": 95.0, "pressure_diff_lower": 3.0,
-            "vibration_radial_mms_upper": 4.5, "current_a_upper": 28.0,
-            "acoustic_db_upper": 85.0
-        }
+    """Detector N1 de um dispositivo: as regras de `edge.n1_rules` (config.yaml), compiladas pelo RuleEngine."""
+
+    def __init__(self, rules=None):
+        self.engine = RuleEngine(rules) if rules is not None else RuleEngine.from_config()
 
     def check_anomaly(self, data):
-        alerts = []
-        if data["temperature_c"] > self.thresholds["temperature_c_upper"]:
-            alerts.append({"type": "HighTemperature", "value": data["temperature_c"]})
-        pressure_diff = data["pressure_out_bar"] - data["pressure_in_bar"]
-        if pressure_diff < self.thresholds["pressure_diff_lower"]:
-             alerts.append({"type": "LowPressureDifferential", "value": pressure_diff})
-        if data["vibration_radial_mms"] > self.thresholds["vibration_radial_mms_upper"]:
-            alerts.append({"type": "HighVibration", "value": data["vibration_radial_mms"]})
-        if data["current_a"] > self.thresholds["current_a_upper"]:
-            alerts.append({"type": "HighCurrent", "value": data["current_a"]})
-        if data["acoustic_db"] > self.thresholds["acoustic_db_upper"]:
-            alerts.append({"type": "HighAcousticNoise", "value": data["acoustic_db"]})
-        return alerts
+        return self.engine.check(data)
 
 def main():
     sqs_client = boto3.client('sqs', endpoint_url=endpoint_url, region_name=region_name)
@@ -56,6 +60,16 @@ def main():
 
     sensor_simulator = ComprehensiveSensorSimulator(device_id="bomba-centrifuga-01")
     anomaly_detector = AnomalyDetectorN1()
+    # Modelos locais (LCM): versões novas são trocadas pela thread do serviço, sem reiniciar a borda.
+    model_manager = LocalModelManager(LCM_MODEL_DIR)
+    lcm = LcmService(model_manager)
+    lcm.start()
+    uplink = Uplink(
+        sqs_client, queue_url, sensor_simulator.device_id,
+        max_latency=UPLINK_MAX_LATENCY, max_readings=UPLINK_MAX_READINGS,
+        spill=SpillQueue(UPLINK_SPILL_DIR, max_bytes=UPLINK_SPILL_MAX_BYTES),
+    )
+    reducer = SignalReducer.from_config() if EDGE_FEATURES else None
     
     print(f"--- Dispositivo de Borda '{DEVICE_ID}' iniciado (Modo SQS) ---")
 
@@ -64,24 +78,39 @@ def main():
             data = sensor_simulator.generate_data()
             
             alerts = anomaly_detector.check_anomaly(data)
+            model_alerts = model_manager.evaluate(data)
             
             payload_data = data.copy()
             if alerts:
                 print(f"EDGE: Anomalia N1 detectada: {[a['type'] for a in alerts]}")
-                payload_data['alerts'] = alerts
+            if model_alerts:
+                print(f"EDGE: Alerta do modelo local: {[a['type'] for a in model_alerts]}")
+            if alerts or model_alerts:
+                payload_data['alerts'] = alerts + model_alerts
+            payload_data['time'] = datetime.now(timezone.utc)
             
-            payload = json.dumps(payload_data)
+            if reducer is None:
+                uplink.add(payload_data)
+            else:
+                raw, summary = reducer.add(payload_data)
+                for reading in raw:
+                    uplink.add(reading)
+                if summary:
+                    uplink.add_summary(summary)
+            if uplink.due():
+                pending, summaries = len(uplink.buffer), len(uplink.summaries)
+                sent = uplink.flush()
+                print(f"EDGE: {pending} leitura(s) e {summaries} resumo(s) enviados em {sent} mensagem(ns) para a fila SQS.")
             
-            sqs_client.send_message(
-                QueueUrl=queue_url,
-                MessageBody=payload
-            )
-            print(f"EDGE: Mensagem enviada para a fila SQS -> {payload}")
-            
-            time.sleep(5)
+            time.sleep(SAMPLE_SECONDS)
 
     except KeyboardInterrupt:
         print("\n--- Desligando o dispositivo de borda ---")
+        lcm.stop()
+        summary = reducer.flush() if reducer else None
+        if summary:
+            uplink.add_summary(summary)
+        uplink.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
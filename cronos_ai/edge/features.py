@@ -0,0 +1,149 @@
+"""
+Estágio de features da borda: em vez de mandar toda leitura bruta para a nuvem, resume cada bloco
+de `block_size` leituras em features e envia leituras brutas só quando algo acontece.
+
+Features de um bloco (`block_features`), por canal: média, desvio, mínimo, máximo e inclinação
+(tendência em unidades/hora, mínimos quadrados sobre o instante de cada leitura). Nos canais de
+vibração, também RMS, pico, fator de crista (pico/RMS) e a energia do sinal (sem a média) em
+`bands` faixas de frequência iguais entre 0 e a frequência de Nyquist da amostragem, via FFT; a
+soma das faixas é a variância do bloco.
+
+Leituras brutas (`SignalReducer.add`) são enviadas:
+- quando trazem alertas, junto com as `context` leituras anteriores e as `context` seguintes;
+- quando algum canal se afasta mais que a sua zona morta (`deadband`) do último valor enviado
+  (codificação por delta: a nuvem vê toda mudança significativa, inclusive a volta ao normal);
+- a primeira leitura, para a nuvem ter a referência inicial.
+
+Parâmetros na seção `edge.features` do config.yaml; sem ela valem DEFAULT_FEATURES.
+"""
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cronos_ai.shared.config import get_section
+from cronos_ai.shared.data_models import SENSOR_CHANNELS, SUMMARY_STATS, VIBRATION_CHANNELS
+
+# Zonas mortas por canal: ~5 desvios do ruído de medição do simulador, para que o ruído normal não
+# gere envios mas qualquer degrau real (anomalias, desgaste acumulado) gere.
+DEFAULT_DEADBAND = {
+    "health_factor": 0.02, "rpm": 50, "temperature_c": 2.5, "pressure_in_bar": 0.25, "pressure_out_bar": 0.5,
+    "vibration_axial_mms": 0.5, "vibration_radial_mms": 0.5, "current_a": 1.0, "acoustic_db": 2.5,
+    "humidity_percent": 5.0,
+}
+# 60 leituras de 5 s: um resumo a cada 5 minutos.
+DEFAULT_FEATURES = {"block_size": 60, "bands": 4, "context": 2, "deadband": DEFAULT_DEADBAND}
+
+def _compact(value):
+    # 6 algarismos significativos bastam para as features e reduzem o JSON do uplink.
+    return float(f"{value:.6g}")
+
+def block_features(values, seconds, channels=SENSOR_CHANNELS, bands=4):
+    """
+    Features de um bloco: `values` (n, canais) e `seconds` (n,) com o instante de cada leitura.
+    Devolve um dict {"<canal>_<feature>": valor}, na ordem de `summary_feature_names` quando `channels`
+    são os SENSOR_CHANNELS.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    hours = (np.asarray(seconds, dtype=np.float64) - seconds[0]) / 3600
+    mean = values.mean(axis=0)
+    centered_t = hours - hours.mean()
+    var_t = float(centered_t @ centered_t)
+    slope = centered_t @ (values - mean) / var_t if var_t > 0 else np.zeros(len(channels))
+    stats = np.vstack((mean, values.std(axis=0), values.min(axis=0), values.max(axis=0), slope))
+    features = {f"{channel}_{kind}": _compact(stats[k, c])
+                for k, kind in enumerate(SUMMARY_STATS) for c, channel in enumerate(channels)}
+
+    vibration = [channels.index(channel) for channel in VIBRATION_CHANNELS if channel in channels]
+    if vibration:
+        signal = values[:, vibration]
+        rms = np.sqrt((signal * signal).mean(axis=0))
+        peak = np.abs(signal).max(axis=0)
+        crest = np.divide(peak, rms, out=np.zeros_like(peak), where=rms > 0)
+        # Espectro de potência unilateral normalizado para que a soma dos bins (sem o DC) seja a variância.
+        n = len(signal)
+        power = np.abs(np.fft.rfft(signal - signal.mean(axis=0), axis=0)) ** 2 / n ** 2
+        power[1:(n + 1) // 2] *= 2
+        edges = np.linspace(1, len(power), bands + 1).astype(int)
+        if len(power) - 1 >= bands:
+            band_energy = np.add.reduceat(power, edges[:-1], axis=0)
+        else:
+            # Bloco curto demais para separar as faixas (ex.: o resto do bloco no desligamento).
+            band_energy = np.zeros((bands, len(vibration)))
+        for j, c in enumerate(vibration):
+            channel = channels[c]
+            features[f"{channel}_rms"] = _compact(rms[j])
+            features[f"{channel}_peak"] = _compact(peak[j])
+            features[f"{channel}_crest"] = _compact(crest[j])
+            for b in range(bands):
+                features[f"{channel}_band{b}"] = _compact(band_energy[b, j])
+    return features
+
+class SignalReducer:
+    """
+    Decide, leitura a leitura, o que sai da borda: `add(reading)` devolve (leituras brutas a enviar
+    agora, resumo do bloco ou None). As leituras são dicts de SensorData com `time` e `alerts` opcionais.
+    """
+
+    def __init__(self, channels=SENSOR_CHANNELS, block_size=60, bands=4, context=2, deadband=None):
+        self.channels = tuple(channels)
+        self.block_size = block_size
+        self.bands = bands
+        self.context = context
+        deadband = {**DEFAULT_DEADBAND, **(deadband or {})}
+        self.deadband = np.array([float(deadband.get(channel, np.inf)) for channel in self.channels])
+        self._values = np.empty((block_size, len(self.channels)))
+        self._seconds = np.empty(block_size)
+        self._times = []
+        self._recent = deque(maxlen=context)
+        self._after = 0
+        self._reference = None
+        self.stats = {"readings": 0, "raw_sent": 0, "summaries": 0}
+
+    @classmethod
+    def from_config(cls):
+        return cls(**get_section("edge", "features", default=DEFAULT_FEATURES))
+
+    def add(self, reading):
+        reading = dict(reading)
+        reading.setdefault("time", datetime.now(timezone.utc))
+        row = np.array([reading[channel] for channel in self.channels], dtype=np.float64)
+        self.stats["readings"] += 1
+        index = self.stats["readings"]
+
+        send = []
+        if reading.get("alerts"):
+            # Contexto: as leituras não enviadas entre as `context` anteriores; e abre a janela das seguintes.
+            send.extend(r for i, r in self._recent if i >= index - self.context)
+            self._recent.clear()
+            send.append(reading)
+            self._after = self.context
+        elif self._after > 0 or self._reference is None or np.any(np.abs(row - self._reference) > self.deadband):
+            self._after = max(self._after - 1, 0)
+            send.append(reading)
+        else:
+            self._recent.append((index, reading))
+        if send:
+            self._reference = row
+            self.stats["raw_sent"] += len(send)
+
+        i = len(self._times)
+        self._values[i] = row
+        time_value = reading["time"]
+        self._seconds[i] = time_value.timestamp() if isinstance(time_value, datetime) else datetime.fromisoformat(time_value).timestamp()
+        self._times.append(time_value)
+        summary = self.flush() if len(self._times) == self.block_size else None
+        return send, summary
+
+    def flush(self):
+        """Resumo das leituras acumuladas no bloco atual (None se vazio); começa um bloco novo."""
+        n = len(self._times)
+        if not n:
+            return None
+        summary = {
+            "window_start": self._times[0], "time": self._times[-1], "readings": n,
+            "features": block_features(self._values[:n], self._seconds[:n], self.channels, self.bands),
+        }
+        self._times = []
+        self.stats["summaries"] += 1
+        return summary
@@ -0,0 +1,163 @@
+"""
+Gerador de carga: simula uma frota com o FleetSimulator e emite as leituras a uma taxa alvo
+(leituras por segundo) para o SQS, para a saída padrão ou para um arquivo NDJSON.
+
+    python -m cronos_ai.edge.load_generator --devices 5000 --rate 20000 --duration 60 --sink sqs
+    python -m cronos_ai.edge.load_generator --devices 100 --rate 500 --steps 10 --sink stdout
+
+No SQS, o formato `batch` envia uma mensagem v1 por dispositivo a cada `--steps-per-message`
+passos; o formato `legacy` envia uma mensagem JSON por leitura, como a borda fazia antes.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from cronos_ai.edge.simulators import FleetSimulator
+from cronos_ai.edge.uplink import group_batches
+from cronos_ai.shared.uplink_codec import encode_readings
+
+class StreamSink:
+    """Escreve cada leitura como uma linha JSON em um arquivo já aberto (stdout ou arquivo)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.sent = 0
+
+    def emit(self, records):
+        for record in records:
+            record = dict(record, time=record["time"].isoformat())
+            self.stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.sent += len(records)
+
+    def close(self):
+        self.stream.flush()
+
+class SQSSink:
+    """Envia as leituras para a fila, em lotes de `send_message_batch` disparados por `senders` threads."""
+
+    def __init__(self, sqs_client, queue_url, fmt="batch", steps_per_message=10, senders=8):
+        if fmt not in ("batch", "legacy"):
+            raise ValueError(f"Formato desconhecido: {fmt}")
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.fmt = fmt
+        self.steps_per_message = steps_per_message
+        self.pool = ThreadPoolExecutor(max_workers=senders)
+        self.pending = {}
+        self.steps = 0
+        self.sent = 0
+        self.messages = 0
+        self.failed = 0
+
+    def emit(self, records):
+        if self.fmt == "legacy":
+            self.sent += len(records)
+            self._send([json.dumps({k: v for k, v in r.items() if k != "time"}) for r in records])
+            return
+        for record in records:
+            self.pending.setdefault(record["device_id"], []).append(record)
+        self.steps += 1
+        if self.steps >= self.steps_per_message:
+            self._send(self._drain_pending())
+
+    def _drain_pending(self):
+        bodies = []
+        for device_id, readings in self.pending.items():
+            bodies += encode_readings(device_id, readings)
+            self.sent += len(readings)
+        self.pending = {}
+        self.steps = 0
+        return bodies
+
+    def _send_group(self, group):
+        entries = [{"Id": uuid.uuid4().hex, "MessageBody": body} for body in group]
+        try:
+            response = self.sqs_client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            return len(entries) - len(response.get("Failed", []))
+        except Exception as e:
+            print(f"LOAD_GEN: Falha ao enviar lote: {e}", file=sys.stderr)
+            return 0
+
+    def _send(self, bodies):
+        groups = list(group_batches(bodies))
+        delivered = sum(self.pool.map(self._send_group, groups))
+        self.messages += delivered
+        self.failed += len(bodies) - delivered
+
+    def close(self):
+        if self.pending:
+            self._send(self._drain_pending())
+        self.pool.shutdown()
+
+def run(simulator, sink, rate, steps=None, duration=None):
+    """
+    Avança a frota passo a passo, ritmado para `rate` leituras/s (cada passo gera uma leitura por
+    dispositivo), até `steps` passos ou `duration` segundos. Devolve a taxa efetivamente atingida.
+    """
+    step_interval = simulator.n_devices / rate if rate else 0.0
+    start = time.monotonic()
+    done = 0
+    while (steps is None or done < steps) and (duration is None or time.monotonic() - start < duration):
+        now = datetime.now(timezone.utc)
+        records = simulator.records(simulator.step())
+        for record in records:
+            record["time"] = now
+        sink.emit(records)
+        done += 1
+        delay = start + done * step_interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    sink.close()
+    elapsed = time.monotonic() - start
+    return {
+        "devices": simulator.n_devices,
+        "steps": done,
+        "readings": done * simulator.n_devices,
+        "seconds": round(elapsed, 2),
+        "readings_per_second": round(done * simulator.n_devices / elapsed, 1) if elapsed else None,
+        "anomalies": simulator.anomaly_counts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=1000.0, help="Leituras por segundo (0 = sem limite).")
+    parser.add_argument("--steps", type=int, default=None, help="Número de passos (uma leitura por dispositivo).")
+    parser.add_argument("--duration", type=float, default=None, help="Duração máxima em segundos.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--prefix", default="bomba-sim")
+    parser.add_argument("--sink", choices=("sqs", "stdout", "file"), default="stdout")
+    parser.add_argument("--output", default="fleet_readings.ndjson", help="Arquivo de saída para --sink file.")
+    parser.add_argument("--format", choices=("batch", "legacy"), default="batch", help="Formato das mensagens SQS.")
+    parser.add_argument("--steps-per-message", type=int, default=10)
+    parser.add_argument("--senders", type=int, default=8)
+    args = parser.parse_args()
+    if args.steps is None and args.duration is None:
+        parser.error("Informe --steps ou --duration.")
+
+    simulator = FleetSimulator(args.devices, device_prefix=args.prefix, seed=args.seed)
+    if args.sink == "sqs":
+        import boto3
+        from cronos_ai.edge.edge_device_main import QUEUE_NAME, endpoint_url, region_name
+        sqs_client = boto3.client("sqs", endpoint_url=os.getenv("SQS_ENDPOINT_URL", endpoint_url),
+                                  region_name=os.getenv("SQS_REGION", region_name))
+        queue_url = sqs_client.get_queue_url(QueueName=os.getenv("SQS_QUEUE_NAME", QUEUE_NAME))["QueueUrl"]
+        sink = SQSSink(sqs_client, queue_url, fmt=args.format, steps_per_message=args.steps_per_message, senders=args.senders)
+    elif args.sink == "file":
+        sink = StreamSink(open(args.output, "w", encoding="utf-8"))
+    else:
+        sink = StreamSink(sys.stdout)
+    report = run(simulator, sink, args.rate, steps=args.steps, duration=args.duration)
+    if isinstance(sink, SQSSink):
+        report.update(messages=sink.messages, failed_messages=sink.failed)
+    print(json.dumps(report), file=sys.stderr)
+    if args.sink == "file":
+        sink.stream.close()
+
+if __name__ == "__main__":
+    main()
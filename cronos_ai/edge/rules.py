@@ -0,0 +1,251 @@
+"""
+Motor de regras N1 da borda: limiares sobre canais e sinais derivados, configurados na seção
+`edge.n1_rules` do config.yaml e compilados uma vez em avaliações NumPy sobre um bloco de leituras.
+
+Cada regra tem:
+- `name`: tipo do alerta enviado (ex.: HighTemperature);
+- `signal`: um campo da leitura ou uma expressão aritmética sobre campos
+  (ex.: "pressure_out_bar - pressure_in_bar"; só + - * / parênteses e números);
+- `above` ou `below`: o limiar que dispara o alerta;
+- `clear` (opcional): histerese; o alerta só é rearmado quando o sinal volta além deste nível
+  (abaixo dele para `above`, acima para `below`). Sem `clear`, rearma ao voltar para o lado normal do limiar;
+- `debounce` / `clear_debounce` (opcional, padrão 1): leituras consecutivas necessárias para
+  disparar / rearmar.
+
+Um alerta é emitido só na leitura em que a regra passa de normal para ativa, então um pico que
+dura muitas leituras gera um alerta (e uma mensagem urgente no uplink), não um por leitura.
+O estado (ativa, contagens consecutivas) continua de um bloco para o seguinte.
+"""
+import ast
+
+import numpy as np
+
+from cronos_ai.shared.config import load_config
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+
+# Equivalentes aos limiares fixos que o AnomalyDetectorN1 usava, com histerese de ~2-10%.
+DEFAULT_RULES = (
+    {"name": "HighTemperature", "signal": "temperature_c", "above": 95.0, "clear": 93.0},
+    {"name": "LowPressureDifferential", "signal": "pressure_out_bar - pressure_in_bar", "below": 3.0, "clear": 3.3},
+    {"name": "HighVibration", "signal": "vibration_radial_mms", "above": 4.5, "clear": 4.2},
+    {"name": "HighCurrent", "signal": "current_a", "above": 28.0, "clear": 27.0},
+    {"name": "HighAcousticNoise", "signal": "acoustic_db", "above": 85.0, "clear": 83.0},
+)
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+                  ast.USub, ast.UAdd, ast.Name, ast.Load, ast.Constant)
+
+def compile_signal(expression, fields):
+    """Valida e compila a expressão de um sinal; devolve (código, campos usados). Levanta ValueError."""
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Sinal inválido {expression!r}: {e.msg}") from None
+    used = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Sinal inválido {expression!r}: {type(node).__name__} não é permitido.")
+        if isinstance(node, ast.Name):
+            if node.id not in fields:
+                raise ValueError(f"Sinal inválido {expression!r}: campo desconhecido {node.id!r}.")
+            used.add(node.id)
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"Sinal inválido {expression!r}: só constantes numéricas.")
+    return compile(tree, f"<regra: {expression}>", "eval"), used
+
+def load_rules():
+    """Regras da seção `edge.n1_rules` do config.yaml, ou DEFAULT_RULES."""
+    edge = load_config().get("edge") or {}
+    return edge.get("n1_rules") or DEFAULT_RULES
+
+class _FieldsToReading(ast.NodeTransformer):
+    """Troca cada campo `x` da expressão por `r['x']`, para avaliar direto sobre o dict da leitura."""
+
+    def visit_Name(self, node):
+        return ast.copy_location(ast.Subscript(value=ast.Name("r", ast.Load()), slice=ast.Constant(node.id), ctx=ast.Load()), node)
+
+def _scalar_source(expressions, rules, debounced=True):
+    """
+    Código de `check(r)`: avalia uma leitura (dict) com os limiares como constantes e devolve a
+    lista de alertas. O estado de cada regra (ativa `a{k}`, contagens consecutivas `u{k}`/`c{k}`)
+    fica em variáveis globais do namespace próprio de cada RuleEngine, sem listas nem atributos
+    no caminho de cada leitura. Sem debounce em nenhuma regra (`debounced=False`), as contagens
+    não são mantidas e uma leitura normal sem regra ativa (`on`, o número de regras ativas, é zero)
+    sai depois de uma comparação por regra, como os limiares fixos do detector antigo.
+    """
+    n = len(rules)
+    signals = []
+    for expression in expressions:
+        tree = _FieldsToReading().visit(ast.parse(expression, mode="eval"))
+        code = ast.unparse(tree)
+        signals.append(code if isinstance(tree.body, ast.Subscript) else f"({code})")
+    state = [f"a{k}" for k in range(n)] + ([f"{c}{k}" for c in "uc" for k in range(n)] if debounced else ["on"])
+    lines = ["def check(r):"]
+    if n:
+        lines.append(f"    global {', '.join(state)}")
+    if n and not debounced:
+        quiet = " and ".join(
+            f"not {signals[expressions.index(signal)]} {'>' if upper else '<'} {threshold!r}"
+            for _, signal, upper, threshold, *_ in rules
+        )
+        lines += [f"    if not on and {quiet}:", "        return []"]
+    for i, signal in enumerate(signals):
+        lines.append(f"    v{i} = {signal}")
+    lines.append("    alerts = []")
+    for k, (name, signal, upper, threshold, clear, hysteresis, debounce, clear_debounce) in enumerate(rules):
+        v = f"v{expressions.index(signal)}"
+        breach, normal = (">", "<") if upper else ("<", ">")
+        fire = f"alerts.append({{'type': {name!r}, 'value': round({v}, 4)}})"
+        if not debounced:
+            lines += [
+                f"    if a{k}:",
+                f"        if {v} {normal} {clear!r}:" if hysteresis else f"        if not {v} {breach} {threshold!r}:",
+                f"            a{k} = False",
+                "            on -= 1",
+                f"    elif {v} {breach} {threshold!r}:",
+                f"        a{k} = True",
+                "        on += 1",
+                f"        {fire}",
+            ]
+            continue
+        lines += [
+            f"    if {v} {breach} {threshold!r}:",
+            f"        u{k} += 1",
+            f"        c{k} = 0",
+            f"        if u{k} >= {debounce} and not a{k}:",
+            f"            a{k} = True",
+            f"            {fire}",
+            f"    elif {v} {normal} {clear!r}:" if hysteresis else "    else:",
+            f"        c{k} += 1",
+            f"        u{k} = 0",
+            f"        if c{k} >= {clear_debounce}:",
+            f"            a{k} = False",
+        ]
+        if hysteresis:
+            lines += ["    else:", f"        u{k} = c{k} = 0"]
+    lines.append("    return alerts")
+    return "\n".join(lines)
+
+def _runs(condition, idx, carry):
+    """Comprimento da sequência de True consecutivos terminando em cada posição (linhas = regras)."""
+    last_break = np.maximum.accumulate(np.where(condition, -1, idx), axis=1)
+    return np.where(last_break < 0, idx + 1 + carry[:, None], idx - last_break)
+
+class RuleEngine:
+    """
+    Avalia todas as regras de uma vez sobre um bloco de leituras de um dispositivo.
+
+    `check(reading)` devolve a lista de alertas ({"type", "value"}) das regras que dispararam em
+    uma leitura (dict), usando uma função Python gerada a partir das regras (com dicts, montar as
+    colunas para o NumPy custa mais que a própria avaliação); `evaluate(readings)` faz o mesmo
+    para cada leitura de uma lista.
+    `evaluate_columns(columns)` recebe um dict de arrays (um por campo), como o de
+    FleetSimulator.step(), avalia o bloco vetorizado e devolve só as leituras com alerta:
+    [(índice, alerta), ...]. Os dois compartilham o estado e podem ser alternados.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, fields=None):
+        fields = tuple(fields or SENSOR_CHANNELS)
+        compiled = []
+        for rule in rules:
+            if ("above" in rule) == ("below" in rule):
+                raise ValueError(f"Regra {rule.get('name')!r}: defina exatamente um de 'above' ou 'below'.")
+            upper = "above" in rule
+            threshold = float(rule["above"] if upper else rule["below"])
+            clear = float(rule.get("clear", threshold))
+            if (upper and clear > threshold) or (not upper and clear < threshold):
+                raise ValueError(f"Regra {rule['name']!r}: 'clear' precisa ficar do lado normal do limiar.")
+            debounce, clear_debounce = int(rule.get("debounce", 1)), int(rule.get("clear_debounce", 1))
+            compiled.append((str(rule["name"]), rule["signal"], upper, threshold, clear, clear != threshold,
+                             debounce, clear_debounce))
+        self.names = [rule[0] for rule in compiled]
+        # Expressões repetidas são calculadas uma vez por leitura/bloco.
+        self._expressions = list(dict.fromkeys(rule[1] for rule in compiled))
+        self._signals = [compile_signal(expression, fields) for expression in self._expressions]
+        self.fields = sorted(set().union(*(used for _, used in self._signals)))
+        self._rows = [self._expressions.index(rule[1]) for rule in compiled]
+        # Sem debounce, cada leitura decide sozinha e as contagens consecutivas não precisam ser calculadas.
+        self._debounced = any(rule[6] > 1 or rule[7] > 1 for rule in compiled)
+
+        # Namespace próprio: guarda o estado das regras (globais da função gerada) deste motor.
+        self._namespace = {"__builtins__": {"round": round}}
+        exec(compile(_scalar_source(self._expressions, compiled, self._debounced), "<regras N1>", "exec"), self._namespace)
+        # `check` é a função gerada (não um método), para a chamada por leitura não passar pelo self.
+        self.check = self._namespace["check"]
+
+        # Regras "below" são avaliadas com o sinal e os limiares negados, para usar só comparações "acima de".
+        _, _, upper, thresholds, clears, hysteresis, debounce, clear_debounce = zip(*compiled) if compiled else ((),) * 8
+        sign = np.where(upper, 1.0, -1.0)
+        self._sign = sign[:, None]
+        self._threshold = (sign * np.array(thresholds))[:, None]
+        self._clear = (sign * np.array(clears))[:, None]
+        self._hysteresis = np.array(hysteresis, dtype=bool)[:, None]
+        self._debounce = np.array(debounce, dtype=np.int64)[:, None]
+        self._clear_debounce = np.array(clear_debounce, dtype=np.int64)[:, None]
+        self.reset()
+
+    @classmethod
+    def from_config(cls):
+        return cls(load_rules())
+
+    @property
+    def active(self):
+        return self._get_state()[0]
+
+    def _get_state(self):
+        """(ativa, contagem acima do limiar, contagem no lado normal) de cada regra."""
+        ns, n = self._namespace, len(self.names)
+        runs = [[ns[f"{c}{k}"] for k in range(n)] for c in "uc"] if self._debounced else [[0] * n, [0] * n]
+        return [ns[f"a{k}"] for k in range(n)], *runs
+
+    def _set_state(self, active, raise_run, clear_run):
+        ns = self._namespace
+        ns.update((f"a{k}", bool(value)) for k, value in enumerate(active))
+        if self._debounced:
+            ns.update((f"u{k}", value) for k, value in enumerate(raise_run))
+            ns.update((f"c{k}", value) for k, value in enumerate(clear_run))
+        else:
+            ns["on"] = sum(map(bool, active))
+
+    def reset(self):
+        n = len(self.names)
+        self._set_state([False] * n, [0] * n, [0] * n)
+
+    def _onsets(self, columns, n):
+        """Avaliação vetorizada de um bloco: (regras, índices, valores) das passagens de normal para ativa."""
+        namespace = {"__builtins__": {}, **columns}
+        signals = [np.broadcast_to(np.asarray(eval(code, namespace), dtype=np.float64), (n,)) for code, _ in self._signals]
+        values = np.vstack(signals)[self._rows]
+        signed = values * self._sign
+        idx = np.arange(n)
+        breach = signed > self._threshold
+        # Com histerese, rearma ao passar do nível de clear; sem ela, ao deixar de violar o limiar.
+        normal = np.where(self._hysteresis, signed < self._clear, ~breach)
+        previous, raise_state, clear_state = self._get_state()
+        if self._debounced:
+            raise_run = _runs(breach, idx, np.array(raise_state))
+            clear_run = _runs(normal, idx, np.array(clear_state))
+            raise_state, clear_state = raise_run[:, -1].tolist(), clear_run[:, -1].tolist()
+            breach = raise_run >= self._debounce
+            normal = clear_run >= self._clear_debounce
+        last_raise = np.maximum.accumulate(np.where(breach, idx, -1), axis=1)
+        last_clear = np.maximum.accumulate(np.where(normal, idx, -1), axis=1)
+        previous = np.array(previous)[:, None]
+        active = np.where((last_raise < 0) & (last_clear < 0), previous, last_raise > last_clear)
+        onset = active & ~np.concatenate((previous, active[:, :-1]), axis=1)
+        self._set_state(active[:, -1].tolist(), raise_state, clear_state)
+        rules, positions = np.nonzero(onset)
+        return rules, positions, values[rules, positions]
+
+    def evaluate_columns(self, columns):
+        n = len(next(iter(columns.values()))) if columns else 0
+        if not n or not self.names:
+            return []
+        rules, positions, values = self._onsets(columns, n)
+        order = np.argsort(positions, kind="stable")
+        return [(i, {"type": self.names[rule], "value": round(value, 4)})
+                for rule, i, value in zip(rules[order].tolist(), positions[order].tolist(), values[order].tolist())]
+
+    def evaluate(self, readings):
+        check = self.check
+        return [check(r) for r in readings]
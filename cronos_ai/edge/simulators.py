@@ -111,6 +111,99 @@ class ComprehensiveSensorSimulator:
             "humidity_percent": round(current_humidity, 2)
         }
 
+class FleetSimulator:
+    """
+    Versão vetorizada do ComprehensiveSensorSimulator para gerar carga: avança `n_devices` bombas
+    por passo com o estado em arrays NumPy e sorteia todo o ruído do passo em uma única chamada
+    ao gerador (`seed` torna a sequência reproduzível).
+
+    O modelo físico e as anomalias súbitas (pressure_spike e lubrication_failure, 2% por leitura)
+    são os mesmos da classe original, aplicados a cada bomba de forma independente.
+    """
+
+    ANOMALIES = ("pressure_spike", "lubrication_failure")
+    # Desvios do ruído gaussiano, na ordem das colunas sorteadas a cada passo:
+    # rpm, temperatura, pressão, vibração, corrente, ruído acústico, umidade.
+    NOISE_STD = np.array([10.0, 0.5, 0.1, 0.1, 0.2, 0.5, 1.0])
+
+    def __init__(self, n_devices=1000, device_prefix="bomba-sim", seed=None, anomaly_probability=0.02):
+        self.n_devices = n_devices
+        self.device_ids = [f"{device_prefix}-{i:05d}" for i in range(n_devices)]
+        self.rng = np.random.default_rng(seed)
+        self.anomaly_probability = anomaly_probability
+        self.timestep = 0
+
+        self.health_factor = np.ones(n_devices)
+        self.degradation_rate = 0.0001
+
+        self.base_rpm = 1500
+        self.base_temp = 70.0
+        self.base_pressure_in = 2.0
+        self.base_pressure_out = 7.0
+        self.base_vibration_axial = 0.5
+        self.base_vibration_radial = 0.8
+        self.base_current = 20.0
+        self.base_acoustic = 65.0
+        self.base_humidity = 40.0
+        self.anomaly_counts = dict.fromkeys(self.ANOMALIES, 0)
+
+    def step(self):
+        """Avança todas as bombas em uma leitura e devolve um dict de colunas (arrays de tamanho n_devices)."""
+        self.timestep += 1
+        n = self.n_devices
+        self.health_factor = np.where(self.health_factor > 0.1, self.health_factor - self.degradation_rate, self.health_factor)
+
+        # Um sorteio uniforme por bomba decide se há anomalia e qual (metade para cada tipo).
+        draw = self.rng.random(n)
+        anomalous = draw < self.anomaly_probability
+        spike = anomalous & (draw < self.anomaly_probability / 2)
+        lubrication = anomalous & ~spike
+        self.anomaly_counts["pressure_spike"] += int(spike.sum())
+        self.anomaly_counts["lubrication_failure"] += int(lubrication.sum())
+
+        noise = self.rng.standard_normal((n, len(self.NOISE_STD))) * self.NOISE_STD
+        rpm_noise, temp_noise, pressure_noise, vibration_noise, current_noise, acoustic_noise, humidity_noise = noise.T
+        health = self.health_factor
+
+        current_rpm = self.base_rpm * (health * 0.2 + 0.8) + rpm_noise
+        current_temp = self.base_temp + (current_rpm / 100) + (10 * (1 - health)) + temp_noise
+        current_pressure_out = self.base_pressure_out * (current_rpm / self.base_rpm) * health + pressure_noise
+        current_pressure_in = self.base_pressure_in + pressure_noise / 2
+        vibration_factor = (current_rpm / self.base_rpm) + (2 * (1 - health))
+        current_vibration_axial = self.base_vibration_axial * vibration_factor + vibration_noise
+        current_vibration_radial = self.base_vibration_radial * vibration_factor + vibration_noise
+        current_current = self.base_current / (health * 0.5 + 0.5) + current_noise
+        log_arg = np.maximum(0, current_rpm - self.base_rpm)
+        current_acoustic = self.base_acoustic + 5 * np.log1p(log_arg) + (15 * (1 - health)) + acoustic_noise
+        current_humidity = self.base_humidity + np.sin(self.timestep / 200) * 5 + humidity_noise
+
+        current_pressure_out = np.where(spike, current_pressure_out * 1.5, current_pressure_out)
+        current_current = np.where(spike, current_current * 1.2, current_current)
+        current_temp = np.where(lubrication, current_temp + 25, current_temp)
+        current_vibration_axial = np.where(lubrication, current_vibration_axial * 3, current_vibration_axial)
+        current_vibration_radial = np.where(lubrication, current_vibration_radial * 3, current_vibration_radial)
+        current_acoustic = np.where(lubrication, current_acoustic + 10, current_acoustic)
+        self.health_factor = np.where(lubrication, self.health_factor - 0.05, self.health_factor)
+
+        return {
+            "health_factor": np.round(self.health_factor, 4),
+            "rpm": np.trunc(current_rpm).astype(np.int64),
+            "temperature_c": np.round(current_temp, 2),
+            "pressure_in_bar": np.round(current_pressure_in, 2),
+            "pressure_out_bar": np.round(current_pressure_out, 2),
+            "vibration_axial_mms": np.round(current_vibration_axial, 3),
+            "vibration_radial_mms": np.round(current_vibration_radial, 3),
+            "current_a": np.round(current_current, 2),
+            "acoustic_db": np.round(current_acoustic, 2),
+            "humidity_percent": np.round(current_humidity, 2),
+        }
+
+    def records(self, columns):
+        """Converte as colunas de um passo em dicts no mesmo formato de `generate_data`."""
+        names = list(columns)
+        values = zip(*(columns[name].tolist() for name in names))
+        return [dict(zip(["device_id"] + names, (device_id,) + row)) for device_id, row in zip(self.device_ids, values)]
+
 if __name__ == '__main__':
     simulator = ComprehensiveSensorSimulator()
     print("Iniciando simulador abrangente. Pressione Ctrl+C para parar.")
@@ -0,0 +1,197 @@
+"""
+Uplink da borda para o SQS: acumula leituras, empacota várias por mensagem (formato v1 de
+`uplink_codec`) e envia até 10 mensagens por `send_message_batch`.
+
+O lote é enviado quando completa `max_readings` leituras, quando a leitura (ou o resumo de bloco)
+mais antigo completa `max_latency` segundos, ou imediatamente se uma leitura trouxer alertas N1.
+Resumos de bloco (`add_summary`) vão no mesmo envelope das leituras. Mensagens que não
+puderam ser enviadas (uplink fora do ar ou falha parcial do lote) vão para uma fila em disco e são
+reenviadas, na ordem, antes das leituras novas.
+"""
+import itertools
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from cronos_ai.shared.uplink_codec import MAX_BATCH_ENTRIES, SQS_MAX_BYTES, encode_readings
+
+class SpillQueue:
+    """
+    Fila FIFO de corpos de mensagem em disco, um arquivo por mensagem. Limitada a `max_bytes`:
+    ao estourar, descarta as mensagens mais antigas (perder o passado é melhor que travar a borda).
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+        self._seq = itertools.count()
+
+    def _names(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".msg"))
+
+    def __len__(self):
+        return len(self._names())
+
+    def size_bytes(self):
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in self._names())
+
+    def push(self, bodies):
+        for body in bodies:
+            # Nome ordenável: instante em ns + sequência local, para manter a ordem de chegada.
+            name = f"{time.time_ns():020d}-{next(self._seq):08d}.msg"
+            tmp_path = os.path.join(self.directory, f"{name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(body)
+            os.replace(tmp_path, os.path.join(self.directory, name))
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        names = self._names()
+        sizes = [os.path.getsize(os.path.join(self.directory, name)) for name in names]
+        total = sum(sizes)
+        for name, size in zip(names, sizes):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+            self.dropped += 1
+
+    def peek(self, limit):
+        """Até `limit` mensagens mais antigas, como (nome, corpo)."""
+        items = []
+        for name in self._names()[:limit]:
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                items.append((name, f.read()))
+        return items
+
+    def remove(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+class Uplink:
+    """Envio em lote das leituras de um dispositivo de borda."""
+
+    def __init__(self, sqs_client, queue_url, device_id, max_latency=5.0, max_readings=500,
+                 spill=None, clock=time.monotonic):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.device_id = device_id
+        self.max_latency = max_latency
+        self.max_readings = max_readings
+        self.spill = spill
+        self.clock = clock
+        self.buffer = []
+        self.summaries = []
+        self._oldest = None
+        self._urgent = False
+        self.stats = {"readings": 0, "summaries": 0, "messages": 0, "requests": 0, "bytes": 0, "spilled": 0}
+
+    def add(self, reading):
+        """Enfileira uma leitura (dict de SensorData, com `alerts` opcionais) carimbando o instante de coleta."""
+        reading = dict(reading)
+        reading.setdefault("time", datetime.now(timezone.utc))
+        if self._oldest is None:
+            self._oldest = self.clock()
+        self.buffer.append(reading)
+        if reading.get("alerts"):
+            self._urgent = True
+
+    def add_summary(self, summary):
+        """Enfileira um resumo de bloco de SignalReducer (sem urgência: segue o prazo do lote)."""
+        if self._oldest is None:
+            self._oldest = self.clock()
+        self.summaries.append(summary)
+
+    def due(self):
+        if not self.buffer and not self.summaries:
+            return False
+        return self._urgent or len(self.buffer) >= self.max_readings or self.clock() - self._oldest >= self.max_latency
+
+    def flush_if_due(self):
+        if self.due():
+            self.flush()
+
+    def flush(self):
+        """Reenvia o que estiver na fila em disco e depois envia o lote atual. Devolve as mensagens enviadas."""
+        sent = self._drain_spill()
+        if self.buffer or self.summaries:
+            readings, summaries = self.buffer, self.summaries
+            self.buffer, self.summaries = [], []
+            self._oldest = None
+            self._urgent = False
+            bodies = encode_readings(self.device_id, readings, summaries=summaries)
+            self.stats["readings"] += len(readings)
+            self.stats["summaries"] += len(summaries)
+            if self.spill is not None and len(self.spill):
+                # Ainda há backlog em disco: as mensagens novas entram atrás dele para manter a ordem.
+                self._spill(bodies)
+            else:
+                failed = self._send(bodies)
+                sent += len(bodies) - len(failed)
+                self._spill(failed)
+        return sent
+
+    def _drain_spill(self):
+        if self.spill is None:
+            return 0
+        sent = 0
+        while True:
+            items = self.spill.peek(MAX_BATCH_ENTRIES)
+            if not items:
+                return sent
+            failed = set(self._send([body for _, body in items]))
+            delivered = [name for name, body in items if body not in failed]
+            self.spill.remove(delivered)
+            sent += len(delivered)
+            if failed:
+                return sent
+
+    def _spill(self, bodies):
+        if not bodies:
+            return
+        if self.spill is None:
+            print(f"EDGE_UPLINK: {len(bodies)} mensagem(ns) descartada(s): uplink indisponível e sem fila em disco.")
+            return
+        self.spill.push(bodies)
+        self.stats["spilled"] += len(bodies)
+        print(f"EDGE_UPLINK: {len(bodies)} mensagem(ns) guardada(s) em disco para reenvio.")
+
+    def _send(self, bodies):
+        """Envia em chamadas de até 10 mensagens e 256 KB no total; devolve os corpos que falharam."""
+        failed = []
+        for group in group_batches(bodies):
+            entries = [{"Id": uuid.uuid4().hex, "MessageBody": body} for body in group]
+            try:
+                response = self.sqs_client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            except Exception as e:
+                print(f"EDGE_UPLINK: Falha ao enviar lote para o SQS: {e}")
+                failed.extend(group)
+                continue
+            self.stats["requests"] += 1
+            failed_ids = {entry["Id"] for entry in response.get("Failed", [])}
+            for entry in entries:
+                if entry["Id"] in failed_ids:
+                    failed.append(entry["MessageBody"])
+                else:
+                    self.stats["messages"] += 1
+                    self.stats["bytes"] += len(entry["MessageBody"].encode("utf-8"))
+        return failed
+
+def group_batches(bodies):
+    """Agrupa corpos de mensagem em chamadas de send_message_batch (até 10 entradas e 256 KB no total)."""
+    group, group_bytes = [], 0
+    for body in bodies:
+        size = len(body.encode("utf-8"))
+        if group and (len(group) == MAX_BATCH_ENTRIES or group_bytes + size > SQS_MAX_BYTES):
+            yield group
+            group, group_bytes = [], 0
+        group.append(body)
+        group_bytes += size
+    if group:
+        yield group
@@ -0,0 +1,82 @@
+"""
+Serviço do LCM na borda: uma thread que, a cada LCM_POLL_SECONDS, traz versões novas de modelo da
+origem (um diretório que faz o papel do armazenamento na nuvem, ex.: um volume ou bucket montado)
+para o diretório local e ativa a versão apontada pelo CURRENT, sem reiniciar o processo da borda.
+
+A cópia de cada versão é feita em um diretório temporário e renomeada no fim, e o CURRENT local só
+é trocado depois que a versão está completa; uma versão que falhe ao carregar não substitui a ativa.
+A cada LCM_REPORT_SECONDS o serviço imprime a latência de inferência e a memória do modelo ativo.
+"""
+import os
+import shutil
+import threading
+import time
+
+from cronos_ai.lcm.local_model_manager import MANIFEST, current_version, publish
+
+LCM_MODEL_DIR = os.getenv("LCM_MODEL_DIR", "/var/lib/cronos/lcm/models")
+LCM_MODEL_SOURCE = os.getenv("LCM_MODEL_SOURCE") or None
+LCM_POLL_SECONDS = float(os.getenv("LCM_POLL_SECONDS", "30"))
+LCM_REPORT_SECONDS = float(os.getenv("LCM_REPORT_SECONDS", "300"))
+
+def sync_version(source, model_dir, version):
+    """Copia `source/<versão>` para `model_dir` (se ainda não estiver lá); diretório nunca fica pela metade."""
+    target = os.path.join(model_dir, version)
+    if os.path.exists(os.path.join(target, MANIFEST)):
+        return False
+    tmp_dir = f"{target}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.copytree(os.path.join(source, version), tmp_dir)
+    os.rename(tmp_dir, target)
+    return True
+
+class LcmService:
+    """Thread de sincronização e troca de modelos de um LocalModelManager."""
+
+    def __init__(self, manager, source=LCM_MODEL_SOURCE, interval=LCM_POLL_SECONDS, report_interval=LCM_REPORT_SECONDS):
+        self.manager = manager
+        self.source = source
+        self.interval = interval
+        self.report_interval = report_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_report = time.monotonic()
+
+    def poll(self):
+        """Uma rodada: sincroniza a versão atual da origem e ativa o CURRENT local. Devolve True se trocou."""
+        if self.source:
+            version = current_version(self.source)
+            if version and version != current_version(self.manager.model_dir):
+                os.makedirs(self.manager.model_dir, exist_ok=True)
+                if sync_version(self.source, self.manager.model_dir, version):
+                    print(f"LCM: Versão {version} copiada de {self.source}.")
+                publish(self.manager.model_dir, version)
+        return self.manager.refresh()
+
+    def _safe_poll(self):
+        try:
+            self.poll()
+        except Exception as e:
+            print(f"LCM: Erro ao sincronizar modelos: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._safe_poll()
+            if time.monotonic() - self._last_report >= self.report_interval:
+                self._last_report = time.monotonic()
+                report = self.manager.report()
+                if report:
+                    print(f"LCM: Modelo {report['name']} {report['version']}: {report['inferences']} inferência(s), "
+                          f"p50 {report['p50_us']} us, p99 {report['p99_us']} us, {report['weights_bytes']} bytes de pesos "
+                          f"({report['artifact_bytes']} no disco).")
+
+    def start(self):
+        """Carrega o modelo local já existente (se houver) antes de iniciar a thread de sincronização."""
+        self._safe_poll()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,227 @@
+"""
+Gerenciador de modelos locais (LCM) da borda: carrega artefatos compactos de modelo, roda a
+inferência sobre a janela recente do dispositivo e troca de versão sem reiniciar o processo.
+
+Cada versão é um diretório dentro do diretório de modelos, e o arquivo CURRENT diz qual está ativa:
+
+    <model_dir>/CURRENT                  nome da versão ativa (gravado de forma atômica)
+    <model_dir>/<versão>/manifest.json   tipo, features, janela, quantização, saída e regras de alerta
+    <model_dir>/<versão>/weights.npy     pesos float32, ou int8 com `weight_scale` no manifesto
+
+Os .npy são abertos com mmap (np.load(mmap_mode="r")): carregar uma versão não copia os pesos para
+o heap, e as páginas são compartilhadas entre processos que usam o mesmo artefato.
+
+Hoje o único tipo é "linear" (o RulModel da nuvem exportado por `export_rul_model`): features de
+janela iguais às da inferência de RUL na nuvem (média, desvio e última leitura de cada canal), com a
+padronização já fundida nos pesos. A saída do modelo passa por regras no formato do config.yaml
+(`edge.n1_rules`, avaliadas pelo RuleEngine), e as que disparam viram alertas da leitura.
+
+Exportar o modelo de RUL da nuvem para a borda (o Dockerfile faz isso com o modelo padrão):
+
+    python -m cronos_ai.lcm.local_model_manager export --model /var/lib/cronos/models/rul_model.npz --output /var/lib/cronos/lcm/models --quantize
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import deque
+
+import numpy as np
+
+from cronos_ai.central_cloud.ml_engine.rolling_stats import RollingWindowStats
+from cronos_ai.central_cloud.ml_engine.rul_inference import RulModel, feature_names, window_features
+from cronos_ai.edge.rules import RuleEngine
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+MODEL_KINDS = ("linear",)
+# Alerta padrão do modelo de RUL exportado: menos de 2 h de vida útil em 3 previsões seguidas.
+DEFAULT_RUL_RULES = ({"name": "LowRemainingLife", "signal": "rul_hours", "below": 2.0, "clear": 2.5, "debounce": 3},)
+# Latências guardadas por modelo para o relatório (p50/p99).
+LATENCY_SAMPLES = 1024
+# A janela local tem um único dispositivo, na linha 0.
+_ROW = np.zeros(1, dtype=np.intp)
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def publish(model_dir, version):
+    """Torna `version` a versão ativa de `model_dir` (troca atômica do CURRENT)."""
+    if not os.path.exists(os.path.join(model_dir, version, MANIFEST)):
+        raise ValueError(f"Versão {version!r} não existe em {model_dir}.")
+    _write_atomic(os.path.join(model_dir, CURRENT), version + "\n")
+
+def current_version(model_dir):
+    try:
+        with open(os.path.join(model_dir, CURRENT), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def export_rul_model(model, model_dir, quantize=False, rules=DEFAULT_RUL_RULES, window_size=100,
+                     min_window=50, make_current=True):
+    """
+    Grava um RulModel como artefato "linear" em `model_dir/<versão>` e, por padrão, o publica.
+    Com `quantize`, os pesos vão em int8 com uma escala (erro máximo de meio passo por peso).
+    O diretório da versão é montado ao lado e renomeado no fim, então nunca aparece incompleto.
+    """
+    weights, bias = model.fused()
+    weights = weights.astype(np.float32)
+    manifest = {
+        "name": "rul", "version": model.version, "kind": "linear",
+        "features": model.feature_names, "window_size": window_size, "min_window": min_window,
+        "bias": bias, "clip": [0.0, model.max_rul], "output": "rul_hours",
+        "weight_scale": None, "rules": list(rules),
+    }
+    if quantize:
+        scale = float(np.abs(weights).max()) / 127 or 1.0
+        weights = np.round(weights / scale).astype(np.int8)
+        manifest["weight_scale"] = scale
+    os.makedirs(model_dir, exist_ok=True)
+    final_dir = os.path.join(model_dir, model.version)
+    tmp_dir = f"{final_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "weights.npy"), weights)
+    with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(tmp_dir, final_dir)
+    if make_current:
+        publish(model_dir, model.version)
+    return final_dir
+
+class ModelArtifact:
+    """Uma versão carregada: pesos mapeados em memória, regras de alerta e estatísticas de inferência."""
+
+    def __init__(self, path, channels=SENSOR_CHANNELS):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            self.manifest = manifest = json.load(f)
+        if manifest.get("kind") not in MODEL_KINDS:
+            raise ValueError(f"Tipo de modelo desconhecido: {manifest.get('kind')!r}")
+        self.name, self.version = str(manifest["name"]), str(manifest["version"])
+        self.window_size, self.min_window = int(manifest["window_size"]), int(manifest["min_window"])
+        if not 0 < self.min_window <= self.window_size:
+            raise ValueError(f"Modelo {self.version}: min_window precisa estar entre 1 e window_size.")
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r", allow_pickle=False)
+        available = {name: i for i, name in enumerate(feature_names(channels))}
+        missing = [name for name in manifest["features"] if name not in available]
+        if missing:
+            raise ValueError(f"Modelo {self.version} usa features indisponíveis: {', '.join(missing)}")
+        if self.weights.shape != (len(manifest["features"]),):
+            raise ValueError(f"Modelo {self.version}: pesos com forma {self.weights.shape} para {len(manifest['features'])} features.")
+        if self.weights.dtype == np.int8 and not manifest.get("weight_scale"):
+            raise ValueError(f"Modelo {self.version}: pesos int8 sem weight_scale.")
+        self.columns = np.array([available[name] for name in manifest["features"]], dtype=np.intp)
+        self.scale = float(manifest.get("weight_scale") or 1.0)
+        self.bias = float(manifest["bias"])
+        self.clip = tuple(float(v) for v in manifest.get("clip") or (-np.inf, np.inf))
+        self.output = str(manifest.get("output", "prediction"))
+        self.rules = RuleEngine(manifest.get("rules") or (), fields=(self.output,))
+        self.loaded_at = time.time()
+        self.inferences = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def predict(self, features):
+        """Saída do modelo para uma matriz (n, features na ordem de `feature_names(channels)`)."""
+        start = time.perf_counter()
+        raw = (features[:, self.columns] @ self.weights) * self.scale + self.bias
+        prediction = np.clip(raw, *self.clip)
+        self._latencies.append(time.perf_counter() - start)
+        self.inferences += len(prediction)
+        return prediction
+
+    def memory(self):
+        """Bytes do artefato em disco e dos pesos mapeados (o que a versão ocupa em memória no pior caso)."""
+        disk = sum(entry.stat().st_size for entry in os.scandir(self.path) if entry.is_file())
+        return {"artifact_bytes": disk, "weights_bytes": int(self.weights.nbytes), "weights_dtype": str(self.weights.dtype)}
+
+    def report(self):
+        latencies = np.array(self._latencies) * 1e6
+        return {
+            "name": self.name, "version": self.version, "inferences": self.inferences,
+            "p50_us": round(float(np.percentile(latencies, 50)), 1) if latencies.size else None,
+            "p99_us": round(float(np.percentile(latencies, 99)), 1) if latencies.size else None,
+            **self.memory(),
+        }
+
+class LocalModelManager:
+    """
+    Modelos ativos da borda e a janela recente do dispositivo que alimenta as features.
+
+    `evaluate(reading)` é chamado pelo laço principal a cada leitura; `refresh()` (thread do
+    LcmService) carrega a versão apontada por CURRENT e a troca por uma atribuição de referência:
+    a inferência em andamento termina com a versão antiga e a próxima já usa a nova. Uma versão que
+    não carrega é ignorada e a anterior continua ativa.
+    """
+
+    def __init__(self, model_dir, channels=SENSOR_CHANNELS):
+        self.model_dir = model_dir
+        self.channels = tuple(channels)
+        self.active = None
+        self._failed = set()
+        self._window = None
+
+    def refresh(self):
+        """Ativa a versão de CURRENT se for nova. Devolve True se houve troca."""
+        version = current_version(self.model_dir)
+        active = self.active
+        if version is None or (active is not None and active.version == version) or version in self._failed:
+            return False
+        try:
+            start = time.perf_counter()
+            artifact = ModelArtifact(os.path.join(self.model_dir, version), self.channels)
+        except Exception as e:
+            self._failed.add(version)
+            print(f"LCM: Falha ao carregar o modelo {version}: {e}; mantendo {active.version if active else 'nenhum'}.")
+            return False
+        self._ensure_window(artifact.window_size)
+        self.active = artifact
+        memory = artifact.memory()
+        print(f"LCM: Modelo {artifact.name} {artifact.version} ativo em {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"({memory['weights_bytes']} bytes de pesos {memory['weights_dtype']}).")
+        return True
+
+    def _ensure_window(self, window_size):
+        # A janela sobrevive às trocas; só é recriada se a nova versão pedir outro tamanho.
+        if self._window is None or self._window.window_size != window_size:
+            self._window = RollingWindowStats(self.channels, window_size=window_size, initial_capacity=1)
+
+    def evaluate(self, reading):
+        """Empurra a leitura na janela e devolve os alertas do modelo ativo (lista vazia sem modelo ou com janela fria)."""
+        model, window = self.active, self._window
+        if model is None:
+            return []
+        window.push(_ROW, [[reading[channel] for channel in self.channels]])
+        if window.counts[0] < model.min_window:
+            return []
+        prediction = float(model.predict(window_features(window, _ROW))[0])
+        return model.rules.evaluate([{model.output: prediction}])[0]
+
+    def report(self):
+        return self.active.report() if self.active is not None else {}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Exporta um modelo de RUL (.npz da nuvem) como artefato da borda.")
+    export.add_argument("--model", required=True)
+    export.add_argument("--output", required=True, help="Diretório de modelos da borda (ou a origem que o LCM sincroniza).")
+    export.add_argument("--quantize", action="store_true", help="Pesos em int8.")
+    export.add_argument("--no-publish", action="store_true", help="Não troca o CURRENT.")
+    use = subparsers.add_parser("publish", help="Ativa uma versão já exportada (também serve para rollback).")
+    use.add_argument("--output", required=True)
+    use.add_argument("version")
+    args = parser.parse_args()
+    if args.command == "export":
+        path = export_rul_model(RulModel.load(args.model), args.output, quantize=args.quantize, make_current=not args.no_publish)
+        print(f"LCM: Modelo exportado em {path}.")
+    else:
+        publish(args.output, args.version)
+        print(f"LCM: Versão {args.version} publicada em {args.output}.")
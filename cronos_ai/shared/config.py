@@ -0,0 +1,26 @@
+"""Leitura do config.yaml do projeto, com valores padrão quando o arquivo ou a chave não existem."""
+import os
+
+import yaml
+
+CONFIG_PATH = os.getenv("CRONOS_CONFIG", os.path.join(os.path.dirname(__file__), "..", "..", "config.yaml"))
+
+def load_config(path=CONFIG_PATH):
+    """Devolve o config.yaml como dicionário (vazio se o arquivo não existir ou estiver vazio)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+def get_section(*keys, default=None, path=CONFIG_PATH):
+    """Navega pelas chaves aninhadas (ex: get_section('storage', 'sensor_data')) e mescla com `default`."""
+    node = load_config(path)
+    for key in keys:
+        node = node.get(key) if isinstance(node, dict) else None
+        if node is None:
+            break
+    merged = dict(default or {})
+    if isinstance(node, dict):
+        merged.update(node)
+    return merged
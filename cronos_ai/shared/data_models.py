@@ -1,22 +1,79 @@
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
 from enum import Enum
+from datetime import datetime, timezone
+from typing import Annotated, Dict, List, Optional
+
+# Limites das colunas no banco (VARCHAR(50), INTEGER, REAL, VARCHAR(100)): um valor fora deles
+# passaria pela validação e faria o COPY/INSERT do lote inteiro falhar no consumidor. Texto no
+# PostgreSQL também não aceita o caractere NUL.
+DEVICE_ID_MAX_LENGTH = 50
+ALERT_TYPE_MAX_LENGTH = 100
+INT4_MAX = 2**31 - 1
+REAL_MAX = 3.4e38
+NO_NUL = r"^[^\x00]*$"
+DeviceId = Annotated[str, Field(max_length=DEVICE_ID_MAX_LENGTH, pattern=NO_NUL)]
+Int4 = Annotated[int, Field(ge=-INT4_MAX - 1, le=INT4_MAX)]
+Real = Annotated[float, Field(ge=-REAL_MAX, le=REAL_MAX)]
+
+def _as_utc(value):
+    # Sem fuso, o instante é UTC (como no codec do uplink); misturar datetimes com e sem fuso no
+    # mesmo lote quebraria as comparações do consumidor.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+UtcDatetime = Annotated[datetime, AfterValidator(_as_utc)]
+
+class EdgeAlert(BaseModel):
+    """Alerta N1 (regras ou modelo local) anexado pela borda a uma leitura."""
+    type: Annotated[str, Field(max_length=ALERT_TYPE_MAX_LENGTH, pattern=NO_NUL)]
+    value: Optional[Real] = None
 
 class SensorData(BaseModel):
-    device_id: str
-    health_factor: float
-    rpm: int
-    temperature_c: float
-    pressure_in_bar: float
-    pressure_out_bar: float
-    vibration_axial_mms: float
-    vibration_radial_mms: float
-    current_a: float
-    acoustic_db: float
-    humidity_percent: float
+    device_id: DeviceId
+    # Instante da coleta na borda (mensagens em lote); ausente no formato legado de uma leitura por mensagem.
+    time: Optional[UtcDatetime] = None
+    health_factor: Real
+    rpm: Int4
+    temperature_c: Real
+    pressure_in_bar: Real
+    pressure_out_bar: Real
+    vibration_axial_mms: Real
+    vibration_radial_mms: Real
+    current_a: Real
+    acoustic_db: Real
+    humidity_percent: Real
+    alerts: Optional[List[EdgeAlert]] = None
+
+# Canais numéricos de SensorData, na ordem das colunas de sensor_data.
+SENSOR_CHANNELS = (
+    "health_factor", "rpm", "temperature_c", "pressure_in_bar", "pressure_out_bar",
+    "vibration_axial_mms", "vibration_radial_mms", "current_a", "acoustic_db", "humidity_percent",
+)
+
+# Canais de vibração que ganham features espectrais nos resumos da borda.
+VIBRATION_CHANNELS = ("vibration_axial_mms", "vibration_radial_mms")
+SUMMARY_STATS = ("mean", "std", "min", "max", "slope")
+
+def summary_feature_names(bands=4):
+    """Features de um resumo de bloco da borda, na ordem fixa em que trafegam no uplink."""
+    names = [f"{channel}_{kind}" for kind in SUMMARY_STATS for channel in SENSOR_CHANNELS]
+    for channel in VIBRATION_CHANNELS:
+        names += [f"{channel}_rms", f"{channel}_peak", f"{channel}_crest"] + [f"{channel}_band{b}" for b in range(bands)]
+    return names
+
+class SensorSummary(BaseModel):
+    """Resumo de um bloco de leituras calculado na borda (cronos_ai/edge/features.py)."""
+    device_id: DeviceId
+    window_start: UtcDatetime
+    time: UtcDatetime
+    readings: Int4
+    features: Dict[str, float]
 
 class DeviceConfig(BaseModel):
     device_id: str
     temp_std_dev_multiplier: float = 3.0
+    # Multiplicadores dos demais canais do N2, por nome de campo (ex.: "vibration_axial_mms"); um canal
+    # listado aqui também passa a alertar neste dispositivo (ver a seção `n2` do config.yaml).
+    channel_multipliers: Dict[str, float] = Field(default_factory=dict)
 
 class AlertStatus(str, Enum):
     pending = "pending"
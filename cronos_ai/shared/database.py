@@ -0,0 +1,159 @@
+"""
+Camada única de acesso ao TimescaleDB, compartilhada pela API, pelo consumidor e pelo auto-tuner.
+
+Centraliza as variáveis DB_* e mantém um pool limitado de conexões com checkout verificado
+(conexões fechadas ou ociosas há muito tempo são testadas antes de serem entregues) e
+métricas de tempo de espera por conexão.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_NAME = os.getenv("DB_NAME", "cronos_db")
+DB_USER = os.getenv("DB_USER", "cronos_user")
+DB_PASS = os.getenv("DB_PASS", "cronos_password")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5.0"))
+DB_POOL_HEALTHCHECK_SECONDS = float(os.getenv("DB_POOL_HEALTHCHECK_SECONDS", "30"))
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou livre dentro de DB_POOL_TIMEOUT segundos."""
+
+def connect(retries=5, delay=5):
+    """Abre uma conexão dedicada (fora do pool), com novas tentativas enquanto o banco sobe."""
+    conn = None
+    while retries > 0 and not conn:
+        try: conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+        except psycopg2.OperationalError: retries -= 1; time.sleep(delay)
+    return conn
+
+class DatabasePool:
+    """
+    Pool de conexões limitado a `maxconn`, seguro para threads.
+
+    Quando todas as conexões estão em uso, o checkout espera até `timeout` segundos em vez de
+    falhar na hora (como faria o ThreadedConnectionPool puro) e levanta PoolTimeout ao estourar.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 healthcheck_after=DB_POOL_HEALTHCHECK_SECONDS, **conn_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_after = healthcheck_after
+        self.conn_kwargs = conn_kwargs or dict(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS)
+        self._pool = None
+        self._init_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _get_pool(self):
+        # Criado sob demanda para que importar os módulos da API não exija o banco no ar.
+        if self._pool is None:
+            with self._init_lock:
+                if self._pool is None:
+                    self._pool = pool.ThreadedConnectionPool(self.minconn, self.maxconn, **self.conn_kwargs)
+        return self._pool
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        try:
+            # O rollback de uma transação pendente já falha se o servidor derrubou a conexão.
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if time.monotonic() - self._last_used.get(id(conn), 0) < self.healthcheck_after:
+                return True
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        # O id() de uma conexão fechada pode ser reaproveitado por uma nova.
+        self._last_used.pop(id(conn), None)
+        self._get_pool().putconn(conn, close=True)
+
+    def _checkout(self):
+        db_pool = self._get_pool()
+        for _ in range(self.maxconn + 1):
+            conn = db_pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+            with self._stats_lock:
+                self._discarded += 1
+        raise psycopg2.OperationalError("Não foi possível obter uma conexão saudável do pool.")
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão; faz commit ao sair normalmente e rollback em caso de exceção."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._stats_lock:
+                self._timeouts += 1
+            raise PoolTimeout(f"Pool de conexões esgotado ({self.maxconn} em uso).")
+        waited = time.perf_counter() - start
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            with conn:
+                yield conn
+        finally:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._get_pool().putconn(conn)
+            with self._stats_lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Métricas do pool: uso atual, checkouts, timeouts e tempo de espera (segundos)."""
+        with self._stats_lock:
+            return {
+                "max_size": self.maxconn,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded_unhealthy": self._discarded,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+                "wait_seconds_avg": round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+            }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+
+db_pool = DatabasePool()
+
+def get_connection():
+    """Atalho para `db_pool.connection()`, usado pelos routers e serviços."""
+    return db_pool.connection()
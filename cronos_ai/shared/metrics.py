@@ -0,0 +1,94 @@
+"""
+Métricas Prometheus do consumidor, do auto-tuner e da API.
+
+As métricas são atualizadas por lote (não por mensagem), então o custo fica em alguns
+microssegundos por lote e elas podem ficar sempre ligadas. A API expõe tudo em `/metrics`;
+o consumidor externo expõe na porta CONSUMER_METRICS_PORT.
+
+Com o consumidor em modo processo, cada worker é um processo separado: defina
+PROMETHEUS_MULTIPROC_DIR (um diretório vazio e gravável) antes de subir o serviço para que
+as métricas de todos os workers sejam agregadas na exposição.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client import REGISTRY, start_http_server
+
+# Buckets de latência (segundos) do hot path: de 100 µs a 10 s.
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CONSUMER_MESSAGES = Counter(
+    "cronos_consumer_messages_total", "Mensagens SQS processadas pelo consumidor, por resultado.", ["result"])
+CONSUMER_READINGS = Counter(
+    "cronos_consumer_readings_total", "Leituras de sensores validadas e enfileiradas para gravação.")
+CONSUMER_ALERTS = Counter(
+    "cronos_consumer_alerts_total", "Alertas enfileirados para gravação, por nível (n1 = borda, n2 = nuvem).", ["level"])
+CONSUMER_STAGE_SECONDS = Histogram(
+    "cronos_consumer_stage_seconds", "Duração de cada estágio do consumidor, por lote.", ["stage"], buckets=STAGE_BUCKETS)
+CONSUMER_BATCH_ROWS = Histogram(
+    "cronos_consumer_batch_rows", "Leituras gravadas por flush do BatchWriter.", buckets=BATCH_BUCKETS)
+CONSUMER_DELETE_LAG_SECONDS = Histogram(
+    "cronos_consumer_delete_lag_seconds", "Tempo entre o commit de um lote e a exclusão das mensagens no SQS.", buckets=STAGE_BUCKETS)
+CONSUMER_ERRORS = Counter(
+    "cronos_consumer_errors_total", "Falhas do consumidor, por estágio.", ["stage"])
+CONSUMER_INCIDENT_WRITES = Counter(
+    "cronos_consumer_incident_writes_total", "Linhas de incidentes de alerta gravadas, por operação (insert = abertura).", ["operation"])
+
+RUL_PREDICTIONS = Counter(
+    "cronos_rul_predictions_total", "Previsões de RUL geradas pelo consumidor.")
+
+AUTO_TUNER_CYCLE_SECONDS = Histogram(
+    "cronos_auto_tuner_cycle_seconds", "Duração de um ciclo do auto-tuner.", buckets=STAGE_BUCKETS)
+AUTO_TUNER_DEVICES_TUNED = Counter(
+    "cronos_auto_tuner_devices_tuned_total", "Dispositivos com sensibilidade ajustada pelo auto-tuner.")
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "cronos_http_request_seconds", "Latência das rotas da API até o início da resposta.",
+    ["method", "route", "status"], buckets=STAGE_BUCKETS)
+
+# Estágios pré-resolvidos: `labels()` faz lookup com lock a cada chamada, então o hot path usa estes.
+STAGES = {stage: CONSUMER_STAGE_SECONDS.labels(stage=stage)
+          for stage in ("sqs_receive", "decode", "n2_check", "rul_score", "enqueue", "db_flush", "db_isolate", "sqs_delete")}
+MESSAGES_ACCEPTED = CONSUMER_MESSAGES.labels(result="accepted")
+MESSAGES_INVALID = CONSUMER_MESSAGES.labels(result="invalid")
+# Rejeitadas pelo banco e devolvidas à fila; dead_lettered inclui as inválidas e as que esgotaram as entregas.
+MESSAGES_REJECTED = CONSUMER_MESSAGES.labels(result="rejected")
+MESSAGES_DEAD_LETTERED = CONSUMER_MESSAGES.labels(result="dead_lettered")
+ALERTS_N1 = CONSUMER_ALERTS.labels(level="n1")
+ALERTS_N2 = CONSUMER_ALERTS.labels(level="n2")
+INCIDENTS_OPENED = CONSUMER_INCIDENT_WRITES.labels(operation="insert")
+INCIDENTS_UPDATED = CONSUMER_INCIDENT_WRITES.labels(operation="update")
+
+@contextmanager
+def stage(name):
+    """Cronometra um estágio do consumidor (ver STAGES)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGES[name].observe(time.perf_counter() - start)
+
+def gauge_from(name, documentation, function):
+    """Gauge lido sob demanda na coleta (ex.: conexões em uso no pool), sem custo no hot path."""
+    gauge = Gauge(name, documentation)
+    gauge.set_function(function)
+    return gauge
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def exposition():
+    """(corpo, content-type) da exposição no formato texto do Prometheus."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+def serve(port):
+    """Servidor HTTP de métricas em thread própria (usado pelo consumidor externo)."""
+    start_http_server(port, registry=_registry())
+    print(f"METRICS: Exposição Prometheus em :{port}/metrics")
@@ -0,0 +1,117 @@
+"""
+Serialização do caminho quente do consumidor e da API.
+
+- JSON: `loads` e `dumps` (sempre bytes) usam o orjson quando ele está instalado; sem ele, caem
+  no json da biblioteca padrão com a mesma interface. Nos dois, datetime em UTC sai com sufixo
+  "Z", como o pydantic serializava as respostas da API.
+- Validação em lote: `validate_batch` valida as leituras de todas as mensagens de um lote SQS
+  contra SensorData em uma única chamada ao pydantic-core (TypeAdapter), em vez de um
+  `SensorData(**d)` por leitura; se alguma leitura for inválida, só as mensagens com erro ficam
+  de fora.
+- Respostas: `rows_response` serializa as linhas de um cursor comum (tuplas, sem RealDictCursor)
+  direto em bytes, sem passar pela validação genérica do `response_model` do FastAPI; páginas
+  com mais de ROWS_STREAM_THRESHOLD linhas saem em streaming, em blocos de ROWS_CHUNK linhas.
+- Paginação: `encode_page_cursor` e `decode_page_cursor` convertem o par (time, número) do
+  cabeçalho X-Next-Cursor em texto opaco (base64 url-safe), que vai na query string sem escape
+  (o isoformat cru tem '+' no fuso e chegaria ao servidor como espaço).
+"""
+import base64
+import json
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from pydantic import TypeAdapter, ValidationError
+
+from cronos_ai.shared.data_models import SensorData
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, o json da biblioteca padrão atende com a mesma interface.
+    orjson = None
+
+ROWS_CHUNK = int(os.getenv("API_ROWS_CHUNK", "1000"))
+ROWS_STREAM_THRESHOLD = int(os.getenv("API_ROWS_STREAM_THRESHOLD", "2000"))
+JSON_MEDIA_TYPE = "application/json"
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+        return value.replace(tzinfo=None).isoformat() + "Z"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # escalares NumPy
+        return value.item()
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+if orjson is not None:
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(value):
+        return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+else:
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(value):
+        return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+_READINGS = TypeAdapter(List[SensorData])
+
+def validate_batch(groups):
+    """
+    Valida grupos de leituras (dicts), um grupo por mensagem, em uma chamada só.
+    Devolve (modelos por grupo, erros) em que os grupos com leitura inválida têm None e
+    `erros` mapeia o índice do grupo para a primeira mensagem de erro.
+    """
+    flat = [reading for group in groups for reading in group]
+    owner = [g for g, group in enumerate(groups) for _ in group]
+    errors = {}
+    try:
+        models = _READINGS.validate_python(flat)
+    except ValidationError as e:
+        for error in e.errors(include_url=False):
+            g = owner[error["loc"][0]]
+            errors.setdefault(g, f"{'.'.join(str(part) for part in error['loc'][1:])}: {error['msg']}")
+        flat = [reading for g, group in enumerate(groups) if g not in errors for reading in group]
+        models = _READINGS.validate_python(flat)
+    results = []
+    position = 0
+    for g, group in enumerate(groups):
+        if g in errors:
+            results.append(None)
+        else:
+            results.append(models[position:position + len(group)])
+            position += len(group)
+    return results, errors
+
+def encode_page_cursor(time, number):
+    return base64.urlsafe_b64encode(f"{time.isoformat()}|{number}".encode()).decode()
+
+def decode_page_cursor(cursor):
+    """Converte o X-Next-Cursor de volta em (time, número); levanta ValueError se estiver malformado."""
+    time_text, _, number_text = base64.urlsafe_b64decode(cursor.encode()).decode().rpartition("|")
+    return datetime.fromisoformat(time_text), int(number_text)
+
+def cursor_columns(cur):
+    """Nomes das colunas do último SELECT de um cursor comum."""
+    return [column.name for column in cur.description]
+
+def _rows_chunks(columns, rows):
+    yield b"["
+    for start in range(0, len(rows), ROWS_CHUNK):
+        chunk = dumps([dict(zip(columns, row)) for row in rows[start:start + ROWS_CHUNK]])
+        yield (b"," if start else b"") + chunk[1:-1]
+    yield b"]"
+
+def rows_response(columns, rows, headers=None):
+    """Resposta JSON (lista de objetos) a partir de tuplas na ordem de `columns`."""
+    # Import local: a borda também usa este módulo (codec do uplink) e não precisa do FastAPI.
+    from fastapi.responses import Response, StreamingResponse
+
+    if len(rows) > ROWS_STREAM_THRESHOLD:
+        return StreamingResponse(_rows_chunks(columns, rows), media_type=JSON_MEDIA_TYPE, headers=headers)
+    return Response(dumps([dict(zip(columns, row)) for row in rows]), media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,127 @@
+"""
+Formato das mensagens SQS entre a borda e a nuvem.
+
+Formato legado: uma leitura por mensagem, JSON puro (`{"device_id": ..., "temperature_c": ..., "alerts": [...]}`).
+
+Formato em lote (v1): várias leituras de um dispositivo em uma mensagem. O corpo continua sendo um
+JSON com `device_id` em claro (usado pelo consumidor para o sharding), e as leituras vão em
+`data`, como JSON colunar comprimido com zlib e codificado em base64:
+
+    {"v": 1, "device_id": "...", "n": 500, "data": "<base64(zlib(json colunar))>"}
+
+O JSON colunar tem o instante da primeira leitura em ms (`t0`), os deltas em ms (`dt`), uma lista de
+valores por canal (`c`) e os alertas N1 indexados pela posição da leitura (`a`). Resumos de bloco do
+estágio de features da borda (`cronos_ai/edge/features.py`) vão em `s`, cada um com início e fim do
+bloco em ms (`t0`, `t`), número de leituras (`n`) e as features: só os valores (`fv`), na ordem de
+`summary_feature_names(fb)`, quando o resumo segue esse layout, ou o dict completo (`f`). Uma
+mensagem pode ter só resumos (`n` = 0).
+"""
+import base64
+import json
+import zlib
+from datetime import datetime, timezone
+
+from cronos_ai.shared.data_models import SENSOR_CHANNELS, VIBRATION_CHANNELS, summary_feature_names
+from cronos_ai.shared.serialization import loads
+
+ENVELOPE_VERSION = 1
+# Limite do SQS para uma mensagem e para a soma das mensagens de um send_message_batch.
+SQS_MAX_BYTES = 256 * 1024
+MAX_BODY_BYTES = SQS_MAX_BYTES - 6 * 1024
+MAX_BATCH_ENTRIES = 10
+
+def _epoch_ms(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(round(value.timestamp() * 1000))
+
+def _pack_summary(summary):
+    features = summary["features"]
+    entry = {"t0": _epoch_ms(summary["window_start"]), "t": _epoch_ms(summary["time"]), "n": summary["readings"]}
+    # Os nomes das features são a maior parte de um resumo; no layout padrão vão só os valores.
+    bands = sum(1 for name in features if name.startswith(f"{VIBRATION_CHANNELS[0]}_band"))
+    names = summary_feature_names(bands)
+    if list(features) == names:
+        entry["fb"], entry["fv"] = bands, [features[name] for name in names]
+    else:
+        entry["f"] = features
+    return entry
+
+def _unpack_features(entry):
+    if "fv" in entry:
+        return dict(zip(summary_feature_names(entry["fb"]), entry["fv"]))
+    return entry["f"]
+
+def _encode_chunk(device_id, readings, summaries=()):
+    columnar = {}
+    if readings:
+        times = [_epoch_ms(r["time"]) for r in readings]
+        columnar = {
+            "t0": times[0],
+            "dt": [b - a for a, b in zip(times, times[1:])],
+            "c": {channel: [r[channel] for r in readings] for channel in SENSOR_CHANNELS},
+            "a": {str(i): r["alerts"] for i, r in enumerate(readings) if r.get("alerts")},
+        }
+    if summaries:
+        columnar["s"] = [_pack_summary(summary) for summary in summaries]
+    packed = zlib.compress(json.dumps(columnar, separators=(",", ":")).encode("utf-8"), 6)
+    return json.dumps({
+        "v": ENVELOPE_VERSION, "device_id": device_id, "n": len(readings),
+        "data": base64.b64encode(packed).decode("ascii"),
+    }, separators=(",", ":"))
+
+def encode_readings(device_id, readings, max_body_bytes=MAX_BODY_BYTES, summaries=()):
+    """
+    Empacota leituras (dicts com `time`) e resumos de bloco em corpos de mensagem no formato v1,
+    cada um abaixo de `max_body_bytes`; um lote grande demais é dividido ao meio até caber
+    (os resumos vão na primeira metade).
+    """
+    if not readings and not summaries:
+        return []
+    body = _encode_chunk(device_id, readings, summaries)
+    if len(body.encode("utf-8")) <= max_body_bytes:
+        return [body]
+    if len(readings) <= 1:
+        raise ValueError(f"Leitura de {device_id} excede {max_body_bytes} bytes mesmo sozinha.")
+    middle = len(readings) // 2
+    return (encode_readings(device_id, readings[:middle], max_body_bytes, summaries)
+            + encode_readings(device_id, readings[middle:], max_body_bytes))
+
+def _iso(epoch_ms):
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).isoformat()
+
+def decode_body(body):
+    """Leituras (dicts prontos para SensorData) de um corpo de mensagem em qualquer formato."""
+    return decode_message(body)[0]
+
+def decode_message(body):
+    """(leituras, resumos de bloco) de um corpo de mensagem; resumos são dicts prontos para SensorSummary."""
+    message = loads(body)
+    if not isinstance(message, dict):
+        raise ValueError("Corpo de mensagem não é um objeto JSON.")
+    if "v" not in message:
+        return [message], []
+    if message["v"] != ENVELOPE_VERSION:
+        raise ValueError(f"Versão de envelope desconhecida: {message['v']}")
+    columnar = loads(zlib.decompress(base64.b64decode(message["data"])))
+    n = message["n"]
+    times = []
+    if n:
+        times.append(columnar["t0"])
+        for delta in columnar["dt"]:
+            times.append(times[-1] + delta)
+        if len(times) != n or any(len(columnar["c"][channel]) != n for channel in SENSOR_CHANNELS):
+            raise ValueError("Envelope com número de leituras inconsistente.")
+    # Uma tupla por leitura (zip das colunas) e um dict por tupla, sem indexar canal a canal.
+    device_id = message["device_id"]
+    keys = ("device_id", "time") + SENSOR_CHANNELS
+    columns = zip(*(columnar["c"][channel] for channel in SENSOR_CHANNELS)) if n else ()
+    readings = [dict(zip(keys, (device_id, _iso(t), *values))) for t, values in zip(times, columns)]
+    for i, alerts in columnar.get("a", {}).items():
+        if alerts:
+            readings[int(i)]["alerts"] = alerts
+    summaries = [{"device_id": message["device_id"], "window_start": _iso(s["t0"]), "time": _iso(s["t"]),
+                  "readings": s["n"], "features": _unpack_features(s)} for s in columnar.get("s", ())]
+    return readings, summaries
@@ -1,6 +1,13 @@
 import { useState, useEffect } from 'react';
 
 const API_BASE_URL = 'http://localhost:8000/api/v1';
+const MAX_ALERTS = 100;
+
+// Lista recarregada do banco, mantendo na frente o que o stream já trouxe depois dela.
+const mergeAlerts = (fetched, current) => {
+  const newest = fetched.length > 0 ? Math.max(...fetched.map(alert => alert.id)) : 0;
+  return [...current.filter(alert => alert.id > newest), ...fetched].slice(0, MAX_ALERTS);
+};
 
 function AlertsDashboard() {
   const [alerts, setAlerts] = useState([]);
@@ -9,18 +16,51 @@ function AlertsDashboard() {
 
   const fetchAlerts = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/alerts`);
+      const response = await fetch(`${API_BASE_URL}/alerts?include_payload=false&limit=${MAX_ALERTS}`);
       if (!response.ok) throw new Error('Falha na resposta da rede');
       const data = await response.json();
-      setAlerts(data);
+      setAlerts(currentAlerts => mergeAlerts(data, currentAlerts));
+      return data;
     } catch (err) {
       setError('Não foi possível carregar os alertas.');
       console.error(err);
+      return null;
     } finally {
       setLoading(false);
     }
   };
 
+  // Carga inicial única; depois disso os alertas novos chegam pelo stream (SSE).
+  // Em uma reconexão o navegador reenvia Last-Event-ID e o servidor completa o que faltou; quando
+  // não há como completar (sem id ou lacuna grande demais), o servidor envia 'reset' e a lista é recarregada.
+  const subscribeToAlerts = (lastId) => {
+    const query = lastId != null ? `?last_event_id=${lastId}` : '';
+    const source = new EventSource(`${API_BASE_URL}/alerts/stream${query}`);
+
+    source.addEventListener('alert', (event) => {
+      const newAlert = JSON.parse(event.data);
+      setAlerts(currentAlerts =>
+        currentAlerts.some(alert => alert.id === newAlert.id)
+          ? currentAlerts
+          : [newAlert, ...currentAlerts].slice(0, MAX_ALERTS)
+      );
+    });
+
+    source.addEventListener('status', (event) => {
+      const { id, status } = JSON.parse(event.data);
+      setAlerts(currentAlerts =>
+        currentAlerts.map(alert => (alert.id === id ? { ...alert, status } : alert))
+      );
+    });
+
+    source.addEventListener('reset', () => {
+      fetchAlerts();
+    });
+
+    source.onerror = (err) => console.error('Stream de alertas interrompido, reconectando...', err);
+    return source;
+  };
+
   const handleFeedback = async (alertId, status) => {
     try {
       const response = await fetch(`${API_BASE_URL}/alerts/${alertId}/feedback`, {
@@ -43,9 +83,17 @@ function AlertsDashboard() {
   };
 
   useEffect(() => {
-    fetchAlerts();
-    const intervalId = setInterval(fetchAlerts, 15000);
-    return () => clearInterval(intervalId);
+    let source = null;
+    let cancelled = false;
+    fetchAlerts().then(data => {
+      if (cancelled) return;
+      const lastId = data && data.length > 0 ? Math.max(...data.map(alert => alert.id)) : null;
+      source = subscribeToAlerts(lastId);
+    });
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+    };
   }, []);
 
   if (loading) return <p>Carregando alertas...</p>;
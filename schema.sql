@@ -20,6 +20,18 @@ CREATE TABLE IF NOT EXISTS sensor_data (
 -- Converte a tabela sensor_data em uma hypertable, particionada pela coluna 'time'.
 SELECT create_hypertable('sensor_data', 'time', if_not_exists => TRUE);
 
+-- Políticas de armazenamento (valores padrão da seção `storage` do config.yaml; para instalações
+-- existentes use: python -m cronos_ai.central_cloud.data_pipeline.storage).
+SELECT set_chunk_time_interval('sensor_data', INTERVAL '6 hours');
+CREATE INDEX IF NOT EXISTS sensor_data_device_time_idx ON sensor_data (device_id, time DESC);
+ALTER TABLE sensor_data SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'device_id',
+    timescaledb.compress_orderby = 'time DESC'
+);
+SELECT add_compression_policy('sensor_data', INTERVAL '7 days', if_not_exists => TRUE);
+SELECT add_retention_policy('sensor_data', INTERVAL '365 days', if_not_exists => TRUE);
+
 
 -- Tabela para registrar todos os alertas gerados (Nível 1 da borda ou Nível 2 da nuvem).
 CREATE TABLE IF NOT EXISTS alerts (
@@ -29,19 +41,80 @@ CREATE TABLE IF NOT EXISTS alerts (
     alert_type VARCHAR(100),
     alert_value REAL,
     full_payload JSONB,
-    status VARCHAR(20) DEFAULT 'pending' -- Para o feedback continuo do operador (pending, confirmed_true, confirmed_false)
+    status VARCHAR(20) DEFAULT 'pending', -- Para o feedback continuo do operador (pending, confirmed_true, confirmed_false)
+    feedback_at TIMESTAMPTZ, -- Instante do último feedback; o auto-tuner processa o que vier depois da sua marca d'água
+    -- Incidente (disparos repetidos do mesmo alerta agrupados pelo consumidor): `time` e full_payload
+    -- são da abertura; last_time, occurrences e peak_value acompanham os disparos seguintes.
+    last_time TIMESTAMPTZ,
+    occurrences INTEGER DEFAULT 1,
+    peak_value REAL,
+    closed_at TIMESTAMPTZ, -- NULL enquanto o incidente está aberto
+    close_payload JSONB -- Payload do último disparo, gravado no fechamento
 );
 
+-- Índices da API de alertas (filtros + paginação por (time, id)) e da varredura do auto-tuner por status.
+CREATE INDEX IF NOT EXISTS alerts_time_id_idx ON alerts (time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS alerts_device_time_idx ON alerts (device_id, time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS alerts_status_time_idx ON alerts (status, time DESC, id DESC) INCLUDE (device_id);
+CREATE INDEX IF NOT EXISTS alerts_type_time_idx ON alerts (alert_type, time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS alerts_pending_time_idx ON alerts (time DESC, id DESC) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS alerts_false_feedback_idx ON alerts (feedback_at) INCLUDE (device_id, alert_type) WHERE status = 'confirmed_false';
+CREATE INDEX IF NOT EXISTS alerts_open_incidents_idx ON alerts (last_time) INCLUDE (device_id, alert_type) WHERE closed_at IS NULL AND last_time IS NOT NULL;
+
 
 -- Tabela para armazenar as configurações de sensibilidade do motor de IA para cada dispositivo.
 CREATE TABLE IF NOT EXISTS device_configs (
     device_id VARCHAR(50) PRIMARY KEY,
     temp_std_dev_multiplier REAL DEFAULT 3.0,
+    channel_multipliers JSONB NOT NULL DEFAULT '{}', -- Multiplicadores dos demais canais do N2 (ex.: {"vibration_axial_mms": 3.3})
     last_updated TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Marca d'água do auto-tuner: feedback com feedback_at até `watermark` já foi aplicado.
+CREATE TABLE IF NOT EXISTS auto_tuner_state (
+    name VARCHAR(50) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    last_run TIMESTAMPTZ,
+    devices_tuned INTEGER
+);
+
+-- Previsões de RUL (vida útil remanescente, em horas) geradas pelo consumidor a partir das janelas do N2.
+CREATE TABLE IF NOT EXISTS rul_predictions (
+    time TIMESTAMPTZ NOT NULL,
+    device_id VARCHAR(50) NOT NULL,
+    rul_hours REAL,
+    model_version VARCHAR(50)
+);
+SELECT create_hypertable('rul_predictions', 'time', if_not_exists => TRUE);
+CREATE INDEX IF NOT EXISTS rul_predictions_device_time_idx ON rul_predictions (device_id, time DESC);
+
+-- Resumos por bloco de leituras calculados na borda (cronos_ai/edge/features.py): estatísticas e
+-- tendência por canal, RMS/pico/fator de crista e energia por faixa de frequência da vibração.
+CREATE TABLE IF NOT EXISTS sensor_summaries (
+    time TIMESTAMPTZ NOT NULL,
+    device_id VARCHAR(50) NOT NULL,
+    window_start TIMESTAMPTZ NOT NULL,
+    readings INTEGER,
+    features JSONB NOT NULL
+);
+SELECT create_hypertable('sensor_summaries', 'time', if_not_exists => TRUE);
+CREATE INDEX IF NOT EXISTS sensor_summaries_device_time_idx ON sensor_summaries (device_id, time DESC);
 
--- Tabela para armazenar os dados históricos de treinamento do dataset da NASA.
+-- Mensagens SQS que o consumidor descartou: corpo ilegível ou inválido (na primeira entrega) ou
+-- rejeitado pelo banco em todas as CONSUMER_MAX_RECEIVES entregas. O corpo fica como texto, sem
+-- interpretação, para inspeção e reenvio manual.
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id SERIAL PRIMARY KEY,
+    time TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    message_id VARCHAR(100),
+    receive_count INTEGER,
+    reason TEXT,
+    body TEXT
+);
+
+
+-- Tabela para armazenar os dados históricos de treinamento do dataset da NASA (train_FD001 a train_FD004).
+-- Carregada por scripts/import_nasa_data.py.
 -- Esta tabela é usada para o treinamento do modelo de previsão de RUL (Remaining Useful Life).
 CREATE TABLE IF NOT EXISTS nasa_turbofan_data (
     time TIMESTAMPTZ DEFAULT NOW(),
@@ -71,5 +144,121 @@ CREATE TABLE IF NOT EXISTS nasa_turbofan_data (
     sensor19 REAL,
     sensor20 REAL,
     sensor21 REAL,
-    RUL REAL
-);
\ No newline at end of file
+    RUL REAL,
+    -- Subset do C-MAPSS (1 a 4 = FD001 a FD004).
+    subset SMALLINT
+);
+
+-- Ciclos de teste do C-MAPSS (test_FD001 a test_FD004), com a RUL real de cada ciclo calculada a partir de RUL_FDxxx.
+CREATE TABLE IF NOT EXISTS nasa_turbofan_test (
+    time TIMESTAMPTZ DEFAULT NOW(),
+    unit_nr INTEGER,
+    cycle REAL,
+    setting1 REAL,
+    setting2 REAL,
+    setting3 REAL,
+    sensor1 REAL,
+    sensor2 REAL,
+    sensor3 REAL,
+    sensor4 REAL,
+    sensor5 REAL,
+    sensor6 REAL,
+    sensor7 REAL,
+    sensor8 REAL,
+    sensor9 REAL,
+    sensor10 REAL,
+    sensor11 REAL,
+    sensor12 REAL,
+    sensor13 REAL,
+    sensor14 REAL,
+    sensor15 REAL,
+    sensor16 REAL,
+    sensor17 REAL,
+    sensor18 REAL,
+    sensor19 REAL,
+    sensor20 REAL,
+    sensor21 REAL,
+    RUL REAL,
+    -- Subset do C-MAPSS (1 a 4 = FD001 a FD004).
+    subset SMALLINT
+);
+
+-- RUL no último ciclo de cada unidade de teste (RUL_FD001 a RUL_FD004).
+CREATE TABLE IF NOT EXISTS nasa_turbofan_rul (
+    subset SMALLINT NOT NULL,
+    unit_nr INTEGER NOT NULL,
+    RUL REAL,
+    PRIMARY KEY (subset, unit_nr)
+);
+
+-- Arquivos já importados (pelo nome dentro do ZIP e CRC); o importador pula os que não mudaram.
+CREATE TABLE IF NOT EXISTS nasa_import_log (
+    member TEXT PRIMARY KEY,
+    crc BIGINT NOT NULL,
+    rows INTEGER NOT NULL,
+    seconds REAL,
+    imported_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Rollups (continuous aggregates) do sensor_data em 1 minuto, 1 hora e 1 dia, com média, mínimo e máximo
+-- de todos os canais. O endpoint /summary escolhe o rollup mais grosso que responde ao intervalo pedido.
+-- materialized_only = false inclui nos resultados os dados recentes ainda não materializados.
+CREATE MATERIALIZED VIEW IF NOT EXISTS sensor_data_1m
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 minute', time) AS bucket, device_id, COUNT(*) AS samples,
+    AVG(health_factor) AS health_factor_avg, MIN(health_factor) AS health_factor_min, MAX(health_factor) AS health_factor_max,
+    AVG(rpm) AS rpm_avg, MIN(rpm) AS rpm_min, MAX(rpm) AS rpm_max,
+    AVG(temperature_c) AS temperature_c_avg, MIN(temperature_c) AS temperature_c_min, MAX(temperature_c) AS temperature_c_max,
+    AVG(pressure_in_bar) AS pressure_in_bar_avg, MIN(pressure_in_bar) AS pressure_in_bar_min, MAX(pressure_in_bar) AS pressure_in_bar_max,
+    AVG(pressure_out_bar) AS pressure_out_bar_avg, MIN(pressure_out_bar) AS pressure_out_bar_min, MAX(pressure_out_bar) AS pressure_out_bar_max,
+    AVG(vibration_axial_mms) AS vibration_axial_mms_avg, MIN(vibration_axial_mms) AS vibration_axial_mms_min, MAX(vibration_axial_mms) AS vibration_axial_mms_max,
+    AVG(vibration_radial_mms) AS vibration_radial_mms_avg, MIN(vibration_radial_mms) AS vibration_radial_mms_min, MAX(vibration_radial_mms) AS vibration_radial_mms_max,
+    AVG(current_a) AS current_a_avg, MIN(current_a) AS current_a_min, MAX(current_a) AS current_a_max,
+    AVG(acoustic_db) AS acoustic_db_avg, MIN(acoustic_db) AS acoustic_db_min, MAX(acoustic_db) AS acoustic_db_max,
+    AVG(humidity_percent) AS humidity_percent_avg, MIN(humidity_percent) AS humidity_percent_min, MAX(humidity_percent) AS humidity_percent_max
+FROM sensor_data
+GROUP BY bucket, device_id
+WITH NO DATA;
+SELECT add_continuous_aggregate_policy('sensor_data_1m',
+    start_offset => INTERVAL '2 hours', end_offset => INTERVAL '1 minute',
+    schedule_interval => INTERVAL '1 minute', if_not_exists => TRUE);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS sensor_data_1h
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 hour', time) AS bucket, device_id, COUNT(*) AS samples,
+    AVG(health_factor) AS health_factor_avg, MIN(health_factor) AS health_factor_min, MAX(health_factor) AS health_factor_max,
+    AVG(rpm) AS rpm_avg, MIN(rpm) AS rpm_min, MAX(rpm) AS rpm_max,
+    AVG(temperature_c) AS temperature_c_avg, MIN(temperature_c) AS temperature_c_min, MAX(temperature_c) AS temperature_c_max,
+    AVG(pressure_in_bar) AS pressure_in_bar_avg, MIN(pressure_in_bar) AS pressure_in_bar_min, MAX(pressure_in_bar) AS pressure_in_bar_max,
+    AVG(pressure_out_bar) AS pressure_out_bar_avg, MIN(pressure_out_bar) AS pressure_out_bar_min, MAX(pressure_out_bar) AS pressure_out_bar_max,
+    AVG(vibration_axial_mms) AS vibration_axial_mms_avg, MIN(vibration_axial_mms) AS vibration_axial_mms_min, MAX(vibration_axial_mms) AS vibration_axial_mms_max,
+    AVG(vibration_radial_mms) AS vibration_radial_mms_avg, MIN(vibration_radial_mms) AS vibration_radial_mms_min, MAX(vibration_radial_mms) AS vibration_radial_mms_max,
+    AVG(current_a) AS current_a_avg, MIN(current_a) AS current_a_min, MAX(current_a) AS current_a_max,
+    AVG(acoustic_db) AS acoustic_db_avg, MIN(acoustic_db) AS acoustic_db_min, MAX(acoustic_db) AS acoustic_db_max,
+    AVG(humidity_percent) AS humidity_percent_avg, MIN(humidity_percent) AS humidity_percent_min, MAX(humidity_percent) AS humidity_percent_max
+FROM sensor_data
+GROUP BY bucket, device_id
+WITH NO DATA;
+SELECT add_continuous_aggregate_policy('sensor_data_1h',
+    start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '30 minutes', if_not_exists => TRUE);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS sensor_data_1d
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 day', time) AS bucket, device_id, COUNT(*) AS samples,
+    AVG(health_factor) AS health_factor_avg, MIN(health_factor) AS health_factor_min, MAX(health_factor) AS health_factor_max,
+    AVG(rpm) AS rpm_avg, MIN(rpm) AS rpm_min, MAX(rpm) AS rpm_max,
+    AVG(temperature_c) AS temperature_c_avg, MIN(temperature_c) AS temperature_c_min, MAX(temperature_c) AS temperature_c_max,
+    AVG(pressure_in_bar) AS pressure_in_bar_avg, MIN(pressure_in_bar) AS pressure_in_bar_min, MAX(pressure_in_bar) AS pressure_in_bar_max,
+    AVG(pressure_out_bar) AS pressure_out_bar_avg, MIN(pressure_out_bar) AS pressure_out_bar_min, MAX(pressure_out_bar) AS pressure_out_bar_max,
+    AVG(vibration_axial_mms) AS vibration_axial_mms_avg, MIN(vibration_axial_mms) AS vibration_axial_mms_min, MAX(vibration_axial_mms) AS vibration_axial_mms_max,
+    AVG(vibration_radial_mms) AS vibration_radial_mms_avg, MIN(vibration_radial_mms) AS vibration_radial_mms_min, MAX(vibration_radial_mms) AS vibration_radial_mms_max,
+    AVG(current_a) AS current_a_avg, MIN(current_a) AS current_a_min, MAX(current_a) AS current_a_max,
+    AVG(acoustic_db) AS acoustic_db_avg, MIN(acoustic_db) AS acoustic_db_min, MAX(acoustic_db) AS acoustic_db_max,
+    AVG(humidity_percent) AS humidity_percent_avg, MIN(humidity_percent) AS humidity_percent_min, MAX(humidity_percent) AS humidity_percent_max
+FROM sensor_data
+GROUP BY bucket, device_id
+WITH NO DATA;
+SELECT add_continuous_aggregate_policy('sensor_data_1d',
+    start_offset => INTERVAL '30 days', end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE);
@@ -1,19 +1,53 @@
-import os
-import psycopg2
-import pandas as pd
-import numpy as np
-import zipfile
+"""
+Importador do dataset NASA C-MAPSS (Turbofan Engine Degradation Simulation) para o TimescaleDB.
+
+Lê os arquivos train/test/RUL de FD001–FD004 direto do ZIP aninhado: o ZIP interno é aberto
+como stream dentro do externo e cada arquivo é lido linha a linha, sem carregar nenhum dos dois
+em memória. Cada arquivo é uma tarefa, executada em até IMPORTER_WORKERS processos em paralelo,
+e é carregado com COPY a partir de buffers CSV em memória de até COPY_BUFFER_BYTES.
+
+Tabelas:
+- nasa_turbofan_data: ciclos de treino, com RUL = último ciclo da unidade - ciclo;
+- nasa_turbofan_test: ciclos de teste, com a RUL real (RUL_FDxxx + último ciclo - ciclo);
+- nasa_turbofan_rul: a RUL no último ciclo de cada unidade de teste (RUL_FDxxx.txt);
+- nasa_import_log: um registro por arquivo importado (CRC do arquivo no ZIP, linhas, duração).
+A coluna `subset` (1 a 4) identifica FD001–FD004.
+
+Cada arquivo é importado em uma transação que substitui as linhas do mesmo subset e grava o log,
+então rodar de novo é seguro e uma importação interrompida continua de onde parou: arquivos já
+registrados com o mesmo CRC são pulados (--force reimporta). Nenhuma tabela é apagada.
+
+Uso: python import_nasa_data.py [--zip caminho] [--subsets FD001 FD002] [--splits train test RUL] [--workers 4] [--force]
+"""
+import argparse
 import io
+import os
+import posixpath
+import resource
 import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import psycopg2
 
 DB_HOST = os.getenv("DB_HOST", "timescaledb")
 DB_NAME = os.getenv("DB_NAME", "cronos_db")
 DB_USER = os.getenv("DB_USER", "cronos_user")
 DB_PASS = os.getenv("DB_PASS", "cronos_password")
-OUTER_ZIP_PATH = "/data/5. Turbofan Engine Degradation Simulation Data Set.zip"
-INNER_ZIP_PATH = "6. Turbofan Engine Degradation Simulation Data Set/CMAPSSData.zip" 
-TARGET_FILE_SUFFIX = 'train_FD001.txt'
-TABLE_NAME = "nasa_turbofan_data"
+OUTER_ZIP_PATH = os.getenv("NASA_ZIP_PATH", "/data/5. Turbofan Engine Degradation Simulation Data Set.zip")
+INNER_ZIP_SUFFIX = "CMAPSSData.zip"
+SUBSETS = ("FD001", "FD002", "FD003", "FD004")
+SPLITS = ("train", "test", "RUL")
+IMPORTER_WORKERS = int(os.getenv("IMPORTER_WORKERS", str(min(4, os.cpu_count() or 1))))
+COPY_BUFFER_BYTES = int(os.getenv("IMPORTER_COPY_BUFFER_BYTES", str(4 * 1024 * 1024)))
+# Para ler o índice do ZIP interno, o stream comprimido é avançado até o fim; o zipfile faz isso em
+# leituras de 16 MB por padrão, o que sozinho leva o pico de memória de ~30 MB para ~75 MB.
+ZIP_SEEK_READ_BYTES = 1024 * 1024
+
+RAW_COLUMNS = ["unit_nr", "cycle", "setting1", "setting2", "setting3"] + [f"sensor{i}" for i in range(1, 22)]
+CYCLE_COLUMNS = ["subset"] + RAW_COLUMNS + ["RUL"]
+TABLES = {"train": "nasa_turbofan_data", "test": "nasa_turbofan_test", "RUL": "nasa_turbofan_rul"}
 
 def get_db_connection():
     retries = 5; conn = None
@@ -23,66 +57,204 @@ def get_db_connection():
     if conn: print("IMPORTER: Conexão com o TimescaleDB estabelecida!")
     return conn
 
-def process_data_from_nested_zip():
-    print(f"IMPORTER: Lendo o arquivo ZIP externo em {OUTER_ZIP_PATH}...")
-    try:
-        with zipfile.ZipFile(OUTER_ZIP_PATH, 'r') as outer_z:
-            print(f"IMPORTER: Procurando pelo ZIP interno em '{INNER_ZIP_PATH}'...")
-            inner_zip_bytes = outer_z.read(INNER_ZIP_PATH)
-            print("IMPORTER: Lendo o ZIP interno a partir da memória...")
-            with zipfile.ZipFile(io.BytesIO(inner_zip_bytes), 'r') as inner_z:
-                file_to_extract = None
-                for filename in inner_z.namelist():
-                    if filename.endswith(TARGET_FILE_SUFFIX):
-                        file_to_extract = filename
-                        break
-                if not file_to_extract: raise FileNotFoundError(f"Não foi possível encontrar '{TARGET_FILE_SUFFIX}' dentro do ZIP interno.")
-                with inner_z.open(file_to_extract) as f:
-                    df = pd.read_csv(f, sep=' ', header=None)
-                print(f"IMPORTER: Arquivo {file_to_extract} extraído e lido com sucesso.")
-    except (FileNotFoundError, KeyError):
-        print(f"ERRO: Arquivo ou caminho não encontrado.")
-        return None
-    except Exception as e:
-        print(f"ERRO: Falha ao ler os arquivos ZIP: {e}")
-        return None
-    df.drop(columns=[26, 27], inplace=True)
-    columns = ['unit_nr', 'cycle', 'setting1', 'setting2', 'setting3'] + [f'sensor{i}' for i in range(1, 22)]
-    df.columns = columns
-    max_cycles = df.groupby('unit_nr')['cycle'].max().reset_index()
-    max_cycles.columns = ['unit_nr', 'max_cycle']
-    df = pd.merge(df, max_cycles, on='unit_nr')
-    df['RUL'] = df['max_cycle'] - df['cycle']
-    df.drop(columns=['max_cycle'], inplace=True)
-    print("IMPORTER: Processamento de dados concluído.")
-    return df
-
-def create_table_and_insert_data(conn, df):
-    """Cria a tabela e insere os dados do DataFrame."""
+def ensure_tables(conn):
+    """Cria as tabelas que faltarem (as mesmas do schema.sql) sem tocar nos dados existentes."""
+    cycle_columns = ", ".join(f"{col} REAL" for col in RAW_COLUMNS[1:] + ["RUL"])
     with conn.cursor() as cur:
-        print(f"IMPORTER: Criando a tabela '{TABLE_NAME}'...")
-        cur.execute(f"DROP TABLE IF EXISTS {TABLE_NAME};")
-        column_definitions = ", ".join([f"{col} REAL" for col in df.columns if col != 'unit_nr'])
-        cur.execute(f"CREATE TABLE {TABLE_NAME} (time TIMESTAMPTZ DEFAULT NOW(), unit_nr INTEGER, {column_definitions});")
-        print(f"IMPORTER: Inserindo {len(df)} registros no banco de dados...")
-        
-        data_tuples = list(df.itertuples(index=False, name=None))
-        cols = ",".join(list(df.columns))
-        
-        from psycopg2.extras import execute_values
-        execute_values(cur, f"INSERT INTO {TABLE_NAME} ({cols}) VALUES %s", data_tuples)
+        for table in (TABLES["train"], TABLES["test"]):
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {table} (time TIMESTAMPTZ DEFAULT NOW(), unit_nr INTEGER, {cycle_columns});")
+            # Tabelas criadas pelo importador antigo não têm a coluna subset.
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS subset SMALLINT;")
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TABLES['RUL']} (
+                subset SMALLINT NOT NULL, unit_nr INTEGER NOT NULL, RUL REAL, PRIMARY KEY (subset, unit_nr));
+            CREATE TABLE IF NOT EXISTS nasa_import_log (
+                member TEXT PRIMARY KEY, crc BIGINT NOT NULL, rows INTEGER NOT NULL,
+                seconds REAL, imported_at TIMESTAMPTZ DEFAULT NOW());
+        """)
+    conn.commit()
+
+@contextmanager
+def open_data_zip(zip_path):
+    """O ZIP com os arquivos do C-MAPSS: o CMAPSSData.zip dentro de `zip_path` (lido como stream) ou o próprio `zip_path`."""
+    with zipfile.ZipFile(zip_path) as outer:
+        inner_name = next((name for name in outer.namelist() if name.endswith(INNER_ZIP_SUFFIX)), None)
+        if inner_name is None:
+            yield outer
+            return
+        with outer.open(inner_name) as inner_file:
+            inner_file.MAX_SEEK_READ = ZIP_SEEK_READ_BYTES
+            with zipfile.ZipFile(inner_file) as inner:
+                yield inner
+
+@contextmanager
+def open_member(zip_path, member):
+    with open_data_zip(zip_path) as data_zip, data_zip.open(member) as raw:
+        yield io.TextIOWrapper(raw, encoding="ascii")
+
+def list_members(zip_path, subsets=SUBSETS, splits=SPLITS):
+    """[(membro, split, subset, crc, tamanho)] dos arquivos pedidos, do maior para o menor."""
+    wanted = {f"{split}_{subset}.txt": (split, subset) for split in splits for subset in subsets}
+    members = []
+    with open_data_zip(zip_path) as data_zip:
+        for info in data_zip.infolist():
+            base = os.path.basename(info.filename)
+            if base in wanted:
+                members.append((info.filename, *wanted.pop(base), info.CRC, info.file_size))
+    for base in sorted(wanted):
+        print(f"IMPORTER: Aviso: '{base}' não encontrado no ZIP.")
+    return sorted(members, key=lambda m: -m[4])
+
+def unit_rows(lines):
+    """Agrupa as linhas (separadas em campos) por unidade; os arquivos vêm ordenados por unidade e ciclo."""
+    unit, rows, seen = None, [], set()
+    for number, line in enumerate(lines, 1):
+        fields = line.split()
+        if not fields:
+            continue
+        if len(fields) != len(RAW_COLUMNS):
+            raise ValueError(f"linha {number}: {len(fields)} campos, esperado {len(RAW_COLUMNS)}")
+        if fields[0] != unit:
+            if rows:
+                yield unit, rows
+            if fields[0] in seen:
+                raise ValueError(f"linha {number}: unidade {fields[0]} fora de ordem")
+            seen.add(fields[0])
+            unit, rows = fields[0], []
+        rows.append(fields)
+    if rows:
+        yield unit, rows
+
+def read_rul(zip_path, member):
+    """RUL_FDxxx.txt: a RUL no último ciclo de cada unidade de teste, na ordem das unidades (1, 2, ...)."""
+    with open_member(zip_path, member) as f:
+        return [int(float(line)) for line in f if line.strip()]
+
+def copy_buffer(cur, table, columns, buffer):
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    buffer.seek(0)
+    buffer.truncate()
+
+def write_rows(cur, zip_path, member, split, subset_nr):
+    """Lê o arquivo em stream e o grava com COPY em blocos de até COPY_BUFFER_BYTES; devolve o número de linhas."""
+    table, buffer, count = TABLES[split], io.StringIO(), 0
+    if split == "RUL":
+        for unit_nr, rul in enumerate(read_rul(zip_path, member), 1):
+            buffer.write(f"{subset_nr},{unit_nr},{rul}\n")
+            count += 1
+        copy_buffer(cur, table, ["subset", "unit_nr", "RUL"], buffer)
+        return count
+
+    final_rul = None
+    if split == "test":
+        subset = SUBSETS[subset_nr - 1]
+        final_rul = read_rul(zip_path, posixpath.join(posixpath.dirname(member), f"RUL_{subset}.txt"))
+    with open_member(zip_path, member) as f:
+        for unit, rows in unit_rows(f):
+            offset = final_rul[int(unit) - 1] if final_rul is not None else 0
+            last_cycle = max(int(fields[1]) for fields in rows)
+            for fields in rows:
+                buffer.write(f"{subset_nr},{','.join(fields)},{offset + last_cycle - int(fields[1])}\n")
+            count += len(rows)
+            if buffer.tell() >= COPY_BUFFER_BYTES:
+                copy_buffer(cur, table, CYCLE_COLUMNS, buffer)
+    copy_buffer(cur, table, CYCLE_COLUMNS, buffer)
+    return count
+
+def import_member(zip_path, member, split, subset, crc, force=False):
+    """Importa um arquivo em uma transação (executado nos processos de trabalho)."""
+    start = time.perf_counter()
+    name = os.path.basename(member)
+    subset_nr = SUBSETS.index(subset) + 1
+    conn = get_db_connection()
+    if not conn:
+        return {"member": name, "error": "sem conexão com o banco"}
+    try:
+        with conn.cursor() as cur:
+            # Serializa importações concorrentes do mesmo arquivo (ex.: dois importadores rodando).
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (name,))
+            cur.execute("SELECT crc, rows FROM nasa_import_log WHERE member = %s;", (name,))
+            logged = cur.fetchone()
+            if logged and logged[0] == crc and not force:
+                conn.rollback()
+                return {"member": name, "skipped": True, "rows": logged[1]}
+            # Linhas sem subset foram gravadas pelo importador antigo, que só importava train_FD001.
+            legacy = " OR subset IS NULL" if split == "train" and subset_nr == 1 else ""
+            cur.execute(f"DELETE FROM {TABLES[split]} WHERE subset = %s{legacy};", (subset_nr,))
+            rows = write_rows(cur, zip_path, member, split, subset_nr)
+            seconds = time.perf_counter() - start
+            cur.execute("""
+                INSERT INTO nasa_import_log (member, crc, rows, seconds) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (member) DO UPDATE SET crc = EXCLUDED.crc, rows = EXCLUDED.rows,
+                    seconds = EXCLUDED.seconds, imported_at = NOW();
+            """, (name, crc, rows, seconds))
         conn.commit()
-    print("IMPORTER: Inserção de dados concluída com sucesso!")
+        return {"member": name, "rows": rows, "seconds": round(seconds, 2)}
+    except Exception as e:
+        conn.rollback()
+        return {"member": name, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        conn.close()
+
+def peak_rss_mb():
+    """Pico de memória residente deste processo e do maior processo de trabalho já encerrado (MB)."""
+    to_mb = 1 / 1024  # ru_maxrss é em KB no Linux.
+    return (round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * to_mb, 1),
+            round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * to_mb, 1))
+
+def run_import(zip_path=OUTER_ZIP_PATH, subsets=SUBSETS, splits=SPLITS, workers=IMPORTER_WORKERS, force=False):
+    start = time.perf_counter()
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Não foi possível conectar ao banco.")
+    try:
+        ensure_tables(conn)
+    finally:
+        conn.close()
 
+    print(f"IMPORTER: Lendo o índice de {zip_path}...")
+    members = list_members(zip_path, subsets, splits)
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(members) or 1))) as pool:
+        futures = [pool.submit(import_member, zip_path, member, split, subset, crc, force)
+                   for member, split, subset, crc, _ in members]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if "error" in result:
+                print(f"IMPORTER: ERRO em {result['member']}: {result['error']}")
+            elif result.get("skipped"):
+                print(f"IMPORTER: {result['member']} já importado ({result['rows']} linhas), pulando.")
+            else:
+                print(f"IMPORTER: {result['member']}: {result['rows']} linhas em {result['seconds']} s.")
+
+    main_rss, worker_rss = peak_rss_mb()
+    return {
+        "files": len(results),
+        "imported": sum(1 for r in results if "seconds" in r),
+        "skipped": sum(1 for r in results if r.get("skipped")),
+        "errors": sum(1 for r in results if "error" in r),
+        "rows": sum(r.get("rows", 0) for r in results if "seconds" in r),
+        "wall_seconds": round(time.perf_counter() - start, 2),
+        "peak_rss_mb": {"main": main_rss, "worker": worker_rss},
+    }
 
 if __name__ == "__main__":
-    connection = get_db_connection()
-    if connection:
-        try:
-            dataframe = process_data_from_nested_zip()
-            if dataframe is not None:
-                create_table_and_insert_data(connection, dataframe)
-        except Exception as e:
-            print(f"IMPORTER: Um erro ocorreu durante o processo: {e}")
-        finally:
-            connection.close()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zip", default=OUTER_ZIP_PATH)
+    parser.add_argument("--subsets", nargs="+", default=list(SUBSETS), choices=SUBSETS)
+    parser.add_argument("--splits", nargs="+", default=list(SPLITS), choices=SPLITS)
+    parser.add_argument("--workers", type=int, default=IMPORTER_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Reimporta arquivos já registrados no log.")
+    args = parser.parse_args()
+    try:
+        report = run_import(args.zip, args.subsets, args.splits, args.workers, args.force)
+    except Exception as e:
+        print(f"IMPORTER: Um erro ocorreu durante o processo: {e}")
+        raise SystemExit(1)
+    print(f"IMPORTER: {report['rows']} linhas de {report['imported']} arquivo(s) em {report['wall_seconds']} s "
+          f"({report['skipped']} pulado(s), {report['errors']} erro(s)); pico de memória: "
+          f"{report['peak_rss_mb']['main']} MB (principal), {report['peak_rss_mb']['worker']} MB (maior worker).")
+    if report["errors"]:
+        raise SystemExit(1)
@@ -1,4 +1,5 @@
 import boto3
+import json
 import time
 
 print("--- Iniciando configuração da infraestrutura no LocalStack (apenas SQS) ---")
@@ -6,6 +7,10 @@ print("--- Iniciando configuração da infraestrutura no LocalStack (apenas SQS)
 endpoint_url = 'http://host.docker.internal:4566'
 region_name = 'us-east-1'
 queue_name = 'sensor_data_queue'
+dlq_name = 'sensor_data_dlq'
+# Rede de segurança do SQS: o consumidor já manda para a tabela dead_letters as mensagens que
+# falham CONSUMER_MAX_RECEIVES vezes; esta fila só recebe as que nem chegam a um commit.
+dlq_max_receives = 10
 
 def wait_for_localstack():
     print("Aguardando LocalStack ficar pronto...")
@@ -27,6 +32,16 @@ def setup_sqs(sqs_client):
         print("Fila SQS criada com sucesso.")
     except Exception as e:
         print(f"Não foi possível criar a fila (ela pode já existir): {e}")
+    print(f"Criando fila de mensagens mortas: {dlq_name}...")
+    try:
+        dlq_url = sqs_client.create_queue(QueueName=dlq_name)['QueueUrl']
+        dlq_arn = sqs_client.get_queue_attributes(QueueUrl=dlq_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+        queue_url = sqs_client.get_queue_url(QueueName=queue_name)['QueueUrl']
+        redrive = json.dumps({'deadLetterTargetArn': dlq_arn, 'maxReceiveCount': str(dlq_max_receives)})
+        sqs_client.set_queue_attributes(QueueUrl=queue_url, Attributes={'RedrivePolicy': redrive})
+        print(f"Mensagens recebidas {dlq_max_receives} vezes sem exclusão vão para {dlq_name}.")
+    except Exception as e:
+        print(f"Não foi possível configurar a fila de mensagens mortas: {e}")
 
 if wait_for_localstack():
     sqs = boto3.client("sqs", endpoint_url=endpoint_url, region_name=region_name)
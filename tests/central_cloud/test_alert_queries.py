@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from cronos_ai.central_cloud.api.services.alert_queries import decode_cursor, encode_cursor, plan_alerts_query
+
+def test_cursor_round_trip():
+    row = {"time": datetime(2025, 8, 10, 12, 30, tzinfo=timezone.utc), "id": 4812}
+    assert decode_cursor(encode_cursor(row)) == (row["time"], 4812)
+    with pytest.raises(ValueError):
+        decode_cursor("sem-cursor")
+
+def test_plan_applies_filters_in_order_and_omits_payload():
+    start = datetime(2025, 8, 1, tzinfo=timezone.utc)
+    cursor = encode_cursor({"time": datetime(2025, 8, 10, tzinfo=timezone.utc), "id": 7})
+    sql, params = plan_alerts_query(device_id="bomba-01", status="pending", start_time=start, cursor=cursor, limit=50)
+    assert "full_payload" not in sql
+    assert "WHERE device_id = %s AND status = %s AND time >= %s AND (time, id) < (%s, %s)" in sql
+    assert sql.endswith("ORDER BY time DESC, id DESC LIMIT %s;")
+    assert params == ["bomba-01", "pending", start, datetime(2025, 8, 10, tzinfo=timezone.utc), 7, 50]
+
+def test_plan_without_filters_can_include_payload():
+    sql, params = plan_alerts_query(include_payload=True)
+    assert "WHERE" not in sql and "full_payload" in sql
+    assert params == [100]
@@ -0,0 +1,59 @@
+import asyncio
+import contextlib
+from datetime import datetime, timezone
+
+from cronos_ai.central_cloud.api.services import alert_stream
+from cronos_ai.central_cloud.api.services.alert_stream import AlertBroker, format_event
+
+def make_alert(alert_id):
+    return {
+        "id": alert_id, "time": datetime(2025, 8, 10, tzinfo=timezone.utc), "device_id": "bomba-01",
+        "alert_type": "HighTemperatureN2", "alert_value": 91.5, "status": "pending",
+    }
+
+def test_publish_skips_ids_already_seen_and_replays_after_last_id():
+    broker = AlertBroker(replay_size=3)
+    broker.publish([make_alert(1), make_alert(2)])
+    broker.publish([make_alert(2), make_alert(3), make_alert(4)])
+    assert broker.published == 4
+    assert [a["id"] for a in broker.replay_after(2)] == [3, 4]
+    # O id 1 saiu do buffer: o chamador precisa buscar no banco.
+    assert broker.replay_after(1) is None
+
+def test_slow_subscriber_drops_oldest_events():
+    loop = asyncio.new_event_loop()
+    try:
+        broker = AlertBroker(client_buffer=2)
+        subscriber = broker.subscribe(loop)
+        broker.publish([make_alert(i) for i in range(1, 6)])
+        assert subscriber.dropped == 3
+        assert [alert["id"] for _, alert in subscriber.queue] == [4, 5]
+        broker.unsubscribe(subscriber)
+        broker.publish([make_alert(6)])
+        assert len(subscriber.queue) == 2
+    finally:
+        loop.close()
+
+def test_only_alert_events_carry_an_id():
+    assert format_event("alert", make_alert(7)).startswith("event: alert\nid: 7\ndata: {")
+    assert "id:" not in format_event("status", {"id": 7, "status": "confirmed_true"}).split("\n")[1]
+
+class DisconnectedRequest:
+    async def is_disconnected(self):
+        return True
+
+def _stream(last_id):
+    async def collect():
+        return [chunk async for chunk in alert_stream.event_stream(DisconnectedRequest(), last_id)]
+    return asyncio.run(collect())
+
+def test_stream_resets_clients_it_cannot_catch_up(monkeypatch):
+    monkeypatch.setattr(alert_stream, "alert_broker", AlertBroker(replay_size=3))
+    alert_stream.alert_broker.publish([make_alert(i) for i in range(5, 8)])
+    assert _stream(None)[1] == alert_stream.RESET_EVENT
+    assert [chunk.split("\n")[1] for chunk in _stream(5)[1:]] == ["id: 6", "id: 7"]
+
+    # O id 1 saiu do replay e o banco tem mais alertas perdidos que o limite da busca.
+    monkeypatch.setattr(alert_stream, "fetch_alerts", lambda conn, after_id: [make_alert(2)] * alert_stream.ALERT_STREAM_REPLAY)
+    monkeypatch.setattr(alert_stream.database, "get_connection", contextlib.nullcontext)
+    assert _stream(1)[1:] == [alert_stream.RESET_EVENT]
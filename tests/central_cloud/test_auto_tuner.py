@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+
+from cronos_ai.central_cloud.api.endpoints import alerts as alerts_endpoint
+from cronos_ai.central_cloud.api.services import auto_tuner
+from cronos_ai.shared.data_models import AlertFeedback
+from cronos_ai.shared.database import DB_HOST, DB_NAME, DB_PASS, DB_USER
+
+# Precisa de um PostgreSQL (variáveis DB_*); as tabelas são temporárias da conexão.
+TEMP_TABLES = (
+    "CREATE TEMP TABLE alerts (id SERIAL PRIMARY KEY, time TIMESTAMPTZ NOT NULL, device_id VARCHAR(50) NOT NULL, alert_type VARCHAR(100), alert_value REAL, full_payload JSONB, status VARCHAR(20) DEFAULT 'pending', feedback_at TIMESTAMPTZ);",
+    "CREATE TEMP TABLE device_configs (device_id VARCHAR(50) PRIMARY KEY, temp_std_dev_multiplier REAL DEFAULT 3.0, last_updated TIMESTAMPTZ DEFAULT NOW(), channel_multipliers JSONB NOT NULL DEFAULT '{}');",
+    "CREATE TEMP TABLE auto_tuner_state (name VARCHAR(50) PRIMARY KEY, watermark TIMESTAMPTZ NOT NULL, last_run TIMESTAMPTZ, devices_tuned INTEGER);",
+)
+
+@pytest.fixture
+def conn(monkeypatch):
+    try:
+        conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASS, connect_timeout=2)
+    except psycopg2.OperationalError:
+        pytest.skip("PostgreSQL indisponível")
+    with conn.cursor() as cur:
+        for ddl in TEMP_TABLES:
+            cur.execute(ddl)
+    conn.commit()
+
+    @contextmanager
+    def get_connection():
+        yield conn
+
+    monkeypatch.setattr(alerts_endpoint, "get_connection", get_connection)
+    monkeypatch.setattr(auto_tuner, "AUTO_TUNER_SETTLE_SECONDS", 0.0)
+    yield conn
+    conn.close()
+
+def _multiplier(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT temp_std_dev_multiplier FROM device_configs WHERE device_id = 'bomba-01';")
+        row = cur.fetchone()
+    conn.rollback()
+    return row and row[0]
+
+def test_repeated_feedback_does_not_tune_again(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO alerts (time, device_id, alert_type, alert_value)
+            SELECT NOW(), 'bomba-01', 'HighTemperatureN2', 90 FROM generate_series(1, %s) RETURNING id;
+        """, (auto_tuner.AUTO_TUNER_MIN_FALSE_POSITIVES + 1,))
+        ids = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    false_positive = AlertFeedback(status="confirmed_false")
+
+    # Abaixo do mínimo, o canal não é ajustado.
+    for alert_id in ids[:-1]:
+        alerts_endpoint.provide_alert_feedback(alert_id, false_positive)
+    auto_tuner.tune_once(conn, bus=None, channel="cronos_test_configs")
+    assert _multiplier(conn) is None
+
+    alerts_endpoint.provide_alert_feedback(ids[-1], false_positive)
+    auto_tuner.tune_once(conn, bus=None, channel="cronos_test_configs")
+    tuned = _multiplier(conn)
+    assert tuned > 3.0
+
+    # Repetir o mesmo feedback não o coloca de novo depois da marca d'água.
+    alerts_endpoint.provide_alert_feedback(ids[-1], false_positive)
+    assert auto_tuner.tune_once(conn, bus=None, channel="cronos_test_configs") == []
+    assert _multiplier(conn) == tuned
@@ -0,0 +1,46 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from cronos_ai.central_cloud.api.services.config_service import ConfigBus, ConfigCache, notify_payloads
+
+T0 = datetime(2025, 8, 10, tzinfo=timezone.utc)
+
+def make_config(device_id, multiplier, minutes=0):
+    return {"device_id": device_id, "temp_std_dev_multiplier": multiplier, "last_updated": T0 + timedelta(minutes=minutes)}
+
+def test_bus_drops_changes_older_than_the_last_seen():
+    bus, received = ConfigBus(), []
+    bus.subscribe(received.extend)
+    bus.publish([make_config("bomba-01", 3.3, minutes=5)])
+    # NOTIFY atrasado de uma alteração anterior não desfaz a mais nova.
+    assert bus.publish([make_config("bomba-01", 3.0, minutes=1), make_config("bomba-02", 4.0)]) == 1
+    assert [(c["device_id"], c["temp_std_dev_multiplier"]) for c in received] == [("bomba-01", 3.3), ("bomba-02", 4.0)]
+
+def test_cache_reads_through_once_and_follows_published_changes():
+    cache, loads = ConfigCache(), []
+
+    def load(device_id):
+        loads.append(device_id)
+        return None
+
+    assert cache.get("bomba-01", load) is None
+    assert cache.get("bomba-01", load) is None
+    assert loads == ["bomba-01"]
+    cache.apply([make_config("bomba-01", 3.3), make_config("bomba-99", 5.0)])
+    assert cache.get("bomba-01", load)["temp_std_dev_multiplier"] == 3.3
+    # Dispositivos nunca lidos não entram no cache pelas alterações.
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 1}
+
+def test_notify_payloads_stay_under_the_limit():
+    rows = [make_config(f"bomba-{i:05d}", 3.0 + i / 1000) for i in range(500)]
+    payloads = notify_payloads(rows, max_bytes=2000)
+    assert len(payloads) > 1 and all(len(p) <= 2000 for p in payloads)
+    decoded = [row for payload in payloads for row in json.loads(payload)]
+    assert [row["device_id"] for row in decoded] == [row["device_id"] for row in rows]
+
+def test_detector_applies_channel_multipliers_from_a_single_row():
+    from cronos_ai.central_cloud.api.services.sqs_consumer_service import N2_FIELDS, AnomalyDetectorN2
+    detector = AnomalyDetectorN2()
+    detector.apply_configs([{**make_config("bomba-01", 3.3), "channel_multipliers": {"rpm": 4.5, "desconhecido": 9.0}}])
+    multipliers = dict(zip(N2_FIELDS, detector.configs["bomba-01"]))
+    assert multipliers["temperature_c"] == 3.3 and multipliers["rpm"] == 4.5 and multipliers["current_a"] == 3.0
@@ -0,0 +1,55 @@
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+from cronos_ai.shared.database import DatabasePool
+
+class FakeInfo:
+    def __init__(self, status):
+        self.transaction_status = status
+
+class FakeConn:
+    def __init__(self, dead=False):
+        self.closed = 0
+        self.dead = dead
+        # Devolvida com uma transação aberta: o checkout precisa fazer rollback antes de emprestar.
+        self.info = FakeInfo(extensions.TRANSACTION_STATUS_INTRANS)
+
+    def rollback(self):
+        if self.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class FakeThreadedPool:
+    def __init__(self, conns):
+        self.idle = list(conns)
+        self.closed = []
+
+    def getconn(self):
+        return self.idle.pop(0)
+
+    def putconn(self, conn, close=False):
+        (self.closed if close else self.idle).append(conn)
+
+def test_checkout_discards_dead_connection_and_forgets_it():
+    dead, alive = FakeConn(dead=True), FakeConn()
+    db_pool = DatabasePool(minconn=1, maxconn=2, healthcheck_after=3600)
+    db_pool._pool = FakeThreadedPool([dead, alive])
+    db_pool._last_used.update({id(dead): 0.0, id(alive): time.monotonic()})
+
+    with db_pool.connection() as conn:
+        assert conn is alive
+
+    assert db_pool._pool.closed == [dead]
+    assert db_pool.stats()["discarded_unhealthy"] == 1
+    assert set(db_pool._last_used) == {id(alive)}
@@ -0,0 +1,144 @@
+import json
+from datetime import datetime, timezone
+
+import psycopg2
+import pytest
+
+from cronos_ai.central_cloud.api.services import sqs_consumer_service as service
+from cronos_ai.central_cloud.data_pipeline.incidents import AlertCoalescer
+from cronos_ai.central_cloud.data_pipeline.ingestion import BatchWriter
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.shared.data_models import SensorData
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.connection = conn
+        self.values = []
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        sql = sql.decode() if isinstance(sql, bytes) else sql
+        self.conn.statements.append(sql)
+        values, self.values = self.values, []
+        # Um alert_value pequeno demais para REAL derruba o INSERT do incidente (e a conferência dele).
+        if "1e-50" in sql:
+            raise psycopg2.DataError("value out of range: underflow")
+        self.result = [(self.conn.next_id + i,) for i in range(len(values))]
+        self.conn.next_id += len(values)
+
+    def mogrify(self, template, args):
+        self.values.append(args)
+        return repr(tuple(args)).encode()
+
+    def fetchall(self):
+        return self.result
+
+    def copy_expert(self, sql, buf):
+        self.conn.copies += 1
+        if "bomba-ruim" in buf.getvalue():
+            raise psycopg2.DataError("value out of range")
+
+class FakeConn:
+    def __init__(self):
+        self.statements, self.copies, self.commits = [], 0, 0
+        self.encoding = "UTF8"
+        self.next_id = 1
+        self.fail_commit = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        if self.fail_commit:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+def _enqueue(writer, device_ids, receive_count, alerts=None, received_at=None):
+    simulator = ComprehensiveSensorSimulator()
+    for device_id in device_ids:
+        writer.add(SensorData(**{**simulator.generate_data(), "device_id": device_id}), received_at,
+                   (alerts or {}).get(device_id, ()))
+        writer.track_message({"MessageId": device_id, "ReceiptHandle": f"{device_id}-{receive_count}",
+                              "Attributes": {"ApproximateReceiveCount": str(receive_count)}})
+
+def test_flush_commits_the_good_messages_and_quarantines_the_rejected_one():
+    conn = FakeConn()
+    writer = BatchWriter(conn, max_receives=3)
+    _enqueue(writer, ["bomba-01", "bomba-02", "bomba-ruim", "bomba-03"], 1)
+    committed = writer.flush()
+    assert sorted(entry["Id"] for entry in committed) == ["bomba-01", "bomba-02", "bomba-03"]
+    assert conn.commits == 1 and list(writer.suspects) == ["bomba-ruim"]
+
+    # Na reentrega, a mensagem já rejeitada vai à parte e não derruba o COPY do lote.
+    conn.copies = 0
+    _enqueue(writer, ["bomba-04", "bomba-ruim", "bomba-05"], 2)
+    committed = writer.flush()
+    assert sorted(entry["Id"] for entry in committed) == ["bomba-04", "bomba-05"]
+    assert conn.copies == 3
+
+def test_coalescer_only_sees_the_written_messages():
+    conn = FakeConn()
+    writer = BatchWriter(conn, max_receives=3, coalescer=AlertCoalescer())
+    alerts = {device_id: [("HighVibration", 9.5, {"device_id": device_id})] for device_id in ("bomba-01", "bomba-02")}
+    alerts["bomba-minima"] = [("HighVibration", 1e-50, {"device_id": "bomba-minima"})]
+    _enqueue(writer, ["bomba-01", "bomba-minima", "bomba-02"], 1, alerts, datetime.now(timezone.utc))
+    committed = writer.flush()
+    assert sorted(entry["Id"] for entry in committed) == ["bomba-01", "bomba-02"]
+    assert list(writer.suspects) == ["bomba-minima"]
+    assert writer.coalescer.open_count("bomba-minima") == 0 and len(writer.coalescer) == 2
+    assert writer.coalescer.open["bomba-01"]["HighVibration"].occurrences == 1
+
+    # A reentrega da rejeitada não abre incidente e as aceitas não contam a ocorrência duas vezes.
+    _enqueue(writer, ["bomba-01", "bomba-minima"], 2, alerts, datetime.now(timezone.utc))
+    committed = writer.flush()
+    assert [entry["Id"] for entry in committed] == ["bomba-01"]
+    assert writer.coalescer.open_count("bomba-minima") == 0
+    assert writer.coalescer.open["bomba-01"]["HighVibration"].occurrences == 2
+    assert not writer.coalescer.opened and not writer.coalescer.changed
+
+def test_mixed_naive_and_aware_times_publish_after_commit():
+    conn = FakeConn()
+    published = []
+    writer = BatchWriter(conn, on_readings=lambda rows, open_alerts: published.extend(rows))
+    reading = ComprehensiveSensorSimulator(device_id="bomba-01").generate_data()
+    # Sem fuso vale como UTC: as duas leituras ficam comparáveis e a mais nova é a publicada.
+    writer.add(SensorData(**reading, time="2024-01-01T00:00:05"), None)
+    writer.add(SensorData(**reading, time="2024-01-01T00:00:00+00:00"), None)
+    writer.flush()
+    assert conn.commits == 1
+    assert [row[0] for row in published] == [datetime(2024, 1, 1, 0, 0, 5, tzinfo=timezone.utc)]
+
+def test_failed_flush_rolls_back_the_n2_windows(monkeypatch):
+    detector = service.AnomalyDetectorN2(window_size=20)
+    monkeypatch.setattr(service, "anomaly_detector_n2", detector)
+    simulator = ComprehensiveSensorSimulator(device_id="bomba-01")
+    first = [{"MessageId": "m0", "ReceiptHandle": "m0", "Body": json.dumps(simulator.generate_data())}]
+    conn = FakeConn()
+    writer = BatchWriter(conn, detector=detector)
+    service.process_messages(first, writer)
+    writer.flush()
+    counts, sums = detector.stats.counts.copy(), detector.stats.sums.copy()
+
+    messages = [{"MessageId": f"m{i}", "ReceiptHandle": f"m{i}", "Body": json.dumps(simulator.generate_data())}
+                for i in range(1, 4)]
+    conn.fail_commit = True
+    service.process_messages(messages, writer)
+    with pytest.raises(psycopg2.OperationalError):
+        writer.flush()
+    # As mensagens voltam para a fila: as janelas não podem contar as leituras delas duas vezes.
+    assert (detector.stats.counts == counts).all() and (detector.stats.sums == sums).all()
+
+    conn.fail_commit = False
+    service.process_messages(messages, writer)
+    writer.flush()
+    assert detector.stats.counts[detector.stats.index["bomba-01"]] == 4
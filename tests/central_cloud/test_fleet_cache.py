@@ -0,0 +1,36 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from cronos_ai.central_cloud.api.services.fleet_cache import FLEET_COLUMNS, LastValueCache
+
+T0 = datetime(2025, 8, 10, tzinfo=timezone.utc)
+
+def reading(device_id, minutes, health=0.9):
+    return (T0 + timedelta(minutes=minutes), device_id, health) + (0,) * (len(FLEET_COLUMNS) - 4)
+
+def test_consumer_updates_win_over_an_older_restart_load():
+    cache, fetches = LastValueCache(), []
+
+    def fetch():
+        fetches.append(1)
+        return [reading("bomba-01", 1, 0.5) + (4,), reading("bomba-02", 3, 0.7) + (1,)]
+
+    cache.update([reading("bomba-01", 5, 0.8), reading("bomba-01", 2, 0.1)], {"bomba-01": 0})
+    source, rows = cache.rows(fetch)
+    assert source == "database"
+    # bomba-01: leitura e incidentes do consumidor; bomba-02 só existe no banco.
+    assert sorted((r[1], r[2], r[-1]) for r in rows) == [("bomba-01", 0.8, 0), ("bomba-02", 0.7, 1)]
+    cache.update([reading("bomba-02", 4, 0.6)], {"bomba-02": 2})
+    source, rows = cache.rows(fetch)
+    assert source == "memory" and len(fetches) == 1
+    assert sorted((r[1], r[2], r[-1]) for r in rows) == [("bomba-01", 0.8, 0), ("bomba-02", 0.6, 2)]
+    # O JSON pronto acompanha as alterações (bomba-02 foi codificada de novo).
+    body = json.loads(cache.body(fetch)[1])
+    assert sorted((d["device_id"], d["health_factor"], d["open_alerts"]) for d in body) == [("bomba-01", 0.8, 0), ("bomba-02", 0.6, 2)]
+
+def test_without_a_consumer_the_cache_reloads_when_stale():
+    cache = LastValueCache(refresh_seconds=0)
+    assert cache.rows(lambda: [reading("bomba-01", 1) + (2,)])[0] == "database"
+    source, rows = cache.rows(lambda: [reading("bomba-03", 2) + (0,)])
+    # A carga substitui tudo: dispositivos fora da janela de consulta saem da visão.
+    assert source == "database" and [r[1] for r in rows] == ["bomba-03"]
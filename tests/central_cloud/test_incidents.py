@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from cronos_ai.central_cloud.data_pipeline.incidents import AlertCoalescer
+
+START = datetime(2025, 8, 10, 12, tzinfo=timezone.utc)
+
+def at(seconds):
+    return START + timedelta(seconds=seconds)
+
+def test_repeated_firings_update_one_incident_until_quiet():
+    coalescer = AlertCoalescer(quiet_seconds=60)
+    coalescer.observe("bomba-01", at(0), [("HighTemperature", 96.0, {"temperature_c": 96.0})])
+    coalescer.observe("bomba-01", at(5), [("HighTemperature", 99.0, {"temperature_c": 99.0}), ("LowHealthFactorN2", 0.4, "d")])
+    inserts, updates = coalescer.pending()
+    # Disparos no mesmo lote saem no INSERT com o estado final; nada para atualizar ainda.
+    assert updates == []
+    assert [(r[2], r[3], r[5], r[6], r[7]) for r in inserts] == [
+        ("HighTemperature", 96.0, at(5), 2, 99.0), ("LowHealthFactorN2", 0.4, at(5), 1, 0.4)]
+    coalescer.committed([10, 11])
+
+    coalescer.observe("bomba-01", at(30), [("HighTemperature", 97.0, {"temperature_c": 97.0}), ("LowHealthFactorN2", 0.3, "d")])
+    coalescer.observe("bomba-01", at(40), [("LowHealthFactorN2", 0.35, "d")])
+    inserts, updates = coalescer.pending()
+    assert inserts == []
+    assert sorted(r[:5] for r in updates) == [(10, at(30), 3, 99.0, None), (11, at(40), 3, 0.3, None)]
+    coalescer.committed([])
+
+    # Leitura depois do silêncio: fecha os dois; o alerta que volta abre um incidente novo.
+    coalescer.observe("bomba-01", at(200), [("HighTemperature", 95.5, {"temperature_c": 95.5})])
+    inserts, updates = coalescer.pending()
+    assert {r[0]: r[4] for r in updates} == {10: at(200), 11: at(200)}
+    assert dict((r[0], r[5]) for r in updates)[10] == '{"temperature_c": 97.0}'
+    assert [(r[0], r[6]) for r in inserts] == [(at(200), 1)]
+    assert coalescer.stats == {"firings": 7, "opened": 3, "updated": 4, "closed": 2}
+
+def test_rollback_restores_the_last_committed_state():
+    coalescer = AlertCoalescer(quiet_seconds=60)
+    coalescer.observe("bomba-02", at(0), [("HighVibration", 5.0, {})])
+    coalescer.committed([7])
+    coalescer.observe("bomba-02", at(10), [("HighVibration", 6.0, {})])
+    coalescer.observe("bomba-02", at(100), [("HighCurrent", 29.0, {})])
+    coalescer.rollback()
+    assert coalescer.pending() == ([], [])
+    # Reentrega do lote: o incidente 7 volta a receber o disparo e fecha de novo, uma única vez.
+    coalescer.observe("bomba-02", at(10), [("HighVibration", 6.0, {})])
+    _, updates = coalescer.pending()
+    assert [r[:5] for r in updates] == [(7, at(10), 2, 6.0, None)]
+    assert len(coalescer) == 1
@@ -0,0 +1,48 @@
+import json
+
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import process_messages
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.shared import metrics
+
+class RecordingWriter:
+    def __init__(self):
+        self.added, self.tracked, self.dead = [], [], []
+
+    def add(self, sd, received_at, alerts=()):
+        self.added.append((sd.device_id, alerts))
+
+    def track_message(self, message):
+        self.tracked.append(message["MessageId"])
+
+    def add_predictions(self, predicted_at, predictions, model_version):
+        pass
+
+    def dead_letter(self, message, reason):
+        self.dead.append(message["MessageId"])
+
+def _sample(collector, suffix, **labels):
+    for family in collector.collect():
+        for sample in family.samples:
+            if sample.name.endswith(suffix) and all(sample.labels.get(k) == v for k, v in labels.items()):
+                return sample.value
+    return 0.0
+
+def test_process_messages_counts_results_alerts_and_stages():
+    reading = ComprehensiveSensorSimulator(device_id="bomba-metrics").generate_data()
+    reading["alerts"] = [{"type": "HighTemperature", "value": reading["temperature_c"]}]
+    messages = [{"MessageId": "ok", "Body": json.dumps(reading)}, {"MessageId": "bad", "Body": "{não é json"}]
+    before = {
+        "accepted": _sample(metrics.CONSUMER_MESSAGES, "_total", result="accepted"),
+        "invalid": _sample(metrics.CONSUMER_MESSAGES, "_total", result="invalid"),
+        "n1": _sample(metrics.CONSUMER_ALERTS, "_total", level="n1"),
+        "decode": _sample(metrics.CONSUMER_STAGE_SECONDS, "_count", stage="decode"),
+    }
+    writer = RecordingWriter()
+    process_messages(messages, writer)
+
+    assert writer.tracked == ["ok"] and writer.dead == ["bad"]
+    assert _sample(metrics.CONSUMER_MESSAGES, "_total", result="accepted") == before["accepted"] + 1
+    assert _sample(metrics.CONSUMER_MESSAGES, "_total", result="invalid") == before["invalid"] + 1
+    assert _sample(metrics.CONSUMER_ALERTS, "_total", level="n1") == before["n1"] + 1
+    # Um estágio observado por lote, não por mensagem.
+    assert _sample(metrics.CONSUMER_STAGE_SECONDS, "_count", stage="decode") == before["decode"] + 1
@@ -0,0 +1,48 @@
+import time
+
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import AnomalyDetectorN2, N2_FIELDS
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.shared.data_models import SensorData
+
+WINDOW = 100
+
+def _normal_readings(n, device_id="bomba-01"):
+    simulator = ComprehensiveSensorSimulator(device_id=device_id)
+    simulator._trigger_anomaly = lambda: None
+    return [SensorData(**simulator.generate_data()) for _ in range(n)]
+
+def _readings_until_first_alert(detector, spike, limit=WINDOW):
+    for i in range(1, limit + 1):
+        if any(a["type"] == "HighTemperatureN2" for a in detector.check(spike)):
+            return i
+    return None
+
+def test_restart_to_first_alert_with_snapshot(tmp_path):
+    history = _normal_readings(WINDOW)
+    spike = history[-1].model_copy(update={"temperature_c": history[-1].temperature_c + 50})
+
+    before_restart = AnomalyDetectorN2(window_size=WINDOW)
+    for sd in history:
+        before_restart.check(sd)
+    path = tmp_path / "n2_state.npz"
+    assert before_restart.snapshot(str(path)) == 1
+
+    cold = AnomalyDetectorN2(window_size=WINDOW)
+    assert _readings_until_first_alert(cold, spike) is None
+
+    restarted = AnomalyDetectorN2(window_size=WINDOW)
+    start = time.perf_counter()
+    assert restarted.restore([str(path)]) == 1
+    assert _readings_until_first_alert(restarted, spike) == 1
+    assert time.perf_counter() - start < 1.0
+
+def test_rebuild_from_rows_warms_every_device():
+    rows = []
+    for device_id in ("a", "b"):
+        rows += [(device_id, *(getattr(sd, f) for f in N2_FIELDS)) for sd in _normal_readings(WINDOW, device_id)]
+    detector = AnomalyDetectorN2(window_size=WINDOW)
+    assert detector.load_rows(rows, keep=lambda device_id: device_id == "a") == 1
+
+    spike = SensorData(**dict(zip(("device_id",) + N2_FIELDS, rows[WINDOW - 1])))
+    spike = spike.model_copy(update={"temperature_c": spike.temperature_c + 50})
+    assert _readings_until_first_alert(detector, spike) == 1
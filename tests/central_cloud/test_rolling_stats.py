@@ -0,0 +1,75 @@
+import numpy as np
+
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import AnomalyDetectorN2, N2_FIELDS
+from cronos_ai.central_cloud.ml_engine.rolling_stats import RollingWindowStats, occurrence_rank
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator, FleetSimulator
+from cronos_ai.shared.data_models import SensorData
+
+def test_rolling_stats_match_numpy_window():
+    rng = np.random.default_rng(0)
+    stats = RollingWindowStats(("a", "b"), window_size=7, initial_capacity=1)
+    history = {d: [] for d in ("x", "y", "z")}
+    for _ in range(40):
+        for device in history:
+            value = rng.normal(50, 5, size=2)
+            stats.push(stats.rows_for([device]), value[None, :])
+            history[device].append(value.astype(np.float32))
+    for device, values in history.items():
+        window = np.array(values[-7:], dtype=np.float64)
+        mean, std_dev, counts = stats.stats(stats.rows_for([device]))
+        np.testing.assert_allclose(mean[0], window.mean(axis=0), rtol=1e-9)
+        np.testing.assert_allclose(std_dev[0], window.std(axis=0), rtol=1e-6)
+        assert counts[0] == 7
+    assert stats.memory_report()["devices"] == 3
+
+def test_occurrence_rank():
+    assert occurrence_rank(["a", "b", "a", "a", "b"]).tolist() == [0, 0, 1, 2, 1]
+
+def test_check_many_matches_sequential_checks():
+    simulators = [ComprehensiveSensorSimulator(device_id=f"dev-{i}") for i in range(3)]
+    readings = [SensorData(**simulators[i % 3].generate_data()) for i in range(600)]
+    readings[-1] = readings[-1].model_copy(update={"temperature_c": 500.0})
+
+    sequential = AnomalyDetectorN2(window_size=50)
+    expected = [sequential.check(sd) for sd in readings]
+    batched = AnomalyDetectorN2(window_size=50)
+    got = []
+    for i in range(0, len(readings), 64):
+        got += batched.check_many(readings[i:i + 64])
+
+    assert [[a["type"] for a in alerts] for alerts in got] == [[a["type"] for a in alerts] for alerts in expected]
+    assert "HighTemperatureN2" in [a["type"] for a in got[-1]]
+    assert len(N2_FIELDS) == 10
+
+def test_constant_signal_raises_no_n2_alert():
+    reading = SensorData(**ComprehensiveSensorSimulator(device_id="bomba-constante").generate_data())
+    detector = AnomalyDetectorN2(window_size=20)
+    # A janela guarda float32: a leitura float64 não pode ficar "acima" da própria média arredondada.
+    assert [alert for _ in range(60) for alert in detector.check(reading)] == []
+
+def test_n2_false_alert_rate_on_normal_fleet():
+    # Frota sem anomalias: só o ruído do simulador, que não deve inundar `alerts`.
+    simulator = FleetSimulator(50, seed=1, anomaly_probability=0.0)
+    detector = AnomalyDetectorN2()
+    readings = alerts = 0
+    types = set()
+    for _ in range(400):
+        batch = [SensorData(**record) for record in simulator.records(simulator.step())]
+        for found in detector.check_many(batch):
+            alerts += len(found)
+            types.update(alert["type"] for alert in found)
+        readings += len(batch)
+    assert alerts / readings < 0.005
+    assert types <= {"HighTemperatureN2", "LowTemperatureN2"}
+
+def test_channel_multiplier_opts_a_device_into_channel_alerts():
+    detector = AnomalyDetectorN2(window_size=20)
+    detector.apply_configs([{"device_id": "bomba-acustica", "temp_std_dev_multiplier": 3.0,
+                             "channel_multipliers": {"acoustic_db": 3.0}}])
+    found = {}
+    for device_id in ("bomba-acustica", "bomba-padrao"):
+        reading = SensorData(**ComprehensiveSensorSimulator(device_id=device_id).generate_data())
+        for _ in range(30):
+            detector.check(reading)
+        found[device_id] = [a["type"] for a in detector.check(reading.model_copy(update={"acoustic_db": 500.0}))]
+    assert found == {"bomba-acustica": ["HighAcousticNoiseN2"], "bomba-padrao": []}
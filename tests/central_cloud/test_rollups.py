@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from cronos_ai.central_cloud.data_pipeline.rollups import choose_rollup, parse_interval, plan_summary_query
+
+def test_parse_interval():
+    assert parse_interval("15 minutes") == timedelta(minutes=15)
+    assert parse_interval("2 hours 30 minutes") == timedelta(hours=2, minutes=30)
+    assert parse_interval("1 month") is None
+
+def test_choose_coarsest_rollup_that_divides_interval():
+    assert choose_rollup("1 week") == "sensor_data_1d"
+    assert choose_rollup("6 hours") == "sensor_data_1h"
+    assert choose_rollup("90 minutes") == "sensor_data_1m"
+    assert choose_rollup("30 seconds") is None
+
+def test_plan_falls_back_to_raw_data():
+    end = datetime(2025, 8, 10)
+    _, params, source = plan_summary_query("bomba-01", "30 seconds", end - timedelta(hours=1), end)
+    assert source == "sensor_data"
+    assert params[1] == "bomba-01"
+
+def test_plan_covers_unaligned_edges_with_finer_sources():
+    start, end = datetime(2025, 8, 1, 10, 20, 30), datetime(2025, 8, 3, 15, 45)
+    sql, params, source = plan_summary_query("bomba-01", "1 day", start, end)
+    assert source == "sensor_data_1d"
+    # O rollup diário só responde pelos dias inteiros; as horas, minutos e segundos das bordas vêm das fontes mais finas.
+    assert [view for view in ("sensor_data_1d", "sensor_data_1h", "sensor_data_1m") if f"FROM {view}," in sql] == \
+        ["sensor_data_1d", "sensor_data_1h", "sensor_data_1m"]
+    assert "FROM sensor_data, period" in sql and "bucket BETWEEN" not in sql
+    assert params[:2] == (start, end) and params[-1] == "1 day"
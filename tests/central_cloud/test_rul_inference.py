@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from cronos_ai.central_cloud.api.services.sqs_consumer_service import N2_FIELDS, AnomalyDetectorN2
+from cronos_ai.central_cloud.ml_engine.rul_inference import RulModel, RulScorer
+from cronos_ai.shared.data_models import SensorData
+
+def feed(detector, device_id, n, start=0):
+    readings = [SensorData(device_id=device_id, **{field: float(start + i + k) for k, field in enumerate(N2_FIELDS)})
+                for i in range(n)]
+    detector.check_many(readings)
+
+def test_window_features_match_the_window_and_model_round_trips(tmp_path):
+    detector = AnomalyDetectorN2(window_size=10)
+    feed(detector, "bomba-01", 25)
+    devices, features = detector.window_features(["bomba-01", "bomba-99"], min_count=5)
+    window = detector.stats.window_of("bomba-01").astype(np.float64)
+    assert devices == ["bomba-01"]
+    np.testing.assert_allclose(features[0], np.concatenate((window.mean(axis=0), window.std(axis=0), window[-1])), rtol=1e-6)
+
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=(200, 4))
+    model = RulModel.fit(x, x @ [2.0, -1.0, 0.5, 0.0] + 10, ["a", "b", "c", "d"], version="v-test")
+    model.save(str(tmp_path / "rul.npz"))
+    loaded = RulModel.load(str(tmp_path / "rul.npz"))
+    assert loaded.version == "v-test"
+    np.testing.assert_allclose(loaded.predict(x), model.predict(x))
+    np.testing.assert_allclose(model.predict(x), np.clip(x @ [2.0, -1.0, 0.5, 0.0] + 10, 0, None), atol=0.05)
+
+def test_scorer_skips_cold_windows_and_throttles_per_device():
+    detector = AnomalyDetectorN2(window_size=10)
+    # Modelo que devolve a média da temperatura, para conferir a coluna escolhida.
+    model = RulModel(["temperature_c_mean"], [1.0], 0.0)
+    scorer = RulScorer(model, detector.window_features, N2_FIELDS, interval=60, min_window=5)
+    feed(detector, "bomba-01", 10)
+    feed(detector, "bomba-02", 3)
+    [(device_id, rul)] = scorer.score(["bomba-01", "bomba-02", "bomba-01"], now=0)
+    temperature = detector.stats.window_of("bomba-01")[:, N2_FIELDS.index("temperature_c")]
+    assert device_id == "bomba-01" and rul == pytest.approx(temperature.mean())
+    assert scorer.score(["bomba-01"], now=30) == []
+    assert [d for d, _ in scorer.score(["bomba-01"], now=61)] == ["bomba-01"]
+    with pytest.raises(ValueError):
+        RulScorer(RulModel(["unknown_mean"], [1.0], 0.0), detector.window_features, N2_FIELDS)
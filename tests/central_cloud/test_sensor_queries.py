@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cronos_ai.central_cloud.api.services.sensor_queries import next_sensor_cursor, plan_sensor_page_query
+from cronos_ai.shared.serialization import decode_page_cursor
+
+def _page(rows, before, limit):
+    # Aplica o plano sobre uma lista já na ordem do ORDER BY (time DESC, canais).
+    sql, params = plan_sensor_page_query("bomba-01", before=before, limit=limit)
+    skip, limit = params[-2:]
+    if before:
+        rows = [row for row in rows if row[0] <= params[1]]
+    return rows[skip:skip + limit]
+
+def test_pagination_does_not_skip_readings_sharing_a_timestamp():
+    t0 = datetime(2025, 8, 10, 12, tzinfo=timezone(timedelta(hours=-3)))
+    # Sete leituras no mesmo instante atravessam três páginas de 3.
+    rows = [(t0, i) for i in range(7)] + [(t0 - timedelta(seconds=s), 0) for s in (1, 2, 3)]
+    seen, before = [], None
+    while True:
+        page = _page(rows, before, 3)
+        seen.extend(page)
+        if len(page) < 3:
+            break
+        before = next_sensor_cursor([row[0] for row in page], before)
+        assert "+" not in before and decode_page_cursor(before)[0] == page[-1][0]
+    assert seen == rows
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        plan_sensor_page_query("bomba-01", before="2025-08-10T12:00:00+00:00")
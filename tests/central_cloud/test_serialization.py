@@ -0,0 +1,52 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.shared import serialization
+from cronos_ai.shared.serialization import rows_response, validate_batch
+
+def test_validate_batch_drops_only_messages_with_invalid_readings():
+    simulator = ComprehensiveSensorSimulator(device_id="bomba-serial")
+    good = [simulator.generate_data() for _ in range(3)]
+    bad = {**simulator.generate_data(), "rpm": "rápido"}
+    models, errors = validate_batch([good[:2], [good[2], bad], []])
+    assert [sd.rpm for sd in models[0]] == [good[0]["rpm"], good[1]["rpm"]]
+    assert models[1] is None and models[2] == []
+    assert list(errors) == [1] and errors[1].startswith("rpm:")
+
+def test_validate_batch_rejects_values_the_database_columns_cannot_hold():
+    reading = ComprehensiveSensorSimulator(device_id="bomba-serial").generate_data()
+    groups = [
+        [{**reading, "device_id": "b" * 51}],
+        [{**reading, "device_id": "bomba\x00"}],
+        [{**reading, "rpm": 2**31}],
+        [{**reading, "temperature_c": 1e39}],
+        [{**reading, "alerts": [{"type": "x" * 101}]}],
+        [{**reading, "alerts": [{"type": "temp_alta", "value": 80.5}]}],
+    ]
+    models, errors = validate_batch(groups)
+    assert sorted(errors) == [0, 1, 2, 3, 4]
+    assert models[5][0].alerts[0].type == "temp_alta"
+
+def _body(response):
+    if hasattr(response, "body_iterator"):
+        async def collect():
+            return b"".join([chunk async for chunk in response.body_iterator])
+        return asyncio.run(collect())
+    return response.body
+
+def test_rows_response_matches_plain_and_streamed_bodies(monkeypatch):
+    columns = ["time", "device_id", "rul_hours", "features"]
+    rows = [(datetime(2025, 8, 10, 12, i, tzinfo=timezone.utc), f"bomba-{i}", Decimal("1.5") * i, {"rms": 0.5})
+            for i in range(5)]
+    plain = rows_response(columns, rows, {"X-Next-Cursor": "c"})
+    assert plain.headers["X-Next-Cursor"] == "c"
+    monkeypatch.setattr(serialization, "ROWS_STREAM_THRESHOLD", 2)
+    monkeypatch.setattr(serialization, "ROWS_CHUNK", 2)
+    streamed = rows_response(columns, rows)
+    assert _body(streamed) == _body(plain)
+    decoded = json.loads(_body(plain))
+    # UTC com "Z", como o response_model do FastAPI serializava.
+    assert decoded[1] == {"time": "2025-08-10T12:01:00Z", "device_id": "bomba-1", "rul_hours": 1.5, "features": {"rms": 0.5}}
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from cronos_ai.edge.features import SignalReducer, block_features
+from cronos_ai.shared.data_models import SENSOR_CHANNELS, SensorSummary, summary_feature_names
+from cronos_ai.shared.uplink_codec import decode_message, encode_readings
+
+START = datetime(2025, 8, 10, 12, tzinfo=timezone.utc)
+
+def reading(i, **overrides):
+    base = {channel: 10.0 for channel in SENSOR_CHANNELS}
+    return {**base, "device_id": "bomba-01", "time": START + timedelta(seconds=5 * i), **overrides}
+
+def test_block_features_trend_crest_and_band_energy():
+    n = 64
+    seconds = np.arange(n) * 5.0
+    values = np.full((n, len(SENSOR_CHANNELS)), 3.0)
+    values[:, SENSOR_CHANNELS.index("temperature_c")] = 70 + seconds / 3600 * 2.0
+    axial = SENSOR_CHANNELS.index("vibration_axial_mms")
+    # Senoide no último quarto do espectro: energia toda na última faixa, somando a variância.
+    values[:, axial] = 1.0 + 0.5 * np.sin(2 * np.pi * 28 * np.arange(n) / n)
+    features = block_features(values, seconds)
+    assert list(features) == summary_feature_names(4)
+    assert features["temperature_c_slope"] == pytest.approx(2.0, rel=1e-4)
+    assert features["vibration_radial_mms_crest"] == pytest.approx(1.0)
+    bands = [features[f"vibration_axial_mms_band{b}"] for b in range(4)]
+    assert sum(bands) == pytest.approx(values[:, axial].var(), rel=1e-4)
+    assert bands[3] == pytest.approx(sum(bands), rel=1e-4)
+
+def test_reducer_sends_alert_context_and_deadband_steps_and_summaries():
+    reducer = SignalReducer(block_size=10, context=2)
+    sent, summaries = [], []
+    for i in range(30):
+        overrides = {}
+        if i == 12:
+            overrides["alerts"] = [{"type": "HighTemperature", "value": 99.0}]
+        if i >= 20:
+            overrides["temperature_c"] = 14.0
+        raw, summary = reducer.add(reading(i, **overrides))
+        sent += [r["time"] for r in raw]
+        summaries += [summary] if summary else []
+    # Primeira leitura; alerta com 2 antes e 2 depois; degrau de temperatura só na primeira leitura nova.
+    expected = [0, 10, 11, 12, 13, 14, 20]
+    assert sent == [START + timedelta(seconds=5 * i) for i in expected]
+    assert [s["readings"] for s in summaries] == [10, 10, 10]
+    assert summaries[2]["features"]["temperature_c_mean"] == 14.0
+
+    [body] = encode_readings("bomba-01", [], summaries=summaries)
+    readings, decoded = decode_message(body)
+    assert readings == []
+    parsed = [SensorSummary(**s) for s in decoded]
+    assert [s.time for s in parsed] == [s["time"] for s in summaries]
+    assert parsed[0].features == summaries[0]["features"]
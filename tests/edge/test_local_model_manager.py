@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pytest
+
+from cronos_ai.central_cloud.ml_engine.rolling_stats import RollingWindowStats
+from cronos_ai.central_cloud.ml_engine.rul_inference import RulModel, feature_names, window_features
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.lcm.lcm_service import LcmService
+from cronos_ai.lcm.local_model_manager import LocalModelManager, current_version, export_rul_model, publish
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+
+def make_model(version, seed=0):
+    names = feature_names(SENSOR_CHANNELS)
+    rng = np.random.default_rng(seed)
+    return RulModel(names, rng.normal(size=len(names)), 5.0, rng.normal(size=len(names)),
+                    rng.uniform(0.5, 2.0, len(names)), version=version, max_rul=1e6)
+
+def test_exported_artifact_matches_the_cloud_model(tmp_path):
+    simulator = ComprehensiveSensorSimulator(device_id="bomba-lcm")
+    readings = [simulator.generate_data() for _ in range(30)]
+    stats = RollingWindowStats(SENSOR_CHANNELS, window_size=20, initial_capacity=1)
+    rows = stats.rows_for(["bomba-lcm"])
+    for r in readings:
+        stats.push(rows, [[r[channel] for channel in SENSOR_CHANNELS]])
+    model = make_model("v1")
+    expected = model.predict(window_features(stats, rows))[0]
+
+    for quantize, tolerance in ((False, 1e-3), (True, 0.02)):
+        model_dir = tmp_path / f"models-{quantize}"
+        # Regra que dispara sempre: o alerta marca a primeira leitura com a janela aquecida.
+        export_rul_model(model, str(model_dir), quantize=quantize, window_size=20, min_window=20,
+                         rules=[{"name": "Rul", "signal": "rul_hours", "below": 1e9}])
+        manager = LocalModelManager(str(model_dir))
+        assert manager.refresh() and not manager.refresh()
+        alerts = [manager.evaluate(r) for r in readings]
+        assert alerts[:19] == [[]] * 19
+        assert alerts[-1] == [] and alerts[19][0]["type"] == "Rul"
+        assert manager.active.predict(window_features(stats, rows))[0] == pytest.approx(expected, rel=tolerance)
+        assert manager.report()["weights_dtype"] == ("int8" if quantize else "float32")
+
+def test_service_syncs_and_swaps_versions_keeping_the_window(tmp_path):
+    source, local = tmp_path / "source", tmp_path / "local"
+    manager = LocalModelManager(str(local))
+    service = LcmService(manager, source=str(source))
+    assert not service.poll() and manager.active is None
+
+    export_rul_model(make_model("v1"), str(source), window_size=10, min_window=5)
+    assert service.poll() and manager.active.version == "v1"
+    simulator = ComprehensiveSensorSimulator(device_id="bomba-lcm")
+    for _ in range(5):
+        manager.evaluate(simulator.generate_data())
+
+    # Versão com pesos do tamanho errado: não é ativada e v1 continua.
+    broken = export_rul_model(make_model("v2"), str(source), window_size=10, min_window=5)
+    np.save(f"{broken}/weights.npy", np.zeros(3, dtype=np.float32))
+    assert not service.poll() and manager.active.version == "v1"
+    assert current_version(str(local)) == "v2"
+
+    export_rul_model(make_model("v3", seed=1), str(source), window_size=10, min_window=5)
+    assert service.poll() and manager.active.version == "v3"
+    manager.evaluate(simulator.generate_data())
+    assert manager.active.inferences == 1
+
+    publish(str(source), "v1")
+    assert service.poll() and manager.active.version == "v1"
+    with open(local / "v1" / "manifest.json", encoding="utf-8") as f:
+        assert json.load(f)["version"] == "v1"
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from cronos_ai.edge.rules import DEFAULT_RULES, RuleEngine
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+
+def reading(**overrides):
+    base = {"temperature_c": 70.0, "pressure_in_bar": 1.0, "pressure_out_bar": 6.0,
+            "vibration_radial_mms": 2.0, "current_a": 20.0, "acoustic_db": 70.0}
+    return {**base, **overrides}
+
+def types(results):
+    return [[alert["type"] for alert in alerts] for alerts in results]
+
+def test_derived_signal_fires_once_per_excursion():
+    engine = RuleEngine(DEFAULT_RULES)
+    readings = [reading(), reading(pressure_out_bar=3.5), reading(pressure_out_bar=4.2),
+                reading(pressure_out_bar=5.0), reading(pressure_out_bar=3.5)]
+    results = engine.evaluate(readings)
+    assert types(results) == [[], ["LowPressureDifferential"], [], [], ["LowPressureDifferential"]]
+    assert results[1][0]["value"] == pytest.approx(2.5)
+
+def test_hysteresis_and_debounce_carry_across_blocks():
+    rule = {"name": "Hot", "signal": "temperature_c", "above": 95, "clear": 90, "debounce": 3, "clear_debounce": 2}
+    # Dispara na 3ª leitura acima de 95; 92 e um 89 isolado não rearmam; dois 89 seguidos rearmam.
+    temps = [96, 97, 98, 99, 92, 96, 89, 96, 89, 89, 96, 97, 98]
+    for block_size in (1, 2, 5, len(temps)):
+        engine = RuleEngine([rule], fields=("temperature_c",))
+        fired = []
+        for n, start in enumerate(range(0, len(temps), block_size)):
+            block = temps[start:start + block_size]
+            # Alterna os dois caminhos: o estado é o mesmo.
+            if n % 2:
+                fired += [start + i for i, _ in engine.evaluate_columns({"temperature_c": np.array(block)})]
+            else:
+                fired += [start + i for i, alerts in enumerate(engine.evaluate([{"temperature_c": t} for t in block])) if alerts]
+        assert fired == [2, 12], block_size
+
+def test_single_reading_check_shares_state_with_columns():
+    engine = RuleEngine(DEFAULT_RULES)
+    hot = reading(temperature_c=96.0)
+    fired = engine.evaluate_columns({field: np.array([hot[field]]) for field in engine.fields})
+    assert [alert["type"] for _, alert in fired] == ["HighTemperature"]
+    # Já ativa pelo caminho vetorizado: a leitura seguinte não dispara de novo; só depois de rearmar.
+    assert types([engine.check(hot), engine.check(reading()), engine.check(hot)]) == [[], [], ["HighTemperature"]]
+
+def test_vectorized_block_matches_reading_by_reading():
+    simulator = ComprehensiveSensorSimulator(device_id="bomba-01")
+    readings = [simulator.generate_data() for _ in range(500)]
+    single, block = RuleEngine(DEFAULT_RULES), RuleEngine(DEFAULT_RULES)
+    one_by_one = [single.evaluate([r])[0] for r in readings]
+    assert any(one_by_one)
+    columns = {field: np.array([r[field] for r in readings]) for field in block.fields}
+    assert block.evaluate_columns(columns) == [(i, alert) for i, alerts in enumerate(one_by_one) for alert in alerts]
+
+@pytest.mark.parametrize("signal", ["__import__('os')", "temperature_c.real", "unknown_field * 2", "temperature_c > 3"])
+def test_unsafe_or_unknown_signals_are_rejected(signal):
+    with pytest.raises(ValueError):
+        RuleEngine([{"name": "Bad", "signal": signal, "above": 1}])
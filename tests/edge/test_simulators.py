@@ -0,0 +1,42 @@
+import random
+
+import numpy as np
+
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator, FleetSimulator
+from cronos_ai.shared.data_models import SENSOR_CHANNELS
+
+STEPS = 200
+DEVICES = 60
+
+def test_fleet_simulator_is_reproducible_with_seed():
+    a, b = FleetSimulator(50, seed=7), FleetSimulator(50, seed=7)
+    for _ in range(5):
+        step_a, step_b = a.step(), b.step()
+    for channel in SENSOR_CHANNELS:
+        np.testing.assert_array_equal(step_a[channel], step_b[channel])
+    assert a.records(step_a)[0].keys() == {"device_id", *SENSOR_CHANNELS}
+
+def test_fleet_matches_single_device_simulator_statistics(capsys):
+    np.random.seed(0)
+    random.seed(0)
+    scalar = {channel: [] for channel in SENSOR_CHANNELS}
+    for i in range(DEVICES):
+        simulator = ComprehensiveSensorSimulator(device_id=f"bomba-{i}")
+        for _ in range(STEPS):
+            for channel, value in simulator.generate_data().items():
+                if channel != "device_id":
+                    scalar[channel].append(value)
+    capsys.readouterr()
+
+    fleet = FleetSimulator(DEVICES, seed=0)
+    vectorized = {channel: [] for channel in SENSOR_CHANNELS}
+    for _ in range(STEPS):
+        for channel, values in fleet.step().items():
+            vectorized[channel].extend(values.tolist())
+
+    for channel in SENSOR_CHANNELS:
+        expected, got = np.array(scalar[channel]), np.array(vectorized[channel])
+        assert abs(got.mean() - expected.mean()) <= 0.02 * abs(expected.mean()) + 0.05, channel
+        assert abs(got.std() - expected.std()) <= 0.25 * expected.std() + 0.05, channel
+    anomaly_rate = sum(fleet.anomaly_counts.values()) / (DEVICES * STEPS)
+    assert 0.015 < anomaly_rate < 0.025
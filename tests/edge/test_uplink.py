@@ -0,0 +1,61 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from cronos_ai.edge.simulators import ComprehensiveSensorSimulator
+from cronos_ai.edge.uplink import SpillQueue, Uplink
+from cronos_ai.shared.data_models import SensorData
+from cronos_ai.shared.uplink_codec import decode_body, encode_readings
+
+def make_readings(n):
+    simulator = ComprehensiveSensorSimulator(device_id="bomba-01")
+    start = datetime(2025, 8, 10, 12, tzinfo=timezone.utc)
+    readings = []
+    for i in range(n):
+        reading = simulator.generate_data()
+        reading["time"] = start + timedelta(milliseconds=250 * i)
+        readings.append(reading)
+    readings[3]["alerts"] = [{"type": "HighTemperature", "value": 99.1}]
+    return readings
+
+class FlakySQS:
+    def __init__(self):
+        self.up = False
+        self.bodies = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        if not self.up:
+            raise ConnectionError("uplink fora do ar")
+        self.bodies += [entry["MessageBody"] for entry in Entries]
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+def test_batch_round_trip_and_legacy_format():
+    readings = make_readings(50)
+    [body] = encode_readings("bomba-01", readings)
+    decoded = decode_body(body)
+    assert [SensorData(**d).time for d in decoded] == [r["time"] for r in readings]
+    assert decoded[3]["alerts"] == readings[3]["alerts"]
+    assert decoded[10]["temperature_c"] == readings[10]["temperature_c"]
+    legacy = {k: v for k, v in readings[0].items() if k != "time"}
+    assert decode_body(json.dumps(legacy)) == [legacy]
+
+def test_large_batches_are_split_under_the_size_limit():
+    bodies = encode_readings("bomba-01", make_readings(400), max_body_bytes=4096)
+    assert len(bodies) > 1 and all(len(body) <= 4096 for body in bodies)
+    assert sum(len(decode_body(body)) for body in bodies) == 400
+
+def test_spilled_messages_are_resent_in_order(tmp_path):
+    sqs = FlakySQS()
+    uplink = Uplink(sqs, "memory://q", "bomba-01", max_readings=10, spill=SpillQueue(str(tmp_path)))
+    readings = make_readings(30)
+    for reading in readings[:20]:
+        uplink.add(reading)
+        uplink.flush_if_due()
+    assert sqs.bodies == [] and len(uplink.spill) >= 2
+    sqs.up = True
+    for reading in readings[20:]:
+        uplink.add(reading)
+        uplink.flush_if_due()
+    uplink.flush()
+    assert len(uplink.spill) == 0
+    delivered = [d["time"] for body in sqs.bodies for d in decode_body(body)]
+    assert delivered == [r["time"].isoformat() for r in readings]